@@ -10,6 +10,7 @@ Backwards compatibility is not guaranteed at this time.
 
 import asyncio
 import os
+import sys
 from dotenv import load_dotenv
 
 
@@ -31,6 +32,16 @@ async def main():
     logging.getLogger("webserver.middleware.logging_middleware").setLevel(logging.WARNING)
     logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
     
+    # Refuse to start if a configured provider's packages are missing; nothing is
+    # installed at runtime (install them with `python -m core.preflight --install`)
+    from core.preflight import verify_dependencies
+    from core.utils.dependencies import MissingDependencyError
+    try:
+        verify_dependencies()
+    except MissingDependencyError as e:
+        print(f"Startup aborted: {e}")
+        sys.exit(1)
+    
     # Initialize router
     import core.router as router
     router.init()
@@ -42,6 +53,10 @@ async def main():
     # Initialize retrieval clients
     import core.retriever as retriever
     retriever.init()
+    
+    # Load the embedding provider
+    import core.embedding as embedding
+    embedding.init()
 
     print("Starting aiohttp server...")
     from webserver.aiohttp_server import AioHTTPServer
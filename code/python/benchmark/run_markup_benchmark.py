@@ -0,0 +1,104 @@
+"""
+Benchmark for schema.org markup extraction.
+
+Measures the pages/s and peak memory of extract_markup in scraping/extractMarkup.py with
+each of its parsers: BeautifulSoup's full DOM (the previous implementation, as the baseline),
+the tag tokenizer, and selectolax when it is installed. Also checks that every parser finds
+the same canonical URL and schemas as the DOM.
+
+The corpus is a directory of saved HTML pages, such as the html directory the incremental
+crawler writes (data/<site>/html). Without one, a small built-in set of synthetic pages is used.
+
+Run from the code/python directory:
+    python benchmark/run_markup_benchmark.py [html_dir]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from scraping.extractMarkup import LexborHTMLParser, extract_markup
+
+NUM_PASSES = 5
+
+
+# ---------- Corpus ----------
+
+def sample_pages():
+    recipe = {"@context": "https://schema.org", "@type": "Recipe", "name": "Spicy Noodles",
+              "recipeIngredient": [f"ingredient {i}" for i in range(12)],
+              "recipeInstructions": [{"@type": "HowToStep", "text": "Stir. " * 10} for _ in range(6)]}
+    breadcrumbs = {"@context": "https://schema.org", "@type": "BreadcrumbList",
+                   "itemListElement": [{"@type": "ListItem", "position": i, "name": f"Level {i}"} for i in range(4)]}
+    nav = "".join(f'<li><a href="/section/{i}?a=1&amp;b=2">Section {i}</a></li>' for i in range(60))
+    body = "".join(f'<div class="card"><h2>Item {i}</h2><p>{"Some text, " * 40}</p><img src="/{i}.jpg"></div>'
+                   for i in range(150))
+    pages = []
+    for i in range(20):
+        pages.append(f"""<!DOCTYPE html>
+<html><head><title>Page {i} &lt;recipes&gt;</title>
+<link rel="stylesheet" href="/site.css"><link rel="canonical" href="https://example.com/recipes/{i}?ref=a&amp;x=1">
+<style>.card > h2 {{ color: red; }}</style>
+<script>var html = '<script type="application/ld+json">{{}}</' + 'script>'; window.dataLayer = [];</script>
+<script type="application/ld+json">{json.dumps(recipe)}</script>
+<!-- <script type="application/ld+json">{{"@type": "Commented"}}</script> -->
+</head><body><nav><ul>{nav}</ul></nav><main>{body}</main>
+<script type='application/ld+json'>{json.dumps(breadcrumbs)}</script>
+<script src="/app.js" async></script></body></html>""")
+    return pages
+
+
+def load_corpus(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.endswith((".html", ".htm")):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    return pages
+
+
+# ---------- Benchmark ----------
+
+def throughput(parser, pages):
+    start = time.perf_counter()
+    for _ in range(NUM_PASSES):
+        for page in pages:
+            extract_markup(page, parser)
+    return NUM_PASSES * len(pages) / (time.perf_counter() - start)
+
+
+def peak_memory(parser, pages):
+    """The largest peak of traced allocations while extracting from one page, in bytes."""
+    peak = 0
+    tracemalloc.start()
+    for page in pages:
+        tracemalloc.reset_peak()
+        extract_markup(page, parser)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    pages = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else sample_pages()
+    size = sum(len(page) for page in pages)
+    print(f"Extracting markup from {len(pages)} pages ({size / len(pages) / 1024:.0f}KB on average), {NUM_PASSES} passes")
+
+    parsers = ["dom", "tokenizer"] + (["selectolax"] if LexborHTMLParser is not None else [])
+    expected = [extract_markup(page, "dom") for page in pages]
+    baseline = None
+    for parser in parsers:
+        mismatches = sum(1 for page, result in zip(pages, expected) if extract_markup(page, parser) != result)
+        rate = throughput(parser, pages)
+        baseline = baseline or rate
+        # selectolax allocates its tree outside Python's allocator, so tracemalloc doesn't see it
+        peak = peak_memory(parser, pages)
+        print(f"  {parser}: {rate:,.0f} pages/s ({rate / baseline:.1f}x), peak {peak / 1024:,.0f}KB traced, "
+              f"{mismatches} pages extracted differently")
+
+
+if __name__ == "__main__":
+    main()
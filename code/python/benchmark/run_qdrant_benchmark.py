@@ -0,0 +1,114 @@
+"""
+Benchmark for Qdrant bulk loading and multi-query search.
+
+Uploads synthetic documents through QdrantVectorClient.upload_documents with one upsert
+in flight and with several, and runs a set of query vectors the old way (a collection
+check and a search request per query) and as one search_vectors_batch request.
+
+By default Qdrant runs in local mode in a temporary directory, so no server is needed.
+Local mode runs in-process, so it shows the cost of the client-side work and of the
+extra requests, but not network latency; pass --url to benchmark a Qdrant server, and
+--grpc to talk to it over gRPC.
+
+Run from the code/python directory:
+    python benchmark/run_qdrant_benchmark.py [--documents 5000] [--url http://localhost:6333] [--grpc]
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+
+from core.config import CONFIG, RetrievalProviderConfig
+from retrieval_providers.qdrant import QdrantVectorClient
+
+ENDPOINT_NAME = "qdrant_benchmark"
+VECTOR_SIZE = 384
+NUM_QUERIES = 20
+
+
+def make_documents(count, rng):
+    documents = []
+    for i in range(count):
+        url = f"https://example.com/items/{i}"
+        documents.append({
+            "id": url,
+            "url": url,
+            "name": f"Item {i}",
+            "site": f"site{i % 5}",
+            "schema_json": '{"@type": "Recipe", "name": "Item %d"}' % i,
+            "ranking_text": '{"name": ["Item %d"]}' % i,
+            "embedding": [rng.random() for _ in range(VECTOR_SIZE)],
+        })
+    return documents
+
+
+def make_client(args, path, concurrency):
+    CONFIG.retrieval_endpoints[ENDPOINT_NAME] = RetrievalProviderConfig(
+        db_type="qdrant", enabled=True, index_name="benchmark",
+        api_endpoint=args.url, database_path=None if args.url else path,
+        prefer_grpc=args.grpc, upsert_batch_size=args.batch_size, upsert_concurrency=concurrency,
+    )
+    return QdrantVectorClient(ENDPOINT_NAME)
+
+
+async def bench_upload(args, path, documents, concurrency):
+    client = make_client(args, path, concurrency)
+    await client.recreate_collection("benchmark", VECTOR_SIZE)
+    start = time.perf_counter()
+    await client.upload_documents(documents, "benchmark")
+    elapsed = time.perf_counter() - start
+    return client, len(documents) / elapsed
+
+
+async def bench_search(client, vectors):
+    qdrant = await client._get_qdrant_client()
+    start = time.perf_counter()
+    for vector in vectors:
+        await qdrant.collection_exists("benchmark")
+        await qdrant.query_points(collection_name="benchmark", query=vector, limit=50,
+                                  query_filter=client._create_site_filter("site1"), with_payload=True)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await client.search_vectors_batch(vectors, "site1", 50, "benchmark")
+    batched = time.perf_counter() - start
+    return one_by_one, batched
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--url", help="Qdrant server URL (default: local mode)")
+    parser.add_argument("--grpc", action="store_true", help="Use gRPC (server only)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = make_documents(args.documents, rng)
+    vectors = [[rng.random() for _ in range(VECTOR_SIZE)] for _ in range(NUM_QUERIES)]
+    print(f"{'Server ' + args.url if args.url else 'Local mode'}{' (gRPC)' if args.grpc else ''}, "
+          f"{args.documents} documents of dimension {VECTOR_SIZE}, batches of {args.batch_size}")
+
+    path = tempfile.mkdtemp(prefix="qdrant_benchmark_")
+    try:
+        for concurrency in sorted({1, args.concurrency}):
+            client, throughput = await bench_upload(args, path, documents, concurrency)
+            print(f"  Upload, {concurrency} upsert(s) in flight: {throughput:,.0f} documents/s")
+            # Local mode locks its storage directory, so close the client before the next run
+            await (await client._get_qdrant_client()).close()
+
+        client = make_client(args, path, args.concurrency)
+        one_by_one, batched = await bench_search(client, vectors)
+        print(f"  {NUM_QUERIES} queries one by one: {one_by_one * 1000:.1f} ms, "
+              f"in one batch: {batched * 1000:.1f} ms ({one_by_one / batched:.2f}x)")
+        await (await client._get_qdrant_client()).close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
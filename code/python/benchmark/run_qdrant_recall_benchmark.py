@@ -0,0 +1,136 @@
+"""
+Recall / latency benchmark for the Qdrant index settings (the `index` block of a Qdrant
+endpoint in config_retrieval.yaml).
+
+Loads synthetic clustered vectors spread over several sites into one collection per
+setting (no quantization, int8 with and without rescoring, binary) and runs
+site-filtered queries with a range of search_ef values. Recall@10 is measured against
+exact search on the same collection, and latency per query is reported as p50 / p95.
+
+By default Qdrant runs in local mode in a temporary directory. Local mode always does
+exact (brute-force) search and has no payload indexes or quantization, so it gives the
+exact-search baseline and checks that every setting is accepted, with recall 1.0
+throughout; run it against a server with --url to see the trade-offs. HNSW is only
+built once a segment exceeds Qdrant's indexing threshold, so use enough documents.
+
+Run from the code/python directory:
+    python benchmark/run_qdrant_recall_benchmark.py [--documents 20000] [--url http://localhost:6333]
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from qdrant_client.http import models
+
+from core.config import CONFIG, RetrievalProviderConfig, VectorIndexConfig
+from retrieval_providers.qdrant import QdrantVectorClient
+
+ENDPOINT_NAME = "qdrant_recall_benchmark"
+VECTOR_SIZE = 256
+NUM_SITES = 20
+NUM_QUERIES = 100
+TOP_K = 10
+SEARCH_EFS = [32, 64, 128, 256]
+
+SETTINGS = {
+    "full precision": VectorIndexConfig(hnsw_m=16, hnsw_ef_construct=100),
+    "int8 + rescore": VectorIndexConfig(hnsw_m=16, hnsw_ef_construct=100, quantization="int8",
+                                        quantization_rescore=True, quantization_oversampling=2.0),
+    "int8, no rescore": VectorIndexConfig(hnsw_m=16, hnsw_ef_construct=100, quantization="int8",
+                                          quantization_rescore=False),
+    "binary + rescore": VectorIndexConfig(hnsw_m=16, hnsw_ef_construct=100, quantization="binary",
+                                          quantization_rescore=True, quantization_oversampling=3.0),
+}
+
+
+def clustered_vectors(count, rng, centers):
+    vectors = []
+    for _ in range(count):
+        center = rng.choice(centers)
+        vectors.append([c + rng.gauss(0, 0.3) for c in center])
+    return vectors
+
+
+def make_client(args, path, name, index):
+    CONFIG.retrieval_endpoints[ENDPOINT_NAME] = RetrievalProviderConfig(
+        db_type="qdrant", enabled=True, index_name=name, api_endpoint=args.url,
+        database_path=None if args.url else path, index=index, upsert_concurrency=4,
+    )
+    return QdrantVectorClient(ENDPOINT_NAME)
+
+
+async def wait_until_indexed(qdrant, collection):
+    while (await qdrant.get_collection(collection)).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+
+
+async def run_queries(qdrant, collection, queries, search_params):
+    latencies = []
+    results = []
+    for vector, site in queries:
+        start = time.perf_counter()
+        response = await qdrant.query_points(
+            collection_name=collection, query=vector, limit=TOP_K, search_params=search_params,
+            query_filter=models.Filter(must=[models.FieldCondition(key="site", match=models.MatchValue(value=site))]),
+        )
+        latencies.append(time.perf_counter() - start)
+        results.append({point.id for point in response.points})
+    return results, latencies
+
+
+def recall(results, exact):
+    return statistics.mean(len(r & e) / max(1, len(e)) for r, e in zip(results, exact))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--url", help="Qdrant server URL (default: local mode)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    centers = [[rng.gauss(0, 1) for _ in range(VECTOR_SIZE)] for _ in range(50)]
+    vectors = clustered_vectors(args.documents, rng, centers)
+    documents = [{
+        "url": f"https://example.com/{i}", "name": f"Item {i}", "site": f"site{i % NUM_SITES}",
+        "schema_json": "{}", "ranking_text": "{}", "embedding": vector,
+    } for i, vector in enumerate(vectors)]
+    queries = [(vector, f"site{rng.randrange(NUM_SITES)}") for vector in clustered_vectors(NUM_QUERIES, rng, centers)]
+
+    print(f"{'Server ' + args.url if args.url else 'Local mode (exact search)'}: {args.documents} vectors of "
+          f"dimension {VECTOR_SIZE} over {NUM_SITES} sites, {NUM_QUERIES} filtered queries, recall@{TOP_K}")
+    path = tempfile.mkdtemp(prefix="qdrant_recall_benchmark_")
+    try:
+        for label, index in SETTINGS.items():
+            collection = "recall_" + label.replace(" ", "_").replace(",", "").replace("+", "plus")
+            client = make_client(args, path, collection, index)
+            await client.recreate_collection(collection, VECTOR_SIZE)
+            await client.upload_documents(documents, collection)
+            qdrant = await client._get_qdrant_client()
+            if args.url:
+                await wait_until_indexed(qdrant, collection)
+
+            exact, exact_latencies = await run_queries(qdrant, collection, queries, models.SearchParams(exact=True))
+            print(f"\n{label}  (exact search: p50 {percentile(exact_latencies, 50) * 1000:.2f} ms)")
+            for search_ef in SEARCH_EFS:
+                client.endpoint_config.index.search_ef = search_ef
+                results, latencies = await run_queries(qdrant, collection, queries, client._search_params())
+                print(f"  search_ef {search_ef:>4}: recall {recall(results, exact):.3f}, "
+                      f"p50 {percentile(latencies, 50) * 1000:.2f} ms, p95 {percentile(latencies, 95) * 1000:.2f} ms")
+            await qdrant.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Micro-benchmark for the representation of retrieval results.
+
+Runs synthetic result sets (50 results from each of 5 endpoints, with overlapping URLs)
+through aggregation and the JSON handling done by ranking and answer generation, once
+with the old [url, json_str, name, site] lists, where every stage re-parses the JSON,
+and once with RetrievedItems, which parse it once. Reports CPU time and peak memory
+per query.
+
+Run from the code/python directory:
+    python benchmark/run_result_benchmark.py
+"""
+
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from core.retriever import VectorDBClient
+from core.utils.json_utils import merge_json_array, trim_json, trim_json_hard
+
+NUM_ENDPOINTS = 5
+RESULTS_PER_ENDPOINT = 50
+NUM_QUERIES = 200
+
+
+def make_recipe(i):
+    return {
+        "@type": "Recipe",
+        "name": f"Recipe {i}",
+        "url": f"https://example.com/recipes/{i}",
+        "description": "A hearty dish. " * 20,
+        "recipeIngredient": [f"{n} cups of ingredient {n}" for n in range(15)],
+        "recipeInstructions": [{"@type": "HowToStep", "text": "Stir and simmer. " * 5} for _ in range(8)],
+        "author": {"@type": "Person", "name": "A. Cook"},
+        "publisher": {"@type": "Organization", "name": "Example"},
+        "image": [f"https://example.com/img/{i}/{n}.jpg" for n in range(4)],
+        "nutrition": {"@type": "NutritionInformation", "calories": "420 kcal"},
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": 4.5, "ratingCount": 120},
+    }
+
+
+def make_endpoint_results(seed):
+    """Results for one query. Endpoints draw from a shared pool, so many URLs are returned more than once."""
+    rng = random.Random(seed)
+    pool = [make_recipe(i) for i in range(RESULTS_PER_ENDPOINT * 2)]
+    endpoint_results = {}
+    for e in range(NUM_ENDPOINTS):
+        picks = rng.sample(pool, RESULTS_PER_ENDPOINT)
+        endpoint_results[f"endpoint_{e}"] = [
+            [p["url"], json.dumps(p), p["name"], "example"] for p in picks
+        ]
+    return endpoint_results
+
+
+def legacy_aggregate(endpoint_results):
+    """Aggregation as it was done on lists: merged JSON is parsed and re-serialized."""
+    url_to_data = {}
+    for results in endpoint_results.values():
+        for url, json_str, name, site in results:
+            data = url_to_data.setdefault(url, {"json_list": [], "name": name, "site": site})
+            data["json_list"].append(json_str)
+    final_results = []
+    seen_urls = set()
+    iterators = [iter(results) for results in endpoint_results.values()]
+    while iterators:
+        for iterator in list(iterators):
+            result = next(iterator, None)
+            if result is None:
+                iterators.remove(iterator)
+                continue
+            url = result[0]
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            data = url_to_data[url]
+            json_list = data["json_list"]
+            json_str = json.dumps(merge_json_array(json_list)) if len(json_list) > 1 else json_list[0]
+            final_results.append([url, json_str, data["name"], data["site"]])
+    return final_results
+
+
+def legacy_query(endpoint_results):
+    results = legacy_aggregate(endpoint_results)
+    answers = []
+    for url, json_str, name, site in results:
+        trim_json(json_str)  # Ranking prompt
+        trim_json_hard(json_str)  # GenerateAnswer ranking prompt
+        answers.append(json.loads(json_str))  # Ranking schema_object
+        answers.append(json.loads(json_str))  # GenerateAnswer schema_object
+    return answers
+
+
+def item_query(client, endpoint_results):
+    results = client._aggregate_results(endpoint_results)
+    answers = []
+    for item in results:
+        trim_json(item.schema)
+        trim_json_hard(item.schema)
+        answers.append(item.schema_object)
+        answers.append(item.schema)
+    return answers
+
+
+def measure(run, inputs):
+    times = []
+    peaks = []
+    for endpoint_results in inputs:
+        tracemalloc.start()
+        run(endpoint_results)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    for endpoint_results in inputs:
+        start = time.perf_counter()
+        run(endpoint_results)
+        times.append(time.perf_counter() - start)
+    return times, peaks
+
+
+def main():
+    client = VectorDBClient.__new__(VectorDBClient)
+    inputs = [make_endpoint_results(seed) for seed in range(NUM_QUERIES)]
+    print(f"{NUM_QUERIES} queries, {NUM_ENDPOINTS} endpoints x {RESULTS_PER_ENDPOINT} results each")
+
+    for label, run in [("lists", legacy_query), ("RetrievedItem", lambda r: item_query(client, r))]:
+        times, peaks = measure(run, inputs)
+        print(f"{label}:")
+        print(f"  CPU per query: mean {statistics.mean(times) * 1000:.2f} ms, median {statistics.median(times) * 1000:.2f} ms")
+        print(f"  Peak memory per query: {statistics.mean(peaks) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import asyncio
 import time
 from config.config import CONFIG
 from core.baseHandler import NLWebHandler
+from core.llm import llm_call_counts
 import dotenv
 import statistics
 import json
@@ -24,12 +25,13 @@ def load_conversations(path):
 # Configuration
 RUN_SINGLE_TURN = True                  # Whether to run single-turn benchmark
 RUN_MULTI_TURN = True                   # Whether to run multi-turn benchmark
+RUN_PROFILES = True                     # Whether to compare execution profiles (full/balanced/economy)
 
 # Load conversations
 MULTITURN_CONVERSATIONS = load_conversations("./benchmark/data/conversations.jsonl")
 
 
-async def single_turn(query, generate_mode, streaming, query_id):
+async def single_turn(query, generate_mode, streaming, query_id, profile=None):
     """Run a single turn and return result, elapsed time, and error."""
     site = "scifi_movies"
     query_params = {
@@ -39,6 +41,8 @@ async def single_turn(query, generate_mode, streaming, query_id):
         "generate_mode": [generate_mode],
         "query_id": [query_id]
     }
+    if profile:
+        query_params["profile"] = [profile]
     handler = NLWebHandler(query_params, http_handler=None)
     start = time.time()
     try:
@@ -143,6 +147,52 @@ async def run_single_turn_benchmark(generate_mode, streaming, num_runs=1):
         all_results.extend(results)
     return all_results
 
+async def run_profile_benchmark(generate_mode, streaming, num_runs=1):
+    """Run the single-turn queries under each execution profile, recording latency and LLM calls."""
+    all_results = []
+    for profile in CONFIG.nlweb.execution_profiles:
+        print(f"\n=== Benchmarking profile: {profile} ===")
+        for conversation in MULTITURN_CONVERSATIONS:
+            query = conversation[0]
+            for i in range(num_runs):
+                query_id = f"benchmark_{profile}_{query}_{i}"
+                calls_before = llm_call_counts()
+                result, elapsed, error = await single_turn(query, generate_mode, streaming, query_id, profile)
+                calls_after = llm_call_counts()
+                llm_calls = {level: calls_after.get(level, 0) - calls_before.get(level, 0) for level in calls_after}
+                if error is None:
+                    print(f"    {query} run {i+1}: {elapsed:.3f} seconds, LLM calls: {llm_calls}")
+                else:
+                    print(f"    {query} run {i+1}: ERROR - {error}")
+                all_results.append({
+                    'profile': profile,
+                    'query': query,
+                    'provider': CONFIG.preferred_llm_endpoint,
+                    'elapsed': elapsed,
+                    'error': error,
+                    'llm_calls': llm_calls
+                })
+    return all_results
+
+def print_profile_stats(profile_results):
+    """Print latency and LLM call (cost) stats for each execution profile."""
+    from collections import defaultdict
+    by_profile = defaultdict(list)
+    for r in profile_results:
+        if r['error'] is None:
+            by_profile[r['profile']].append(r)
+    print("\n=== Latency and Cost by Execution Profile ===")
+    for profile, results in by_profile.items():
+        times = sorted(r['elapsed'] for r in results)
+        p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+        print(f"Profile: {profile}")
+        print(f"  Mean: {statistics.mean(times):.3f} s")
+        print(f"  Median: {statistics.median(times):.3f} s")
+        print(f"  p95: {p95:.3f} s")
+        for level in ("high", "low"):
+            calls = [r['llm_calls'].get(level, 0) for r in results]
+            print(f"  {level.capitalize()} tier LLM calls per query: {statistics.mean(calls):.1f}")
+
 async def run_multiturn_benchmark(generate_mode, streaming):
     """Run multi-turn benchmark and return results."""
     multiturn_results = []
@@ -275,6 +325,19 @@ async def run_benchmark():
             title='Single-turn Benchmark Timing by Provider',
             filename=f"./benchmark/benchmark_results/single_turn_benchmark_{CONFIG.preferred_llm_endpoint}.png"
         )
+    if RUN_PROFILES:
+        profile_results = await run_profile_benchmark(generate_mode, streaming, num_runs)
+        with open('./benchmark/benchmark_results/profile_results.json', 'w') as f:
+            json.dump(profile_results, f, indent=2)
+        print_profile_stats(profile_results)
+        plot_results(
+            [
+                {'provider': r['profile'], 'elapsed': r['elapsed']}
+                for r in profile_results if r['error'] is None
+            ],
+            title='Single-turn Benchmark Timing by Execution Profile',
+            filename=f"./benchmark/benchmark_results/profile_benchmark_{CONFIG.preferred_llm_endpoint}.png"
+        )
     if RUN_MULTI_TURN:
         multiturn_results = await run_multiturn_benchmark(generate_mode, streaming)
         with open('./benchmark/benchmark_results/multiturn_results.json', 'w') as f:
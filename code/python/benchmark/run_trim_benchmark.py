@@ -0,0 +1,154 @@
+"""
+Benchmark for trim_json / trim_json_hard.
+
+Compares the per-@type trimming plans in core/utils/json_utils.py with the previous
+implementation, which re-derived what to drop on every call, and checks that both give
+the same output.
+
+The corpus is a file of schema.org items, either in the data loading format (one
+url<TAB>json[<TAB>embedding] line per page) or one JSON document per line. Without one,
+a small built-in sample of recipes, movies, products and other items is used.
+
+Run from the code/python directory:
+    python benchmark/run_trim_benchmark.py [corpus_file]
+"""
+
+import json
+import sys
+import time
+
+from core.utils.json_utils import collateObjAttr, jsonify, trim_json, trim_json_hard
+
+NUM_PASSES = 20
+
+
+# ---------- Previous implementation, as the baseline ----------
+
+def legacy_trim_json(obj, hard=False):
+    obj = jsonify(obj)
+    objType = obj["@type"] if "@type" in obj else ["Thing"]
+    if not isinstance(objType, list):
+        objType = [objType]
+    if (objType == ["Thing"]):
+        return obj
+    if ("Recipe" in objType):
+        return legacy_trim_recipe(obj, hard)
+    if ("Movie" in objType or "TVSeries" in objType):
+        return legacy_trim_movie(obj, hard)
+    return obj
+
+
+def legacy_trim_recipe(obj, hard):
+    items = collateObjAttr(obj)
+    js = {}
+    skipAttrs = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "author"]
+    if (hard):
+        skipAttrs.extend(["review", "recipeYield", "recipeInstructions", "nutrition"])
+    for attr in items.keys():
+        if (attr in skipAttrs):
+            continue
+        js[attr] = items[attr]
+    return js
+
+
+def legacy_trim_movie(obj, hard):
+    items = collateObjAttr(obj)
+    js = {}
+    skipAttrs = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "author", "trailer"]
+    if (hard):
+        skipAttrs.extend(["actor", "director", "creator", "review"])
+    for attr in items.keys():
+        if (attr in skipAttrs):
+            continue
+        elif (attr == "actor" or attr == "director" or attr == "creator"):
+            if ("name" in items[attr]):
+                if (attr not in js):
+                    js[attr] = []
+                js[attr].append(items[attr]["name"])
+        elif (attr == "review"):
+            continue
+        else:
+            js[attr] = items[attr]
+    return js
+
+
+# ---------- Corpus ----------
+
+def sample_items():
+    recipe = {
+        "@type": "Recipe", "name": "Spicy Noodles", "description": "Quick weeknight noodles. " * 10,
+        "author": {"@type": "Person", "name": "A. Cook"}, "publisher": {"@type": "Organization", "name": "Example"},
+        "image": ["https://example.com/1.jpg", "https://example.com/2.jpg"], "datePublished": "2024-01-01",
+        "recipeIngredient": [f"ingredient {i}" for i in range(12)],
+        "recipeInstructions": [{"@type": "HowToStep", "text": "Stir. " * 10} for _ in range(6)],
+        "nutrition": {"@type": "NutritionInformation", "calories": "420 kcal"}, "recipeYield": "4",
+        "review": [{"@type": "Review", "reviewBody": "Great! " * 20} for _ in range(3)],
+    }
+    movie = {
+        "@type": "Movie", "name": "Space Odyssey", "description": "A voyage. " * 15, "datePublished": "1968",
+        "actor": [{"@type": "Person", "name": f"Actor {i}"} for i in range(10)],
+        "director": {"@type": "Person", "name": "A. Director"}, "genre": ["Science Fiction"],
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": 8.3},
+        "trailer": {"@type": "VideoObject", "embedUrl": "https://example.com/trailer"},
+    }
+    series = dict(movie, **{"@type": "TVSeries", "name": "Space Station", "numberOfSeasons": 3})
+    product = {
+        "@type": "Product", "name": "Trail Shoe", "description": "Grippy. " * 10, "brand": {"@type": "Brand", "name": "X"},
+        "offers": {"@type": "Offer", "price": "120.00", "priceCurrency": "USD"}, "image": "https://example.com/shoe.jpg",
+    }
+    event = {"@type": "Event", "name": "Food Fair", "startDate": "2024-06-01", "location": {"@type": "Place", "name": "Park"}}
+    return [recipe, movie, series, product, event, {"@type": ["Recipe", "HowTo"], **{k: v for k, v in recipe.items() if k != "@type"}}]
+
+
+def flatten(schema):
+    if isinstance(schema, list):
+        for item in schema:
+            yield from flatten(item)
+    elif isinstance(schema, dict) and "@graph" in schema:
+        yield from flatten(schema["@graph"])
+    elif isinstance(schema, dict):
+        yield schema
+
+
+def load_corpus(path):
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split("\t")
+            text = parts[1] if len(parts) > 1 else parts[0]
+            try:
+                items.extend(flatten(json.loads(text)))
+            except json.JSONDecodeError:
+                continue
+    return items
+
+
+# ---------- Benchmark ----------
+
+def throughput(trim, texts):
+    start = time.perf_counter()
+    for _ in range(NUM_PASSES):
+        for text in texts:
+            trim(text)
+    return NUM_PASSES * len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    items = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else sample_items() * 500
+    texts = [json.dumps(item) for item in items]
+    print(f"Trimming {len(items)} items, {NUM_PASSES} passes")
+
+    for hard in (False, True):
+        mismatches = sum(1 for item in items if legacy_trim_json(item, hard) != (trim_json_hard if hard else trim_json)(item))
+        print(f"\ntrim_json{'_hard' if hard else ''}: {mismatches} items trimmed differently")
+        for label, source in (("parsed objects", items), ("JSON strings", texts)):
+            legacy = throughput(lambda obj: legacy_trim_json(obj, hard), source)
+            planned = throughput(trim_json_hard if hard else trim_json, source)
+            print(f"  {label}: {legacy:,.0f} -> {planned:,.0f} items/s ({planned / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
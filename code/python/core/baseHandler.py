@@ -10,7 +10,6 @@ Backwards compatibility is not guaranteed at this time.
 
 from core.retriever import search
 import asyncio
-import importlib
 import core.query_analysis.decontextualize as decontextualize
 import core.query_analysis.analyze_query as analyze_query
 import core.query_analysis.memory as memory   
@@ -24,6 +23,8 @@ import core.router as router
 import methods.accompaniment as accompaniment
 import methods.recipe_substitution as substitution
 from core.state import NLWebHandlerState
+from core.utils.stage_graph import StageGraph
+from core.utils.cancellation import CancellationToken
 from core.utils.utils import get_param, siteToItemType, log
 from misc.logger.logger import get_logger, LogLevel
 from misc.logger.logging_config_helper import get_configured_logger
@@ -91,6 +92,14 @@ class NLWebHandler:
         # should we just list the results or try to summarize the results or use the results to generate an answer
         # Valid values are "none","summarize" and "generate"
         self.generate_mode = get_param(query_params, "generate_mode", str, "none")
+
+        # the execution profile (e.g. full, balanced, economy) decides which pre-checks run,
+        # how many items are ranked, which LLM tier is used and whether to summarize.
+        # Chosen by the "profile" param, or by admission control when the server is overloaded.
+        self.profile_name, self.profile = CONFIG.get_execution_profile(get_param(query_params, "profile", str, None))
+        self.num_retrieval_results = self.profile.num_results
+        if not self.profile.summarize and self.generate_mode == "summarize":
+            self.generate_mode = "none"
         # the items that have been retrieved from the vector database, could be before decontextualization.
         # See below notes on fasttrack
         self.retrieved_items = []
@@ -104,7 +113,9 @@ class NLWebHandler:
         self.final_ranked_answers = []
 
         # whether the query has been done. Can happen if it is determined that we don't have enough
-        # information to answer the query, or if the query is irrelevant.
+        # information to answer the query, or if the query is irrelevant. Setting it also sets
+        # query_done_event, which cancels pre-check work that is no longer needed.
+        self.query_done_event = asyncio.Event()
         self.query_done = False
 
         # whether the query is irrelevant. e.g., how many angels on a pinhead asked of seriouseats.com
@@ -132,10 +143,15 @@ class NLWebHandler:
         self.connection_alive_event = asyncio.Event()
         self.connection_alive_event.set()  # Initially alive
         self.abort_fast_track_event = asyncio.Event()
+        # Cancelled when the client goes away; the http handler owns it when it can detect disconnects
+        self.cancellation_token = getattr(http_handler, "cancellation_token", None) or CancellationToken()
+        self.cancellation_token.add_callback(lambda reason: self.connection_alive_event.clear())
         self._state_lock = asyncio.Lock()
         self._send_lock = asyncio.Lock()
         
         self.fastTrackRanker = None
+        # the pre-check stages of this request, with their timings and critical path
+        self.stage_graph = None
         self.headersSent = False  # Track if headers have been sent
         self.fastTrackWorked = False
         self.sites_in_embeddings_sent = False
@@ -151,7 +167,7 @@ class NLWebHandler:
         logger.info(f"NLWebHandler initialized with parameters:")
         logger.debug(f"site: {self.site}, query: {self.query}")
         logger.debug(f"model: {self.model}, streaming: {self.streaming}")
-        logger.debug(f"generate_mode: {self.generate_mode}, query_id: {self.query_id}")
+        logger.debug(f"generate_mode: {self.generate_mode}, query_id: {self.query_id}, profile: {self.profile_name}")
         logger.debug(f"context_url: {self.context_url}")
         logger.debug(f"Previous queries: {self.prev_queries}")
         logger.debug(f"Last answers: {self.last_answers}")
@@ -169,6 +185,23 @@ class NLWebHandler:
         else:
             self.connection_alive_event.clear()
 
+    def llm_level(self, level):
+        """The model tier to use for a prompt that asks for `level`, as capped by the execution profile."""
+        if self.profile.max_llm_level == "low":
+            return "low"
+        return level
+
+    @property
+    def query_done(self):
+        return self.query_done_event.is_set()
+
+    @query_done.setter
+    def query_done(self, value):
+        if value:
+            self.query_done_event.set()
+        else:
+            self.query_done_event.clear()
+
    
 
     async def send_message(self, message):
@@ -366,31 +399,26 @@ class NLWebHandler:
     
     async def prepare(self):
         logger.info("Starting preparation phase")
-        tasks = []
+        fast_track = fastTrack.FastTrack(self)
         
-        logger.debug("Creating preparation tasks")
-        tasks.append(asyncio.create_task(fastTrack.FastTrack(self).do()))
-        tasks.append(asyncio.create_task(analyze_query.DetectItemType(self).do()))
-        tasks.append(asyncio.create_task(analyze_query.DetectMultiItemTypeQuery(self).do()))
-        tasks.append(asyncio.create_task(analyze_query.DetectQueryType(self).do()))
-        tasks.append(asyncio.create_task(self.decontextualizeQuery().do()))
-        tasks.append(asyncio.create_task(relevance_detection.RelevanceDetection(self).do()))
-        tasks.append(asyncio.create_task(memory.Memory(self).do()))
-        tasks.append(asyncio.create_task(required_info.RequiredInfo(self).do()))
-        tasks.append(asyncio.create_task(router.ToolSelector(self).do()))
+        logger.debug("Declaring preparation stages")
+        graph = StageGraph("prepare", stop_event=self.query_done_event)
+        # Relevance and required info checks are the ones that can end the query early,
+        # so they are never cancelled; everything else is wasted work once they do.
+        graph.add("Decon", self.decontextualizeQuery().do, abort_on_stop=True)
+        self.add_pre_check(graph, "Relevance", relevance_detection.RelevanceDetection)
+        self.add_pre_check(graph, "RequiredInfo", required_info.RequiredInfo)
+        self.add_pre_check(graph, "Memory", memory.Memory)
+        self.add_pre_check(graph, "DetectItemType", analyze_query.DetectItemType, abort_on_stop=True)
+        self.add_pre_check(graph, "DetectMultiItemTypeQuery", analyze_query.DetectMultiItemTypeQuery, abort_on_stop=True)
+        self.add_pre_check(graph, "DetectQueryType", analyze_query.DetectQueryType, abort_on_stop=True)
+        self.add_pre_check(graph, "ToolSelector", router.ToolSelector, depends_on=["Decon"], abort_on_stop=True)
+        graph.add("FastTrackRetrieval", fast_track.retrieve, abort_on_stop=True)
+        graph.add("FastTrackRanking", fast_track.rank, depends_on=["FastTrackRetrieval", "Decon"],
+                  wait_timeout=fastTrack.FastTrack.DECON_WAIT_TIMEOUT, abort_on_stop=True)
         
         try:
-            logger.debug(f"Running {len(tasks)} preparation tasks concurrently")
-            if CONFIG.should_raise_exceptions():
-                # In testing/development mode, raise exceptions to fail tests properly
-                await asyncio.gather(*tasks)
-            else:
-                # In production mode, catch exceptions to avoid crashing
-                await asyncio.gather(*tasks, return_exceptions=True)
-        except Exception as e:
-            logger.exception(f"Error during preparation tasks: {e}")
-            if CONFIG.should_raise_exceptions():
-                raise  # Re-raise in testing/development mode
+            await self.run_stage_graph(graph, pre_checks=[name for name in graph.stages if not name.startswith("FastTrack")])
         finally:
             self.pre_checks_done_event.set()  # Signal completion regardless of errors
             self.state.set_pre_checks_done()
@@ -408,6 +436,7 @@ class NLWebHandler:
                 items = await search(
                     self.decontextualized_query, 
                     self.site,
+                    num_results=self.num_retrieval_results,
                     query_params=self.query_params,
                     handler=self
                 )
@@ -417,6 +446,46 @@ class NLWebHandler:
         
         logger.info("Preparation phase completed")
 
+    def add_pre_check(self, graph, name, step_class, **kwargs):
+        """Add an optional pre-check stage, if the execution profile runs it."""
+        if name in self.profile.pre_checks:
+            graph.add(name, step_class(self).do, **kwargs)
+
+    async def run_stage_graph(self, graph, pre_checks, raise_errors=None):
+        """
+        Run the preparation stages and log their timings and critical path.
+
+        pre_checks_done_event is set as soon as the stages named in pre_checks have finished,
+        however they finished, so that ranking never waits on a stage that was cancelled
+        or timed out.
+        """
+        if raise_errors is None:
+            raise_errors = CONFIG.should_raise_exceptions()
+        for name, timeout in CONFIG.nlweb.stage_timeouts.items():
+            if name in graph.stages:
+                graph.stages[name].timeout = timeout
+        self.stage_graph = graph
+
+        async def signal_pre_checks_done():
+            await graph.wait(pre_checks)
+            self.state.set_pre_checks_done()
+
+        signal = asyncio.create_task(signal_pre_checks_done())
+        logger.debug(f"Running {len(graph.stages)} preparation stages")
+        try:
+            await graph.run(raise_errors=raise_errors)
+        except Exception as e:
+            logger.exception(f"Error during preparation tasks: {e}")
+            if raise_errors:
+                raise  # Re-raise in testing/development mode
+        finally:
+            signal.cancel()
+            logger.log_with_context(
+                LogLevel.INFO,
+                f"Preparation critical path: {' -> '.join(graph.critical_path())}",
+                {"query_id": self.query_id, "stages": graph.timings()}
+            )
+
     def decontextualizeQuery(self):
         logger.info("Determining decontextualization strategy")
         if (len(self.prev_queries) < 1):
@@ -475,10 +544,8 @@ class NLWebHandler:
                     self.final_retrieved_items = []
                     self.retrieved_items = []
                 
-                # Dynamic import of handler module and class
-                module_path, class_name = tool.handler_class.rsplit('.', 1)
-                module = importlib.import_module(module_path)
-                handler_class = getattr(module, class_name)
+                # Handler classes are resolved once, when the tool registry is built
+                handler_class = router.get_registry().handler_for(tool)
                 
                 # Instantiate and execute handler
                 handler_instance = handler_class(params, self)
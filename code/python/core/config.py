@@ -13,7 +13,7 @@ import yaml
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("config")
@@ -36,6 +36,19 @@ class LLMProviderConfig:
     endpoint: Optional[str] = None
     api_version: Optional[str] = None
 
+@dataclass
+class LLMFailoverConfig:
+    chain: List[str] = field(default_factory=list)  # Endpoints to fall back to, in order, after the preferred one
+    hedge_delay: Optional[float] = None  # Seconds before also trying the next endpoint; None only fails over on errors
+
+@dataclass
+class LLMConnectionPoolConfig:
+    max_connections: int = 100  # Upper bound on open connections per provider client
+    max_keepalive_connections: int = 20  # Idle connections kept open for reuse
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept before closing
+    http2: bool = False  # Multiplex requests over HTTP/2 where the server supports it
+    connect_timeout: float = 10.0  # Seconds allowed for establishing a connection
+
 @dataclass
 class EmbeddingProviderConfig:
     api_key: Optional[str] = None
@@ -44,6 +57,19 @@ class EmbeddingProviderConfig:
     model: Optional[str] = None
     config: Optional[Dict[str, Any]] = None
 
+@dataclass
+class VectorIndexConfig:
+    payload_indexes: List[str] = field(default_factory=lambda: ["site", "url"])  # Fields filtered on, indexed as keywords
+    hnsw_m: Optional[int] = None  # Edges per node in the HNSW graph (backend default if unset)
+    hnsw_ef_construct: Optional[int] = None  # Candidate list size while building the HNSW graph
+    search_ef: Optional[int] = None  # Candidate list size while searching; higher is slower but more accurate
+    quantization: Optional[str] = None  # "int8" (scalar) or "binary" to keep compressed vectors in RAM, or None
+    quantization_rescore: bool = True  # Re-score the top candidates with the full-precision vectors
+    quantization_oversampling: Optional[float] = None  # Fetch this many times the limit before rescoring
+    method: str = "hnsw"  # Postgres: vector index type, "hnsw" or "ivfflat"
+    ivfflat_lists: Optional[int] = None  # Postgres: IVFFlat clusters (rows / 1000, or sqrt(rows) above 1M rows, if unset)
+    ivfflat_probes: Optional[int] = None  # Postgres: IVFFlat clusters searched per query; higher is slower but more accurate
+
 @dataclass
 class RetrievalProviderConfig:
     api_key: Optional[str] = None
@@ -56,6 +82,53 @@ class RetrievalProviderConfig:
     use_knn: Optional[bool] = None
     enabled: bool = False
     vector_type: Optional[str] = None
+    timeout: Optional[float] = None  # Per-endpoint latency budget in seconds
+    replicas: List[str] = field(default_factory=list)  # Endpoints holding the same data, used for hedged requests
+    prefer_grpc: bool = False  # Qdrant: talk to the server over gRPC instead of REST
+    grpc_port: Optional[int] = None  # Qdrant: gRPC port, if not the default 6334
+    upsert_batch_size: int = 100  # Points per upsert request when uploading documents
+    upsert_concurrency: int = 4  # Upsert requests in flight at once when uploading documents
+    index: VectorIndexConfig = field(default_factory=VectorIndexConfig)  # Payload indexes, HNSW and quantization settings
+    pool_min_size: int = 1  # Postgres: connections kept open in the pool
+    pool_max_size: int = 10  # Postgres: connections the pool opens at most
+    prepare_statements: bool = True  # Postgres: use server-side prepared statements (turn off behind PgBouncer in transaction mode)
+
+@dataclass
+class ShardConfig:
+    endpoint: str  # Retrieval endpoint holding the shard
+    collection: Optional[str] = None  # Collection (or index) on the endpoint; the endpoint's index_name if unset
+
+@dataclass
+class ShardingConfig:
+    enabled: bool = False
+    shards: Dict[str, ShardConfig] = field(default_factory=dict)
+    routes: Dict[str, str] = field(default_factory=dict)  # Site, or fnmatch pattern for a group of sites -> shard
+    default_shard: Optional[str] = None  # Shard for sites without a route
+    state_file: Optional[str] = None  # Routes changed by site migrations, shared by all processes
+    reload_interval: float = 5.0  # Seconds between checks of the state file for changes
+
+@dataclass
+class RetrievalFanOutConfig:
+    deadline: Optional[float] = 3.0  # Return whatever results are available after this many seconds
+    endpoint_timeout: float = 10.0  # Default per-endpoint budget when an endpoint does not set its own
+    late_results_enabled: bool = True  # Feed results that arrive after the deadline into ranking as a second wave
+    hedge_enabled: bool = True  # Send a duplicate request to a replica when the primary is slow
+    hedge_percentile: float = 95.0  # Percentile of recent endpoint latency used as the hedge delay
+    hedge_default_delay: float = 1.0  # Hedge delay used until enough latency samples are collected
+    hedge_min_delay: float = 0.05  # Lower bound on the hedge delay
+
+@dataclass
+class CircuitBreakerConfig:
+    enabled: bool = True
+    window_size: int = 20  # Number of recent calls considered when computing error and slow-call rates
+    min_calls: int = 5  # Calls needed in the window before the breaker can open
+    failure_rate_threshold: float = 0.5  # Open when this fraction of recent calls failed
+    slow_call_threshold: float = 8.0  # Calls slower than this many seconds count as slow
+    slow_call_rate_threshold: float = 0.8  # Open when this fraction of recent calls were slow
+    open_duration: float = 30.0  # Seconds an open breaker rejects calls before allowing a trial
+    half_open_max_calls: int = 1  # Trial calls allowed while half-open
+    probe_interval: float = 10.0  # Seconds between background probes of half-open endpoints
+    probe_timeout: float = 5.0  # Latency budget for a single probe
 
 
 @dataclass
@@ -123,6 +196,18 @@ class ServerConfig:
     logging: Optional[LoggingConfig] = None
     static: Optional[StaticConfig] = None
 
+# Pre-check stages that an execution profile can switch off. Decontextualization and
+# fast track always run.
+OPTIONAL_PRE_CHECKS = ["Relevance", "RequiredInfo", "Memory", "DetectItemType",
+                       "DetectMultiItemTypeQuery", "DetectQueryType", "ToolSelector"]
+
+@dataclass
+class ExecutionProfileConfig:
+    pre_checks: List[str] = field(default_factory=lambda: list(OPTIONAL_PRE_CHECKS))  # Optional pre-checks to run
+    num_results: int = 50  # Number of items retrieved and ranked
+    max_llm_level: str = "high"  # "low" runs every prompt on the low model tier
+    summarize: bool = True  # Whether generate_mode=summarize is honoured
+
 @dataclass
 class NLWebConfig:
     sites: List[str]  # List of allowed sites
@@ -137,6 +222,11 @@ class NLWebConfig:
     decontextualize_enabled: bool = True  # Enable or disable decontextualization
     required_info_enabled: bool = True  # Enable or disable required info checking
     api_keys: Dict[str, str] = field(default_factory=dict)  # API keys for external services
+    stage_timeouts: Dict[str, float] = field(default_factory=dict)  # Per-stage timeouts (seconds) for request preparation
+    execution_profiles: Dict[str, ExecutionProfileConfig] = field(default_factory=lambda: {"full": ExecutionProfileConfig()})
+    default_execution_profile: str = "full"  # Profile used when a request doesn't name one
+    tokenizer: str = "tiktoken"  # Tokenizer for token budgets: "tiktoken" (if installed) or "estimate"
+    prompt_token_budgets: Dict[str, int] = field(default_factory=dict)  # Max tokens per prompt variable
 
 @dataclass
 class ConversationStorageConfig:
@@ -303,6 +393,33 @@ class AppConfig:
                     api_version=api_version
                 )
 
+            self.llm_circuit_breaker = self._load_circuit_breaker_config(data.get("circuit_breaker"))
+
+            pool_data = data.get("connection_pool") or {}
+            pool_defaults = LLMConnectionPoolConfig()
+            self.llm_connection_pool = LLMConnectionPoolConfig(**{
+                name: pool_data.get(name, getattr(pool_defaults, name))
+                for name in LLMConnectionPoolConfig.__dataclass_fields__
+            })
+
+            # Per-level failover chains and hedging
+            self.llm_failover: Dict[str, LLMFailoverConfig] = {}
+            for level, cfg in (data.get("failover") or {}).items():
+                cfg = cfg or {}
+                self.llm_failover[level] = LLMFailoverConfig(
+                    chain=cfg.get("chain") or [],
+                    hedge_delay=cfg.get("hedge_delay")
+                )
+
+    def _load_circuit_breaker_config(self, data: Optional[Dict[str, Any]]) -> CircuitBreakerConfig:
+        """Build a CircuitBreakerConfig from a `circuit_breaker` YAML block, using defaults for missing keys."""
+        data = data or {}
+        defaults = CircuitBreakerConfig()
+        return CircuitBreakerConfig(**{
+            name: data.get(name, getattr(defaults, name))
+            for name in CircuitBreakerConfig.__dataclass_fields__
+        })
+
     def load_embedding_config(self, path: str = "config_embedding.yaml"):
         """Load embedding model configuration."""
         # Build the full path to the config file using the config directory
@@ -373,8 +490,44 @@ class AppConfig:
                 db_type=self._get_config_value(cfg.get("db_type")),  # Add db_type
                 enabled=cfg.get("enabled", False),  # Add enabled field
                 use_knn=cfg.get("use_knn"),
-                vector_type=cfg.get("vector_type")
+                vector_type=cfg.get("vector_type"),
+                timeout=cfg.get("timeout"),
+                replicas=cfg.get("replicas") or [],
+                prefer_grpc=cfg.get("prefer_grpc", False),
+                grpc_port=cfg.get("grpc_port"),
+                upsert_batch_size=cfg.get("upsert_batch_size", 100),
+                upsert_concurrency=cfg.get("upsert_concurrency", 4),
+                index=VectorIndexConfig(**(cfg.get("index") or {})),
+                pool_min_size=cfg.get("pool_min_size", 1),
+                pool_max_size=cfg.get("pool_max_size", 10),
+                prepare_statements=cfg.get("prepare_statements", True)
             )
+
+        # Fan-out settings: deadlines, per-endpoint budgets and hedging
+        fan_out_data = data.get("fan_out", {}) or {}
+        defaults = RetrievalFanOutConfig()
+        self.retrieval_fan_out = RetrievalFanOutConfig(
+            deadline=fan_out_data.get("deadline", defaults.deadline),
+            endpoint_timeout=fan_out_data.get("endpoint_timeout", defaults.endpoint_timeout),
+            late_results_enabled=fan_out_data.get("late_results_enabled", defaults.late_results_enabled),
+            hedge_enabled=fan_out_data.get("hedge_enabled", defaults.hedge_enabled),
+            hedge_percentile=fan_out_data.get("hedge_percentile", defaults.hedge_percentile),
+            hedge_default_delay=fan_out_data.get("hedge_default_delay", defaults.hedge_default_delay),
+            hedge_min_delay=fan_out_data.get("hedge_min_delay", defaults.hedge_min_delay)
+        )
+        
+        self.retrieval_circuit_breaker = self._load_circuit_breaker_config(data.get("circuit_breaker"))
+
+        # Site sharding: routing table from sites to shards (endpoint + collection)
+        sharding_data = data.get("sharding", {}) or {}
+        self.sharding = ShardingConfig(
+            enabled=sharding_data.get("enabled", False),
+            shards={name: ShardConfig(**shard) for name, shard in (sharding_data.get("shards") or {}).items()},
+            routes={str(site): shard for site, shard in (sharding_data.get("routes") or {}).items()},
+            default_shard=sharding_data.get("default_shard"),
+            state_file=self._resolve_path(sharding_data.get("state_file", "shard_routes.json")),
+            reload_interval=sharding_data.get("reload_interval", 5.0)
+        )
     
     def load_webserver_config(self, path: str = "config_webserver.yaml"):
         # Build the full path to the config file using the config directory
@@ -514,6 +667,25 @@ class AppConfig:
                 api_keys[key] = resolved_value
                 print(f"Loaded API key '{key}': {'*' * 10 if resolved_value else 'Not set'} (from {value})")
         
+        # Load per-stage preparation timeouts
+        stage_timeouts = {name: float(value) for name, value in (data.get("stage_timeouts") or {}).items()}
+        
+        # Load execution profiles (full/balanced/economy, ...)
+        profiles_data = data.get("execution_profiles") or {}
+        execution_profiles = {
+            name: ExecutionProfileConfig(**{
+                key: (profile_data or {}).get(key, getattr(ExecutionProfileConfig(), key))
+                for key in ExecutionProfileConfig.__dataclass_fields__
+            })
+            for name, profile_data in (profiles_data.get("profiles") or {}).items()
+        } or {"full": ExecutionProfileConfig()}
+        default_execution_profile = profiles_data.get("default", next(iter(execution_profiles)))
+        
+        # Load token budgets for prompt variables
+        budgets_data = data.get("prompt_budgets") or {}
+        tokenizer = budgets_data.get("tokenizer", "tiktoken")
+        prompt_token_budgets = {name: int(value) for name, value in (budgets_data.get("variables") or {}).items()}
+        
         # Convert relative paths to use NLWEB_OUTPUT_DIR if available
         base_output_dir = self.base_output_directory
         if base_output_dir:
@@ -537,7 +709,12 @@ class AppConfig:
             analyze_query_enabled=analyze_query_enabled,
             decontextualize_enabled=decontextualize_enabled,
             required_info_enabled=required_info_enabled,
-            api_keys=api_keys
+            api_keys=api_keys,
+            stage_timeouts=stage_timeouts,
+            execution_profiles=execution_profiles,
+            default_execution_profile=default_execution_profile,
+            tokenizer=tokenizer,
+            prompt_token_budgets=prompt_token_budgets
         )
     
     def get_chatbot_instructions(self, instruction_type: str = "search_results") -> str:
@@ -642,6 +819,22 @@ class AppConfig:
         """Check if decontextualization is enabled."""
         return self.nlweb.decontextualize_enabled if hasattr(self, 'nlweb') else True
     
+    def get_execution_profile(self, name: Optional[str] = None) -> Tuple[str, ExecutionProfileConfig]:
+        """
+        Look up an execution profile, falling back to the default profile when the name
+        is missing or unknown.
+
+        Returns:
+            The name of the profile actually used, and the profile
+        """
+        profiles = self.nlweb.execution_profiles
+        if name in profiles:
+            return name, profiles[name]
+        default = self.nlweb.default_execution_profile
+        if default not in profiles:
+            default = next(iter(profiles))
+        return default, profiles[default]
+    
     def is_required_info_enabled(self) -> bool:
         """Check if required info checking is enabled."""
         return self.nlweb.required_info_enabled if hasattr(self, 'nlweb') else True
@@ -13,6 +13,9 @@ import asyncio
 import threading
 
 from core.config import CONFIG
+from core.utils.cancellation import guarded, EMBEDDING
+from core.utils.dependencies import import_timed, require_packages
+from core.utils.token_budget import count_tokens, truncate_to_tokens
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 
 logger = get_configured_logger("embedding_wrapper")
@@ -26,6 +29,58 @@ _provider_locks = {
     "elasticsearch": threading.Lock()
 }
 
+# Module of each embedding provider, and the packages it needs as {pip requirement: module}
+_provider_modules = {
+    "openai": "embedding_providers.openai_embedding",
+    "gemini": "embedding_providers.gemini_embedding",
+    "azure_openai": "embedding_providers.azure_oai_embedding",
+    "ollama": "embedding_providers.ollama_embedding",
+    "snowflake": "embedding_providers.snowflake_embedding",
+    "elasticsearch": "embedding_providers.elasticsearch_embedding",
+}
+
+_provider_packages = {
+    "openai": {"openai>=1.12.0": "openai"},
+    "gemini": {"google-genai>=0.7.1": "google.genai"},
+    "azure_openai": {"openai>=1.12.0": "openai"},
+    "ollama": {"ollama>=0.5.1": "ollama"},
+    "snowflake": {"httpx>=0.28.1": "httpx"},
+    "elasticsearch": {"elasticsearch[async]>=8,<9": "elasticsearch"},
+}
+
+
+def init():
+    """Import the preferred embedding provider, so the first query doesn't pay for loading its SDK."""
+    provider = CONFIG.preferred_embedding_provider
+    if provider not in _provider_modules:
+        return
+    try:
+        require_packages("embedding", provider, _provider_packages[provider])
+        import_time = import_timed(_provider_modules[provider])
+        logger.info(f"Loaded {provider} embedding provider in {import_time * 1000:.0f} ms")
+    except Exception as e:
+        logger.warning(f"Failed to load {provider} embedding provider: {e}")
+
+
+# Longest input passed to an embedding model, in tokens of that model (8191 for the
+# OpenAI embedding models). Without a tokenizer for the model, text is cut at
+# EMBEDDING_MAX_CHARS characters instead.
+EMBEDDING_MAX_TOKENS = 8000
+EMBEDDING_MAX_CHARS = 20000
+
+
+def _truncate_for_embedding(text: str, provider: str, model: Optional[str], index: Optional[int] = None) -> str:
+    if model is None:
+        provider_config = CONFIG.get_embedding_provider(provider)
+        model = provider_config.model if provider_config else None
+    truncated = truncate_to_tokens(text, EMBEDDING_MAX_TOKENS, model, max_chars=EMBEDDING_MAX_CHARS, marker="")
+    if len(truncated) < len(text):
+        label = "text" if index is None else f"text {index}"
+        logger.warning(f"Truncated {label} from {len(text)} to {len(truncated)} characters "
+                       f"({count_tokens(truncated, model)} tokens) for embedding generation")
+    return truncated
+
+
 async def get_embedding(
     text: str,
     provider: Optional[str] = None,
@@ -45,7 +100,21 @@ async def get_embedding(
         
     Returns:
         List of floats representing the embedding vector
+        
+    Raises:
+        RequestCancelledError: If the current request was cancelled
     """
+    # Abort the call if the request it belongs to is cancelled
+    return await guarded(EMBEDDING, _get_embedding(text, provider, model, timeout, query_params))
+
+
+async def _get_embedding(
+    text: str,
+    provider: Optional[str],
+    model: Optional[str],
+    timeout: int,
+    query_params: Optional[dict]
+) -> List[float]:
     # Allow overriding provider in development mode
     if CONFIG.is_development_mode() and query_params:
         if 'embedding_provider' in query_params:
@@ -54,12 +123,7 @@ async def get_embedding(
     
     provider = provider or CONFIG.preferred_embedding_provider
     
-    # Truncate text to 20k characters to avoid token limit issues
-    MAX_CHARS = 20000
-    original_length = len(text)
-    if original_length > MAX_CHARS:
-        text = text[:MAX_CHARS]
-        logger.warning(f"Truncated text from {original_length} to {MAX_CHARS} characters for embedding generation")
+    text = _truncate_for_embedding(text, provider, model)
     
     logger.debug(f"Getting embedding with provider: {provider}")
     logger.debug(f"Text length: {len(text)} chars")
@@ -84,6 +148,8 @@ async def get_embedding(
         raise ValueError(error_msg)
     
     logger.debug(f"Using embedding model: {model_id}")
+    # Fail fast on missing packages instead of installing them while serving a request
+    require_packages("embedding", provider, _provider_packages.get(provider, {}))
 
     try:
         # Use a timeout wrapper for all embedding calls
@@ -188,7 +254,8 @@ async def batch_get_embeddings(
     texts: List[str],
     provider: Optional[str] = None,
     model: Optional[str] = None,
-    timeout: int = 60
+    timeout: int = 60,
+    query_params: Optional[dict] = None
 ) -> List[List[float]]:
     """
     Get embeddings for a batch of texts.
@@ -198,24 +265,18 @@ async def batch_get_embeddings(
         provider: Optional provider name, defaults to preferred_embedding_provider
         model: Optional model name, defaults to the provider's configured model
         timeout: Maximum time to wait for batch embedding response in seconds
+        query_params: Optional query parameters from HTTP request
         
     Returns:
         List of embedding vectors, each a list of floats
     """
+    # Allow overriding provider in development mode, as for single embeddings
+    if CONFIG.is_development_mode() and query_params and 'embedding_provider' in query_params:
+        provider = query_params['embedding_provider']
+    
     provider = provider or CONFIG.preferred_embedding_provider
     
-    # Truncate texts to 20k characters to avoid token limit issues
-    MAX_CHARS = 20000
-    truncated_texts = []
-    for i, text in enumerate(texts):
-        original_length = len(text)
-        if original_length > MAX_CHARS:
-            truncated_text = text[:MAX_CHARS]
-            truncated_texts.append(truncated_text)
-            logger.warning(f"Truncated text {i} from {original_length} to {MAX_CHARS} characters for embedding generation")
-        else:
-            truncated_texts.append(text)
-    texts = truncated_texts
+    texts = [_truncate_for_embedding(text, provider, model, i) for i, text in enumerate(texts)]
     
     logger.debug(f"Getting batch embeddings with provider: {provider}")
     logger.debug(f"Batch size: {len(texts)} texts")
@@ -232,6 +293,8 @@ async def batch_get_embeddings(
         error_msg = f"No embedding model specified for provider '{provider}'"
         logger.error(error_msg)
         raise ValueError(error_msg)
+    # Fail fast on missing packages instead of installing them while serving a request
+    require_packages("embedding", provider, _provider_packages.get(provider, {}))
     
     try:
         # Provider-specific batch implementations with timeout handling
@@ -14,14 +14,18 @@ Backwards compatibility is not guaranteed at this time.
 from core.retriever import search
 import core.ranking as ranking
 from misc.logger.logging_config_helper import get_configured_logger
-import asyncio
 
 logger = get_configured_logger("fast_track")
 
 
 class FastTrack:
+
+    # How long ranking waits for decontextualization before giving up on fast track
+    DECON_WAIT_TIMEOUT = 5.0
+
     def __init__(self, handler):
         self.handler = handler
+        self.items = None
         logger.debug("FastTrack initialized")
 
     def is_fastTrack_eligible(self):
@@ -39,11 +43,16 @@ class FastTrack:
         logger.info("Query is eligible for fast track")
         return True
         
-    async def do(self):
-        """Execute fast track processing"""
+    async def retrieve(self):
+        """
+        Retrieve items for the query as typed, without waiting for decontextualization.
+
+        Returns:
+            True if items were retrieved and can be ranked
+        """
         if (not self.is_fastTrack_eligible()):
             logger.info("Fast track processing skipped - not eligible")
-            return
+            return False
         
         logger.info("Starting fast track processing")
         
@@ -54,24 +63,26 @@ class FastTrack:
             items = await search(
                 self.handler.query, 
                 self.handler.site,
+                num_results=self.handler.num_retrieval_results,
                 query_params=self.handler.query_params,
                 handler=self.handler
             )
             self.handler.final_retrieved_items = items
+            self.items = items
             logger.info(f"Fast track retrieved {len(items)} items")
-            
-            # Wait for decontextualization to complete with timeout
-            decon_done = False
-            try:
-                decon_done = await asyncio.wait_for(
-                    self.handler.state.wait_for_decontextualization(),
-                    timeout=5.0  # 5 second timeout
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Decontextualization timed out in fast track")
-                return
-            
-            if decon_done:
+            return True
+        except Exception as e:
+            logger.error(f"Error during fast track processing: {str(e)}")
+            logger.debug("Fast track error details:", exc_info=True)
+            raise
+
+    async def rank(self):
+        """Rank the retrieved items, unless fast track was aborted. The stage graph runs it once decontextualization has finished."""
+        if self.items is None:
+            return
+
+        try:
+            if self.handler.state.is_decontextualization_done():
                 logger.debug("Decontextualization is done")
                 
                 # Check all abort conditions using centralized method
@@ -80,20 +91,14 @@ class FastTrack:
                     return
                 elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
                     logger.info("Fast track proceeding: decontextualization not required")
-                    self.handler.fastTrackRanker = ranking.Ranking(self.handler, items, ranking.Ranking.FAST_TRACK)
+                    self.handler.fastTrackRanker = ranking.Ranking(self.handler, self.items, ranking.Ranking.FAST_TRACK)
                     await self.handler.fastTrackRanker.do()
                     logger.info("Fast track ranking completed")
                     return  
-            elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
-                logger.info("Fast track proceeding: decontextualization call pending, query not done")
-                self.handler.fastTrackRanker = ranking.Ranking(self.handler, items, ranking.Ranking.FAST_TRACK)
-                await self.handler.fastTrackRanker.do()
-                logger.info("Fast track ranking completed")
-                return
                 
         except Exception as e:
             logger.error(f"Error during fast track processing: {str(e)}")
             logger.debug("Fast track error details:", exc_info=True)
             raise
         
-        logger.info("Fast track processing completed")
\ No newline at end of file
+        logger.info("Fast track processing completed")
@@ -9,12 +9,19 @@ Backwards compatibility is not guaranteed at this time.
 
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from core.config import CONFIG
+from core.utils.circuit_breaker import get_breaker, register_probe
+from core.utils.json_stream import FieldUpdate, IncrementalJSONFieldExtractor
+from core.utils import cancellation
+from core.utils.cancellation import guarded
+from core.utils import token_budget
+from core.utils.dependencies import import_timed, require_packages
 import asyncio
-import threading
-import subprocess
+import json
 import sys
+import threading
+import time
 
 
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
@@ -23,76 +30,114 @@ logger = get_configured_logger("llm_wrapper")
 # Cache for loaded providers
 _loaded_providers = {}
 
+# Number of ask_llm calls currently waiting on a provider, across all requests
+_llm_calls_in_flight = 0
+
+# Number of LLM calls made since startup, by model tier; used to compare the cost of execution profiles
+_llm_calls_total = {"low": 0, "high": 0}
+
+# Tokens sent to and received from each model since startup, for capacity planning
+_llm_tokens: Dict[str, Dict[str, int]] = {}
+
 def init():
     """Initialize LLM providers based on configuration."""
-    # Get all configured LLM endpoints
-    for endpoint_name, endpoint_config in CONFIG.llm_endpoints.items():
-        llm_type = endpoint_config.llm_type
-        if llm_type and endpoint_name == CONFIG.preferred_llm_endpoint:
-            try:
-                # Use _get_provider which will load and cache the provider
-                _get_provider(llm_type)
-                logger.info(f"Successfully loaded {llm_type} provider")
-            except Exception as e:
-                logger.warning(f"Failed to load {llm_type} provider: {e}")
+    # Load the providers of the preferred endpoint and its failover endpoints, and no others
+    for llm_type in enabled_llm_types():
+        try:
+            # Use _get_provider which will load and cache the provider
+            _get_provider(llm_type)
+            logger.info(f"Successfully loaded {llm_type} provider")
+        except Exception as e:
+            logger.warning(f"Failed to load {llm_type} provider: {e}")
+    
+    # Register background health probes so ejected providers can recover without user traffic
+    for endpoint_name in get_available_providers():
+        register_probe("llm", endpoint_name, lambda name=endpoint_name: _probe_provider(name))
+    
+    # Load the tokenizers prompt budgets are counted with, which may download their encodings
+    if CONFIG.nlweb.prompt_token_budgets:
+        token_budget.warm_up(model_for_level(level) for level in ("low", "high"))
+
+
+def warm_up_clients():
+    """Create the pooled clients of all loaded providers, so the first requests don't pay for it."""
+    for llm_type, provider_instance in list(_loaded_providers.items()):
+        try:
+            provider_instance.get_client()
+        except Exception as e:
+            logger.warning(f"Failed to create client for {llm_type} provider: {e}")
+
+
+async def shutdown():
+    """Close all provider clients and release their pooled connections."""
+    from llm_providers.llm_provider import close_pooled_http_clients
+    for llm_type, provider_instance in list(_loaded_providers.items()):
+        try:
+            await provider_instance.close()
+        except Exception as e:
+            logger.warning(f"Failed to close client for {llm_type} provider: {e}")
+    await close_pooled_http_clients()
 
-# Mapping of LLM types to their required pip packages
+
+def _provider_breaker(provider_name: str):
+    """Get the circuit breaker guarding an LLM endpoint."""
+    return get_breaker("llm", provider_name, CONFIG.llm_circuit_breaker)
+
+
+async def _probe_provider(provider_name: str):
+    """Cheap health check for an LLM endpoint: a tiny completion on its low model."""
+    provider_config = CONFIG.get_llm_provider(provider_name)
+    provider_instance = _get_provider(provider_config.llm_type)
+    timeout = CONFIG.llm_circuit_breaker.probe_timeout
+    result = await provider_instance.get_completion(
+        'Reply with the JSON object {"ok": true}', {"ok": "boolean"},
+        model=provider_config.models.low, timeout=timeout, max_tokens=16
+    )
+    if not result:
+        raise ValueError(f"Empty probe response from {provider_name}")
+
+# Module of each LLM type, which exposes the provider instance as `provider`. Only the
+# modules of configured providers are imported, since each pulls in an SDK.
+_provider_modules = {
+    "openai": "llm_providers.openai",
+    "anthropic": "llm_providers.anthropic",
+    "gemini": "llm_providers.gemini",
+    "azure_openai": "llm_providers.azure_oai",
+    "llama_azure": "llm_providers.azure_llama",
+    "deepseek_azure": "llm_providers.azure_deepseek",
+    "inception": "llm_providers.inception",
+    "snowflake": "llm_providers.snowflake",
+    "huggingface": "llm_providers.huggingface",
+    "ollama": "llm_providers.ollama",
+}
+
+# Packages each LLM type needs, as {pip requirement: module}
 _llm_type_packages = {
-    "openai": ["openai>=1.12.0"],
-    "anthropic": ["anthropic>=0.18.1"],
-    "gemini": ["google-cloud-aiplatform>=1.38.0"],
-    "azure_openai": ["openai>=1.12.0"],
-    "llama_azure": ["openai>=1.12.0"],
-    "deepseek_azure": ["openai>=1.12.0"],
-    "inception": ["aiohttp>=3.9.1"],
-    "snowflake": ["httpx>=0.28.1"],
-    "huggingface": ["huggingface_hub>=0.31.0"],
-    "ollama": ["ollama>=0.5.1"],
+    "openai": {"openai>=1.12.0": "openai"},
+    "anthropic": {"anthropic>=0.18.1": "anthropic"},
+    "gemini": {"google-genai>=0.7.1": "google.genai"},
+    "azure_openai": {"openai>=1.12.0": "openai"},
+    "llama_azure": {"openai>=1.12.0": "openai"},
+    "deepseek_azure": {"openai>=1.12.0": "openai"},
+    "inception": {"httpx>=0.28.1": "httpx"},
+    "snowflake": {"httpx>=0.28.1": "httpx"},
+    "huggingface": {"huggingface_hub>=0.31.0": "huggingface_hub"},
+    "ollama": {"ollama>=0.5.1": "ollama"},
 }
 
-# Cache for installed packages
-_installed_packages = set()
 
-def _ensure_package_installed(llm_type: str):
-    """
-    Ensure the required packages for an LLM type are installed.
-    
-    Args:
-        llm_type: The type of LLM provider
-    """
-    if llm_type not in _llm_type_packages:
-        return
-    
-    packages = _llm_type_packages[llm_type]
-    for package in packages:
-        # Extract package name without version for caching
-        package_name = package.split(">=")[0].split("==")[0]
-        
-        if package_name in _installed_packages:
-            continue
-            
-        try:
-            # Try to import the package first
-            if package_name == "google-cloud-aiplatform":
-                __import__("vertexai")
-            elif package_name == "huggingface_hub":
-                __import__("huggingface_hub")
-            else:
-                __import__(package_name)
-            _installed_packages.add(package_name)
-            logger.debug(f"Package {package_name} is already installed")
-        except ImportError:
-            # Package not installed, install it
-            logger.info(f"Installing {package} for {llm_type} provider...")
-            try:
-                subprocess.check_call([
-                    sys.executable, "-m", "pip", "install", package, "--quiet"
-                ])
-                _installed_packages.add(package_name)
-                logger.info(f"Successfully installed {package}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to install {package}: {e}")
-                raise ValueError(f"Failed to install required package {package} for {llm_type}")
+def enabled_llm_types() -> List[str]:
+    """LLM types of the preferred endpoint and of the endpoints it fails over to."""
+    endpoints = [CONFIG.preferred_llm_endpoint]
+    for failover in CONFIG.llm_failover.values():
+        endpoints.extend(failover.chain or [])
+    llm_types = []
+    for endpoint_name in endpoints:
+        endpoint_config = CONFIG.llm_endpoints.get(endpoint_name)
+        if endpoint_config and endpoint_config.llm_type and endpoint_config.llm_type not in llm_types:
+            llm_types.append(endpoint_config.llm_type)
+    return llm_types
+
 
 def _get_provider(llm_type: str):
     """
@@ -105,54 +150,27 @@ def _get_provider(llm_type: str):
         The provider instance
         
     Raises:
-        ValueError: If the LLM type is unknown
+        ValueError: If the LLM type is unknown or its packages are not installed
     """
     # Return cached provider if already loaded
     if llm_type in _loaded_providers:
         return _loaded_providers[llm_type]
     
-    # Ensure required packages are installed
-    _ensure_package_installed(llm_type)
+    if llm_type not in _provider_modules:
+        raise ValueError(f"Unknown LLM type: {llm_type}")
+    # Fail fast on missing packages instead of installing them while serving a request
+    require_packages("llm", llm_type, _llm_type_packages.get(llm_type, {}))
     
-    # Import the appropriate provider module if not already loaded
+    module_name = _provider_modules[llm_type]
     try:
-        if llm_type == "openai":
-            from llm_providers.openai import provider as openai_provider
-            _loaded_providers[llm_type] = openai_provider
-        elif llm_type == "anthropic":
-            from llm_providers.anthropic import provider as anthropic_provider
-            _loaded_providers[llm_type] = anthropic_provider
-        elif llm_type == "gemini":
-            from llm_providers.gemini import provider as gemini_provider
-            _loaded_providers[llm_type] = gemini_provider
-        elif llm_type == "azure_openai":
-            from llm_providers.azure_oai import provider as azure_openai_provider
-            _loaded_providers[llm_type] = azure_openai_provider
-        elif llm_type == "llama_azure":
-            from llm_providers.azure_llama import provider as llama_provider
-            _loaded_providers[llm_type] = llama_provider
-        elif llm_type == "deepseek_azure":
-            from llm_providers.azure_deepseek import provider as deepseek_provider
-            _loaded_providers[llm_type] = deepseek_provider
-        elif llm_type == "inception":
-            from llm_providers.inception import provider as inception_provider
-            _loaded_providers[llm_type] = inception_provider
-        elif llm_type == "snowflake":
-            from llm_providers.snowflake import provider as snowflake_provider
-            _loaded_providers[llm_type] = snowflake_provider
-        elif llm_type == "huggingface":
-            from llm_providers.huggingface import provider as huggingface_provider
-            _loaded_providers[llm_type] = huggingface_provider
-        elif llm_type == "ollama":
-            from llm_providers.ollama import provider as ollama_provider
-            _loaded_providers[llm_type] = ollama_provider
-        else:
-            raise ValueError(f"Unknown LLM type: {llm_type}")
-            
-        return _loaded_providers[llm_type]
+        import_time = import_timed(module_name)
+        _loaded_providers[llm_type] = sys.modules[module_name].provider
     except ImportError as e:
         logger.error(f"Failed to import provider for {llm_type}: {e}")
         raise ValueError(f"Failed to load provider for {llm_type}: {e}")
+    if import_time:
+        logger.info(f"Imported {module_name} for {llm_type} provider in {import_time * 1000:.0f} ms")
+    return _loaded_providers[llm_type]
 
 async def ask_llm(
     prompt: str,
@@ -181,9 +199,196 @@ async def ask_llm(
     Raises:
         ValueError: If the endpoint is unknown or response cannot be parsed
         TimeoutError: If the request times out
+        RequestCancelledError: If the current request was cancelled
+    """
+    chain, level, hedge_delay = _resolve_endpoints(provider, level, query_params)
+    logger.debug(f"Initiating LLM request with endpoints: {chain}, level: {level}")
+    logger.debug(f"Prompt preview: {prompt[:100]}...")
+    logger.debug(f"Schema: {schema}")
+    
+    if len(chain) == 1:
+        call = _ask_provider(chain[0], prompt, schema, level, timeout, max_length)
+    else:
+        call = _ask_with_failover(chain, hedge_delay, prompt, schema, level, timeout, max_length)
+    # Abort the call if the request it belongs to is cancelled
+    global _llm_calls_in_flight
+    _llm_calls_in_flight += 1
+    _llm_calls_total[level] = _llm_calls_total.get(level, 0) + 1
+    try:
+        return await guarded(cancellation.LLM, call)
+    finally:
+        _llm_calls_in_flight -= 1
+
+
+def llm_queue_depth() -> int:
+    """Number of ask_llm and ask_llm_stream calls in flight across all requests; used for admission control."""
+    return _llm_calls_in_flight
+
+
+def _record_tokens(provider_name: str, model_id: str, level: str, prompt: str, output: str, start_time: float):
+    """
+    Log the tokens in and out of a completed LLM call. They are estimated from the character
+    counts: tokenizing every prompt and response on the event loop costs more than the
+    numbers are worth for capacity planning.
+    """
+    tokens_in = token_budget.estimate_tokens(prompt)
+    tokens_out = token_budget.estimate_tokens(output)
+    usage = _llm_tokens.setdefault(model_id, {"calls": 0, "tokens_in": 0, "tokens_out": 0})
+    usage["calls"] += 1
+    usage["tokens_in"] += tokens_in
+    usage["tokens_out"] += tokens_out
+    logger.log_with_context(
+        LogLevel.INFO,
+        "LLM call tokens",
+        {
+            "endpoint": provider_name,
+            "model": model_id,
+            "level": level,
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "duration": f"{time.time() - start_time:.2f}s"
+        }
+    )
+
+
+def llm_token_usage() -> Dict[str, Dict[str, int]]:
+    """Calls, and estimated tokens in and out, since startup, by model."""
+    return {model: dict(usage) for model, usage in _llm_tokens.items()}
+
+
+def model_for_level(level: str = "low", provider: Optional[str] = None) -> Optional[str]:
+    """The model an endpoint (the preferred one by default) uses for a tier, e.g. to pick a tokenizer."""
+    provider_config = CONFIG.get_llm_provider(provider or CONFIG.preferred_llm_endpoint)
+    if not provider_config or not provider_config.models:
+        return None
+    return getattr(provider_config.models, level, None)
+
+
+def llm_call_counts() -> Dict[str, int]:
+    """Number of LLM calls (ask_llm and ask_llm_stream) made since startup, by model tier."""
+    return dict(_llm_calls_total)
+
+
+async def ask_llm_stream(
+    prompt: str,
+    schema: Dict[str, Any],
+    provider: Optional[str] = None,
+    level: str = "low",
+    timeout: int = 16,
+    query_params: Optional[Dict[str, Any]] = None,
+    max_length: int = 512
+) -> AsyncIterator[FieldUpdate]:
+    """
+    Stream an LLM response, yielding updates to its top-level JSON fields as they are generated.
+    
+    String fields arrive piece by piece (FieldUpdate.delta); all fields are reported once
+    complete. Endpoints are chosen as in ask_llm, failing over to the next endpoint in the
+    chain only if the current one errors before producing any output.
+    
+    Args:
+        prompt: The text prompt to send to the LLM
+        schema: JSON schema that the response should conform to
+        provider: The LLM endpoint to use (if None, use preferred endpoint from config)
+        level: The model tier to use ('low' or 'high')
+        timeout: Timeout in seconds for the whole response
+        query_params: Optional query parameters for development mode provider override
+        max_length: Maximum length of the response in tokens (default: 512)
+        
+    Yields:
+        FieldUpdate for each change to a top-level field of the response
+    """
+    chain, level, _ = _resolve_endpoints(provider, level, query_params)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    token = cancellation.current_token()
+    if token is not None:
+        token.raise_if_cancelled(cancellation.LLM)
+    _llm_calls_total[level] = _llm_calls_total.get(level, 0) + 1
+    
+    # Counted as in flight until the stream ends or is closed, as ask_llm calls are
+    global _llm_calls_in_flight
+    _llm_calls_in_flight += 1
+    try:
+        for provider_name in chain:
+            if provider_name not in CONFIG.llm_endpoints:
+                logger.error(f"Unknown provider '{provider_name}'")
+                continue
+            provider_config = CONFIG.get_llm_provider(provider_name)
+            if not provider_config or not provider_config.models:
+                logger.error(f"Missing model configuration for provider '{provider_name}'")
+                continue
+            breaker = _provider_breaker(provider_name)
+            if not breaker.allow_request():
+                logger.warning(f"Skipping LLM stream to {provider_name}: circuit breaker is {breaker.state}")
+                continue
+        
+            model_id = getattr(provider_config.models, level)
+            extractor = IncrementalJSONFieldExtractor()
+            produced_output = False
+            chunks = []
+            start_time = time.time()
+            try:
+                provider_instance = _get_provider(provider_config.llm_type)
+                stream = provider_instance.stream_completion(
+                    prompt, schema, model=model_id, timeout=max(0.0, deadline - loop.time()), max_tokens=max_length
+                )
+                try:
+                    while True:
+                        try:
+                            next_chunk = asyncio.wait_for(stream.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                            chunk = await (token.guard(cancellation.LLM, next_chunk) if token is not None else next_chunk)
+                        except StopAsyncIteration:
+                            break
+                        if not produced_output:
+                            produced_output = True
+                            breaker.record_success(time.time() - start_time)
+                        chunks.append(chunk)
+                        for update in extractor.feed(chunk):
+                            yield update
+                        if extractor.done:
+                            break
+                finally:
+                    await stream.aclose()
+                    if produced_output:
+                        _record_tokens(provider_name, model_id, level, prompt, "".join(chunks), start_time)
+                for update in extractor.finish():
+                    yield update
+                if produced_output:
+                    return
+                logger.warning(f"LLM endpoint {provider_name} streamed no output")
+                # Report it, so that a half-open breaker's trial slot is given back
+                breaker.record_failure(ValueError(f"{provider_name} streamed no output"))
+            except Exception as e:
+                if not produced_output:
+                    breaker.record_failure(e)
+                logger.error(f"LLM stream failed with provider {provider_name}: {type(e).__name__}: {str(e)}")
+                if produced_output:
+                    # Partial output has already been handed to the caller; don't mix in another endpoint
+                    return
+    
+        logger.error(f"No LLM endpoint in {chain} produced a streamed response")
+    finally:
+        _llm_calls_in_flight -= 1
+
+
+def _resolve_endpoints(
+    provider: Optional[str],
+    level: str,
+    query_params: Optional[Dict[str, Any]]
+) -> Tuple[List[str], str, Optional[float]]:
+    """
+    Work out which LLM endpoints to use for a request, in order of preference.
+    
+    An explicitly chosen provider (by argument, or by query param in development mode)
+    is used on its own. Otherwise the preferred endpoint is followed by the failover
+    chain configured for the level.
+    
+    Returns:
+        The endpoint chain, the (possibly overridden) level, and the hedge delay for the chain
     """
     # Determine provider, with development mode override support
     provider_name = provider or CONFIG.preferred_llm_endpoint
+    provider_pinned = provider is not None
     
     # In development mode, allow query param override
     if CONFIG.is_development_mode() and query_params:
@@ -191,6 +396,7 @@ async def ask_llm(
         override_provider = get_param(query_params, "llm_provider", str, None)
         if override_provider:
             provider_name = override_provider
+            provider_pinned = True
             logger.debug(f"Development mode: LLM provider overridden to {provider_name}")
         
         # Also allow level override in development mode
@@ -198,10 +404,110 @@ async def ask_llm(
         if override_level:
             level = override_level
             logger.debug(f"Development mode: LLM level overridden to {level}")
-    logger.debug(f"Initiating LLM request with provider: {provider_name}, level: {level}")
-    logger.debug(f"Prompt preview: {prompt[:100]}...")
-    logger.debug(f"Schema: {schema}")
     
+    failover = CONFIG.llm_failover.get(level)
+    if provider_pinned or not failover or not failover.chain:
+        return [provider_name], level, None
+    
+    chain = [provider_name] + [name for name in failover.chain if name != provider_name]
+    return chain, level, failover.hedge_delay
+
+
+def _is_valid_response(result: Any) -> bool:
+    """A provider response is usable when it parsed to a non-empty JSON object."""
+    return isinstance(result, dict) and bool(result)
+
+
+async def _ask_with_failover(
+    chain: List[str],
+    hedge_delay: Optional[float],
+    prompt: str,
+    schema: Dict[str, Any],
+    level: str,
+    timeout: float,
+    max_length: int
+) -> Dict[str, Any]:
+    """
+    Send the prompt along an ordered chain of LLM endpoints and return the first valid response.
+    
+    The next endpoint in the chain is tried as soon as the current one fails or returns an
+    empty/invalid response. With a hedge delay, it is also started (without cancelling the
+    current one) once the current endpoint has been running for that long. The whole chain
+    shares a single timeout.
+    
+    Args:
+        chain: Endpoint names, in order of preference
+        hedge_delay: Seconds to wait before hedging to the next endpoint, or None to only fail over on errors
+        prompt: The text prompt to send to the LLM
+        schema: JSON schema that the response should conform to
+        level: The model tier to use ('low' or 'high')
+        timeout: Overall timeout in seconds
+        max_length: Maximum length of the response in tokens
+        
+    Returns:
+        Parsed JSON response from the first endpoint that produced one, or {} if none did
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    remaining = list(chain)
+    running: Dict[asyncio.Task, str] = {}
+    
+    def launch_next():
+        provider_name = remaining.pop(0)
+        budget = max(0.0, deadline - loop.time())
+        task = asyncio.create_task(_ask_provider(provider_name, prompt, schema, level, budget, max_length))
+        running[task] = provider_name
+    
+    try:
+        launch_next()
+        while running:
+            time_left = deadline - loop.time()
+            if time_left <= 0:
+                break
+            wait_for = min(hedge_delay, time_left) if hedge_delay is not None and remaining else time_left
+            done, _ = await asyncio.wait(running.keys(), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            
+            if not done:
+                # Nothing back within the hedge delay: fire the same prompt at the next endpoint
+                if remaining:
+                    logger.info(f"Hedging LLM request from {list(running.values())} to {remaining[0]}")
+                    launch_next()
+                continue
+            
+            for task in done:
+                provider_name = running.pop(task)
+                result = task.result()
+                if _is_valid_response(result):
+                    if provider_name != chain[0]:
+                        logger.info(f"LLM request served by failover endpoint {provider_name}")
+                    return result
+                logger.warning(f"LLM endpoint {provider_name} returned no usable response")
+            
+            if remaining:
+                logger.info(f"Failing over LLM request to {remaining[0]}")
+                launch_next()
+        
+        logger.error(f"No LLM endpoint in {chain} produced a usable response within {timeout}s")
+        return {}
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def _ask_provider(
+    provider_name: str,
+    prompt: str,
+    schema: Dict[str, Any],
+    level: str,
+    timeout: float,
+    max_length: int
+) -> Dict[str, Any]:
+    """
+    Send the prompt to a single LLM endpoint.
+    
+    Returns:
+        Parsed JSON response from the LLM, or {} if the endpoint is unavailable, fails or times out
+    """
     if provider_name not in CONFIG.llm_endpoints:
         error_msg = f"Unknown provider '{provider_name}'"
         logger.error(error_msg)
@@ -224,6 +530,13 @@ async def ask_llm(
     # Initialize variables for exception handling
     llm_type_for_error = llm_type
 
+    # Fail fast when the endpoint has been ejected by its circuit breaker
+    breaker = _provider_breaker(provider_name)
+    if not breaker.allow_request():
+        logger.warning(f"Skipping LLM call to {provider_name}: circuit breaker is {breaker.state}")
+        return {}
+
+    start_time = time.time()
     try:
 
         # Get the provider instance based on llm_type
@@ -232,6 +545,7 @@ async def ask_llm(
         except ValueError as e:
             error_msg = str(e)
             logger.error(error_msg)
+            breaker.record_failure(e)
             return {}
         
         # Simply call the provider's get_completion method without locking
@@ -242,12 +556,16 @@ async def ask_llm(
             timeout=timeout
         )
         logger.debug(f"{provider_name} response received, size: {len(str(result))} chars")
+        breaker.record_success(time.time() - start_time)
+        _record_tokens(provider_name, model_id, level, prompt, json.dumps(result) if result else "", start_time)
         return result
         
-    except asyncio.TimeoutError:
+    except asyncio.TimeoutError as e:
         logger.error(f"LLM call timed out after {timeout}s with provider {provider_name}")
+        breaker.record_failure(e)
         return {}
     except Exception as e:
+        breaker.record_failure(e)
         error_msg = f"LLM call failed: {type(e).__name__}: {str(e)}"
         logger.error(f"Error with provider {provider_name}: {error_msg}")
 
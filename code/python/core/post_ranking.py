@@ -131,11 +131,17 @@ class SummarizeResults(PromptRunner):
 
     async def do(self):
         self.handler.final_ranked_answers = self.handler.final_ranked_answers[:3]
-        response = await self.run_prompt(self.SUMMARIZE_RESULTS_PROMPT_NAME, timeout=20)
-        if (not response):
+        response = await self.run_prompt_streaming(self.SUMMARIZE_RESULTS_PROMPT_NAME, self.send_summary_delta, timeout=20)
+        if (not response or "summary" not in response):
             return
         self.handler.summary = response["summary"]
         message = {"message_type": "summary", "message": self.handler.summary}
         await self.handler.send_message(message)
         # Use proper state update
         await self.handler.state.precheck_step_done("post_ranking")
+
+    async def send_summary_delta(self, update):
+        # Stream the summary text to the client as it is generated; the complete
+        # summary is still sent as a single "summary" message at the end
+        if update.name == "summary" and update.delta and self.handler.connection_alive_event.is_set():
+            await self.handler.send_message({"message_type": "summary_delta", "delta": update.delta})
@@ -0,0 +1,142 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Preflight checks for the configured providers, to run before starting the server.
+
+Checks that the packages of every enabled LLM, embedding and retrieval provider are
+installed, optionally installs the missing ones, and can profile how long the server's
+modules take to import. The server itself never installs packages: it checks the same
+packages at startup with verify_dependencies() and refuses to start if any are missing.
+
+Run from the code/python directory:
+    python -m core.preflight              # report missing packages (exit status 1 if any)
+    python -m core.preflight --install    # install the missing packages
+    python -m core.preflight --profile    # also show the import time of each module at startup
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from core import embedding, llm, retriever
+from core.config import CONFIG
+from core.utils.dependencies import MissingDependencyError, install_requirements, missing_requirements
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("preflight")
+
+# Modules every server process imports, besides the provider modules
+STARTUP_MODULES = ["core.router", "core.llm", "core.retriever", "core.embedding", "webserver.aiohttp_server"]
+
+
+@dataclass
+class ProviderDependencies:
+    kind: str  # "llm", "embedding" or "retrieval"
+    provider_type: str
+    module: str  # Module implementing the provider
+    packages: Dict[str, str]  # {pip requirement: module}
+
+    @property
+    def missing(self) -> List[str]:
+        return missing_requirements(self.packages)
+
+
+def enabled_providers() -> List[ProviderDependencies]:
+    """The providers the current configuration uses."""
+    providers = [
+        ProviderDependencies("llm", llm_type, llm._provider_modules[llm_type], llm._llm_type_packages.get(llm_type, {}))
+        for llm_type in llm.enabled_llm_types() if llm_type in llm._provider_modules
+    ]
+    provider = CONFIG.preferred_embedding_provider
+    if provider in embedding._provider_modules:
+        providers.append(ProviderDependencies("embedding", provider, embedding._provider_modules[provider],
+                                              embedding._provider_packages.get(provider, {})))
+    providers.extend(
+        ProviderDependencies("retrieval", db_type, retriever._client_classes[db_type][0],
+                             retriever._db_type_packages.get(db_type, {}))
+        for db_type in retriever.enabled_db_types() if db_type in retriever._client_classes
+    )
+    return providers
+
+
+def verify_dependencies():
+    """
+    Check the packages of all enabled providers, for the server to call before it starts.
+
+    Raises:
+        MissingDependencyError: For the first provider with missing packages (all are logged)
+    """
+    errors = [MissingDependencyError(p.kind, p.provider_type, p.missing) for p in enabled_providers() if p.missing]
+    for error in errors:
+        logger.error(str(error))
+    if errors:
+        raise errors[0]
+
+
+def import_profile(modules: List[str]) -> List[Tuple[str, float, float]]:
+    """
+    Import modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        (module, self seconds, cumulative seconds) for every module imported, slowest first
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    profile = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            profile.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    return sorted(profile, key=lambda entry: entry[2], reverse=True)
+
+
+def print_import_profile(modules: List[str], top: int):
+    profile = import_profile(modules)
+    times = {module: cumulative for module, _, cumulative in profile}
+    print(f"\nImport time at startup ({len(profile)} modules)")
+    for module in modules:
+        print(f"  {module:<45} {times.get(module, 0) * 1000:8.1f} ms")
+    print(f"\nSlowest {top} modules (cumulative / self)")
+    for module, self_time, cumulative in profile[:top]:
+        print(f"  {module:<45} {cumulative * 1000:8.1f} ms {self_time * 1000:8.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the packages of the configured providers before starting the server")
+    parser.add_argument("--install", action="store_true", help="Install missing packages with pip")
+    parser.add_argument("--profile", action="store_true", help="Show the import time of the server's modules")
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to list in the import profile")
+    args = parser.parse_args()
+
+    providers = enabled_providers()
+    missing = []
+    for provider in providers:
+        provider_missing = provider.missing
+        status = "ok" if not provider_missing else f"missing {', '.join(provider_missing)}"
+        print(f"{provider.kind:<10} {provider.provider_type:<25} {status}")
+        missing.extend(r for r in provider_missing if r not in missing)
+
+    if missing and args.install:
+        install_requirements(missing)
+        missing = [r for provider in providers for r in provider.missing]
+        print("Installed all missing packages" if not missing else f"Still missing: {', '.join(missing)}")
+
+    if args.profile and not missing:
+        print_import_profile(STARTUP_MODULES + [provider.module for provider in providers], args.top)
+    if missing:
+        print(f"\nMissing packages: {', '.join(missing)}. Run `python -m core.preflight --install` to install them.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
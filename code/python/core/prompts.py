@@ -13,7 +13,8 @@ from xml.etree import ElementTree as ET
 import json 
 import os  # Add this import
 from misc.logger.logging_config_helper import get_configured_logger
-from core.llm import ask_llm
+from core.llm import ask_llm, ask_llm_stream, model_for_level
+from core.utils.json_utils import fit_to_tokens
 from core.config import CONFIG
 
 logger = get_configured_logger("prompts")
@@ -150,11 +151,18 @@ def get_prompt_variable_value(variable, handler):
     
     return value
 
-def fill_prompt(prompt_str, handler, pr_dict={}):
+def fill_prompt(prompt_str, handler, pr_dict={}, level="low"):
+    """
+    Fill in the variables of a prompt template. Values longer than their token budget
+    (prompt_budgets in config_nlweb.yaml) are cut down, counting tokens for the model
+    the prompt will run on at `level`; JSON values such as item descriptions stay valid JSON.
+    """
     logger.debug(f"Filling prompt template (length: {len(prompt_str)})")
     try:
         variables = get_prompt_variables_from_prompt(prompt_str)
         logger.debug(f"Found {len(variables)} variables to fill")
+        budgets = CONFIG.nlweb.prompt_token_budgets
+        model = model_for_level(level) if any(variable in budgets for variable in variables) else None
         for variable in variables:
             if (variable in pr_dict):
                 value = pr_dict[variable]
@@ -163,6 +171,8 @@ def fill_prompt(prompt_str, handler, pr_dict={}):
             # Ensure value is a string
             if not isinstance(value, str):
                 value = str(value)
+            if variable in budgets:
+                value = fit_to_tokens(value, budgets[variable], model)
                 
             prompt_str = prompt_str.replace("{" + variable + "}", value)
         
@@ -321,7 +331,13 @@ class PromptRunner:
     def __init__(self, handler):
         self.handler = handler
 
+    def _level(self, level):
+        # The handler's execution profile may cap the model tier
+        cap = getattr(self.handler, "llm_level", None)
+        return cap(level) if cap else level
+
     async def run_prompt(self, prompt_name, level="low", verbose=False, timeout=8):
+        level = self._level(level)
         prompt_runner_logger.info(f"Running prompt: {prompt_name} with level={level}, timeout={timeout}s")
         
         try:
@@ -333,7 +349,7 @@ class PromptRunner:
                 return None
         
             prompt_runner_logger.debug(f"Filling prompt template with handler data")
-            prompt = fill_prompt(prompt_str, self.handler)
+            prompt = fill_prompt(prompt_str, self.handler, level=level)
             if (verbose):
                 print(f"Prompt: {prompt}")
             prompt_runner_logger.debug(f"Filled prompt length: {len(prompt)} chars")
@@ -365,3 +381,42 @@ class PromptRunner:
                 # In production mode, log and return None
                 print(f"ERROR in run_prompt: {type(e).__name__}: {str(e)}")
                 return None
+
+    async def run_prompt_streaming(self, prompt_name, on_update, level="low", timeout=8):
+        """
+        Like run_prompt, but streams the response. on_update is awaited with each
+        FieldUpdate as fields of the response are generated.
+        
+        Returns:
+            The complete response fields, or None if the prompt was not found or nothing came back
+        """
+        level = self._level(level)
+        prompt_runner_logger.info(f"Streaming prompt: {prompt_name} with level={level}, timeout={timeout}s")
+        
+        try:
+            prompt_str, ans_struc = self.get_prompt(prompt_name)
+            if (prompt_str is None):
+                prompt_runner_logger.debug(f"Cannot run prompt '{prompt_name}' - prompt not found")
+                return None
+        
+            prompt = fill_prompt(prompt_str, self.handler, level=level)
+            response = {}
+            async for update in ask_llm_stream(prompt, ans_struc, level=level, timeout=timeout, query_params=self.handler.query_params):
+                if update.complete:
+                    response[update.name] = update.value
+                await on_update(update)
+            
+            if not response:
+                prompt_runner_logger.warning(f"LLM streamed no response for prompt '{prompt_name}'")
+                return None
+            prompt_runner_logger.info(f"LLM streamed response received for prompt '{prompt_name}'")
+            return response
+            
+        except Exception as e:
+            error_msg = f"Error in run_prompt_streaming for '{prompt_name}': {type(e).__name__}: {str(e)}"
+            prompt_runner_logger.error(error_msg)
+            prompt_runner_logger.debug("Full traceback:", exc_info=True)
+            
+            if CONFIG.should_raise_exceptions():
+                raise Exception(f"LLM call failed for prompt '{prompt_name}': {type(e).__name__}: {str(e)}") from e
+            return None
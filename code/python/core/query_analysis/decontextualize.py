@@ -10,6 +10,7 @@ Backwards compatibility is not guaranteed at this time.
 
 import core.retriever as retriever
 from core.utils.trim import trim_json
+from core.utils.retrieved_item import RetrievedItem
 import json
 from core.prompts import PromptRunner
 from misc.logger.logging_config_helper import get_configured_logger
@@ -128,8 +129,7 @@ class ContextUrlDecontextualizer(PrevQueryDecontextualizer):
             await self.handler.state.precheck_step_done(self.STEP_NAME)
             return
         else:
-            (url, schema_json, name, site) = item
-            self.context_description = json.dumps(trim_json(schema_json))
+            self.context_description = json.dumps(trim_json(RetrievedItem.from_result(item).schema))
             self.handler.context_description = self.context_description
             response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, verbose=True)
             self.handler.requires_decontextualization = True
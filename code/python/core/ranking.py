@@ -12,7 +12,7 @@ from core.utils.utils import log
 from core.llm import ask_llm
 import asyncio
 import json
-from core.utils.json_utils import trim_json
+from core.utils.retrieved_item import RetrievedItem
 from core.prompts import find_prompt, fill_prompt
 from misc.logger.logging_config_helper import get_configured_logger
 
@@ -62,7 +62,8 @@ The user's question is: {request.query}. The item's description is {item.descrip
         self.ranking_type = ranking_type
         self._results_lock = asyncio.Lock()  # Add lock for thread-safe operations
 
-    async def rankItem(self, url, json_str, name, site):
+    async def rankItem(self, item):
+        url, name, site = item.url, item.name, item.site
         if not self.handler.connection_alive_event.is_set():
             logger.warning("Connection lost, skipping item ranking")
             return
@@ -73,7 +74,8 @@ The user's question is: {request.query}. The item's description is {item.descrip
         try:
             logger.debug(f"Ranking item: {name} from {site}")
             prompt_str, ans_struc = self.get_ranking_prompt()
-            description = trim_json(json_str)
+            # Pre-trimmed at ingestion when the backend stores it
+            description = item.text_for_ranking()
             prompt = fill_prompt(prompt_str, self.handler, {"item.description": description})
             
             logger.debug(f"Sending ranking request to LLM for item: {name}")
@@ -81,12 +83,8 @@ The user's question is: {request.query}. The item's description is {item.descrip
             logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
             
             
-            # Handle both string and dictionary inputs for json_str
-            schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
-            
-            # If schema_object is an array, set it to the first item
-            if isinstance(schema_object, list) and len(schema_object) > 0:
-                schema_object = schema_object[0]
+            # Parsed once per item and shared with the trimmed description above
+            schema_object = item.schema_object
             
             ansr = {
                 'url': url,
@@ -214,7 +212,8 @@ The user's question is: {request.query}. The item's description is {item.descrip
     async def sendMessageOnSitesBeingAsked(self, top_embeddings):
         if (self.handler.site == "all" or self.handler.site == "nlws"):
             sites_in_embeddings = {}
-            for url, json_str, name, site in top_embeddings:
+            for item in top_embeddings:
+                site = item.site
                 sites_in_embeddings[site] = sites_in_embeddings.get(site, 0) + 1
             
             top_sites = sorted(sites_in_embeddings.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -230,35 +229,76 @@ The user's question is: {request.query}. The item's description is {item.descrip
                 logger.warning("Client disconnected when sending sites message")
                 self.handler.connection_alive_event.clear()
     
+    async def rankLateItems(self, late_results, seen_urls):
+        try:
+            late_items = await late_results
+        except Exception as e:
+            logger.warning(f"Late retrieval results unavailable: {str(e)}")
+            return
+        
+        late_items = [RetrievedItem.from_result(item) for item in late_items]
+        late_items = [item for item in late_items if item.url not in seen_urls]
+        logger.info(f"Ranking {len(late_items)} late retrieval results")
+        
+        tasks = []
+        for item in late_items:
+            if not self.handler.connection_alive_event.is_set():
+                logger.warning("Connection lost, not ranking late results")
+                break
+            tasks.append(asyncio.create_task(self.rankItem(item)))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     async def do(self):
         logger.info(f"Starting ranking process with {len(self.items)} items")
         tasks = []
-        for url, json_str, name, site in self.items:
+        items = [RetrievedItem.from_result(item) for item in self.items]
+        for item in items:
             if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
+                tasks.append(asyncio.create_task(self.rankItem(item)))
             else:
                 logger.warning("Connection lost, not creating new ranking tasks")
-       
-        await self.sendMessageOnSitesBeingAsked(self.items)
 
+        # Results from endpoints that missed the retrieval deadline are ranked as a second wave,
+        # which is only waited for once the first wave's results are sent
+        late_results = getattr(self.items, 'late_results', None)
+        late_wave = None
+        if late_results is not None:
+            late_wave = asyncio.create_task(self.rankLateItems(late_results, {item.url for item in items}))
+       
         try:
-            logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
-            await asyncio.gather(*tasks, return_exceptions=True)
-        except Exception as e:
-            logger.error(f"Error during ranking tasks: {str(e)}")
-            log(f"Error during ranking tasks: {str(e)}")
+            await self.sendMessageOnSitesBeingAsked(items)
 
+            try:
+                logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
+                await asyncio.gather(*tasks, return_exceptions=True)
+            except Exception as e:
+                logger.error(f"Error during ranking tasks: {str(e)}")
+                log(f"Error during ranking tasks: {str(e)}")
+
+            if not await self.sendFinalAnswers() or late_wave is None:
+                return
+            await late_wave
+            await self.sendFinalAnswers()
+        finally:
+            if late_wave is not None and not late_wave.done():
+                late_wave.cancel()
+
+    async def sendFinalAnswers(self):
+        """
+        Send the best ranked answers that were not sent early. Returns False if the connection
+        was lost or the fast track was aborted, and nothing more should be sent.
+        """
         if not self.handler.connection_alive_event.is_set():
             logger.warning("Connection lost during ranking, skipping sending results")
             log("Connection lost during ranking, skipping sending results")
-            return
+            return False
 
         # Wait for pre checks using event
         await self.handler.pre_checks_done_event.wait()
         
         if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
             logger.info("Fast track aborted after ranking tasks completed")
-            return
+            return False
     
         filtered = [r for r in self.rankedAnswers if r['ranking']['score'] > 51]
         ranked = sorted(filtered, key=lambda x: x['ranking']["score"], reverse=True)
@@ -270,7 +310,7 @@ The user's question is: {request.query}. The item's description is {item.descrip
         results = [r for r in self.rankedAnswers if r['sent'] == False]
         if (self.num_results_sent > self.NUM_RESULTS_TO_SEND):
             logger.info(f"Already sent {self.num_results_sent} results, returning without sending more")
-            return
+            return True
        
         # Sort by score in descending order
         sorted_results = sorted(results, key=lambda x: x['ranking']["score"], reverse=True)
@@ -280,7 +320,7 @@ The user's question is: {request.query}. The item's description is {item.descrip
         remaining_slots = self.NUM_RESULTS_TO_SEND - self.num_results_sent
         if remaining_slots <= 0:
             logger.info(f"Already sent {self.num_results_sent} results, at or above limit of {self.NUM_RESULTS_TO_SEND}")
-            return
+            return True
             
         if len(good_results) >= remaining_slots:
             tosend = good_results[:remaining_slots]
@@ -294,6 +334,7 @@ The user's question is: {request.query}. The item's description is {item.descrip
             logger.error("Client disconnected during final answer sending")
             log("Client disconnected during final answer sending")
             self.handler.connection_alive_event.clear()
+        return self.handler.connection_alive_event.is_set()
 
     def prettyPrintSite(self, site):
         ans = site.replace("_", " ")
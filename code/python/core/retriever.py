@@ -9,10 +9,9 @@ This module provides abstract base classes and concrete implementations for data
 import os
 import time
 import asyncio
-import subprocess
 import sys
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Union, Tuple, Type
+from typing import List, Dict, Any, Optional, Union, Tuple, Type, AsyncIterator
 import json
 
 from core.config import CONFIG
@@ -20,6 +19,13 @@ from core.utils.utils import get_param
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 from core.utils.json_utils import merge_json_array
+from core.utils.retrieved_item import RetrievedItem
+from core.utils.latency import LatencyTracker
+from core.utils.circuit_breaker import get_breaker, register_probe
+from core.utils.cancellation import guarded, RETRIEVAL
+from core.utils.dependencies import import_timed, require_packages
+from core.sharding import Shard, get_router
+from core.embedding import batch_get_embeddings
 
 logger = get_configured_logger("retriever")
 
@@ -27,109 +33,115 @@ logger = get_configured_logger("retriever")
 _client_cache = {}
 _client_cache_lock = asyncio.Lock()
 
-# Preloaded client modules
+# Client classes loaded so far, by database type
 _preloaded_modules = {}
 
+# Recent per-endpoint search latencies, used to derive hedge delays
+_endpoint_latency = LatencyTracker()
+
+
+class SearchResults(list):
+    """
+    List of search results, optionally carrying a second wave of results from
+    endpoints that missed the search deadline. `late_results` is an asyncio.Task
+    resolving to additional RetrievedItems not in the first wave.
+    """
+    
+    def __init__(self, results=(), late_results: Optional[asyncio.Task] = None):
+        super().__init__(results)
+        self.late_results = late_results
+
 def init():
     """Initialize retrieval clients based on configuration."""
-    # Preload modules for enabled endpoints
+    # Load the client classes of enabled endpoints, and no others
+    for db_type in enabled_db_types():
+        try:
+            _load_client_class(db_type)
+        except Exception as e:
+            logger.warning(f"Failed to preload {db_type} client module: {e}")
+    
+    # Register background health probes so ejected endpoints (and their replicas) can recover
     for endpoint_name, endpoint_config in CONFIG.retrieval_endpoints.items():
-        if endpoint_config.enabled and endpoint_config.db_type:
-            db_type = endpoint_config.db_type
-            try:
-                # Ensure packages are installed
-                _ensure_package_installed(db_type)
-                
-                # Preload the module
-                if db_type == "azure_ai_search":
-                    from retrieval_providers.azure_search_client import AzureSearchClient
-                    _preloaded_modules[db_type] = AzureSearchClient
-                elif db_type == "milvus":
-                    from retrieval_providers.milvus_client import MilvusVectorClient
-                    _preloaded_modules[db_type] = MilvusVectorClient
-                elif db_type == "opensearch":
-                    from retrieval_providers.opensearch_client import OpenSearchClient
-                    _preloaded_modules[db_type] = OpenSearchClient
-                elif db_type == "qdrant":
-                    from retrieval_providers.qdrant import QdrantVectorClient
-                    _preloaded_modules[db_type] = QdrantVectorClient
-                elif db_type == "snowflake_cortex_search":
-                    from retrieval_providers.snowflake_client import SnowflakeCortexSearchClient
-                    _preloaded_modules[db_type] = SnowflakeCortexSearchClient
-                elif db_type == "elasticsearch":
-                    from retrieval_providers.elasticsearch_client import ElasticsearchClient
-                    _preloaded_modules[db_type] = ElasticsearchClient
-                elif db_type == "postgres":
-                    from retrieval_providers.postgres_client import PgVectorClient
-                    _preloaded_modules[db_type] = PgVectorClient
-                elif db_type == "shopify_mcp":
-                    from retrieval_providers.shopify_mcp import ShopifyMCPClient
-                    _preloaded_modules[db_type] = ShopifyMCPClient
-                
-            except Exception as e:
-                logger.warning(f"Failed to preload {db_type} client module: {e}")
+        if endpoint_config.enabled:
+            for name in [endpoint_name] + endpoint_config.replicas:
+                register_probe("retrieval", name, lambda name=name: _probe_endpoint(name))
+
+
+def _endpoint_breaker(endpoint_name: str):
+    """Get the circuit breaker guarding a retrieval endpoint."""
+    return get_breaker("retrieval", endpoint_name, CONFIG.retrieval_circuit_breaker)
 
-# Mapping of database types to their required pip packages
+
+async def _probe_endpoint(endpoint_name: str):
+    """Cheap health check for a retrieval endpoint: list its sites."""
+    client = await VectorDBClient(endpoint_name=endpoint_name).get_client(endpoint_name)
+    await client.get_sites()
+
+# Module and class of the client for each database type. Only the modules of enabled
+# endpoints are imported, since each pulls in a database SDK.
+_client_classes = {
+    "azure_ai_search": ("retrieval_providers.azure_search_client", "AzureSearchClient"),
+    "milvus": ("retrieval_providers.milvus_client", "MilvusVectorClient"),
+    "opensearch": ("retrieval_providers.opensearch_client", "OpenSearchClient"),
+    "qdrant": ("retrieval_providers.qdrant", "QdrantVectorClient"),
+    "snowflake_cortex_search": ("retrieval_providers.snowflake_client", "SnowflakeCortexSearchClient"),
+    "elasticsearch": ("retrieval_providers.elasticsearch_client", "ElasticsearchClient"),
+    "postgres": ("retrieval_providers.postgres_client", "PgVectorClient"),
+    "shopify_mcp": ("retrieval_providers.shopify_mcp", "ShopifyMCPClient"),
+}
+
+# Packages each database type needs, as {pip requirement: module}
 _db_type_packages = {
-    "azure_ai_search": ["azure-core", "azure-search-documents>=11.4.0"],
-    "milvus": ["pymilvus>=1.1.0", "numpy"],
-    "opensearch": ["httpx>=0.28.1"],
-    "qdrant": ["qdrant-client>=1.14.0"],
-    "snowflake_cortex_search": ["httpx>=0.28.1"],
-    "elasticsearch": ["elasticsearch[async]>=8,<9"],
-    "postgres": ["psycopg", "psycopg[binary]>=3.1.12", "psycopg[pool]>=3.2.0", "pgvector>=0.4.0"],
-    "shopify_mcp": ["aiohttp>=3.8.0"],
+    "azure_ai_search": {"azure-core>=1.30.0": "azure.core", "azure-search-documents>=11.4.0": "azure.search.documents"},
+    "milvus": {"pymilvus>=1.1.0": "pymilvus", "numpy": "numpy"},
+    "opensearch": {"httpx>=0.28.1": "httpx"},
+    "qdrant": {"qdrant-client>=1.14.0": "qdrant_client"},
+    "snowflake_cortex_search": {"httpx>=0.28.1": "httpx"},
+    "elasticsearch": {"elasticsearch[async]>=8,<9": "elasticsearch"},
+    "postgres": {"psycopg[binary]>=3.1.12": "psycopg", "psycopg[pool]>=3.2.0": "psycopg_pool", "pgvector>=0.4.0": "pgvector"},
+    "shopify_mcp": {"aiohttp>=3.8.0": "aiohttp"},
 }
 
-# Cache for installed packages
-_installed_packages = set()
 
-def _ensure_package_installed(db_type: str):
+def enabled_db_types() -> List[str]:
+    """Database types of the enabled retrieval endpoints and their replicas."""
+    db_types = []
+    for endpoint_config in CONFIG.retrieval_endpoints.values():
+        if not endpoint_config.enabled:
+            continue
+        for config in [endpoint_config] + [CONFIG.retrieval_endpoints[name] for name in endpoint_config.replicas
+                                           if name in CONFIG.retrieval_endpoints]:
+            if config.db_type and config.db_type not in db_types:
+                db_types.append(config.db_type)
+    return db_types
+
+
+def _load_client_class(db_type: str) -> Type["VectorDBClientInterface"]:
     """
-    Ensure the required packages for a database type are installed.
+    Import and cache the client class for a database type.
     
-    Args:
-        db_type: The type of database backend
+    Raises:
+        ValueError: If the type is unknown, or its packages are not installed
     """
-    if db_type not in _db_type_packages:
-        return
+    if db_type in _preloaded_modules:
+        return _preloaded_modules[db_type]
+    if db_type not in _client_classes:
+        error_msg = f"Unsupported database type: {db_type}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    # Fail fast on missing packages instead of installing them while serving a request
+    require_packages("retrieval", db_type, _db_type_packages.get(db_type, {}))
     
-    packages = _db_type_packages[db_type]
-    for package in packages:
-        # Extract package name without version for caching
-        package_name = package.split(">=")[0].split("==")[0].split("[")[0]
-        
-        if package_name in _installed_packages:
-            continue
-            
-        try:
-            # Try to import the package first
-            if package_name == "azure-core":
-                __import__("azure.core")
-            elif package_name == "azure-search-documents":
-                __import__("azure.search.documents")
-            elif package_name == "qdrant-client":
-                __import__("qdrant_client")
-            elif package_name == "elasticsearch":
-                __import__("elasticsearch")
-            elif package_name == "psycopg":
-                __import__("psycopg")
-            else:
-                __import__(package_name)
-            _installed_packages.add(package_name)
-            logger.debug(f"Package {package_name} is already installed")
-        except ImportError:
-            # Package not installed, install it
-            logger.info(f"Installing {package} for {db_type} backend...")
-            try:
-                subprocess.check_call([
-                    sys.executable, "-m", "pip", "install", package, "--quiet"
-                ])
-                _installed_packages.add(package_name)
-                logger.info(f"Successfully installed {package}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to install {package}: {e}")
-                raise ValueError(f"Failed to install required package {package} for {db_type}")
+    module_name, class_name = _client_classes[db_type]
+    try:
+        import_time = import_timed(module_name)
+    except ImportError as e:
+        logger.error(f"Failed to import client for {db_type}: {e}")
+        raise ValueError(f"Failed to load client for {db_type}: {e}")
+    if import_time:
+        logger.info(f"Imported {module_name} for {db_type} endpoints in {import_time * 1000:.0f} ms")
+    _preloaded_modules[db_type] = getattr(sys.modules[module_name], class_name)
+    return _preloaded_modules[db_type]
 
 
 class VectorDBClientInterface(ABC):
@@ -183,6 +195,25 @@ class VectorDBClientInterface(ABC):
         """
         pass
     
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          embeddings: Optional[List[List[float]]] = None, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for several queries at once. Backends with a multi-search API override this to
+        send all queries in one request, using the precomputed embeddings if given. The default
+        implementation runs search() for each query concurrently.
+        
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites, the same for all queries
+            num_results: Maximum number of results to return per query
+            embeddings: Optional embeddings of the queries, in the same order
+            **kwargs: Additional parameters
+            
+        Returns:
+            The results of each query, in the order of queries
+        """
+        return list(await asyncio.gather(*(self.search(query, site, num_results, **kwargs) for query in queries)))
+    
     @abstractmethod
     async def search_by_url(self, url: str, **kwargs) -> Optional[List[str]]:
         """
@@ -227,6 +258,52 @@ class VectorDBClientInterface(ABC):
             The default implementation returns None.
         """
         return None
+    
+    async def delete_documents_by_ids(self, site: str, ids: List[str], **kwargs) -> int:
+        """
+        Delete documents of a site by their IDs (the "id" field they were uploaded with).
+        Used to remove documents that vanished from a source when it is re-loaded.
+        
+        Args:
+            site: Site identifier the documents belong to
+            ids: Document IDs
+            **kwargs: Additional parameters
+            
+        Returns:
+            Number of documents deleted
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting documents by ID")
+    
+    async def delete_replaced_documents(self, site: str, ids_by_url: Dict[str, str], **kwargs) -> int:
+        """
+        Delete documents of a site that have one of the given URLs but are stored under
+        another ID than the one given for it: versions loaded under an earlier ID scheme.
+        
+        Args:
+            site: Site identifier the documents belong to
+            ids_by_url: The current document ID of each URL
+            **kwargs: Additional parameters
+            
+        Returns:
+            Number of documents deleted
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting replaced documents")
+    
+    async def export_documents(self, site: str, batch_size: int = 100, **kwargs) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Read back all documents of a site, with their embeddings, in the format
+        upload_documents takes. Used to move sites between shards.
+        
+        Args:
+            site: Site identifier
+            batch_size: Documents per batch
+            **kwargs: Additional parameters
+            
+        Yields:
+            Batches of documents
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support exporting documents")
+        yield
 
 
 class VectorDBClient:
@@ -297,7 +374,8 @@ class VectorDBClient:
                 else:
                     logger.warning(f"Endpoint {name} is enabled but missing required credentials, skipping")
             
-            if not self.enabled_endpoints:
+            # With sharding, the shards' endpoints are enough
+            if not self.enabled_endpoints and not get_router():
                 error_msg = "No enabled retrieval endpoints with valid credentials found"
                 logger.error(error_msg)
                 # Debug: show which endpoints were checked and why they were skipped
@@ -313,6 +391,21 @@ class VectorDBClient:
             
             logger.info(f"VectorDBClient initialized with {len(self.enabled_endpoints)} enabled endpoints: {list(self.enabled_endpoints.keys())}")
         
+        # Replica endpoints only receive hedged duplicates of slow requests, so they
+        # don't need to be enabled themselves
+        self.replica_endpoints = {}
+        for name, config in self.enabled_endpoints.items():
+            for replica_name in config.replicas:
+                if replica_name in self.enabled_endpoints or replica_name in self.replica_endpoints:
+                    continue
+                replica_config = CONFIG.retrieval_endpoints.get(replica_name)
+                if replica_config is None:
+                    logger.warning(f"Replica '{replica_name}' of endpoint {name} is not configured, ignoring")
+                elif not self._has_valid_credentials(replica_name, replica_config):
+                    logger.warning(f"Replica '{replica_name}' of endpoint {name} is missing required credentials, ignoring")
+                else:
+                    self.replica_endpoints[replica_name] = replica_config
+        
         # Validate write endpoint if configured
         self.write_endpoint = CONFIG.write_endpoint
         if self.write_endpoint:
@@ -327,6 +420,18 @@ class VectorDBClient:
         else:
             logger.warning("No write endpoint configured - write operations will fail")
         
+        # With sharding, sites are routed to shards unless a specific endpoint was requested.
+        # Shard endpoints are only queried through their shards, so they needn't be enabled.
+        self.router = None if endpoint_name else get_router()
+        self.shard_endpoints = {}
+        if self.router:
+            for shard in self.router.shards.values():
+                shard_config = CONFIG.retrieval_endpoints[shard.endpoint]
+                if self._has_valid_credentials(shard.endpoint, shard_config):
+                    self.shard_endpoints[shard.endpoint] = shard_config
+                else:
+                    logger.warning(f"Endpoint {shard.endpoint} of shard {shard.name} is missing required credentials")
+        
         self._retrieval_lock = asyncio.Lock()
         
         # Cache for endpoint sites - will be populated lazily
@@ -448,10 +553,15 @@ class VectorDBClient:
         Returns:
             Appropriate vector database client
         """
-        if endpoint_name not in self.enabled_endpoints:
+        if endpoint_name in self.enabled_endpoints:
+            config = self.enabled_endpoints[endpoint_name]
+        elif endpoint_name in self.replica_endpoints:
+            config = self.replica_endpoints[endpoint_name]
+        elif endpoint_name in self.shard_endpoints:
+            config = self.shard_endpoints[endpoint_name]
+        else:
             raise ValueError(f"Endpoint {endpoint_name} is not in enabled endpoints")
             
-        config = self.enabled_endpoints[endpoint_name]
         db_type = config.db_type
         
         # Use cache key combining db_type and endpoint
@@ -462,54 +572,15 @@ class VectorDBClient:
             if cache_key in _client_cache:
                 return _client_cache[cache_key]
             
-            # Ensure required packages are installed
-            _ensure_package_installed(db_type)
-            
-            # Create the appropriate client with dynamic imports
+            # Create the appropriate client, importing its module on first use
             logger.debug(f"Creating new client for {db_type} with endpoint {endpoint_name}")
-            
-            try:
-                # Use preloaded module if available, otherwise load on demand
-                if db_type in _preloaded_modules:
-                    client_class = _preloaded_modules[db_type]
-                    client = client_class(endpoint_name)
-                elif db_type == "azure_ai_search":
-                    from retrieval_providers.azure_search_client import AzureSearchClient
-                    client = AzureSearchClient(endpoint_name)
-                elif db_type == "milvus":
-                    from retrieval_providers.milvus_client import MilvusVectorClient
-                    client = MilvusVectorClient(endpoint_name)
-                elif db_type == "opensearch":
-                    from retrieval_providers.opensearch_client import OpenSearchClient
-                    client = OpenSearchClient(endpoint_name)
-                elif db_type == "qdrant":
-                    from retrieval_providers.qdrant import QdrantVectorClient
-                    client = QdrantVectorClient(endpoint_name)
-                elif db_type == "snowflake_cortex_search":
-                    from retrieval_providers.snowflake_client import SnowflakeCortexSearchClient
-                    client = SnowflakeCortexSearchClient(endpoint_name)
-                elif db_type == "elasticsearch":
-                    from retrieval_providers.elasticsearch_client import ElasticsearchClient
-                    client = ElasticsearchClient(endpoint_name)
-                elif db_type == "postgres":
-                    from retrieval_providers.postgres_client import PgVectorClient
-                    client = PgVectorClient(endpoint_name)
-                elif db_type == "shopify_mcp":
-                    from retrieval_providers.shopify_mcp import ShopifyMCPClient
-                    client = ShopifyMCPClient(endpoint_name)
-                else:
-                    error_msg = f"Unsupported database type: {db_type}"
-                    logger.error(error_msg)
-                    raise ValueError(error_msg)
-            except ImportError as e:
-                logger.error(f"Failed to import client for {db_type}: {e}")
-                raise ValueError(f"Failed to load client for {db_type}: {e}")
+            client = _load_client_class(db_type)(endpoint_name)
             
             # Store in cache and return
             _client_cache[cache_key] = client
             return client
     
-    def _deduplicate_by_url(self, results: List[List[str]]) -> List[List[str]]:
+    def _deduplicate_by_url(self, results: List[RetrievedItem]) -> List[RetrievedItem]:
         """
         Deduplicate search results by URL, keeping the entry with longer content.
         
@@ -522,24 +593,22 @@ class VectorDBClient:
         url_to_result = {}
         
         for result in results:
-            # Assuming result format is [url, title, content, ...]
-            if len(result) >= 3:
-                url = result[0]
-                content = result[2] if len(result) > 2 else ""
-                
-                # If URL not seen before or current content is longer, keep it
-                if url not in url_to_result or len(content) > len(url_to_result[url][2]):
-                    url_to_result[url] = result
+            item = RetrievedItem.from_result(result)
+            # If URL not seen before or current content is longer, keep it
+            seen = url_to_result.get(item.url)
+            if seen is None or len(item.json_str) > len(seen.json_str):
+                url_to_result[item.url] = item
         
         # Return deduplicated results
         return list(url_to_result.values())
     
-    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]]) -> List[List[str]]:
+    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]]) -> List[RetrievedItem]:
         """
         Aggregate results from multiple endpoints, merging JSON data for duplicate URLs.
         
-        When the same URL appears in multiple endpoints, the JSON data (second element)
-        from each source is merged into a single array.
+        When the same URL appears in multiple endpoints, the JSON data from each source
+        is merged into a single object. Results from the backends are wrapped in
+        RetrievedItems here, so later stages parse each item's JSON at most once.
         
         Args:
             endpoint_results: Dictionary mapping endpoint names to their results
@@ -547,82 +616,50 @@ class VectorDBClient:
         Returns:
             Aggregated results with merged JSON for duplicate URLs
         """
-        # Dictionary to store aggregated data by URL
-        # Format: {url: {"result": [url, json_array, name, site], "sources": [json1, json2...]}}
-        url_to_data = {}
+        # Items for each URL, in the order the endpoints returned them
+        url_to_items: Dict[str, List[RetrievedItem]] = {}
+        endpoint_items: Dict[str, List[RetrievedItem]] = {}
         
         # First pass: collect all results and group by URL
         for endpoint_name, results in endpoint_results.items():
             if results:
                 logger.debug(f"Got {len(results)} results from {endpoint_name}")
-                
+                items = []
                 for result in results:
                     if len(result) >= 4:  # Ensure we have [url, json, name, site]
-                        url = result[0]
-                        json_data = result[1]
-                        name = result[2]
-                        site = result[3]
-                        
-                        if url not in url_to_data:
-                            # First occurrence of this URL
-                            url_to_data[url] = {
-                                "url": url,
-                                "json_list": [json_data] if json_data else [],
-                                "name": name,
-                                "site": site,
-                                "first_endpoint": endpoint_name
-                            }
-                        else:
-                            # URL already seen, append JSON data
-                            if json_data:
-                                url_to_data[url]["json_list"].append(json_data)
-        
-        # Second pass: build final results maintaining order from first endpoint
-        # We'll interleave to preserve relevance ordering
+                        item = RetrievedItem.from_result(result)
+                        items.append(item)
+                        url_to_items.setdefault(item.url, []).append(item)
+                endpoint_items[endpoint_name] = items
+        
+        # Second pass: build final results, interleaving endpoints to preserve relevance ordering
         final_results = []
         seen_urls = set()
+        iterators = {name: iter(items) for name, items in endpoint_items.items()}
         
-        # Create iterators for each endpoint's results
-        iterators = {}
-        for endpoint_name, results in endpoint_results.items():
-            if results:
-                iterators[endpoint_name] = iter(results)
-        
-        # Interleave results to maintain relevance ordering
         while iterators:
             endpoints_to_remove = []
             
             for endpoint_name, iterator in iterators.items():
-                try:
-                    result = next(iterator)
-                    if len(result) >= 1:
-                        url = result[0]
-                        if url and url not in seen_urls:
-                            seen_urls.add(url)
-                            # Get the aggregated data for this URL
-                            data = url_to_data.get(url)
-                            if data:
-                                # Merge JSON data if multiple sources
-                                json_list = data["json_list"]
-                                if len(json_list) > 1:
-                                    # Multiple sources - merge them
-                                    merged_json = merge_json_array(json_list)
-                                    # Convert back to JSON string
-                                    merged_json_str = json.dumps(merged_json)
-                                else:
-                                    # Single source - use as is
-                                    merged_json_str = json_list[0] if json_list else "{}"
-                                
-                                # Create result with merged JSON
-                                merged_result = [
-                                    data["url"],
-                                    merged_json_str,  # Single merged JSON string
-                                    data["name"],
-                                    data["site"]
-                                ]
-                                final_results.append(merged_result)
-                except StopIteration:
+                item = next(iterator, None)
+                if item is None:
                     endpoints_to_remove.append(endpoint_name)
+                    continue
+                if not item.url or item.url in seen_urls:
+                    continue
+                seen_urls.add(item.url)
+                
+                # Merge JSON data if the URL came from multiple sources
+                sources = [i for i in url_to_items[item.url] if i.json_str]
+                if len(sources) > 1:
+                    first = sources[0]
+                    merged_json = merge_json_array([i.schema for i in sources])
+                    item = RetrievedItem.from_schema(first.url, merged_json, first.name, first.site, first.score)
+                elif sources:
+                    item = sources[0]
+                else:
+                    item = RetrievedItem(item.url, "{}", item.name, item.site, item.score)
+                final_results.append(item)
             
             # Remove exhausted iterators
             for endpoint in endpoints_to_remove:
@@ -645,15 +682,17 @@ class VectorDBClient:
         Returns:
             Number of documents deleted
         """
-        if not self.write_endpoint:
+        if not self.write_endpoint and not self.router:
             raise ValueError("No write endpoint configured for delete operations")
             
         async with self._retrieval_lock:
-            logger.info(f"Deleting documents for site: {site} using write endpoint: {self.write_endpoint}")
-            
             try:
-                client = await self.get_client(self.write_endpoint)
-                count = await client.delete_documents_by_site(site, **kwargs)
+                if self.router:
+                    count = await self._delete_from_shards(site, **kwargs)
+                else:
+                    logger.info(f"Deleting documents for site: {site} using write endpoint: {self.write_endpoint}")
+                    client = await self.get_client(self.write_endpoint)
+                    count = await client.delete_documents_by_site(site, **kwargs)
                 logger.info(f"Successfully deleted {count} documents for site: {site}")
                 return count
             except Exception as e:
@@ -681,15 +720,17 @@ class VectorDBClient:
         Returns:
             Number of documents uploaded
         """
-        if not self.write_endpoint:
+        if not self.write_endpoint and not self.router:
             raise ValueError("No write endpoint configured for upload operations")
             
         async with self._retrieval_lock:
-            logger.info(f"Uploading {len(documents)} documents to write endpoint: {self.write_endpoint}")
-            
             try:
-                client = await self.get_client(self.write_endpoint)
-                count = await client.upload_documents(documents, **kwargs)
+                if self.router:
+                    count = await self._upload_to_shards(documents, **kwargs)
+                else:
+                    logger.info(f"Uploading {len(documents)} documents to write endpoint: {self.write_endpoint}")
+                    client = await self.get_client(self.write_endpoint)
+                    count = await client.upload_documents(documents, **kwargs)
                 logger.info(f"Successfully uploaded {count} documents")
                 return count
             except Exception as e:
@@ -706,11 +747,145 @@ class VectorDBClient:
                 )
                 raise
     
+    async def delete_documents_by_ids(self, site: str, ids: List[str], **kwargs) -> int:
+        """
+        Delete documents of a site by their IDs.
+        
+        Args:
+            site: Site identifier the documents belong to
+            ids: Document IDs
+            **kwargs: Additional parameters
+            
+        Returns:
+            Number of documents deleted
+        """
+        if not self.write_endpoint and not self.router:
+            raise ValueError("No write endpoint configured for delete operations")
+        if not ids:
+            return 0
+        
+        async with self._retrieval_lock:
+            if self.router:
+                shards = [(shard.endpoint, self.router.collection_kwargs(shard)) for shard in self.router.write_shards(site)]
+            else:
+                shards = [(self.write_endpoint, {})]
+            counts = []
+            for endpoint, collection_kwargs in shards:
+                client = await self.get_client(endpoint)
+                logger.info(f"Deleting {len(ids)} documents of site: {site} from endpoint: {endpoint}")
+                counts.append(await client.delete_documents_by_ids(site, ids, **collection_kwargs, **kwargs))
+            logger.info(f"Successfully deleted {counts[0]} documents of site: {site}")
+            return counts[0]
+    
+    async def delete_replaced_documents(self, site: str, ids_by_url: Dict[str, str], **kwargs) -> int:
+        """
+        Delete documents of a site stored under another ID than the current one of their URL.
+        
+        Args:
+            site: Site identifier the documents belong to
+            ids_by_url: The current document ID of each URL
+            **kwargs: Additional parameters
+            
+        Returns:
+            Number of documents deleted
+        """
+        if not self.write_endpoint and not self.router:
+            raise ValueError("No write endpoint configured for delete operations")
+        if not ids_by_url:
+            return 0
+        
+        async with self._retrieval_lock:
+            if self.router:
+                shards = [(shard.endpoint, self.router.collection_kwargs(shard)) for shard in self.router.write_shards(site)]
+            else:
+                shards = [(self.write_endpoint, {})]
+            counts = []
+            for endpoint, collection_kwargs in shards:
+                client = await self.get_client(endpoint)
+                counts.append(await client.delete_replaced_documents(site, ids_by_url, **collection_kwargs, **kwargs))
+            logger.info(f"Deleted {counts[0]} replaced documents of site: {site}")
+            return counts[0]
+    
+    async def _delete_from_shards(self, site: str, **kwargs) -> int:
+        """Delete a site from its shards (both, while it is being migrated). Returns the count on the shard it is read from."""
+        counts = []
+        for shard in self.router.write_shards(site):
+            logger.info(f"Deleting documents for site: {site} from shard {shard.name}")
+            client = await self.get_client(shard.endpoint)
+            counts.append(await client.delete_documents_by_site(site, **self.router.collection_kwargs(shard), **kwargs))
+        return counts[0]
+    
+    async def _upload_to_shards(self, documents: List[Dict[str, Any]], **kwargs) -> int:
+        """
+        Upload documents to the shards of their sites (both shards, while a site is being
+        migrated). Returns the number uploaded to the shards the sites are read from.
+        """
+        # (shard, whether the documents' sites are read from it) -> documents
+        groups: Dict[Tuple[Shard, bool], List[Dict[str, Any]]] = {}
+        for doc in documents:
+            for i, shard in enumerate(self.router.write_shards(doc.get("site") or "")):
+                groups.setdefault((shard, i == 0), []).append(doc)
+        
+        async def _upload(shard: Shard, docs: List[Dict[str, Any]]) -> int:
+            logger.info(f"Uploading {len(docs)} documents to shard {shard.name}")
+            client = await self.get_client(shard.endpoint)
+            return await client.upload_documents(docs, **self.router.collection_kwargs(shard), **kwargs)
+        
+        counts = await asyncio.gather(*(_upload(shard, docs) for (shard, _), docs in groups.items()))
+        return sum(count for (_, primary), count in zip(groups, counts) if primary)
+    
+    def _search_targets(self, site: Union[str, List[str]],
+                        search_kwargs: Dict[str, Any]) -> List[Tuple[str, str, Union[str, List[str]], Dict[str, Any]]]:
+        """
+        The searches to run for a query, as (label, endpoint, site, kwargs): one per enabled
+        endpoint, except that with sharding, shard endpoints are searched once per shard
+        holding requested sites, for just those sites. A shard holding no other sites is
+        searched without a site filter.
+        """
+        targets = [(name, name, site, search_kwargs) for name in self.enabled_endpoints
+                   if name not in self.shard_endpoints]
+        if not self.router:
+            return targets
+        
+        if site == "all":
+            groups = {shard: "all" for shard in self.router.shards.values()}
+        else:
+            groups = {}
+            for shard, shard_sites in self.router.group_sites(site if isinstance(site, list) else [site]).items():
+                if self.router.is_dedicated(shard, shard_sites):
+                    groups[shard] = "all"
+                else:
+                    groups[shard] = shard_sites[0] if len(shard_sites) == 1 else shard_sites
+        for shard, shard_site in groups.items():
+            targets.append((f"shard:{shard.name}", shard.endpoint, shard_site,
+                            {**search_kwargs, **self.router.collection_kwargs(shard)}))
+        return targets
+    
+    @staticmethod
+    def _normalize_site(site: Union[str, List[str]]) -> Union[str, List[str]]:
+        """Resolve "all" to the configured sites, and split comma-separated site lists."""
+        # Handle configured sites
+        if site == "all":
+            sites = CONFIG.nlweb.sites
+            if sites and sites != "all":
+                # Use configured sites instead of "all"
+                site = sites
+        
+        # Process site parameter for consistency
+        if isinstance(site, str) and ',' in site:
+            site = site.replace('[', '').replace(']', '')
+            site = [s.strip() for s in site.split(',')]
+        elif isinstance(site, str):
+            site = site.replace(" ", "_")
+        return site
+    
     async def search(self, query: str, site: Union[str, List[str]], 
                     num_results: int = 50, endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
         """
         Search for documents matching the query and site.
         
+        The search is aborted if the current request is cancelled (see core.utils.cancellation).
+        
         Args:
             query: Search query string
             site: Site identifier or list of sites
@@ -721,83 +896,86 @@ class VectorDBClient:
         Returns:
             List of search results
         """
-        # Handle configured sites
-        if site == "all":
-            sites = CONFIG.nlweb.sites
-            if sites and sites != "all":
-                # Use configured sites instead of "all"
-                site = sites
+        return await guarded(RETRIEVAL, self._search(query, site, num_results, endpoint_name, **kwargs))
+    
+    async def _search(self, query: str, site: Union[str, List[str]], 
+                      num_results: int = 50, endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
+        site = self._normalize_site(site)
 
         # If specific endpoint is requested, use only that endpoint
         if endpoint_name:
             if endpoint_name not in CONFIG.retrieval_endpoints:
                 raise ValueError(f"Invalid endpoint: {endpoint_name}")
             temp_client = VectorDBClient(endpoint_name=endpoint_name)
-            return await temp_client.search(query, site, num_results, **kwargs)
-        
-        # Process site parameter for consistency
-        if isinstance(site, str) and ',' in site:
-            site = site.replace('[', '').replace(']', '')
-            site = [s.strip() for s in site.split(',')]
-        elif isinstance(site, str):
-            site = site.replace(" ", "_")
+            return await temp_client._search(query, site, num_results, **kwargs)
+
+        fan_out = CONFIG.retrieval_fan_out
 
         async with self._retrieval_lock:
             logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
             logger.info(f"Querying {len(self.enabled_endpoints)} enabled endpoints in parallel")
             start_time = time.time()
             
+            # The handler is only used by the Shopify MCP rewrite wrapper; other backends don't accept it
+            handler_for_rewrite = kwargs.pop('handler', None)
+            
             # Create tasks for parallel queries to endpoints that have the requested site
             tasks = []
             endpoint_names = []
             skipped_endpoints = []
+            ejected_endpoints = []
             
-            for endpoint_name in self.enabled_endpoints:
+            for label, endpoint_name, target_site, target_kwargs in self._search_targets(site, kwargs):
                 try:
-                    # Check if endpoint has data for the requested site
-                    if not await self._endpoint_has_site(endpoint_name, site):
+                    # Check if endpoint has data for the requested site (shards are chosen by site already)
+                    if endpoint_name not in self.shard_endpoints and not await self._endpoint_has_site(endpoint_name, site):
                         skipped_endpoints.append(endpoint_name)
                         continue
                     
-                    client = await self.get_client(endpoint_name)
+                    # Skip endpoints that have been ejected by their circuit breaker
+                    if not _endpoint_breaker(endpoint_name).allow_request():
+                        ejected_endpoints.append(label)
+                        continue
                     
-                    # Use search_all_sites if site is "all"
-                    if site == "all":
-                        task = asyncio.create_task(client.search_all_sites(query, num_results, **kwargs))
-                    else:
-                        # For Shopify MCP, always go through the rewrite wrapper
-                        if type(client).__name__ == 'ShopifyMCPClient':
-                            # Extract handler from kwargs for rewriting
-                            handler_for_rewrite = kwargs.pop('handler', None)  # Remove handler from kwargs
-                            # Use the rewrite wrapper for Shopify MCP
-                            task = asyncio.create_task(
-                                search_with_rewrite(client, query, site, num_results, handler_for_rewrite, **kwargs)
-                            )
-                        else:
-                            # Regular search for other backends
-                            # Remove handler from kwargs if present (some backends don't accept it)
-                            search_kwargs = kwargs.copy()
-                            search_kwargs.pop('handler', None)
-                            task = asyncio.create_task(client.search(query, site, num_results, **search_kwargs))
+                    task = asyncio.create_task(
+                        self._search_endpoint_hedged(endpoint_name, query, target_site, num_results,
+                                                     handler_for_rewrite, target_kwargs)
+                    )
                     tasks.append(task)
-                    endpoint_names.append(endpoint_name)
+                    endpoint_names.append(label)
                 except Exception as e:
-                    logger.warning(f"Failed to create search task for endpoint {endpoint_name}: {e}")
+                    logger.warning(f"Failed to create search task for endpoint {label}: {e}")
             
             if skipped_endpoints:
                 logger.debug(f"Skipped endpoints without site '{site}': {skipped_endpoints}")
+            if ejected_endpoints:
+                logger.warning(f"Skipped endpoints with open circuit breakers: {ejected_endpoints}")
             
             if not tasks:
                 raise ValueError("No valid endpoints available for search")
             
-            # Execute all searches in parallel and collect results
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Wait until the deadline, then keep waiting only if nothing useful has arrived yet.
+            # Each endpoint task is bounded by its own latency budget, so this always terminates.
+            task_to_endpoint = dict(zip(tasks, endpoint_names))
+            try:
+                done, pending = await asyncio.wait(tasks, timeout=fan_out.deadline)
+                while pending and not any(not t.exception() and t.result() is not None for t in done):
+                    newly_done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    done |= newly_done
+            except asyncio.CancelledError:
+                # Nobody is waiting for the results any more
+                for task in tasks:
+                    task.cancel()
+                raise
             
             # Process results and handle failures gracefully
             endpoint_results = {}
             successful_endpoints = 0
             
-            for endpoint_name, result in zip(endpoint_names, results):
+            for task, endpoint_name in task_to_endpoint.items():
+                if task not in done:
+                    continue
+                result = task.exception() or task.result()
                 if isinstance(result, Exception):
                     logger.warning(f"Search failed for endpoint {endpoint_name}: {result}")
                 elif result is None:
@@ -817,6 +995,20 @@ class VectorDBClient:
             # Results are already in relevance order from aggregation
             final_results = final_results[:num_results]
             
+            # Endpoints that missed the deadline keep running within their own budget;
+            # their results become a second wave instead of being dropped
+            late_results = None
+            late_endpoints = [task_to_endpoint[t] for t in pending]
+            if pending:
+                if fan_out.late_results_enabled:
+                    seen_urls = {result.url for result in final_results}
+                    late_results = asyncio.create_task(
+                        self._collect_late_results({t: task_to_endpoint[t] for t in pending}, seen_urls, num_results)
+                    )
+                else:
+                    for task in pending:
+                        task.cancel()
+            
             end_time = time.time()
             search_duration = end_time - start_time
             
@@ -827,12 +1019,243 @@ class VectorDBClient:
                     "duration": f"{search_duration:.2f}s",
                     "endpoints_queried": len(tasks),
                     "endpoints_succeeded": successful_endpoints,
+                    "endpoints_late": late_endpoints,
+                    "endpoints_ejected": ejected_endpoints,
                     "total_results": len(final_results),
                     "site": site
                 }
             )
             
-            return final_results
+            return SearchResults(final_results, late_results=late_results)
+    
+    async def _search_endpoint(self, endpoint_name: str, query: str, site: Union[str, List[str]],
+                               num_results: int, handler: Optional[Any], search_kwargs: Dict[str, Any]) -> List[List[str]]:
+        """
+        Run a single search against one endpoint, picking the right method for its backend.
+        
+        Args:
+            endpoint_name: Endpoint to query
+            query: Search query string
+            site: Site identifier or list of sites
+            num_results: Maximum number of results to return
+            handler: Optional handler, used for query rewriting on keyword backends
+            search_kwargs: Additional parameters for the backend
+            
+        Returns:
+            List of search results from the endpoint
+        """
+        client = await self.get_client(endpoint_name)
+        
+        # Use search_all_sites if site is "all"
+        if site == "all":
+            return await client.search_all_sites(query, num_results, **search_kwargs)
+        
+        # For Shopify MCP, always go through the rewrite wrapper
+        if type(client).__name__ == 'ShopifyMCPClient':
+            return await search_with_rewrite(client, query, site, num_results, handler, **search_kwargs)
+        
+        return await client.search(query, site, num_results, **search_kwargs)
+    
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          endpoint_name: Optional[str] = None, **kwargs) -> List[List[RetrievedItem]]:
+        """
+        Search for several queries at once, for callers that would otherwise call search()
+        once per query. The queries are embedded in one batch call, and each endpoint gets all
+        of them together: in a single multi-search request if its client has search_many,
+        concurrently otherwise.
+        
+        Endpoints are searched with the same latency budgets, hedging and circuit breakers as
+        in search(), but every endpoint is waited for (there is no deadline or second wave).
+        
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites, the same for all queries
+            num_results: Maximum number of results to return per query
+            endpoint_name: Optional endpoint name override
+            **kwargs: Additional parameters
+            
+        Returns:
+            The results of each query, in the order of queries
+        """
+        return await guarded(RETRIEVAL, self._search_many(queries, site, num_results, endpoint_name, **kwargs))
+    
+    async def _search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                           endpoint_name: Optional[str] = None, **kwargs) -> List[List[RetrievedItem]]:
+        if not queries:
+            return []
+        site = self._normalize_site(site)
+        
+        if endpoint_name:
+            if endpoint_name not in CONFIG.retrieval_endpoints:
+                raise ValueError(f"Invalid endpoint: {endpoint_name}")
+            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            return await temp_client._search_many(queries, site, num_results, **kwargs)
+        
+        async with self._retrieval_lock:
+            start_time = time.time()
+            targets = []
+            for label, target_endpoint, target_site, target_kwargs in self._search_targets(site, kwargs):
+                if target_endpoint not in self.shard_endpoints and not await self._endpoint_has_site(target_endpoint, site):
+                    continue
+                if not _endpoint_breaker(target_endpoint).allow_request():
+                    logger.warning(f"Skipping endpoint {label} with an open circuit breaker")
+                    continue
+                targets.append((label, target_endpoint, target_site, target_kwargs))
+            if not targets:
+                raise ValueError("No valid endpoints available for search")
+            
+            # Embed once for every endpoint that takes embeddings; if that fails, they embed the queries themselves
+            embeddings = None
+            clients = [await self.get_client(target_endpoint) for _, target_endpoint, _, _ in targets]
+            if any(hasattr(client, "search_many") for client in clients):
+                try:
+                    embeddings = await batch_get_embeddings(queries, query_params=kwargs.get("query_params"))
+                except Exception as e:
+                    logger.warning(f"Batch embedding of {len(queries)} queries failed, endpoints will embed them: {e}")
+            
+            outcomes = await asyncio.gather(*(
+                self._search_endpoint_hedged(target_endpoint, queries, target_site, num_results, embeddings,
+                                             target_kwargs, method=self._search_many_endpoint)
+                for _, target_endpoint, target_site, target_kwargs in targets
+            ), return_exceptions=True)
+            
+            endpoint_results = {}
+            for (label, _, _, _), outcome in zip(targets, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.warning(f"Batch search failed for endpoint {label}: {outcome}")
+                else:
+                    endpoint_results[label] = outcome
+            if not endpoint_results:
+                raise ValueError("All endpoint searches failed")
+            
+            results = [
+                self._aggregate_results({label: per_query[i] or [] for label, per_query in endpoint_results.items()})[:num_results]
+                for i in range(len(queries))
+            ]
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Batch search completed",
+                {
+                    "duration": f"{time.time() - start_time:.2f}s",
+                    "queries": len(queries),
+                    "endpoints_queried": len(targets),
+                    "endpoints_succeeded": len(endpoint_results),
+                    "total_results": sum(len(r) for r in results),
+                    "site": site
+                }
+            )
+            return results
+    
+    async def _search_many_endpoint(self, endpoint_name: str, queries: List[str], site: Union[str, List[str]],
+                                    num_results: int, embeddings: Optional[List[List[float]]],
+                                    search_kwargs: Dict[str, Any]) -> List[List[List[str]]]:
+        """Run several searches against one endpoint, natively if its client supports it."""
+        client = await self.get_client(endpoint_name)
+        if hasattr(client, "search_many"):
+            return await client.search_many(queries, site, num_results, embeddings=embeddings, **search_kwargs)
+        return list(await asyncio.gather(*(
+            self._search_endpoint(endpoint_name, query, site, num_results, None, search_kwargs) for query in queries
+        )))
+    
+    async def _search_endpoint_with_budget(self, endpoint_name: str, *args, method=None) -> List[List[str]]:
+        """
+        Search one endpoint within its latency budget, recording the observed latency and
+        reporting the outcome to the endpoint's circuit breaker.
+        Timeouts are recorded at the budget so that slow endpoints push up their percentiles.
+        `method` is the per-endpoint search to run (_search_endpoint if unset).
+        """
+        method = method or self._search_endpoint
+        endpoint_config = (self.enabled_endpoints.get(endpoint_name) or self.replica_endpoints.get(endpoint_name)
+                           or self.shard_endpoints.get(endpoint_name))
+        budget = (endpoint_config.timeout if endpoint_config and endpoint_config.timeout
+                  else CONFIG.retrieval_fan_out.endpoint_timeout)
+        
+        breaker = _endpoint_breaker(endpoint_name)
+        start_time = time.time()
+        try:
+            result = await asyncio.wait_for(method(endpoint_name, *args), timeout=budget)
+        except asyncio.TimeoutError:
+            _endpoint_latency.record(endpoint_name, budget)
+            error = TimeoutError(f"Endpoint {endpoint_name} exceeded its {budget}s latency budget")
+            breaker.record_failure(error)
+            raise error
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        latency = time.time() - start_time
+        _endpoint_latency.record(endpoint_name, latency)
+        breaker.record_success(latency)
+        return result
+    
+    def _hedge_delay(self, endpoint_name: str) -> float:
+        """How long to wait for an endpoint before sending a hedged request to its replica."""
+        fan_out = CONFIG.retrieval_fan_out
+        delay = _endpoint_latency.percentile(endpoint_name, fan_out.hedge_percentile)
+        if delay is None:
+            delay = fan_out.hedge_default_delay
+        return max(delay, fan_out.hedge_min_delay)
+    
+    async def _search_endpoint_hedged(self, endpoint_name: str, *args, method=None) -> List[List[str]]:
+        """
+        Search one endpoint, sending a duplicate request to its first replica if the primary
+        has not answered within the hedge delay. The first successful response wins.
+        """
+        endpoint_config = self.enabled_endpoints.get(endpoint_name) or self.shard_endpoints[endpoint_name]
+        replicas = [name for name in endpoint_config.replicas
+                    if name in self.enabled_endpoints or name in self.replica_endpoints]
+        
+        if not CONFIG.retrieval_fan_out.hedge_enabled or not replicas:
+            return await self._search_endpoint_with_budget(endpoint_name, *args, method=method)
+        
+        primary = asyncio.create_task(self._search_endpoint_with_budget(endpoint_name, *args, method=method))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_delay(endpoint_name))
+            if done or not _endpoint_breaker(replicas[0]).allow_request():
+                return await primary
+            
+            logger.info(f"Endpoint {endpoint_name} is slow, hedging request to replica {replicas[0]}")
+            pending.add(asyncio.create_task(self._search_endpoint_with_budget(replicas[0], *args, method=method)))
+            
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _collect_late_results(self, pending: Dict[asyncio.Task, str], seen_urls: set,
+                                    num_results: int) -> List[List[str]]:
+        """
+        Wait for endpoints that missed the search deadline and aggregate whatever they return.
+        
+        Args:
+            pending: Map of still-running endpoint tasks to endpoint names
+            seen_urls: URLs already returned in the first wave, which are skipped
+            num_results: Maximum number of late results to return
+            
+        Returns:
+            Aggregated results that were not part of the first wave
+        """
+        await asyncio.wait(pending.keys())
+        
+        endpoint_results = {}
+        for task, endpoint_name in pending.items():
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                logger.warning(f"Late search failed for endpoint {endpoint_name}: {task.exception()}")
+                continue
+            endpoint_results[endpoint_name] = task.result() or []
+        
+        late_results = [r for r in self._aggregate_results(endpoint_results) if r.url not in seen_urls]
+        logger.info(f"Collected {len(late_results)} late results from {list(endpoint_results.keys())}")
+        return late_results[:num_results]
     
     async def search_by_url(self, url: str, endpoint_name: Optional[str] = None, **kwargs) -> Optional[List[str]]:
         """
@@ -851,6 +1274,9 @@ class VectorDBClient:
             temp_client = VectorDBClient(endpoint_name=endpoint_name)
             return await temp_client.search_by_url(url, **kwargs)
         
+        # The site, if known, picks the shard to look in; the backends don't take it
+        site = kwargs.pop("site", None)
+        
         async with self._retrieval_lock:
             logger.info(f"Retrieving item with URL: {url}")
             
@@ -859,8 +1285,14 @@ class VectorDBClient:
                 if self.endpoint_name:
                     client = await self.get_client(self.endpoint_name)
                 else:
+                    if self.router:
+                        result = await self._search_by_url_in_shards(url, site, **kwargs)
+                        if result:
+                            return result
                     # Multiple endpoints - need to search all of them
                     for endpoint_name in self.enabled_endpoints:
+                        if endpoint_name in self.shard_endpoints:
+                            continue
                         try:
                             client = await self.get_client(endpoint_name)
                             result = await client.search_by_url(url, **kwargs)
@@ -893,6 +1325,24 @@ class VectorDBClient:
                 )
                 raise
     
+    async def _search_by_url_in_shards(self, url: str, site: Optional[str], **kwargs) -> Optional[List[str]]:
+        """Look a URL up in the shard of its site, or in all shards at once if the site isn't known."""
+        shards = [self.router.read_shard(site)] if site else list(
+            {(s.endpoint, s.collection): s for s in self.router.shards.values()}.values()
+        )
+        
+        async def _lookup(shard: Shard) -> Optional[List[str]]:
+            client = await self.get_client(shard.endpoint)
+            return await client.search_by_url(url, **self.router.collection_kwargs(shard), **kwargs)
+        
+        results = await asyncio.gather(*(_lookup(shard) for shard in shards), return_exceptions=True)
+        for shard, result in zip(shards, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to search by URL in shard {shard.name}: {result}")
+            elif result:
+                return result
+        return None
+    
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
         """
@@ -942,6 +1392,8 @@ class VectorDBClient:
                     # Multiple endpoints - aggregate sites from all
                     all_sites = set()
                     for endpoint_name in self.enabled_endpoints:
+                        if endpoint_name in self.shard_endpoints:
+                            continue
                         try:
                             client = await self.get_client(endpoint_name)
                             endpoint_sites = await client.get_sites(**kwargs)
@@ -949,6 +1401,14 @@ class VectorDBClient:
                                 all_sites.update(endpoint_sites)
                         except Exception as e:
                             logger.warning(f"Failed to get sites from endpoint {endpoint_name}: {e}")
+                    for shard in (self.router.shards.values() if self.router else []):
+                        try:
+                            client = await self.get_client(shard.endpoint)
+                            shard_sites = await client.get_sites(**self.router.collection_kwargs(shard), **kwargs)
+                            if shard_sites:
+                                all_sites.update(shard_sites)
+                        except Exception as e:
+                            logger.warning(f"Failed to get sites from shard {shard.name}: {e}")
                     sites = list(all_sites)
                 
                 # If backend doesn't support get_sites, it should return None
@@ -1046,30 +1506,21 @@ async def search_with_rewrite(client: VectorDBClientInterface, query: str, site:
             if len(rewritten_queries) > 1:
                 logger.info(f"Using {len(rewritten_queries)} rewritten queries: {rewritten_queries}")
                 
-                # Calculate results per query to maintain total count
-                results_per_query = max(1, num_results // len(rewritten_queries))
-                remainder = num_results % len(rewritten_queries)
+                # Share the total count between the queries, rounding up
+                results_per_query = max(1, -(-num_results // len(rewritten_queries)))
                 
-                # Create parallel search tasks for each rewritten query
-                tasks = []
-                for i, rewritten_query in enumerate(rewritten_queries):
-                    # Add remainder to first queries
-                    query_results = results_per_query + (1 if i < remainder else 0)
-                    # Call the client's search method directly - no recursion
-                    task = asyncio.create_task(
-                        client.search(rewritten_query, site, query_results, **kwargs)
+                # Search for all rewritten queries at once, in one request if the client supports it
+                if hasattr(client, 'search_many'):
+                    all_results = await client.search_many(rewritten_queries, site, results_per_query, **kwargs)
+                else:
+                    all_results = await asyncio.gather(
+                        *(client.search(q, site, results_per_query, **kwargs) for q in rewritten_queries)
                     )
-                    tasks.append(task)
                 
-                # Execute all searches in parallel
-                all_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Combine results, filtering out errors
+                # Combine results
                 combined_results = []
-                for i, result in enumerate(all_results):
-                    if isinstance(result, Exception):
-                        logger.warning(f"Search failed for rewritten query '{rewritten_queries[i]}': {result}")
-                    elif result:
+                for result in all_results:
+                    if result:
                         combined_results.extend(result)
                 
                 # Limit to requested number of results
@@ -1133,6 +1584,49 @@ async def search(query: str,
     return results
 
 
+async def search_many(queries: List[str],
+                      site: str = "all",
+                      num_results: int = 50,
+                      endpoint_name: Optional[str] = None,
+                      query_params: Optional[Dict[str, Any]] = None,
+                      handler: Optional[Any] = None,
+                      **kwargs) -> List[List[RetrievedItem]]:
+    """
+    Search for several queries at once with one client; see VectorDBClient.search_many.
+    
+    Args:
+        queries: The search queries
+        site: Site to search in (default: "all")
+        num_results: Number of results to return per query
+        endpoint_name: Optional name of the endpoint to use
+        query_params: Optional query parameters for overriding endpoint
+        handler: Optional handler with http_handler for sending messages
+        **kwargs: Additional parameters passed to the search method
+        
+    Returns:
+        The results of each query, in the order of queries
+    """
+    client = get_vector_db_client(endpoint_name=endpoint_name, query_params=query_params)
+    results = await client.search_many(queries, site, num_results, **kwargs)
+    
+    # Send a retrieval count message per query if handler is provided
+    if handler and hasattr(handler, 'http_handler') and hasattr(handler.http_handler, 'write_stream'):
+        for query, query_results in zip(queries, results):
+            try:
+                await handler.http_handler.write_stream({
+                    "message_type": "retrieval_count",
+                    "query": query,
+                    "site": site,
+                    "count": len(query_results),
+                    "requested_count": num_results,
+                    "query_id": getattr(handler, 'query_id', None)
+                })
+            except Exception as e:
+                logger.warning(f"Failed to send retrieval count message: {e}")
+    
+    return results
+
+
 async def search_all_sites(query: str,
                           top_n: int = 10,
                           endpoint_name: Optional[str] = None,
@@ -1243,4 +1737,57 @@ async def delete_documents_by_site(site: str,
         count = await delete_documents_by_site("example.com")
     """
     client = get_vector_db_client(endpoint_name=endpoint_name, query_params=query_params)
-    return await client.delete_documents_by_site(site, **kwargs)
\ No newline at end of file
+    return await client.delete_documents_by_site(site, **kwargs)
+
+async def delete_documents_by_ids(site: str, ids: List[str],
+                                  endpoint_name: Optional[str] = None,
+                                  query_params: Optional[Dict[str, Any]] = None,
+                                  **kwargs) -> int:
+    """
+    Delete documents of a site by their IDs from the database.
+    
+    Args:
+        site: Site identifier the documents belong to
+        ids: Document IDs
+        endpoint_name: Optional name of the endpoint to use (overrides write_endpoint)
+        query_params: Optional query parameters for overriding endpoint
+        **kwargs: Additional parameters passed to the delete_documents_by_ids method
+        
+    Returns:
+        Number of documents deleted
+        
+    Raises:
+        NotImplementedError: If the backend can't delete documents by ID
+        
+    Example:
+        count = await delete_documents_by_ids("example.com", ["1234"])
+    """
+    client = get_vector_db_client(endpoint_name=endpoint_name, query_params=query_params)
+    return await client.delete_documents_by_ids(site, ids, **kwargs)
+
+async def delete_replaced_documents(site: str, ids_by_url: Dict[str, str],
+                                    endpoint_name: Optional[str] = None,
+                                    query_params: Optional[Dict[str, Any]] = None,
+                                    **kwargs) -> int:
+    """
+    Delete documents of a site that are stored under another ID than the current one of
+    their URL, such as versions loaded before document IDs were derived from URLs.
+    
+    Args:
+        site: Site identifier the documents belong to
+        ids_by_url: The current document ID of each URL
+        endpoint_name: Optional name of the endpoint to use (overrides write_endpoint)
+        query_params: Optional query parameters for overriding endpoint
+        **kwargs: Additional parameters passed to the delete_replaced_documents method
+        
+    Returns:
+        Number of documents deleted
+        
+    Raises:
+        NotImplementedError: If the backend can't delete replaced documents
+        
+    Example:
+        count = await delete_replaced_documents("example.com", {"https://example.com/a": "1234"})
+    """
+    client = get_vector_db_client(endpoint_name=endpoint_name, query_params=query_params)
+    return await client.delete_replaced_documents(site, ids_by_url, **kwargs)
@@ -12,6 +12,7 @@ import xml.etree.ElementTree as ET
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 import asyncio
+import importlib
 import os
 import json
 import time
@@ -34,15 +35,9 @@ class Tool:
     handler_class: Optional[str] = None
 
 def init():
-    """Initialize the router module by loading tools."""
-    # Load tools from config directory
-    tools_xml_path = os.path.join(CONFIG.config_directory, "tools.xml")
-    
-    logger.info(f"Loading tools from {tools_xml_path}")
-    tools = _load_tools_from_file(tools_xml_path)
-    _tools_cache[tools_xml_path] = tools
-    
-    logger.info(f"Loaded {len(tools)} tools")
+    """Initialize the router module by building the tool registry. Fails if a tool is misconfigured."""
+    registry = load_tools()
+    logger.info(f"Loaded {len(registry.tools)} tools")
     logger.info("Router initialization complete")
 
 def _load_tools_from_file(tools_xml_path: str) -> List[Tool]:
@@ -91,7 +86,7 @@ def _load_tools_from_file(tools_xml_path: str) -> List[Tool]:
                     try:
                         return_structure = json.loads(return_struc_elem.text.strip())
                     except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse return structure for tool {name}: {e}")
+                        raise ToolConfigError(f"Invalid return structure for tool {name} ({schema_type}): {e}")
                 
                 # Parse handler class
                 handler_elem = tool_elem.find('handler')
@@ -112,16 +107,152 @@ def _load_tools_from_file(tools_xml_path: str) -> List[Tool]:
         
         return tools
         
-    except Exception as e:
-        logger.error(f"Error loading tools from {tools_xml_path}: {e}")
-        return []
+    except (ET.ParseError, OSError) as e:
+        raise ToolConfigError(f"Error loading tools from {tools_xml_path}: {e}")
+
+
+class ToolConfigError(ValueError):
+    """tools.xml can't be loaded, or a tool in it is misconfigured."""
+
+
+# Type hierarchy for schema.org types: the types whose tools a type inherits.
+# Types that aren't listed inherit from Item.
+# TODO: This is a placeholder for now. We need to have a proper type hierarchy from schema.org
+TYPE_HIERARCHY = {
+    "Recipe": ["Item"],
+    "Movie": ["Item"],
+    "Product": ["Item"],
+    "Restaurant": ["Item"],
+    "Event": ["Item"],
+    "Podcast": ["Item"]
+}
+
+# Seconds between checks of tools.xml for changes while the server runs
+TOOLS_RELOAD_INTERVAL = 5.0
+
+
+def _resolve_handler(handler_path: str) -> type:
+    """Import a handler class from its dotted path, checking that it can handle a tool."""
+    module_path, _, class_name = handler_path.rpartition('.')
+    if not module_path:
+        raise ToolConfigError(f"Handler {handler_path} is not a module.Class path")
+    try:
+        handler_class = getattr(importlib.import_module(module_path), class_name)
+    except (ImportError, AttributeError) as e:
+        raise ToolConfigError(f"Cannot load handler {handler_path}: {e}")
+    if not isinstance(handler_class, type) or not callable(getattr(handler_class, "do", None)):
+        raise ToolConfigError(f"Handler {handler_path} is not a class with a do() method")
+    return handler_class
+
+
+class ToolRegistry:
+    """
+    The tools of a tools.xml file, resolved once: handler classes imported and validated,
+    and the tools available to each schema type (its own and inherited ones) indexed, so
+    routing a request only takes dictionary lookups.
+    """
+
+    def __init__(self, path: str, tools: List[Tool], mtime: Optional[float] = None):
+        self.path = path
+        self.tools = tools
+        self.mtime = mtime
+        self.handlers: Dict[str, type] = {}
+        for tool in tools:
+            if tool.handler_class and tool.handler_class not in self.handlers:
+                try:
+                    self.handlers[tool.handler_class] = _resolve_handler(tool.handler_class)
+                except ToolConfigError as e:
+                    raise ToolConfigError(f"Tool {tool.name} ({tool.schema_type}): {e}")
+        types = {tool.schema_type for tool in tools} | set(TYPE_HIERARCHY) | {"Item"}
+        self.tools_by_type: Dict[str, List[Tool]] = {t: self._collect_tools(t) for t in types}
+
+    @classmethod
+    def load(cls, path: str) -> "ToolRegistry":
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        return cls(path, _load_tools_from_file(path), mtime)
+
+    def _collect_tools(self, schema_type: str) -> List[Tool]:
+        """Tools for a type, including inherited ones; a type's own tools override inherited tools of the same name."""
+        types_to_check = [schema_type]
+        if schema_type in TYPE_HIERARCHY:
+            types_to_check.extend(TYPE_HIERARCHY[schema_type])
+        elif schema_type != "Item":
+            types_to_check.append("Item")
+        tools_by_name = {}
+        # Process types from most general (Item) to most specific
+        for type_name in reversed(types_to_check):
+            for tool in self.tools:
+                if tool.schema_type == type_name:
+                    tools_by_name[tool.name] = tool
+        return list(tools_by_name.values())
+
+    def tools_for_type(self, schema_type: str) -> List[Tool]:
+        # A type without tools of its own, and not in the hierarchy, only gets Item's tools
+        return self.tools_by_type.get(schema_type) or self.tools_by_type["Item"]
+
+    def handler_for(self, tool: Tool) -> Optional[type]:
+        if not tool.handler_class:
+            return None
+        handler_class = self.handlers.get(tool.handler_class)
+        if handler_class is None:
+            # A tool from a registry that has since been reloaded
+            handler_class = self.handlers[tool.handler_class] = _resolve_handler(tool.handler_class)
+        return handler_class
+
+
+_registry: Optional[ToolRegistry] = None
+
+
+def _tools_xml_path() -> str:
+    return os.path.join(CONFIG.config_directory, "tools.xml")
+
+
+def load_tools(path: Optional[str] = None) -> ToolRegistry:
+    """
+    Build the registry from tools.xml and make it the current one. The current registry
+    is only replaced once the new one has been built completely.
 
-# Global cache for tools - loaded once and shared
-_tools_cache: Dict[str, List['Tool']] = {}
+    Raises:
+        ToolConfigError: If the file can't be loaded or a handler can't be resolved
+    """
+    global _registry
+    path = path or _tools_xml_path()
+    logger.info(f"Loading tools from {path}")
+    registry = ToolRegistry.load(path)
+    _registry = registry
+    return registry
 
-from typing import TYPE_CHECKING
-if TYPE_CHECKING:
-    from typing import List, Dict
+
+def get_registry() -> ToolRegistry:
+    """The current tool registry, built on first use if init() wasn't called."""
+    return _registry if _registry is not None else load_tools()
+
+
+def reload_tools_if_changed() -> bool:
+    """Reload tools.xml if it changed since it was loaded. A broken file leaves the current tools in place."""
+    registry = get_registry()
+    try:
+        mtime = os.path.getmtime(registry.path)
+    except OSError:
+        return False
+    if mtime == registry.mtime:
+        return False
+    try:
+        load_tools(registry.path)
+        logger.info(f"Reloaded tools from {registry.path}")
+        return True
+    except ToolConfigError as e:
+        # Don't retry the same broken file on every check
+        registry.mtime = mtime
+        logger.error(f"Keeping the current tools, reloading {registry.path} failed: {e}")
+        return False
+
+
+async def watch_tools(interval: float = TOOLS_RELOAD_INTERVAL):
+    """Reload tools.xml whenever it changes. Runs until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        reload_tools_if_changed()
 
 class ToolSelector:
     """Simple tool selector that loads tools and evaluates them for queries."""
@@ -129,56 +260,12 @@ class ToolSelector:
     STEP_NAME = "ToolSelector"
     MIN_TOOL_SCORE_THRESHOLD = 70  # Minimum score required to select a tool
     
-    # Type hierarchy for schema.org types
-    # TODO: This is a placeholder for now. We need to have a proper type hierarchy from schema.org
-    TYPE_HIERARCHY = {
-        "Recipe": ["Item"],
-        "Movie": ["Item"],
-        "Product": ["Item"],
-        "Restaurant": ["Item"],
-        "Event": ["Item"],
-        "Podcast": ["Item"]
-    }
-    
-    # Pre-cache these types for faster lookup
-    PRE_CACHE_TYPES = ["Item", "Recipe", "Movie", "Product", "Restaurant", "Event", "Podcast", "Statistics"]
-    
-    # Class-level cache for get_tools_by_type results
-    _type_tools_cache: Dict[str, List[Tool]] = {}
+    # Kept for callers that look the hierarchy up on the selector
+    TYPE_HIERARCHY = TYPE_HIERARCHY
     
     def __init__(self, handler):
         self.handler = handler
         self.handler.state.start_precheck_step(self.STEP_NAME)
-        
-        # Load tools if not already cached
-        tools_xml_path = os.path.join(CONFIG.config_directory, "tools.xml")
-        self._load_tools_if_needed(tools_xml_path)
-        
-        # Warm cache if empty
-        if not self._type_tools_cache:
-            self._warm_cache()
-        
-    def _load_tools_if_needed(self, tools_xml_path: str):
-        """Load tools from XML if not already cached."""
-        global _tools_cache
-        
-        if tools_xml_path not in _tools_cache:
-            logger.info(f"Loading tools from {tools_xml_path}")
-            _tools_cache[tools_xml_path] = self._load_tools_from_file(tools_xml_path)
-        else:
-            logger.info(f"Using cached tools from {tools_xml_path}")
-    
-    def _load_tools_from_file(self, tools_xml_path: str) -> List[Tool]:
-        """Load tools from XML file."""
-        # Now just delegates to the module-level function
-        return _load_tools_from_file(tools_xml_path)
-    
-    def _warm_cache(self):
-        """Warm the cache for common types."""
-        logger.info("Warming tools cache for common types")
-        for schema_type in self.PRE_CACHE_TYPES:
-            tools = self.get_tools_by_type(schema_type)
-            logger.info(f"Cached {len(tools)} tools for type: {schema_type}")
     
     async def _evaluate_tools_with_early_termination(self, query: str, tools: List[Tool], threshold: int = 79) -> List[dict]:
         """Evaluate tools asynchronously with early termination for high-scoring results.
@@ -241,45 +328,7 @@ class ToolSelector:
     
     def get_tools_by_type(self, schema_type: str) -> List[Tool]:
         """Get tools for a specific schema type, including inherited tools from parent types."""
-        # Check cache first
-        if schema_type in self._type_tools_cache:
-            logger.info(f"Using cached tools for type: {schema_type}")
-            return self._type_tools_cache[schema_type]
-        
-        # Get all loaded tools
-        tools_xml_path = os.path.join(CONFIG.config_directory, "tools.xml")
-        all_tools = _tools_cache.get(tools_xml_path, [])
-        
-        # Get all parent types including the current type
-        types_to_check = [schema_type]
-        if schema_type in self.TYPE_HIERARCHY:
-            types_to_check.extend(self.TYPE_HIERARCHY[schema_type])
-        elif schema_type != "Item":
-            # If type not in hierarchy, assume it inherits from Item
-            types_to_check.append("Item")
-        
-        # Collect tools from all relevant types
-        tools_by_name = {}
-        
-        # Process types from most general (Item) to most specific
-        # This ensures specific type tools override general ones
-        for type_name in reversed(types_to_check):
-            type_tools = [tool for tool in all_tools if tool.schema_type == type_name]
-            for tool in type_tools:
-                # More specific type tools override more general ones
-                tools_by_name[tool.name] = tool
-        
-        # Convert back to list
-        type_tools = list(tools_by_name.values())
-        
-        # Cache the result
-        self._type_tools_cache[schema_type] = type_tools
-        
-        # Debug logging
-        logger.info(f"Schema type: {schema_type}, checking types: {types_to_check}")
-        logger.info(f"Found {len(type_tools)} tools: {[t.name for t in type_tools]}")
-        
-        return type_tools
+        return get_registry().tools_for_type(schema_type)
     
     async def do(self):
         """Main method that evaluates tools and stores results."""
@@ -400,12 +449,12 @@ class ToolSelector:
         if not tool.prompt:
             return {"tool": tool, "score": 0, "justification": "No prompt defined"}
         
+        # Use high level for all tools to ensure fair evaluation timing (unless the profile caps it)
+        level = self.handler.llm_level("high")
         # Fill prompt using the proper mechanism that includes all context
-        filled_prompt = fill_prompt(tool.prompt, self.handler)
+        filled_prompt = fill_prompt(tool.prompt, self.handler, level=level)
         
         try:
-            # Use high level for all tools to ensure fair evaluation timing
-            level = "high"
             start_time = time.time()
             response = await ask_llm(filled_prompt, tool.return_structure, level=level, query_params=self.handler.query_params)
             end_time = time.time()
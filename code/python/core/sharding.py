@@ -0,0 +1,275 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Routing of sites to shards for the retrieval layer.
+
+A shard is a retrieval endpoint, optionally with a collection (or index) on it. The
+routing table in config_retrieval.yaml maps sites, or fnmatch patterns for groups of
+sites, to shards, with a default shard for everything else. Moving a site to another
+shard (see data_loading/migrate_site.py) is recorded in a state file that overrides the
+table. Every process re-reads it when it changes, so moves take effect without restarts.
+
+While a site is being moved, its writes and deletes go to both shards, and its reads go
+to the source shard until the copy is complete and to the target shard afterwards.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import fnmatch
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import CONFIG, RetrievalProviderConfig, ShardingConfig
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("sharding")
+
+# Keyword argument each client type takes for the collection (or index) to use
+COLLECTION_KWARGS = {
+    "qdrant": "collection_name",
+    "milvus": "collection_name",
+    "azure_ai_search": "index_name",
+}
+
+# Phases of a site migration: writes go to both shards throughout, reads switch
+# from the source to the target when the copy is complete
+COPYING = "copying"
+SWITCHED = "switched"
+
+
+class ShardingError(ValueError):
+    """Invalid routing table, or a migration that can't be started or advanced."""
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    endpoint: str
+    collection: Optional[str] = None
+
+
+@dataclass
+class Migration:
+    site: str
+    source: str  # Shard names
+    target: str
+    phase: str = COPYING
+
+
+class ShardRouter:
+    """Maps sites to shards, from the routing table and the migrations in the state file."""
+
+    def __init__(self, config: ShardingConfig, endpoints: Dict[str, RetrievalProviderConfig]):
+        self.config = config
+        self.shards: Dict[str, Shard] = {}
+        for name, shard in config.shards.items():
+            endpoint_config = endpoints.get(shard.endpoint)
+            if endpoint_config is None:
+                raise ShardingError(f"Shard {name} is on unknown endpoint {shard.endpoint}")
+            if shard.collection and endpoint_config.db_type not in COLLECTION_KWARGS:
+                raise ShardingError(
+                    f"Shard {name} sets a collection, which {endpoint_config.db_type} endpoints don't support; "
+                    f"configure an endpoint with its own index_name instead"
+                )
+            self.shards[name] = Shard(name, shard.endpoint, shard.collection)
+        self.db_types = {shard.endpoint: endpoints[shard.endpoint].db_type for shard in self.shards.values()}
+
+        if config.default_shard not in self.shards:
+            raise ShardingError(f"Default shard {config.default_shard!r} is not one of the shards")
+        for route, shard in config.routes.items():
+            if shard not in self.shards:
+                raise ShardingError(f"Route {route} points to unknown shard {shard}")
+        self.patterns = [(route, shard) for route, shard in config.routes.items() if _is_pattern(route)]
+
+        self.overrides: Dict[str, str] = {}  # Sites moved away from their configured shard
+        self.migrations: Dict[str, Migration] = {}
+        self._state_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    # Routing
+
+    def configured_shard(self, site: str) -> str:
+        """Name of the shard the routing table assigns a site to."""
+        if site in self.config.routes:
+            return self.config.routes[site]
+        for pattern, shard in self.patterns:
+            if fnmatch.fnmatchcase(site, pattern):
+                return shard
+        return self.config.default_shard
+
+    def read_shard(self, site: str) -> Shard:
+        """The shard to search for a site."""
+        self.refresh()
+        migration = self.migrations.get(site)
+        if migration:
+            return self.shards[migration.target if migration.phase == SWITCHED else migration.source]
+        return self.shards[self.overrides.get(site) or self.configured_shard(site)]
+
+    def write_shards(self, site: str) -> List[Shard]:
+        """The shards to write a site's documents to, the one it is read from first."""
+        shards = [self.read_shard(site)]
+        migration = self.migrations.get(site)
+        if migration:
+            other = migration.source if shards[0].name == migration.target else migration.target
+            shards.append(self.shards[other])
+        return shards
+
+    def group_sites(self, sites: List[str]) -> Dict[Shard, List[str]]:
+        """The requested sites grouped by the shard to search for them."""
+        groups: Dict[Shard, List[str]] = {}
+        for site in sites:
+            groups.setdefault(self.read_shard(site), []).append(site)
+        return groups
+
+    def is_dedicated(self, shard: Shard, sites: List[str]) -> bool:
+        """
+        Whether a shard holds no sites but the given ones, so that it can be searched
+        without a site filter. Only shards with literal routes qualify, and not while
+        a site is being moved to or from them.
+        """
+        self.refresh()
+        if shard.name == self.config.default_shard or any(s == shard.name for _, s in self.patterns):
+            return False
+        if any(shard.name in (m.source, m.target) for m in self.migrations.values()):
+            return False
+        routed = {site for site in self.config.routes if not _is_pattern(site) and site not in self.overrides
+                  and self.config.routes[site] == shard.name}
+        routed |= {site for site, name in self.overrides.items() if name == shard.name}
+        return routed <= set(sites)
+
+    def collection_kwargs(self, shard: Shard) -> Dict[str, Any]:
+        """Keyword arguments selecting the shard's collection on its endpoint's client."""
+        if not shard.collection:
+            return {}
+        return {COLLECTION_KWARGS[self.db_types[shard.endpoint]]: shard.collection}
+
+    # State file
+
+    def refresh(self, force: bool = False):
+        """Re-read the state file if it changed, checking at most once per reload_interval."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.config.reload_interval:
+            return
+        self._checked_at = now
+        path = self.config.state_file
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        if mtime == self._state_mtime and not force:
+            return
+        state = {}
+        if mtime is not None:
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep the routes we have rather than sending sites back to their configured shards
+                logger.error(f"Failed to read shard routing state from {path}: {e}")
+                return
+        self._state_mtime = mtime
+        self.overrides = {site: shard for site, shard in state.get("routes", {}).items() if shard in self.shards}
+        self.migrations = {
+            site: Migration(site, m["source"], m["target"], m.get("phase", COPYING))
+            for site, m in state.get("migrations", {}).items()
+            if m.get("source") in self.shards and m.get("target") in self.shards
+        }
+        logger.info(f"Loaded shard routing state: {len(self.overrides)} moved sites, "
+                    f"{len(self.migrations)} migrations in progress")
+
+    def _save(self):
+        if not self.config.state_file:
+            raise ShardingError("Sharding has no state_file to record site migrations in")
+        state = {
+            "routes": self.overrides,
+            "migrations": {site: {"source": m.source, "target": m.target, "phase": m.phase}
+                           for site, m in self.migrations.items()},
+        }
+        # Write and rename, so readers never see a partly written file
+        directory = os.path.dirname(os.path.abspath(self.config.state_file))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".shard_routes_")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.config.state_file)
+        self._state_mtime = os.path.getmtime(self.config.state_file)
+
+    # Migrations
+
+    def begin_migration(self, site: str, target: str) -> Tuple[Shard, Shard]:
+        """Start moving a site to another shard: from now on its writes go to both."""
+        self.refresh(force=True)
+        if target not in self.shards:
+            raise ShardingError(f"Unknown shard {target}")
+        if site in self.migrations:
+            migration = self.migrations[site]
+            if migration.target != target:
+                raise ShardingError(f"Site {site} is already being moved to {migration.target}")
+            return self.shards[migration.source], self.shards[target]
+        source = self.read_shard(site)
+        if source.name == target:
+            raise ShardingError(f"Site {site} is already on shard {target}")
+        self.migrations[site] = Migration(site, source.name, target)
+        self._save()
+        return source, self.shards[target]
+
+    def switch_migration(self, site: str):
+        """Send a migrating site's reads to the target shard, once its documents are copied."""
+        self.refresh(force=True)
+        migration = self._migration(site)
+        migration.phase = SWITCHED
+        self._route(site, migration.target)
+        self._save()
+
+    def finish_migration(self, site: str):
+        """Stop writing a site to its old shard, once its documents are deleted there."""
+        self.refresh(force=True)
+        if self._migration(site).phase != SWITCHED:
+            raise ShardingError(f"Reads for site {site} haven't been switched to the new shard yet")
+        del self.migrations[site]
+        self._save()
+
+    def abort_migration(self, site: str) -> Migration:
+        """Give up moving a site that is still read from its old shard."""
+        self.refresh(force=True)
+        migration = self._migration(site)
+        if migration.phase != COPYING:
+            raise ShardingError(f"Site {site} is already read from {migration.target}; finish the migration instead")
+        del self.migrations[site]
+        self._save()
+        return migration
+
+    def _migration(self, site: str) -> Migration:
+        if site not in self.migrations:
+            raise ShardingError(f"Site {site} is not being migrated")
+        return self.migrations[site]
+
+    def _route(self, site: str, shard: str):
+        if shard == self.configured_shard(site):
+            self.overrides.pop(site, None)
+        else:
+            self.overrides[site] = shard
+
+
+def _is_pattern(route: str) -> bool:
+    return any(c in route for c in "*?[")
+
+
+_router: Optional[ShardRouter] = None
+
+
+def get_router() -> Optional[ShardRouter]:
+    """The process-wide router, or None if sharding is disabled."""
+    global _router
+    if not CONFIG.sharding.enabled:
+        return None
+    if _router is None:
+        _router = ShardRouter(CONFIG.sharding, CONFIG.retrieval_endpoints)
+    return _router
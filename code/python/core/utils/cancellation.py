@@ -0,0 +1,179 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Request-scoped cancellation.
+
+A CancellationToken belongs to one request. While a request runs, its token is the
+current token (a context variable, so it is inherited by every task the request
+creates), and ask_llm, get_embedding and retrieval calls run under it. When the
+client goes away the token is cancelled: calls in flight are aborted and new calls
+fail immediately, both with RequestCancelledError.
+
+RequestCancelledError is a CancelledError, so it unwinds through the usual
+`except Exception` handlers instead of being treated as a failure to recover from.
+
+Counts of the work that was aborted or never started are kept as wasted-work-avoided
+metrics.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("cancellation")
+
+# Kinds of work tracked in the metrics
+LLM = "llm"
+EMBEDDING = "embedding"
+RETRIEVAL = "retrieval"
+
+_current_token: contextvars.ContextVar[Optional["CancellationToken"]] = contextvars.ContextVar(
+    "cancellation_token", default=None
+)
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Any] = {}
+
+
+class RequestCancelledError(asyncio.CancelledError):
+    """Raised in place of work that was abandoned because its request was cancelled."""
+
+
+class CancellationToken:
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = asyncio.Event()
+        self._in_flight: Set[Tuple[str, asyncio.Future]] = set()
+        self._callbacks: List[Callable[[str], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    async def wait(self):
+        """Wait until the token is cancelled."""
+        await self._event.wait()
+
+    def add_callback(self, callback: Callable[[str], None]):
+        """Call callback(reason) when the token is cancelled (immediately if it already is)."""
+        if self.cancelled:
+            callback(self.reason)
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self, reason: str = "cancelled"):
+        """Cancel the token and abort every call running under it. Later calls are no-ops."""
+        if self.cancelled:
+            return
+        self.reason = reason
+        self._event.set()
+
+        aborted: Dict[str, int] = {}
+        for kind, future in list(self._in_flight):
+            if not future.done():
+                future.cancel()
+                aborted[kind] = aborted.get(kind, 0) + 1
+        _record_cancellation(aborted)
+        logger.info(f"Request cancelled ({reason}), aborted in-flight calls: {aborted or 'none'}")
+
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(reason)
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def raise_if_cancelled(self, kind: Optional[str] = None):
+        if self.cancelled:
+            if kind:
+                _record_skipped(kind)
+            raise RequestCancelledError(self.reason)
+
+    async def guard(self, kind: str, awaitable: Awaitable[Any]) -> Any:
+        """
+        Await awaitable, aborting it if the token is cancelled first.
+
+        Args:
+            kind: What sort of work this is (LLM, EMBEDDING or RETRIEVAL), for the metrics
+
+        Raises:
+            RequestCancelledError: If the token was cancelled before or during the call
+        """
+        if self.cancelled:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            self.raise_if_cancelled(kind)
+        future = asyncio.ensure_future(awaitable)
+        entry = (kind, future)
+        self._in_flight.add(entry)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if self.cancelled and future.cancelled():
+                raise RequestCancelledError(self.reason) from None
+            raise
+        finally:
+            self._in_flight.discard(entry)
+            if not future.done():
+                # We were cancelled from outside; don't leave the call running
+                future.cancel()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """The cancellation token of the request being served, if any."""
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken):
+    """Make token the current token for the enclosed code and the tasks it creates."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+async def guarded(kind: str, awaitable: Awaitable[Any]) -> Any:
+    """Await awaitable under the current token, or directly when there is none."""
+    token = _current_token.get()
+    if token is None:
+        return await awaitable
+    return await token.guard(kind, awaitable)
+
+
+def _record_cancellation(aborted: Dict[str, int]):
+    with _metrics_lock:
+        _metrics["requests_cancelled"] = _metrics.get("requests_cancelled", 0) + 1
+        for kind, count in aborted.items():
+            key = f"{kind}_calls_aborted"
+            _metrics[key] = _metrics.get(key, 0) + count
+
+
+def _record_skipped(kind: str):
+    with _metrics_lock:
+        key = f"{kind}_calls_skipped"
+        _metrics[key] = _metrics.get(key, 0) + 1
+
+
+def wasted_work_avoided() -> Dict[str, int]:
+    """
+    Counts of cancelled requests, and of calls that were aborted in flight or never
+    started because their request had been cancelled.
+    """
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
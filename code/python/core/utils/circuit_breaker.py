@@ -0,0 +1,255 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Circuit breakers for retrieval endpoints and LLM providers.
+
+A breaker is closed while its endpoint is healthy. It opens when too many recent
+calls failed or were slow, and calls to the endpoint are then skipped immediately.
+After `open_duration` the breaker becomes half-open: a limited number of trial
+calls (or background probes) are let through, and the breaker closes again on
+success or re-opens on failure.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from core.config import CircuitBreakerConfig
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("circuit_breaker")
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of one endpoint and decides whether calls to it are allowed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, config: Optional[CircuitBreakerConfig] = None):
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._trial_started_at = 0.0
+        # (failed, slow) for each recent call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=self.config.window_size)
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """Current state, moving an open breaker to half-open once its open duration has passed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.time() - self._opened_at >= self.config.open_duration:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"Circuit breaker {self.name} is half-open")
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call to the endpoint should be made now. While half-open, each allowed
+        call uses up one of the trial slots, so callers must report its outcome.
+        """
+        if not self.config.enabled:
+            return True
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN:
+                # Trial calls that never reported back (e.g. were cancelled) free their slot eventually
+                if time.time() - self._trial_started_at >= self.config.open_duration:
+                    self._half_open_calls = 0
+                if self._half_open_calls < self.config.half_open_max_calls:
+                    self._half_open_calls += 1
+                    self._trial_started_at = time.time()
+                    return True
+            return False
+
+    def record_success(self, latency: float = 0.0):
+        """Record a successful call and how long it took, in seconds."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._close()
+                return
+            self._outcomes.append((False, latency >= self.config.slow_call_threshold))
+            self._maybe_open()
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """Record a failed call (an exception or a timeout)."""
+        with self._lock:
+            self.last_error = f"{type(error).__name__}: {error}" if error else None
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append((True, False))
+            self._maybe_open()
+
+    def _maybe_open(self):
+        if self._state != self.CLOSED or len(self._outcomes) < self.config.min_calls:
+            return
+        total = len(self._outcomes)
+        failure_rate = sum(1 for failed, _ in self._outcomes if failed) / total
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / total
+        if failure_rate >= self.config.failure_rate_threshold:
+            logger.warning(f"Circuit breaker {self.name} opened: failure rate {failure_rate:.0%} over {total} calls")
+            self._open()
+        elif slow_rate >= self.config.slow_call_rate_threshold:
+            logger.warning(f"Circuit breaker {self.name} opened: slow call rate {slow_rate:.0%} over {total} calls")
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.time()
+        self._half_open_calls = 0
+
+    def _close(self):
+        logger.info(f"Circuit breaker {self.name} closed")
+        self._state = self.CLOSED
+        self._half_open_calls = 0
+        self._outcomes.clear()
+        self.last_error = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and recent call statistics, for health reporting."""
+        state = self.state
+        with self._lock:
+            total = len(self._outcomes)
+            failures = sum(1 for failed, _ in self._outcomes if failed)
+            slow = sum(1 for _, slow_call in self._outcomes if slow_call)
+            snapshot = {
+                "state": state,
+                "recent_calls": total,
+                "failure_rate": round(failures / total, 3) if total else 0.0,
+                "slow_call_rate": round(slow / total, 3) if total else 0.0,
+            }
+            if state != self.CLOSED:
+                snapshot["retry_in_seconds"] = round(
+                    max(0.0, self._opened_at + self.config.open_duration - time.time()), 1)
+                snapshot["last_error"] = self.last_error
+            return snapshot
+
+
+# Breakers are shared process-wide, keyed by "<group>:<endpoint name>"
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+# Background probes for ejected endpoints, keyed like the breakers
+_probes: Dict[str, Callable[[], Awaitable[Any]]] = {}
+_probe_task: Optional[asyncio.Task] = None
+
+
+def get_breaker(group: str, name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
+    """
+    Get the breaker for an endpoint, creating it on first use.
+
+    Args:
+        group: Kind of endpoint, e.g. "retrieval" or "llm"
+        name: Endpoint name from the config
+        config: Breaker settings, used only when the breaker is created
+
+    Returns:
+        The shared CircuitBreaker for this endpoint
+    """
+    key = f"{group}:{name}"
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, config)
+            _breakers[key] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Snapshot of every breaker, grouped by endpoint kind."""
+    states: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    for key, breaker in breakers:
+        group, name = key.split(":", 1)
+        states.setdefault(group, {})[name] = breaker.snapshot()
+    return states
+
+
+def register_probe(group: str, name: str, probe: Callable[[], Awaitable[Any]]):
+    """
+    Register a cheap health check for an endpoint. It is run in the background while
+    the endpoint's breaker is half-open, so that recovery doesn't depend on user traffic.
+    """
+    _probes[f"{group}:{name}"] = probe
+
+
+async def _run_probe(key: str, probe: Callable[[], Awaitable[Any]]):
+    breaker = _breakers[key]
+    if not breaker.allow_request():
+        return
+    start_time = time.time()
+    try:
+        await asyncio.wait_for(probe(), timeout=breaker.config.probe_timeout)
+    except Exception as e:
+        logger.info(f"Probe for {key} failed: {type(e).__name__}: {e}")
+        breaker.record_failure(e)
+        return
+    breaker.record_success(time.time() - start_time)
+
+
+async def probe_ejected_endpoints():
+    """Probe every half-open endpoint that has a registered probe."""
+    with _breakers_lock:
+        candidates = [key for key, breaker in _breakers.items() if key in _probes]
+    probes = [
+        _run_probe(key, _probes[key]) for key in candidates
+        if _breakers[key].state == CircuitBreaker.HALF_OPEN
+    ]
+    if probes:
+        await asyncio.gather(*probes, return_exceptions=True)
+
+
+async def _probe_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await probe_ejected_endpoints()
+        except Exception as e:
+            logger.warning(f"Endpoint probing failed: {e}")
+
+
+def start_probing(interval: float = 10.0):
+    """Start the background probe loop on the running event loop."""
+    global _probe_task
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.create_task(_probe_loop(interval))
+
+
+async def stop_probing():
+    """Stop the background probe loop."""
+    global _probe_task
+    if _probe_task is not None:
+        _probe_task.cancel()
+        try:
+            await _probe_task
+        except asyncio.CancelledError:
+            pass
+        _probe_task = None
+
+
+def reset_breakers():
+    """Forget all breakers and probes."""
+    with _breakers_lock:
+        _breakers.clear()
+    _probes.clear()
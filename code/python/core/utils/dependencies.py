@@ -0,0 +1,92 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Checks for the optional packages the LLM, embedding and retrieval providers depend on.
+
+Each provider type lists its packages as {pip requirement: module it provides}. Whether
+a package is installed is checked with importlib.util.find_spec, which locates the
+module without importing it, so checking is cheap enough to do at startup for every
+enabled provider. Nothing here installs packages on the request path: a missing package
+raises MissingDependencyError, and `python -m core.preflight --install` installs them
+ahead of time.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import importlib
+import importlib.util
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("dependencies")
+
+PREFLIGHT_COMMAND = "python -m core.preflight --install"
+
+# Provider types whose packages have been found, as (kind, type)
+_verified = set()
+
+
+class MissingDependencyError(ValueError):
+    """A package a configured provider needs is not installed."""
+
+    def __init__(self, kind: str, provider_type: str, requirements: List[str]):
+        self.kind = kind
+        self.provider_type = provider_type
+        self.requirements = requirements
+        super().__init__(
+            f"Missing packages for {kind} provider {provider_type}: {', '.join(requirements)}. "
+            f"Install them with `{PREFLIGHT_COMMAND}` or `pip install {' '.join(repr(r) for r in requirements)}`"
+        )
+
+
+def is_module_available(module: str) -> bool:
+    """Whether module can be imported, without importing it (or anything but its parent packages)."""
+    if module in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        # A parent package is missing, or the module is a half-initialized namespace
+        return False
+
+
+def missing_requirements(packages: Dict[str, str]) -> List[str]:
+    """The pip requirements in packages whose module can't be found."""
+    return [requirement for requirement, module in packages.items() if not is_module_available(module)]
+
+
+def require_packages(kind: str, provider_type: str, packages: Dict[str, str]):
+    """
+    Raise MissingDependencyError if any of a provider type's packages is not installed.
+    Only checks a provider type until its packages have been found once.
+    """
+    if (kind, provider_type) in _verified:
+        return
+    missing = missing_requirements(packages)
+    if missing:
+        raise MissingDependencyError(kind, provider_type, missing)
+    _verified.add((kind, provider_type))
+
+
+def install_requirements(requirements: List[str]):
+    """Install pip requirements into the running interpreter. For preflight only, never for requests."""
+    if not requirements:
+        return
+    logger.info(f"Installing {', '.join(requirements)}")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "--quiet", *requirements])
+    importlib.invalidate_caches()
+
+
+def import_timed(module: str) -> float:
+    """Import module and return how long it took, in seconds (0 if it was already imported)."""
+    if module in sys.modules:
+        return 0.0
+    start = time.perf_counter()
+    importlib.import_module(module)
+    return time.perf_counter() - start
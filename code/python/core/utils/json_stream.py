@@ -0,0 +1,211 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Incremental extraction of top-level JSON fields from a streamed LLM completion.
+
+Text before the first '{' (such as a ```json fence) is ignored. String fields are
+reported piece by piece as their characters arrive; other values (numbers, booleans,
+nested objects and arrays) are reported once they are complete.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Parser states
+_BEFORE_OBJECT = 0
+_EXPECT_KEY = 1
+_IN_KEY = 2
+_EXPECT_COLON = 3
+_EXPECT_VALUE = 4
+_IN_STRING = 5
+_IN_RAW = 6
+_DONE = 7
+
+_WHITESPACE = " \t\r\n"
+
+
+@dataclass
+class FieldUpdate:
+    """A change to one top-level field of the streamed object."""
+    name: str
+    delta: str = ""  # Newly decoded text, for string fields
+    value: Any = None  # Full value, once complete
+    complete: bool = False
+
+
+class IncrementalJSONFieldExtractor:
+    """
+    Feed it chunks of a JSON object as they arrive and get back FieldUpdates.
+    Completed fields are also collected in `fields`.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._state = _BEFORE_OBJECT
+        self._key: List[str] = []
+        self._key_escape = False
+        self._name: Optional[str] = None
+        self._text: List[str] = []  # Decoded text of the string value in progress
+        self._escape = ""  # Pending escape sequence in the string value in progress
+        self._high_surrogate = ""
+        self._raw: List[str] = []  # Raw text of the non-string value in progress
+        self._depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+
+    def partial(self, name: str) -> Optional[str]:
+        """Text received so far for a string field that is still streaming."""
+        if self._state == _IN_STRING and self._name == name:
+            return "".join(self._text)
+        return None
+
+    def feed(self, chunk: str) -> List[FieldUpdate]:
+        """
+        Consume the next chunk of text.
+
+        Returns:
+            Updates for fields that changed in this chunk, in order
+        """
+        updates: List[FieldUpdate] = []
+        delta: List[str] = []
+
+        for c in chunk:
+            state = self._state
+            if state == _IN_STRING:
+                if self._escape:
+                    self._escape += c
+                    if self._escape_complete():
+                        decoded = self._decode_escape()
+                        self._text.append(decoded)
+                        delta.append(decoded)
+                elif c == "\\":
+                    self._escape = c
+                elif c == '"':
+                    value = "".join(self._text)
+                    self.fields[self._name] = value
+                    updates.append(FieldUpdate(self._name, "".join(delta), value, True))
+                    delta = []
+                    self._state = _EXPECT_KEY
+                else:
+                    self._text.append(c)
+                    delta.append(c)
+            elif state == _IN_RAW:
+                self._feed_raw(c, updates)
+            elif state == _BEFORE_OBJECT:
+                if c == "{":
+                    self._state = _EXPECT_KEY
+            elif state == _EXPECT_KEY:
+                if c == '"':
+                    self._key = []
+                    self._key_escape = False
+                    self._state = _IN_KEY
+                elif c == "}":
+                    self._state = _DONE
+                    self.done = True
+            elif state == _IN_KEY:
+                if self._key_escape:
+                    self._key.append(c)
+                    self._key_escape = False
+                elif c == "\\":
+                    self._key_escape = True
+                elif c == '"':
+                    self._name = "".join(self._key)
+                    self._state = _EXPECT_COLON
+                else:
+                    self._key.append(c)
+            elif state == _EXPECT_COLON:
+                if c == ":":
+                    self._state = _EXPECT_VALUE
+            elif state == _EXPECT_VALUE:
+                if c in _WHITESPACE:
+                    continue
+                if c == '"':
+                    self._text = []
+                    self._escape = ""
+                    self._state = _IN_STRING
+                else:
+                    self._raw = []
+                    self._depth = 0
+                    self._raw_in_string = False
+                    self._raw_escape = False
+                    self._state = _IN_RAW
+                    self._feed_raw(c, updates)
+
+        if delta and self._state == _IN_STRING:
+            updates.append(FieldUpdate(self._name, "".join(delta)))
+        return updates
+
+    def finish(self) -> List[FieldUpdate]:
+        """Complete a trailing scalar value at the end of the stream, if any."""
+        updates: List[FieldUpdate] = []
+        if self._state == _IN_RAW and self._depth == 0 and self._raw:
+            self._complete_raw(updates)
+        return updates
+
+    def _feed_raw(self, c: str, updates: List[FieldUpdate]):
+        if self._raw_in_string:
+            self._raw.append(c)
+            if self._raw_escape:
+                self._raw_escape = False
+            elif c == "\\":
+                self._raw_escape = True
+            elif c == '"':
+                self._raw_in_string = False
+            return
+
+        if self._depth == 0 and (c in _WHITESPACE or c in ",}"):
+            # End of a scalar value
+            self._complete_raw(updates)
+            if c == "}":
+                self._state = _DONE
+                self.done = True
+            return
+
+        self._raw.append(c)
+        if c == '"':
+            self._raw_in_string = True
+        elif c in "{[":
+            self._depth += 1
+        elif c in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._complete_raw(updates)
+
+    def _complete_raw(self, updates: List[FieldUpdate]):
+        raw = "".join(self._raw)
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        self.fields[self._name] = value
+        updates.append(FieldUpdate(self._name, value=value, complete=True))
+        self._raw = []
+        self._state = _EXPECT_KEY
+
+    def _escape_complete(self) -> bool:
+        if len(self._escape) < 2:
+            return False
+        if self._escape[1] == "u":
+            return len(self._escape) == 6
+        return True
+
+    def _decode_escape(self) -> str:
+        escape, self._escape = self._escape, ""
+        try:
+            decoded = json.loads(f'"{escape}"')
+        except json.JSONDecodeError:
+            return escape
+        # Join UTF-16 surrogate pairs that arrive as two separate \u escapes
+        if "\ud800" <= decoded <= "\udbff":
+            self._high_surrogate = escape
+            return ""
+        if self._high_surrogate and "\udc00" <= decoded <= "\udfff":
+            decoded = json.loads(f'"{self._high_surrogate}{escape}"')
+        self._high_surrogate = ""
+        return decoded
@@ -1,5 +1,7 @@
 import json
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
+
+from core.utils.token_budget import CHARS_PER_TOKEN, count_tokens, truncate_to_tokens
 
 
 # ============= JSON Trimming Functions (from trim.py) =============
@@ -18,80 +20,160 @@ def jsonify(obj):
             return obj
     return obj
 
-def trim_json(obj):
+# Attributes dropped when trimming an item for a prompt, by @type: (trim_json, trim_json_hard).
+# Items whose types have no rules are passed through untrimmed. Cast and reviews are dropped
+# from movies in both modes; they make up most of a movie's markup.
+_RECIPE_SKIP = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "author"]
+_RECIPE_HARD_SKIP = _RECIPE_SKIP + ["review", "recipeYield", "recipeInstructions", "nutrition"]
+_MOVIE_SKIP = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "author", "trailer",
+               "actor", "director", "creator", "review"]
+
+TRIM_RULES = {
+    "Recipe": (_RECIPE_SKIP, _RECIPE_HARD_SKIP),
+    "Movie": (_MOVIE_SKIP, _MOVIE_SKIP),
+    "TVSeries": (_MOVIE_SKIP, _MOVIE_SKIP),
+}
+
+# Compiled plans, by (@type, hard): the frozenset of attributes to drop, or None to keep the item as is
+_trim_plans: Dict[Any, Optional[frozenset]] = {}
+
+
+def _compile_trim_plan(obj_type, hard: bool) -> Optional[frozenset]:
+    types = listify(obj_type)
+    for type_name, skips in TRIM_RULES.items():
+        if type_name in types:
+            return frozenset(skips[1] if hard else skips[0])
+    return None
+
+
+def _trim_plan(obj_type, hard: bool) -> Optional[frozenset]:
+    """The trimming plan for an @type, compiled on first use."""
+    key = (tuple(obj_type) if isinstance(obj_type, list) else obj_type, hard)
+    try:
+        return _trim_plans[key]
+    except KeyError:
+        plan = _trim_plans[key] = _compile_trim_plan(obj_type, hard)
+        return plan
+    except TypeError:
+        # Unhashable @type values (e.g. nested objects) are not cached
+        return _compile_trim_plan(obj_type, hard)
+
+
+def _trim(obj: Dict[str, Any], drop: frozenset) -> Dict[str, List[Any]]:
+    # Values are wrapped in lists, as collateObjAttr does
+    return {attr: [value] for attr, value in obj.items() if attr not in drop}
+
+
+def _apply_trim_plan(obj, hard: bool):
     obj = jsonify(obj)
-    objType = obj["@type"] if "@type" in obj else ["Thing"]
-    if not isinstance(objType, list):
-        objType = [objType]
-    if (objType == ["Thing"]):
+    if not isinstance(obj, dict) or "@type" not in obj:
         return obj
-    if ("Recipe" in objType):
-        return trim_recipe(obj)
-    if ("Movie" in objType or "TVSeries" in objType):
-        return trim_movie(obj)
-    return obj
+    drop = _trim_plan(obj["@type"], hard)
+    if drop is None:
+        return obj
+    return _trim(obj, drop)
+
+
+def trim_json(obj):
+    return _apply_trim_plan(obj, hard=False)
 
 def trim_json_hard(obj):
-    obj = jsonify(obj)
-    objType = obj["@type"] if "@type" in obj else ["Thing"]
-    if not isinstance(objType, list):
-        objType = [objType]
-    if (objType == ["Thing"]):
-        return obj
-    if ("Recipe" in objType):
-        return trim_recipe_hard(obj)
-    if ("Movie" in objType or "TVSeries" in objType):
-        return trim_movie(obj, hard=True)
-    return obj
+    return _apply_trim_plan(obj, hard=True)
    
 
 def trim_recipe(obj):
-    obj = jsonify(obj)
-    items = collateObjAttr(obj)
-    js = {}
-    skipAttrs = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", 
-                 "author"]
-    for attr in items.keys():
-        if (attr in skipAttrs):
-            continue
-        js[attr] = items[attr]
-    return js
+    return _trim(jsonify(obj), _trim_plan("Recipe", False))
 
 def trim_recipe_hard(obj):
-    items = collateObjAttr(obj)
-    js = {}
-    skipAttrs = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "review",
-                 "author", "recipeYield", "recipeInstructions", "nutrition"]
-    for attr in items.keys():
-        if (attr in skipAttrs):
-            continue
-        js[attr] = items[attr]
-    return js
+    return _trim(obj, _trim_plan("Recipe", True))
 
+def trim_movie(obj, hard=False):
+    return _trim(obj, _trim_plan("Movie", hard))
 
+# Attributes that are kept when an item is cut down to fit its ranking text budget
+_RANKING_KEEP = ("@type", "name")
 
-def trim_movie(obj, hard=False):
-    items = collateObjAttr(obj)
-    js = {}
-    skipAttrs = ["mainEntityOfPage", "publisher", "image", "datePublished", "dateModified", "author", "trailer"]
-    if (hard):
-        skipAttrs.extend(["actor", "director", "creator", "review"])
-    for attr in items.keys():
-        if (attr in skipAttrs):
-            continue
-        elif (attr == "actor" or attr == "director" or attr == "creator"):
-            if ("name" in items[attr]):
-                if (attr not in js):
-                    js[attr] = []
-                js[attr].append(items[attr]["name"])
-        elif (attr == "review"):
-            items['review'] = []
-            for review in items['review']:
-                if ("reviewBody" in review):    
-                    js[attr].append(review["reviewBody"])
+def _compact(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _shorten(value):
+    """value with the second half of its longest list cut off, or None if it has no list to cut."""
+    if isinstance(value, list) and len(value) > 1:
+        return value[:len(value) // 2]
+    if isinstance(value, list) and len(value) == 1:
+        inner = _shorten(value[0])
+        return None if inner is None else [inner]
+    return None
+
+def _fit(obj, max_chars: int) -> str:
+    """Compact JSON of obj, cutting list tails and then dropping attributes (largest first) until it fits."""
+    text = _compact(obj)
+    if len(text) <= max_chars:
+        return text
+    if isinstance(obj, list):
+        if len(obj) == 1:
+            return "[" + _fit(obj[0], max_chars - 2) + "]"
+        return _fit(obj[:len(obj) // 2], max_chars) if obj else text
+    if not isinstance(obj, dict):
+        return text
+    obj = dict(obj)
+    while len(text) > max_chars:
+        sizes = [(len(_compact(value)), attr) for attr, value in obj.items() if attr not in _RANKING_KEEP]
+        if not sizes:
+            break
+        _, attr = max(sizes)
+        shortened = _shorten(obj[attr])
+        if shortened is None:
+            del obj[attr]
         else:
-            js[attr] = items[attr]
-    return js
+            obj[attr] = shortened
+        text = _compact(obj)
+    return text
+
+def _ranking_text_budget() -> Optional[int]:
+    from core.config import CONFIG
+    nlweb = getattr(CONFIG, "nlweb", None)
+    return (getattr(nlweb, "prompt_token_budgets", None) or {}).get("item.description")
+
+def ranking_text(obj, max_tokens: Optional[int] = None) -> str:
+    """
+    The text an item is described by in ranking prompts: the trimmed item as compact JSON.
+    It only depends on the item, so it can be computed once at ingestion and stored with it.
+
+    Items longer than max_tokens (by default the item.description prompt budget, estimated
+    at CHARS_PER_TOKEN characters a token) are cut down by structure, so the text is always
+    valid JSON: the hard trim plan is applied, then list tails are cut and the largest
+    attributes dropped. The prompt budget still applies when the text is used.
+    """
+    if max_tokens is None:
+        max_tokens = _ranking_text_budget()
+    trimmed = trim_json(obj)
+    text = _compact(trimmed)
+    if max_tokens is None or len(text) <= max_tokens * CHARS_PER_TOKEN:
+        return text
+    return _fit(trim_json_hard(obj), max_tokens * CHARS_PER_TOKEN)
+
+def fit_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Cut text to at most max_tokens tokens for model. JSON objects and arrays, such as the
+    ranking text of items, are cut by structure, so they stay valid JSON; other text is
+    truncated where the budget runs out.
+    """
+    tokens = count_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    obj = jsonify(text)
+    if not isinstance(obj, (dict, list)):
+        return truncate_to_tokens(text, max_tokens, model)
+    # Characters per token vary with the tokenizer, so the limit is narrowed until it fits
+    max_chars = len(text)
+    for _ in range(4):
+        max_chars = max_chars * max_tokens // tokens
+        fitted = _fit(obj, max_chars)
+        tokens = count_tokens(fitted, model)
+        if tokens <= max_tokens:
+            break
+    return fitted
 
 def collateObjAttr(obj):
     items = {}
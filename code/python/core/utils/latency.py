@@ -0,0 +1,75 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Rolling latency statistics, keyed by endpoint name.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent latency samples for each key (e.g. an endpoint name)
+    and answers percentile queries over that window.
+    """
+
+    def __init__(self, window_size: int = 200, min_samples: int = 10):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        """Record one latency sample (in seconds) for a key."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = deque(maxlen=self.window_size)
+                self._samples[key] = samples
+            samples.append(seconds)
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """
+        Get the given percentile (0-100) of the recent samples for a key.
+
+        Returns:
+            The latency in seconds, or None if there are fewer than min_samples samples.
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def count(self, key: str) -> int:
+        """Number of samples currently held for a key."""
+        with self._lock:
+            samples = self._samples.get(key)
+            return len(samples) if samples else 0
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Summary of p50/p95 and sample counts for every key."""
+        return {
+            key: {
+                "count": self.count(key),
+                "p50": self.percentile(key, 50),
+                "p95": self.percentile(key, 95),
+            }
+            for key in list(self._samples.keys())
+        }
+
+    def reset(self, key: Optional[str] = None):
+        """Drop samples for one key, or for all keys if none is given."""
+        with self._lock:
+            if key is None:
+                self._samples.clear()
+            else:
+                self._samples.pop(key, None)
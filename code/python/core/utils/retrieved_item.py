@@ -0,0 +1,98 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+The record a retrieval result travels in, from the retrieval backends through
+aggregation, ranking and answer generation.
+
+A RetrievedItem carries the raw schema.org JSON text of the item together with its
+parsed form, which is only parsed on first use and then cached, so an item is parsed
+at most once per query instead of once per stage. Backends that store the pre-trimmed
+ranking text computed at ingestion return it with the item, so ranking does not have to
+parse or trim the item at all. It is slotted to keep the per-item footprint small, since
+every query creates a few hundred of them.
+
+For code that still treats results as [url, json_str, name, site] lists, a RetrievedItem
+unpacks, indexes and measures like one.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence, Union
+
+from core.utils.json_utils import ranking_text
+
+_UNPARSED = object()
+
+
+@dataclass(slots=True, eq=False)
+class RetrievedItem:
+    url: str
+    json_str: str
+    name: str
+    site: str
+    # Similarity score reported by the backend, when it reports one
+    score: Optional[float] = None
+    # The item's ranking text (see json_utils.ranking_text), when the backend stores it
+    ranking_text: Optional[str] = None
+    _schema: Any = field(default=_UNPARSED, init=False, repr=False)
+
+    @classmethod
+    def from_schema(cls, url: str, schema: Any, name: str, site: str,
+                    score: Optional[float] = None) -> "RetrievedItem":
+        """Build an item from an already parsed schema object, which is kept as the cached parse."""
+        item = cls(url, json.dumps(schema), name, site, score)
+        item._schema = schema
+        return item
+
+    @classmethod
+    def from_result(cls, result: Union["RetrievedItem", Sequence[Any]],
+                    score: Optional[float] = None) -> "RetrievedItem":
+        """Wrap a [url, json_str, name, site] result; items are returned as they are."""
+        if isinstance(result, RetrievedItem):
+            return result
+        url, json_str, name, site = result[0], result[1], result[2], result[3]
+        if isinstance(json_str, (dict, list)):
+            return cls.from_schema(url, json_str, name, site, score)
+        if isinstance(json_str, bytes):
+            json_str = json_str.decode("utf-8")
+        return cls(url, json_str, name, site, score)
+
+    @property
+    def schema(self) -> Any:
+        """The parsed JSON, or the raw text if it is not valid JSON."""
+        if self._schema is _UNPARSED:
+            try:
+                self._schema = json.loads(self.json_str)
+            except (json.JSONDecodeError, TypeError):
+                self._schema = self.json_str
+        return self._schema
+
+    @property
+    def schema_object(self) -> Any:
+        """The item's schema.org object: the first one, if the JSON is an array of them."""
+        schema = self.schema
+        if isinstance(schema, list) and schema:
+            return schema[0]
+        return schema
+
+    def text_for_ranking(self) -> str:
+        """The stored ranking text, or the ranking text computed from the schema (and then kept)."""
+        if self.ranking_text is None:
+            self.ranking_text = ranking_text(self.schema)
+        return self.ranking_text
+
+    def as_list(self) -> list:
+        return [self.url, self.json_str, self.name, self.site]
+
+    def __iter__(self):
+        return iter((self.url, self.json_str, self.name, self.site))
+
+    def __getitem__(self, index):
+        return (self.url, self.json_str, self.name, self.site)[index]
+
+    def __len__(self) -> int:
+        return 4
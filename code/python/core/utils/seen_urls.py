@@ -0,0 +1,72 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+A set of URLs kept on disk, for deduplicating streams of URLs too large to hold in memory.
+
+Each URL is stored as an 8-byte hash in a SQLite table, so a million URLs take 15-20MB of
+disk and next to no memory. Two different URLs collide with a probability of about n²/2⁶⁵,
+around 3 in 100 million for a million URLs, in which case the later one is taken as seen.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+from typing import Optional
+
+
+class SeenUrls:
+    """
+    URLs seen so far, in a SQLite file. Without a path, the set lives in a temporary file
+    that is deleted when the set is closed; with one, it persists across runs.
+    """
+
+    def __init__(self, path: Optional[str] = None, commit_every: int = 10000):
+        self._temporary = path is None
+        if self._temporary:
+            fd, path = tempfile.mkstemp(suffix=".seen.db")
+            os.close(fd)
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL" if not self._temporary else "PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+
+    @staticmethod
+    def _hash(url: str) -> bytes:
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+    def add(self, url: str) -> bool:
+        """Add a URL to the set. Returns True if it wasn't in it."""
+        cursor = self._db.execute("INSERT OR IGNORE INTO seen (hash) VALUES (?)", (self._hash(url),))
+        if cursor.rowcount:
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+            return True
+        return False
+
+    def __contains__(self, url: str) -> bool:
+        return self._db.execute("SELECT 1 FROM seen WHERE hash = ?", (self._hash(url),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+        if self._temporary and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,198 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+A small scheduler for a request's pre-check stages, declared as a dependency graph.
+
+Each stage starts as soon as the stages it depends on have finished. If a dependency
+fails, times out or is cancelled, the stages that depend on it are cancelled as well.
+Stages marked abort_on_stop are cancelled, whether queued or in flight, as soon as the
+graph's stop event is set (e.g. when a pre-check decides the query is done).
+Per-stage timings are recorded so the critical path of each request can be logged.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Stage outcomes
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+CANCELLED = "cancelled"
+SKIPPED = "skipped"
+
+
+@dataclass
+class Stage:
+    """One node of the graph and what happened to it."""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None  # Limit on the stage's own run time
+    wait_timeout: Optional[float] = None  # Limit on waiting for dependencies; the stage is skipped after it
+    abort_on_stop: bool = False
+    status: str = PENDING
+    started: Optional[float] = None  # Seconds since the graph started
+    finished: Optional[float] = None
+    error: Optional[BaseException] = None
+    reason: str = ""
+    done_event: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class StageGraph:
+
+    def __init__(self, name: str, stop_event: Optional[asyncio.Event] = None):
+        self.name = name
+        self.stop_event = stop_event
+        self.stages: Dict[str, Stage] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._start = 0.0
+
+    def add(self, name: str, run: Callable[[], Awaitable[Any]], depends_on=(), timeout: Optional[float] = None,
+            wait_timeout: Optional[float] = None, abort_on_stop: bool = False) -> Stage:
+        """
+        Declare a stage.
+
+        Args:
+            name: Unique stage name
+            run: Zero-argument callable returning the coroutine to run
+            depends_on: Names of stages that must finish first; they must already be declared
+            timeout: Seconds the stage may run before it is cancelled
+            wait_timeout: Seconds the stage may wait for its dependencies before it is skipped
+            abort_on_stop: Cancel this stage when the stop event is set
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already declared")
+        missing = [dep for dep in depends_on if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on undeclared stages: {missing}")
+        stage = Stage(name, run, tuple(depends_on), timeout, wait_timeout, abort_on_stop)
+        self.stages[name] = stage
+        return stage
+
+    async def run(self, raise_errors: bool = False):
+        """
+        Run every stage and return once all of them have finished, failed or been cancelled.
+
+        Args:
+            raise_errors: Re-raise the first stage error after the graph has finished
+        """
+        self._start = time.time()
+        self._tasks = {name: asyncio.create_task(self._run_stage(stage)) for name, stage in self.stages.items()}
+        watcher = asyncio.create_task(self._watch_stop()) if self.stop_event is not None else None
+        try:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            for task in self._tasks.values():
+                task.cancel()
+
+        if raise_errors:
+            for stage in self.stages.values():
+                if stage.status == FAILED:
+                    raise stage.error
+
+    def cancel(self, reason: str, only_abort_on_stop: bool = False):
+        """Cancel stages that have not finished yet."""
+        for name, stage in self.stages.items():
+            if stage.status not in (PENDING, RUNNING):
+                continue
+            if only_abort_on_stop and not stage.abort_on_stop:
+                continue
+            stage.reason = reason
+            task = self._tasks.get(name)
+            if task is not None:
+                task.cancel()
+
+    async def wait(self, names):
+        """Wait until the named stages have finished, however they finished."""
+        await asyncio.gather(*(self.stages[name].done_event.wait() for name in names))
+
+    async def _watch_stop(self):
+        await self.stop_event.wait()
+        self.cancel("stopped", only_abort_on_stop=True)
+
+    def _now(self) -> float:
+        return time.time() - self._start
+
+    async def _run_stage(self, stage: Stage):
+        try:
+            if stage.depends_on:
+                try:
+                    await asyncio.wait_for(self.wait(stage.depends_on), stage.wait_timeout)
+                except asyncio.TimeoutError:
+                    stage.status = SKIPPED
+                    stage.reason = "dependencies not ready"
+                    return
+                unfinished = [dep for dep in stage.depends_on if self.stages[dep].status != DONE]
+                if unfinished:
+                    stage.status = CANCELLED
+                    stage.reason = f"dependency {unfinished[0]} {self.stages[unfinished[0]].status}"
+                    return
+
+            stage.status = RUNNING
+            stage.started = self._now()
+            try:
+                await asyncio.wait_for(stage.run(), stage.timeout)
+                stage.status = DONE
+            except asyncio.TimeoutError:
+                stage.status = TIMED_OUT
+            except Exception as e:
+                stage.status = FAILED
+                stage.error = e
+        except asyncio.CancelledError:
+            stage.status = CANCELLED
+            stage.reason = stage.reason or "cancelled"
+        finally:
+            if stage.started is not None:
+                stage.finished = self._now()
+            stage.done_event.set()
+
+    def critical_path(self) -> List[str]:
+        """
+        The chain of stages that determined when the graph finished: the last stage to
+        finish, preceded by whichever of its dependencies finished last, and so on.
+        """
+        ran = [stage for stage in self.stages.values() if stage.finished is not None]
+        if not ran:
+            return []
+        stage = max(ran, key=lambda s: s.finished)
+        path = [stage.name]
+        while True:
+            deps = [self.stages[dep] for dep in stage.depends_on if self.stages[dep].finished is not None]
+            if not deps:
+                break
+            stage = max(deps, key=lambda s: s.finished)
+            path.append(stage.name)
+        path.reverse()
+        return path
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage status and timing, in seconds since the graph started."""
+        timings = {}
+        for name, stage in self.stages.items():
+            entry = {"status": stage.status}
+            if stage.started is not None:
+                entry["start"] = round(stage.started, 4)
+                entry["end"] = round(stage.finished, 4)
+                entry["duration"] = round(stage.duration, 4)
+            if stage.reason:
+                entry["reason"] = stage.reason
+            if stage.error is not None:
+                entry["error"] = f"{type(stage.error).__name__}: {stage.error}"
+            timings[name] = entry
+        return timings
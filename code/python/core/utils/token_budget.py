@@ -0,0 +1,125 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Token counting and truncation for prompt budgeting.
+
+Tokens are counted with a local tokenizer for the model when one is available, and
+estimated from the character count otherwise. Tokenizers can be registered for model
+name prefixes with register_tokenizer; without one, tiktoken is used if it is installed
+(and the tokenizer setting in config_nlweb.yaml allows it). Looking up a tokenizer never
+fails: anything that goes wrong falls back to the estimate. tiktoken downloads its encodings
+on first use, so warm_up loads the tokenizers of the configured models at startup rather
+than in the first request.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+from typing import Dict, Iterable, List, Optional, Protocol
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("token_budget")
+
+# Characters per token assumed when there is no tokenizer for the model
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "..."
+
+
+class Tokenizer(Protocol):
+    def encode(self, text: str) -> List[int]: ...
+    def decode(self, tokens: List[int]) -> str: ...
+
+
+# Tokenizers registered for model name prefixes
+_registered: Dict[str, Tokenizer] = {}
+# Tokenizer found for each model, or None when the estimate is used
+_by_model: Dict[Optional[str], Optional[Tokenizer]] = {}
+
+
+def register_tokenizer(model_prefix: str, tokenizer: Tokenizer):
+    """Use tokenizer for models whose name starts with model_prefix."""
+    _registered[model_prefix] = tokenizer
+    _by_model.clear()
+
+
+def _tokenizer_setting() -> str:
+    from core.config import CONFIG
+    nlweb = getattr(CONFIG, "nlweb", None)
+    return getattr(nlweb, "tokenizer", "tiktoken")
+
+
+def _load_tiktoken(model: Optional[str]) -> Optional[Tokenizer]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        # Not a model tiktoken knows; its most common encoding is close enough for budgeting
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def get_tokenizer(model: Optional[str] = None) -> Optional[Tokenizer]:
+    """The tokenizer for model, or None if token counts for it are estimated."""
+    if model in _by_model:
+        return _by_model[model]
+    tokenizer = None
+    matches = [prefix for prefix in _registered if model and model.startswith(prefix)]
+    if matches:
+        tokenizer = _registered[max(matches, key=len)]
+    elif _tokenizer_setting() == "tiktoken":
+        try:
+            tokenizer = _load_tiktoken(model)
+        except Exception as e:
+            logger.warning(f"No tokenizer for model {model}, estimating token counts: {e}")
+    _by_model[model] = tokenizer
+    return tokenizer
+
+
+def warm_up(models: Iterable[Optional[str]]):
+    """Load the tokenizers of models ahead of their first use."""
+    for model in set(models):
+        tokenizer = get_tokenizer(model)
+        logger.info(f"Token counts for model {model} use {'a tokenizer' if tokenizer else 'the estimate'}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimated from the character count, without tokenizing."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None,
+                       max_chars: Optional[int] = None, marker: str = TRUNCATION_MARKER) -> str:
+    """
+    Cut text to at most max_tokens tokens for model, ending it with marker if it was cut.
+
+    Args:
+        max_chars: Character limit to use instead of the estimate when there is no tokenizer
+    """
+    if not text:
+        return text
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        limit = max_chars if max_chars is not None else max_tokens * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        return text[:max(0, limit - len(marker))] + marker
+    tokens = tokenizer.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    marker_tokens = len(tokenizer.encode(marker)) if marker else 0
+    return tokenizer.decode(tokens[:max(0, max_tokens - marker_tokens)]) + marker
+
@@ -12,22 +12,29 @@ import json
 import csv
 import asyncio
 import aiohttp
+import itertools
 import tempfile
 import traceback
 from urllib.parse import urlparse
 
-from typing import List, Dict, Any, Tuple, Union, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Tuple, Union, Optional
 
 from core.config import CONFIG
 from core.embedding import batch_get_embeddings
+from core.utils.seen_urls import SeenUrls
+from data_loading.ingest_manifest import IngestManifest
 from data_loading.db_load_utils import (
     read_file_lines,
     prepare_documents_from_json,
     documents_from_csv_line,
+    int64_hash,
+    content_hash,
 )
 
 # Import vector database client directly
-from core.retriever import get_vector_db_client, upload_documents, delete_documents_by_site
+from core.retriever import (
+    get_vector_db_client, upload_documents, delete_documents_by_site, delete_documents_by_ids, delete_replaced_documents,
+)
 
 # Import RSS to Schema converter
 import data_loading.rss2schema as rss2schema
@@ -154,6 +161,31 @@ async def is_url(path: str) -> bool:
     except Exception:
         return False
 
+def _url_extension(url: str, content_type: str) -> Optional[str]:
+    """
+    Determine the file extension of a URL's content from its content type, or else its path.
+    """
+    content_type = content_type.lower()
+    ext = None
+    if 'application/json' in content_type:
+        ext = '.json'
+    elif 'text/csv' in content_type or 'application/csv' in content_type:
+        ext = '.csv'
+    elif 'application/rss+xml' in content_type or 'application/atom+xml' in content_type:
+        ext = '.xml'
+    elif 'text/xml' in content_type:
+        ext = '.xml'
+        
+    # If extension not determined from content-type, try from URL
+    if ext is None:
+        path = urlparse(url).path
+        if '.' in path:
+            ext = os.path.splitext(path)[1].lower()
+        # For URLs ending with 'feed' or similar
+        elif any(kw in path.lower() for kw in ['/feed', '/rss', '/podcast']):
+            ext = '.xml'
+    return ext
+
 async def fetch_url(url: str) -> Tuple[str, Optional[str]]:
     """
     Fetch content from a URL.
@@ -173,27 +205,7 @@ async def fetch_url(url: str) -> Tuple[str, Optional[str]]:
                     raise ValueError(f"Failed to fetch URL {url}: HTTP {response.status}")
                 
                 # Get content type and extension
-                content_type = response.headers.get('Content-Type', '').lower()
-                
-                # Determine file extension based on content type
-                ext = None
-                if 'application/json' in content_type:
-                    ext = '.json'
-                elif 'text/csv' in content_type or 'application/csv' in content_type:
-                    ext = '.csv'
-                elif 'application/rss+xml' in content_type or 'application/atom+xml' in content_type:
-                    ext = '.xml'
-                elif 'text/xml' in content_type:
-                    ext = '.xml'
-                    
-                # If extension not determined from content-type, try from URL
-                if ext is None:
-                    path = urlparse(url).path
-                    if '.' in path:
-                        ext = os.path.splitext(path)[1].lower()
-                    # For URLs ending with 'feed' or similar
-                    elif any(kw in path.lower() for kw in ['/feed', '/rss', '/podcast']):
-                        ext = '.xml'
+                ext = _url_extension(url, response.headers.get('Content-Type', ''))
                 
                 # Get content as text
                 content = await response.text()
@@ -202,19 +214,46 @@ async def fetch_url(url: str) -> Tuple[str, Optional[str]]:
         print(f"Error fetching URL {url}: {str(e)}")
         raise
 
+# Bytes of downloaded content looked at to tell its type
+SNIFF_SIZE = 65536
+
 async def save_url_content(url: str) -> Tuple[str, str]:
     """
     Fetch content from a URL and save to a temporary file.
     
+    The content is streamed to the file as it downloads, so that large feeds are never
+    held in memory.
+    
     Args:
         url: URL to fetch
         
     Returns:
         Tuple of (file_path, file_type)
     """
-    content, ext = await fetch_url(url)
+    print(f"Fetching content from URL: {url}")
     
-    # Create a temporary file with the appropriate extension
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise ValueError(f"Failed to fetch URL {url}: HTTP {response.status}")
+                
+                ext = _url_extension(url, response.headers.get('Content-Type', ''))
+                
+                head = b''
+                with tempfile.NamedTemporaryFile(suffix='.download', delete=False) as temp:
+                    async for chunk in response.content.iter_chunked(SNIFF_SIZE):
+                        if len(head) < SNIFF_SIZE:
+                            head += chunk[:SNIFF_SIZE - len(head)]
+                        temp.write(chunk)
+                    download_path = temp.name
+    except Exception as e:
+        print(f"Error fetching URL {url}: {str(e)}")
+        raise
+    
+    content = head.decode('utf-8', errors='replace')
+    
+    # Give the temporary file the appropriate extension
     if ext is None:
         # Check content for RSS/XML markers
         if '<?xml' in content[:100] or '<rss' in content[:1000] or '<feed' in content[:1000]:
@@ -222,9 +261,8 @@ async def save_url_content(url: str) -> Tuple[str, str]:
         else:
             ext = '.txt'  # Default extension if we can't determine
     
-    with tempfile.NamedTemporaryFile(suffix=ext, delete=False, mode='w', encoding='utf-8') as temp:
-        temp.write(content)
-        temp_path = temp.name
+    temp_path = os.path.splitext(download_path)[0] + ext
+    os.replace(download_path, temp_path)
     
     # Determine file type
     file_type = 'unknown'
@@ -462,7 +500,7 @@ async def process_csv_file(file_path: str, site: str) -> List[Dict[str, Any]]:
                     
                     # Create document
                     document = {
-                        "id": str(hash(url) % (2**63)),  # Create a stable ID from the URL
+                        "id": str(int64_hash(url)),  # Create a stable ID from the URL
                         "schema_json": json_data,
                         "url": url,
                         "name": name,
@@ -500,6 +538,60 @@ async def process_csv_file(file_path: str, site: str) -> List[Dict[str, Any]]:
     
 
 
+def iter_rss_documents(file_path: str, site: str, seen: Optional[SeenUrls] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Convert an RSS/Atom feed into document objects, yielding each one as the feed is parsed.
+    
+    Args:
+        file_path: Path to the RSS file
+        site: Site identifier
+        seen: URLs already loaded in this run; episodes with these URLs are skipped
+        
+    Yields:
+        Document objects
+    """
+    print(f"Processing RSS/Atom feed: {file_path}")
+    
+    count = 0
+    duplicates = 0
+    
+    # Process each episode in the feed, as it is converted to schema.org format
+    for episode in rss2schema.iter_feed_to_schema(file_path):
+        # Extract URL
+        url = episode.get("url")
+        
+        # Generate a synthetic URL if needed
+        if not url and "name" in episode:
+            url = f"synthetic:{site}:{episode['name']}"
+            episode["url"] = url
+            print(f"Generated synthetic URL for episode: {episode['name']}")
+        elif not url:
+            # Skip items without any identifiable information
+            continue
+        
+        if seen is not None and not seen.add(url):
+            duplicates += 1
+            continue
+        
+        # Convert to JSON - ensure no newlines in the JSON
+        json_data = json.dumps(episode, ensure_ascii=False).replace("\n", " ")
+        
+        # Extract name
+        name = episode.get("name", "Untitled Episode")
+        
+        # Create document
+        count += 1
+        yield {
+            "id": str(int64_hash(url)),  # Create a stable ID from the URL
+            "schema_json": json_data,
+            "url": url,
+            "name": name,
+            "site": site
+        }
+    
+    skipped = f" (skipped {duplicates} already seen)" if duplicates else ""
+    print(f"Processed {count} episodes from RSS/Atom feed{skipped}")
+
 async def process_rss_feed(file_path: str, site: str) -> List[Dict[str, Any]]:
     """
     Process an RSS/Atom feed into document objects.
@@ -511,51 +603,209 @@ async def process_rss_feed(file_path: str, site: str) -> List[Dict[str, Any]]:
     Returns:
         List of document objects
     """
-    print(f"Processing RSS/Atom feed: {file_path}")
-    
     try:
-        # Convert feed to schema.org format
-        podcast_episodes = rss2schema.feed_to_schema(file_path)
+        return list(iter_rss_documents(file_path, site))
+    except Exception as e:
+        print(f"Error processing RSS/Atom feed: {str(e)}")
+        traceback.print_exc()
+        return []
+
+async def embed_and_upload_documents(documents: Iterable[Dict[str, Any]], batch_size: int = 100,
+                                     query_params: Optional[Dict[str, Any]] = None, embed_file=None,
+                                     on_uploaded: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> int:
+    """
+    Compute embeddings for documents and upload them to the database, a batch at a time.
+    
+    The documents can be a generator, such as the documents of a feed being parsed, in which
+    case each batch is uploaded as soon as it has been read.
+    
+    Args:
+        documents: Document objects
+        batch_size: Number of documents to embed and upload in each batch
+        query_params: Query parameters, for the development mode database override
+        embed_file: Open file to also write url<TAB>json<TAB>embedding lines to
+        on_uploaded: Function called with the documents of each batch that were uploaded
         
-        documents = []
+    Returns:
+        Number of documents uploaded
+    """
+    # Get embedding provider from config
+    provider = CONFIG.preferred_embedding_provider
+    provider_config = CONFIG.get_embedding_provider(provider)
+    model = provider_config.model if provider_config else None
+    
+    total_batches = (len(documents) + batch_size - 1) // batch_size if hasattr(documents, '__len__') else None
+    of_total = f" of {total_batches}" if total_batches else ""
+    
+    documents = iter(documents)
+    total_documents = 0
+    processed = 0
+    batch_idx = 0
+    while True:
+        batch_docs = list(itertools.islice(documents, batch_size))
+        if not batch_docs:
+            break
+        batch_idx += 1
+        processed += len(batch_docs)
         
-        # Process each episode in the feed
-        for episode in podcast_episodes:
-            # Extract URL
-            url = episode.get("url")
-            
-            # Generate a synthetic URL if needed
-            if not url and "name" in episode:
-                url = f"synthetic:{site}:{episode['name']}"
-                episode["url"] = url
-                print(f"Generated synthetic URL for episode: {episode['name']}")
-            elif not url:
-                # Skip items without any identifiable information
-                continue
+        try:
+            print(f"Computing embeddings for batch of {len(batch_docs)} texts")
             
-            # Convert to JSON - ensure no newlines in the JSON
-            json_data = json.dumps(episode, ensure_ascii=False).replace("\n", " ")
+            # Compute embeddings for the batch
+            embeddings = await batch_get_embeddings([doc["schema_json"] for doc in batch_docs], provider, model)
             
-            # Extract name
-            name = episode.get("name", "Untitled Episode")
+            # Add embeddings to documents; those left without one are not uploaded
+            docs_with_embeddings = []
+            embedded_docs = []
+            for doc, embedding in zip(batch_docs, embeddings):
+                if not embedding:
+                    continue
+                embedded_docs.append(doc)
+                doc = doc.copy()  # Create a copy of the document
+                doc["embedding"] = embedding
+                
+                if embed_file is not None:
+                    # Format embedding as string - ensure no newlines
+                    embedding_str = str(embedding).replace(' ', '').replace('\n', '')
+                    
+                    # Ensure JSON has no newlines
+                    doc_json = doc['schema_json'].replace('\n', ' ')
+                    
+                    # Write to embeddings file
+                    embed_file.write(f"{doc['url']}\t{doc_json}\t{embedding_str}\n")
+                
+                docs_with_embeddings.append(doc)
             
-            # Create document
-            document = {
-                "id": str(hash(url) % (2**63)),  # Create a stable ID from the URL
-                "schema_json": json_data,
-                "url": url,
-                "name": name,
-                "site": site
-            }
+            print(f"Uploading batch {batch_idx}{of_total} ({len(docs_with_embeddings)} documents)")
+            uploaded = await upload_documents(docs_with_embeddings, query_params=query_params)
+            if uploaded is None:
+                uploaded = len(docs_with_embeddings)
+            if uploaded < len({doc["id"] for doc in embedded_docs}):
+                # Which documents the database dropped isn't known, so none of them are reported
+                print(f"Warning: only {uploaded} of the {len(embedded_docs)} documents of batch {batch_idx} were uploaded")
+                embedded_docs = []
+            else:
+                print(f"Successfully uploaded batch {batch_idx}")
+            if on_uploaded is not None:
+                on_uploaded(embedded_docs)
             
-            documents.append(document)
+            total_documents += uploaded
+        except Exception as e:
+            print(f"Error processing batch: {str(e)}")
+            traceback.print_exc()
         
-        print(f"Processed {len(documents)} episodes from RSS/Atom feed")
-        return documents
+        # Print progress
+        print(f"Processed {processed} documents")
+    
+    return total_documents
+
+def open_manifest(site: str, source: str, endpoint_name: str) -> IngestManifest:
+    """
+    Open the manifest of the documents previously loaded from a source into a site, for
+    the configured embedding model.
+    
+    Args:
+        site: Site identifier
+        source: The file path or URL the documents are loaded from
+        endpoint_name: Database endpoint the documents are loaded into
+        
+    Returns:
+        The manifest, empty if the source wasn't loaded incrementally before
+    """
+    provider = CONFIG.preferred_embedding_provider
+    provider_config = CONFIG.get_embedding_provider(provider)
+    model = provider_config.model if provider_config else None
+    manifest = IngestManifest(site, source, endpoint_name, f"{provider}/{model}")
+    if manifest.stale:
+        print(f"The embedding model changed since {source} was last loaded, reloading all of its documents")
+    return manifest
+
+def changed_documents(documents: Iterable[Dict[str, Any]], manifest: IngestManifest) -> Iterator[Dict[str, Any]]:
+    """
+    Filter documents down to those that are new or changed since the source was last loaded,
+    adding their content hashes. Every document is noted in the manifest. Backends that store
+    the hash (Qdrant keeps it in the payload) have it alongside the manifest; those with a
+    fixed schema leave it out.
+    
+    Args:
+        documents: Document objects
+        manifest: Manifest of the source
+        
+    Yields:
+        New and changed documents
+    """
+    for doc in documents:
+        doc["content_hash"] = content_hash(doc["schema_json"])
+        if not manifest.unchanged(doc["id"], doc["content_hash"], doc.get("url")):
+            yield doc
+
+def record_uploaded(manifest: IngestManifest) -> Callable[[List[Dict[str, Any]]], None]:
+    """The on_uploaded callback of embed_and_upload_documents that records documents in a manifest."""
+    def _record(documents: List[Dict[str, Any]]):
+        for doc in documents:
+            manifest.record(doc["id"], doc["content_hash"])
+    return _record
+
+async def finish_incremental_load(manifest: IngestManifest, query_params: Optional[Dict[str, Any]] = None,
+                                  delete_vanished: bool = True) -> int:
+    """
+    Delete the documents that are no longer in the source and save the manifest. Call it
+    once all documents of the source have been through changed_documents and were uploaded.
+    On the first incremental load of a source, versions of its documents stored under their
+    earlier IDs are deleted too (see ingest_manifest).
+    
+    Args:
+        manifest: Manifest of the source
+        query_params: Query parameters, for the development mode database override
+        delete_vanished: Whether the whole source was read, so that documents missing from it
+            were removed from it; if not, they are kept for the next load to delete
+        
+    Returns:
+        Number of documents deleted
+    """
+    vanished = manifest.vanished()
+    deleted = 0
+    if vanished and delete_vanished:
+        try:
+            deleted = await delete_documents_by_ids(manifest.site, vanished, query_params=query_params)
+            print(f"Deleted {deleted} documents that are no longer in {manifest.source}")
+        except NotImplementedError as e:
+            print(f"Warning: {e}, so {len(vanished)} documents that are no longer in {manifest.source} were kept")
+            manifest.keep(vanished)
+        except Exception as e:
+            print(f"Error deleting documents that are no longer in {manifest.source}: {str(e)}")
+            manifest.keep(vanished)
+    elif vanished:
+        manifest.keep(vanished)
+    if manifest.old_ids:
+        deleted += await _delete_old_ids(manifest, query_params)
+    manifest.save()
+    print(f"Skipped {manifest.skipped} unchanged documents")
+    return deleted
+
+# URLs per request when deleting documents stored under their earlier IDs
+OLD_ID_BATCH_SIZE = 1000
+
+async def _delete_old_ids(manifest: IngestManifest, query_params: Optional[Dict[str, Any]]) -> int:
+    """Delete the documents of a source stored under other IDs than their current ones, noting it in the manifest."""
+    ids_by_url = manifest.ids_by_url()
+    urls = list(ids_by_url)
+    deleted = 0
+    try:
+        for start in range(0, len(urls), OLD_ID_BATCH_SIZE):
+            batch = {url: ids_by_url[url] for url in urls[start:start + OLD_ID_BATCH_SIZE]}
+            deleted += await delete_replaced_documents(manifest.site, batch, query_params=query_params)
+    except NotImplementedError as e:
+        print(f"Warning: {e}, so copies of documents loaded from {manifest.source} under their earlier IDs may remain; "
+              f"delete the site and load it again to remove them")
     except Exception as e:
-        print(f"Error processing RSS/Atom feed: {str(e)}")
-        traceback.print_exc()
-        return []
+        # Tried again on the next load
+        print(f"Error deleting documents of {manifest.source} stored under their earlier IDs: {str(e)}")
+        return deleted
+    if deleted:
+        print(f"Deleted {deleted} documents of {manifest.source} stored under their earlier IDs")
+    manifest.old_ids = False
+    return deleted
 
 async def loadJsonWithEmbeddingsToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, database: str = None):
     """
@@ -680,7 +930,8 @@ async def loadJsonWithEmbeddingsToDB(file_path: str, site: str, batch_size: int
             except Exception:
                 pass
 
-async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None):
+async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None,
+                       incremental: bool = False, manifest: Optional[IngestManifest] = None):
     """
     Load data from a file, compute embeddings, and store in the database.
     
@@ -698,10 +949,16 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         delete_existing: Whether to delete existing entries for this site before loading
         force_recompute: Whether to force recomputation of embeddings
         database: Specific database endpoint to use (if None, uses preferred endpoint)
+        incremental: Whether to only embed and upload documents that changed since the file was
+            last loaded incrementally, and delete those it no longer has (see ingest_manifest).
+            No file with embeddings is read or written in this mode.
+        manifest: Manifest to load incrementally with, when the file is part of a larger source;
+            the caller finishes the load
     """
     # Check if this is a URL
     is_url_path = await is_url(file_path)
     temp_path = None
+    incremental = incremental or manifest is not None
     
     if is_url_path:
         temp_path, _ = await save_url_content(file_path)
@@ -735,14 +992,14 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         print(f"Detected file type: {file_type}")
         
         # If embeddings are detected, switch to loadJsonWithEmbeddingsToDB
-        if has_embeddings and not force_recompute:
+        if has_embeddings and not force_recompute and not incremental:
             print(f"File already contains embeddings, switching to direct loading mode...")
             return await loadJsonWithEmbeddingsToDB(resolved_path, site, batch_size, delete_existing, endpoint_name)
         
         # Check for existing embeddings file if not forcing recomputation
         embeddings_path = get_embeddings_file_path(os.path.basename(original_path))
         
-        if os.path.exists(embeddings_path) and not force_recompute:
+        if os.path.exists(embeddings_path) and not force_recompute and not incremental:
             # In interactive mode, ask the user what to do
             if sys.stdin.isatty():
                 response = input(f"A file with embeddings already exists at {embeddings_path}. Use it? (y/n): ")
@@ -776,6 +1033,7 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         
         # Initialize documents list
         all_documents = []
+        seen = None
         
         # IMPORTANT FIX:
         # For XML files with RSS-like content, force it to be processed as RSS
@@ -794,9 +1052,10 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
             # Process standard CSV file
             all_documents = await process_csv_file(resolved_path, site)
         elif file_type == 'rss' or (file_type == 'xml' and ('/feed' in original_path.lower() or '/rss' in original_path.lower())):
-            # Process RSS/Atom feed
+            # Process RSS/Atom feed, embedding and uploading its episodes as they are parsed
             print("Processing as RSS feed...")
-            all_documents = await process_rss_feed(resolved_path, site)
+            seen = SeenUrls()
+            all_documents = iter_rss_documents(resolved_path, site, seen)
         else:
             # Default to JSON processing
             # Read all lines from the file
@@ -834,74 +1093,34 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
                     print(f"Error processing line: {str(e)}")
                     continue
         
-        # If we have documents to process
-        if all_documents:
-            # Ensure the directory exists for the embeddings file
-            os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
-            
-            # Open file to write documents with embeddings
-            with open(embeddings_path, 'w', encoding='utf-8') as embed_file:
-                # Extract texts for embedding
-                texts = [doc["schema_json"] for doc in all_documents]
-                
-                # Process in batches
-                total_documents = 0
-                
-                for i in range(0, len(all_documents), batch_size):
-                    batch_docs = all_documents[i:i+batch_size]
-                    batch_texts = texts[i:i+batch_size]
-                    
-                    if batch_docs and batch_texts:
-                        try:
-                            print(f"Computing embeddings for batch of {len(batch_texts)} texts")
-                            
-                            # Compute embeddings for the batch
-                            embeddings = await batch_get_embeddings(batch_texts, provider, model)
-                            
-                            # Add embeddings to documents
-                            docs_with_embeddings = []
-                            
-                            for j, embedding in enumerate(embeddings):
-                                if j < len(batch_docs):
-                                    doc = batch_docs[j].copy()  # Create a copy of the document
-                                    
-                                    # Add embedding to document
-                                    doc["embedding"] = embedding
-                                    
-                                    # Format embedding as string - ensure no newlines
-                                    embedding_str = str(embedding).replace(' ', '').replace('\n', '')
-                                    
-                                    # Ensure JSON has no newlines
-                                    doc_json = doc['schema_json'].replace('\n', ' ')
-                                    
-                                    # Write to embeddings file
-                                    embed_file.write(f"{doc['url']}\t{doc_json}\t{embedding_str}\n")
-                                    
-                                    docs_with_embeddings.append(doc)
-                            
-                            # Upload batch using the client directly
-                            batch_idx = i // batch_size
-                            total_batches = (len(all_documents) + batch_size - 1) // batch_size
-                            
-                            print(f"Uploading batch {batch_idx+1} of {total_batches} ({len(docs_with_embeddings)} documents)")
-                            await upload_documents(docs_with_embeddings, query_params=query_params)
-                            print(f"Successfully uploaded batch {batch_idx+1}")
-                            
-                            total_documents += len(docs_with_embeddings)
-                        except Exception as e:
-                            print(f"Error processing batch: {str(e)}")
-                            traceback.print_exc()
-                    
-                    # Print progress
-                    print(f"Processed {min(i+batch_size, len(all_documents))}/{len(all_documents)} documents")
-            
+        if incremental:
+            try:
+                return await _load_incrementally(all_documents, manifest, original_path, site, endpoint_name,
+                                                 batch_size, query_params, delete_existing)
+            finally:
+                if seen is not None:
+                    seen.close()
+        
+        # Ensure the directory exists for the embeddings file
+        os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
+        
+        # Write documents with embeddings to a new file, which replaces the old one if there are any
+        try:
+            with open(embeddings_path + ".tmp", 'w', encoding='utf-8') as embed_file:
+                total_documents = await embed_and_upload_documents(all_documents, batch_size, query_params, embed_file)
+        finally:
+            if seen is not None:
+                seen.close()
+        
+        if total_documents:
+            os.replace(embeddings_path + ".tmp", embeddings_path)
             print(f"Loading completed. Added {total_documents} documents to the database.")
             print(f"Saved file with embeddings to {embeddings_path}")
-            
-            return total_documents
         else:
+            os.unlink(embeddings_path + ".tmp")
             print("No documents were extracted from the file.")
-            return 0
+        
+        return total_documents
     finally:
         # Clean up temporary file if needed
         if temp_path and os.path.exists(temp_path):
@@ -911,7 +1130,25 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
             except Exception:
                 pass
 
-async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None):
+async def _load_incrementally(documents: Iterable[Dict[str, Any]], manifest: Optional[IngestManifest], source: str,
+                              site: str, endpoint_name: str, batch_size: int, query_params: Optional[Dict[str, Any]],
+                              delete_existing: bool) -> int:
+    """Embed and upload the new and changed documents of a source, finishing the load unless the caller owns the manifest."""
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = open_manifest(site, source, endpoint_name)
+        if delete_existing:
+            manifest.reset()
+    
+    total_documents = await embed_and_upload_documents(changed_documents(documents, manifest), batch_size,
+                                                       query_params, on_uploaded=record_uploaded(manifest))
+    if own_manifest:
+        await finish_incremental_load(manifest, query_params)
+    print(f"Loading completed. Added or updated {total_documents} documents in the database.")
+    return total_documents
+
+async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None,
+                          incremental: bool = False):
     """
     Process a file containing a list of URLs, fetch each URL, and load the content into the database.
     Each line in the file should be a single URL pointing to RSS/XML or JSON content.
@@ -924,6 +1161,9 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
         delete_existing: Whether to delete existing entries for this site before loading
         force_recompute: Whether to force recomputation of embeddings
         database: Specific database endpoint to use (if None, uses preferred endpoint)
+        incremental: Whether to only embed and upload documents that changed since the list was
+            last loaded incrementally, and delete those no longer in any of its URLs. Nothing is
+            deleted if a URL fails to load.
         
     Returns:
         Total number of documents loaded
@@ -934,6 +1174,8 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
     # Check if the file_path is a URL
     is_url_list_remote = await is_url(file_path)
     temp_path = None
+    seen = None
+    manifest = open_manifest(site, file_path, endpoint_name) if incremental else None
     
     try:
         # If the file is a URL, fetch it first
@@ -963,13 +1205,19 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
         # Delete existing entries for this site if requested (do this only once)
         if delete_existing:
             await delete_site_from_database(site, endpoint_name)
+            if manifest is not None:
+                manifest.reset()
         
         # Get client directly from the factory function, using query_params for development mode override
         query_params = {"db": database} if database else None
         client = get_vector_db_client(query_params=query_params)
         
+        # Episodes loaded from the feeds so far, as feeds often repeat each other's episodes
+        seen = SeenUrls()
+        
         # Process each URL
         total_documents = 0
+        failed_urls = 0
         for i, url in enumerate(urls):
             print(f"\nProcessing URL {i+1}/{total_valid_urls}: {url}")
             
@@ -993,43 +1241,19 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
                         # Process as RSS/XML
                         # The URL becomes the 'site' for grouping purposes if requested
                         actual_site = site
-                        docs = await process_rss_feed(temp_url_path, actual_site)
+                        docs = iter_rss_documents(temp_url_path, actual_site, seen)
                         
-                        if docs:
-                            # Get embedding provider from config
-                            provider = CONFIG.preferred_embedding_provider
-                            provider_config = CONFIG.get_embedding_provider(provider)
-                            model = provider_config.model if provider_config else None
-                            
-                            # Process in batches
-                            for j in range(0, len(docs), batch_size):
-                                batch_docs = docs[j:j+batch_size]
-                                batch_texts = [doc["schema_json"] for doc in batch_docs]
-                                
-                                # Compute embeddings
-                                embeddings = await batch_get_embeddings(batch_texts, provider, model)
-                                
-                                # Add embeddings to documents
-                                docs_with_embeddings = []
-                                for k, embedding in enumerate(embeddings):
-                                    if k < len(batch_docs):
-                                        doc = batch_docs[k].copy()
-                                        doc["embedding"] = embedding
-                                        docs_with_embeddings.append(doc)
-                                
-                                # Upload batch directly with client
-                                batch_idx = j // batch_size
-                                total_batches = (len(docs) + batch_size - 1) // batch_size
-                                
-                                print(f"Uploading batch {batch_idx+1} of {total_batches} ({len(docs_with_embeddings)} documents)")
-                                await upload_documents(docs_with_embeddings, query_params=query_params)
-                                print(f"Successfully uploaded batch {batch_idx+1}")
-                                
-                                doc_count += len(docs_with_embeddings)
+                        # Embed and upload the episodes in batches, as the feed is parsed
+                        if manifest is not None:
+                            doc_count = await embed_and_upload_documents(changed_documents(docs, manifest), batch_size,
+                                                                         query_params, on_uploaded=record_uploaded(manifest))
+                        else:
+                            doc_count = await embed_and_upload_documents(docs, batch_size, query_params)
                     elif file_type == 'json':
                         # Process as JSON
                         # For each JSON file, we'll process it and add to the database
-                        doc_count = await loadJsonToDB(temp_url_path, site, batch_size, False, force_recompute, endpoint_name)
+                        doc_count = await loadJsonToDB(temp_url_path, site, batch_size, False, force_recompute, endpoint_name,
+                                                       manifest=manifest)
                     else:
                         print(f"Warning: Unsupported file type for URL {url}: {file_type}")
                     
@@ -1043,10 +1267,15 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
                         print(f"Cleaned up temporary file: {temp_url_path}")
             
             except Exception as e:
+                failed_urls += 1
                 print(f"Error processing URL {url}: {str(e)}")
                 traceback.print_exc()
                 print("Continuing with next URL...")
         
+        if manifest is not None:
+            # A URL that failed may still have documents the manifest lists
+            await finish_incremental_load(manifest, query_params, delete_vanished=failed_urls == 0)
+        
         print(f"\nProcessing completed. Added a total of {total_documents} documents from {total_valid_urls} URLs.")
         return total_documents
     
@@ -1055,6 +1284,8 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
         traceback.print_exc()
         return 0
     finally:
+        if seen is not None:
+            seen.close()
         # Clean up the temporary file if we created one
         if temp_path and os.path.exists(temp_path):
             try:
@@ -1074,7 +1305,8 @@ async def delete_site(site: str, database: str = None):
     count = await delete_site_from_database(site, database)
     print(f"Deleted {count} entries for site '{site}'")
 
-async def process_normal_path(input_file_path: str, site: str, batch_size: int = 100, delete_site: bool = False, force_recompute: bool = False, database: str = None):
+async def process_normal_path(input_file_path: str, site: str, batch_size: int = 100, delete_site: bool = False, force_recompute: bool = False, database: str = None,
+                              incremental: bool = False):
     # Check if file exists at the specified path
     if not await is_url(input_file_path) and not os.path.exists(input_file_path):
         print(f"Warning: File not found at '{input_file_path}'. Will try to resolve or download it.")
@@ -1097,9 +1329,13 @@ async def process_normal_path(input_file_path: str, site: str, batch_size: int =
             print(f"Detected file type: {file_type}, contains embeddings: {'Yes' if has_embeddings else 'No'}")
             
             # Process based on whether the file has embeddings
-            if has_embeddings and not force_recompute:
+            if has_embeddings and not force_recompute and not incremental:
                 print("File already contains embeddings, loading directly...")
                 await loadJsonWithEmbeddingsToDB(file_path, site, batch_size, delete_site, database)
+            elif incremental:
+                # The manifest belongs to the path given, not to the temporary file it was downloaded to
+                print("Loading changed documents of file...")
+                await loadJsonToDB(input_file_path, site, batch_size, delete_site, force_recompute, database, incremental=True)
             else:
                 print("Computing embeddings for file...")
                 await loadJsonToDB(file_path, site, batch_size, delete_site, force_recompute, database)
@@ -1129,6 +1365,7 @@ async def main():
         python db_loader.py --force-recompute file.txt site_name
         python db_loader.py --url-list urls.txt site_name
         python db_loader.py --url-list https://example.com/feed_list.txt site_name
+        python db_loader.py --incremental file.txt site_name
     """
     import argparse
     
@@ -1141,6 +1378,8 @@ async def main():
                         help="Force recomputation of embeddings even if a file with embeddings exists")
     parser.add_argument("--url-list", action="store_true",
                         help="Treat the input file as a list of URLs to process (one URL per line). The list file itself can be local or a URL.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed and upload documents that changed since the last incremental load of the same file, and delete those it no longer has")
     parser.add_argument("--directory", action="store_true",
                         help="Treat the input file path as a directory containing files to process.")
     parser.add_argument("file_path", nargs="?", help="Path to the input file or URL or directory containing files to process")
@@ -1173,7 +1412,8 @@ async def main():
         else:
             print(f"Processing local URL list file: {args.file_path}")
             
-        await loadUrlListToDB(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
+        await loadUrlListToDB(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database,
+                              args.incremental)
         return
     
     if args.directory:
@@ -1190,11 +1430,13 @@ async def main():
             if os.path.isfile(file_path):
                 # The downside of this approach is that we aren't taking advantage of the batch functionality
                 print(f"Processing file: {file_path}")
-                await process_normal_path(file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
+                await process_normal_path(file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database,
+                                          args.incremental)
         return
     
     # Normal processing mode
-    await process_normal_path(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
+    await process_normal_path(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database,
+                              args.incremental)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -6,10 +6,12 @@ Includes functions for document creation, transformation, and database operation
 import os
 import json
 import asyncio
+import hashlib
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple, Union
 from core.config import CONFIG
 from core.utils.trim_schema_json import trim_schema_json
+from core.utils.json_utils import ranking_text
 
 # Item type categorization
 SKIP_TYPES = ["ItemList", "ListItem", "AboutPage", "WebPage", "WebSite", "Person"]
@@ -57,6 +59,8 @@ async def read_file_lines(file_path: str) -> List[str]:
 def int64_hash(string):
     """
     Compute a hash value for a string, ensuring it fits within int64 range.
+    The value is the same in every process (unlike hash(), which is salted per
+    process), so a document keeps its ID each time it is loaded.
     
     Args:
         string: The string to hash
@@ -64,8 +68,20 @@ def int64_hash(string):
     Returns:
         int64 hash value
     """
-    hash_value = hash(string)
-    return np.int64(hash_value)
+    digest = hashlib.blake2b(string.encode("utf-8"), digest_size=8).digest()
+    return np.int64(int.from_bytes(digest, "big", signed=True))
+
+def content_hash(schema_json: str) -> str:
+    """
+    Compute the hash of a document's content, to tell whether it changed since it was loaded.
+    
+    Args:
+        schema_json: The document's JSON
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(schema_json.encode("utf-8")).hexdigest()
 
 def should_include_item(js):
     """
@@ -193,6 +209,7 @@ def prepare_documents_from_json(url: str, json_data: str, site: str) -> Tuple[Li
             doc = {
                 "id": str(int64_hash(item_url)),
                 "schema_json": item_json,
+                "ranking_text": ranking_text(item),
                 "url": item_url,
                 "name": get_item_name(item),
                 "site": site
@@ -249,6 +266,7 @@ def documents_from_csv_line(line, site):
             "id": str(int64_hash(item_url)),
             "embedding": embedding,
             "schema_json": json.dumps(item),
+            "ranking_text": ranking_text(item),
             "url": item_url or "",
             "name": name or "Unnamed Item",
             "site": site or "unknown"
@@ -267,6 +285,22 @@ def documents_from_csv_line(line, site):
     
     return documents
 
+def add_ranking_text(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add the ranking text (the trimmed, token-budgeted description used in ranking prompts)
+    to documents that don't have it yet, so it is computed once here rather than per query.
+    
+    Args:
+        documents: Document objects with a schema_json field
+        
+    Returns:
+        The same documents
+    """
+    for doc in documents:
+        if not doc.get("ranking_text") and doc.get("schema_json"):
+            doc["ranking_text"] = ranking_text(doc["schema_json"])
+    return documents
+
 # ---------- Database Client Functions ----------
 
 # Note: This function is maintained for backward compatibility
@@ -310,6 +344,7 @@ async def upload_batch_to_db(client, db_type, documents, batch_idx, total_batche
     if not documents:
         return
     
+    add_ranking_text(documents)
     try:
         print(f"Uploading batch {batch_idx+1} of {total_batches} ({len(documents)} documents)")
         
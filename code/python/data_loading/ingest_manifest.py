@@ -0,0 +1,118 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Manifests of the documents loaded from a source, for re-loading it incrementally.
+
+A manifest records, for one source (a file, a URL or a URL list) loaded into one site of
+one database endpoint, the ID and content hash of each document it yielded, and the
+embedding model they were embedded with. When the source is loaded again, documents with
+the same hash are skipped, changed and new ones are embedded and upserted in place (their
+IDs are derived from their URLs, so they overwrite the old versions), and documents that
+are no longer in the source are deleted. The site stays searchable throughout.
+
+Document IDs used to come from Python's hash(), which differs between processes, so a site
+loaded before may hold the source's documents under other IDs. The first incremental load
+of a source therefore also deletes the documents with one of its URLs but another ID, once
+their replacements are uploaded, rather than replacing the whole site: other sources of
+the site, possibly being loaded at the same time, are left as they are. The manifest notes
+when that was done, and later loads skip it.
+
+Manifests are JSON files under <json_with_embeddings_folder>/manifests/<endpoint>/<site>/.
+Without one, every document is loaded and nothing is deleted, as on a first load.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Set
+
+from core.config import CONFIG
+
+
+class IngestManifest:
+    """The documents loaded from one source into a site, by ID, with their content hashes."""
+
+    def __init__(self, site: str, source: str, endpoint: str, embedding: str,
+                 directory: Optional[str] = None):
+        directory = directory or os.path.join(CONFIG.nlweb.json_with_embeddings_folder, "manifests")
+        name = _safe(os.path.basename(source.rstrip("/")))[:60]
+        digest = hashlib.blake2b(source.encode("utf-8"), digest_size=4).hexdigest()
+        self.path = os.path.join(directory, _safe(endpoint), _safe(site), f"{name}-{digest}.json")
+        self.site = site
+        self.source = source
+        self.embedding = embedding
+
+        self._previous: Dict[str, str] = {}
+        # The previous documents were embedded with another model, so all of them are reloaded
+        self.stale = False
+        # Documents of the source may still be stored under their earlier IDs
+        self.old_ids = True
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._previous = data.get("documents", {})
+            self.stale = data.get("embedding") != embedding
+            self.old_ids = not data.get("old_ids_deleted")
+        self._current: Dict[str, str] = {}
+        self._urls: Dict[str, str] = {}
+        self._seen: Set[str] = set()
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._previous)
+
+    def unchanged(self, doc_id: str, content_hash: str, url: Optional[str] = None) -> bool:
+        """Note a document of the source. Returns True if it was loaded before with the same content."""
+        self._seen.add(doc_id)
+        if url and self.old_ids:
+            self._urls[url] = doc_id
+        if not self.stale and self._previous.get(doc_id) == content_hash:
+            self._current[doc_id] = content_hash
+            self.skipped += 1
+            return True
+        return False
+
+    def reset(self):
+        """Forget the previous load, after the site was deleted, so that every document is loaded."""
+        self._previous = {}
+        self.old_ids = False
+
+    def record(self, doc_id: str, content_hash: str):
+        """Note that a document was uploaded."""
+        self._current[doc_id] = content_hash
+
+    def ids_by_url(self) -> Dict[str, str]:
+        """The ID of each document in the database now (uploaded or unchanged), by URL, while old_ids is set."""
+        return {url: doc_id for url, doc_id in self._urls.items() if doc_id in self._current}
+
+    def vanished(self) -> List[str]:
+        """IDs of the documents loaded before that the source no longer has."""
+        return [doc_id for doc_id in self._previous if doc_id not in self._seen]
+
+    def keep(self, doc_ids: List[str]):
+        """Keep documents in the manifest, so that a later load deletes them if they can't be deleted now."""
+        for doc_id in doc_ids:
+            self._current[doc_id] = self._previous[doc_id]
+
+    def save(self):
+        """Write the manifest, replacing the previous one at once."""
+        documents = dict(self._current)
+        # Documents that were loaded before but failed to upload this time are still in the
+        # database, in some version; an empty hash makes the next load upload them again.
+        for doc_id in self._seen:
+            if doc_id not in documents and doc_id in self._previous:
+                documents[doc_id] = ""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"site": self.site, "source": self.source, "embedding": self.embedding,
+                       "old_ids_deleted": not self.old_ids, "documents": documents}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name) or "_"
@@ -0,0 +1,190 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Move a site to another shard while the servers keep serving it.
+
+The shards and routes are configured in the `sharding` block of config_retrieval.yaml.
+A move runs in four steps. Each one is recorded in the sharding state file, which
+running servers re-read within `reload_interval` seconds:
+
+1. The site's writes and deletes start going to both shards.
+2. The site's documents are copied from the old shard to the new one. The copy reads
+   them back with their embeddings, so nothing is re-embedded.
+3. Searches for the site switch to the new shard.
+4. The site is deleted from the old shard, and writes stop going there.
+
+The tool waits `reload_interval` between steps, so that every process is on the new
+step before the next one starts. If the move is interrupted, run the same command again
+to resume it. Copying is idempotent. A document re-uploaded while it was being copied
+may be copied in its older version. To rule that out, move the site with --keep-source,
+which stops after step 3 and copies again each time it is run, until no writes were in
+flight during the last copy, then run the move without it to finish.
+
+Both shards' backends must be able to export documents (Qdrant and Postgres can). Local
+Qdrant storage can't be opened by two processes at once, so stop the server before
+moving a site between local Qdrant shards.
+
+Run from the code/python directory:
+    python -m data_loading.migrate_site <site> <target shard> [--batch-size 100] [--keep-source]
+    python -m data_loading.migrate_site <site> --abort
+    python -m data_loading.migrate_site --status
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Dict, Optional
+
+from core.config import CONFIG
+from core.retriever import _load_client_class
+from core.sharding import COPYING, Shard, ShardRouter, ShardingError, get_router
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("migrate_site")
+
+
+class ShardClients:
+    """One client per endpoint, so that shards on the same endpoint share it."""
+
+    def __init__(self):
+        self._clients: Dict[str, object] = {}
+
+    def get(self, shard: Shard):
+        if shard.endpoint not in self._clients:
+            db_type = CONFIG.retrieval_endpoints[shard.endpoint].db_type
+            self._clients[shard.endpoint] = _load_client_class(db_type)(shard.endpoint)
+        return self._clients[shard.endpoint]
+
+    async def close(self):
+        for client in self._clients.values():
+            if hasattr(client, "close"):
+                await client.close()
+        self._clients.clear()
+
+
+async def copy_site(router: ShardRouter, clients: ShardClients, site: str, source: Shard, target: Shard,
+                    batch_size: int = 100) -> int:
+    """Copy a site's documents from one shard to another. Returns the number copied."""
+    source_client = clients.get(source)
+    if not hasattr(source_client, "export_documents"):
+        raise ShardingError(f"The backend of shard {source.name} can't export documents")
+    target_client = clients.get(target)
+
+    copied = 0
+    async for batch in source_client.export_documents(site, batch_size, **router.collection_kwargs(source)):
+        copied += await target_client.upload_documents(batch, **router.collection_kwargs(target))
+        logger.info(f"Copied {copied} documents of {site} from {source.name} to {target.name}")
+    return copied
+
+
+async def migrate_site(site: str, target: str, batch_size: int = 100, keep_source: bool = False,
+                       router: Optional[ShardRouter] = None, wait: Optional[float] = None) -> int:
+    """
+    Move a site to the target shard, resuming an interrupted move of the same site.
+
+    Args:
+        wait: Seconds to let the servers pick up each step (the router's reload_interval if unset)
+
+    Returns:
+        Number of documents copied
+    """
+    router = router or get_router()
+    if router is None:
+        raise ShardingError("Sharding is not enabled in config_retrieval.yaml")
+    wait = router.config.reload_interval if wait is None else wait
+    clients = ShardClients()
+
+    source_shard, target_shard = router.begin_migration(site, target)
+    copied = 0
+    try:
+        if router.migrations[site].phase == COPYING or keep_source:
+            print(f"Writes for {site} now go to {source_shard.name} and {target_shard.name}")
+            await asyncio.sleep(wait)
+            copied = await copy_site(router, clients, site, source_shard, target_shard, batch_size)
+            print(f"Copied {copied} documents to {target_shard.name}")
+        if router.migrations[site].phase == COPYING:
+            router.switch_migration(site)
+            print(f"Searches for {site} now go to {target_shard.name}")
+
+        if keep_source:
+            print(f"Kept {site} on {source_shard.name}; run again without --keep-source to finish the move")
+            return copied
+
+        await asyncio.sleep(wait)
+        deleted = await clients.get(source_shard).delete_documents_by_site(
+            site, **router.collection_kwargs(source_shard)
+        )
+        router.finish_migration(site)
+        print(f"Deleted {deleted} documents of {site} from {source_shard.name}; {site} is now on {target_shard.name}")
+        return copied
+    finally:
+        await clients.close()
+
+
+async def abort_migration(site: str, router: Optional[ShardRouter] = None, wait: Optional[float] = None) -> int:
+    """Stop moving a site and delete what was copied to the target shard. Returns the number deleted."""
+    router = router or get_router()
+    if router is None:
+        raise ShardingError("Sharding is not enabled in config_retrieval.yaml")
+    wait = router.config.reload_interval if wait is None else wait
+
+    migration = router.abort_migration(site)
+    # Let the servers stop writing to the target before cleaning it up
+    await asyncio.sleep(wait)
+    target = router.shards[migration.target]
+    clients = ShardClients()
+    try:
+        return await clients.get(target).delete_documents_by_site(site, **router.collection_kwargs(target))
+    finally:
+        await clients.close()
+
+
+def print_status(router: ShardRouter):
+    print("Shards:")
+    for shard in router.shards.values():
+        collection = f", collection {shard.collection}" if shard.collection else ""
+        default = " (default)" if shard.name == router.config.default_shard else ""
+        print(f"  {shard.name}: endpoint {shard.endpoint}{collection}{default}")
+    print("Routes:")
+    for site in sorted(set(router.config.routes) | set(router.overrides)):
+        moved = " (moved)" if site in router.overrides else ""
+        print(f"  {site} -> {router.overrides.get(site) or router.configured_shard(site)}{moved}")
+    for migration in router.migrations.values():
+        print(f"Migrating {migration.site} from {migration.source} to {migration.target} ({migration.phase})")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Move a site to another shard while serving it")
+    parser.add_argument("site", nargs="?", help="Site to move")
+    parser.add_argument("shard", nargs="?", help="Shard to move the site to")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents copied per batch")
+    parser.add_argument("--keep-source", action="store_true", help="Switch searches, but keep the site on its old shard")
+    parser.add_argument("--abort", action="store_true", help="Stop moving the site, deleting the partial copy")
+    parser.add_argument("--status", action="store_true", help="Show the shards, routes and migrations in progress")
+    args = parser.parse_args()
+
+    try:
+        router = get_router()
+        if router is None:
+            raise ShardingError("Sharding is not enabled in config_retrieval.yaml")
+        if args.status:
+            print_status(router)
+        elif args.site and args.abort:
+            deleted = asyncio.run(abort_migration(args.site, router))
+            print(f"Stopped moving {args.site}; deleted {deleted} copied documents")
+        elif args.site and args.shard:
+            asyncio.run(migrate_site(args.site, args.shard, args.batch_size, args.keep_source, router))
+        else:
+            parser.error("give a site and a shard, a site and --abort, or --status")
+    except ShardingError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Load many files into the vector database in parallel.
+
+Files are read and embedded by a pool of worker processes, each loading one file at a
+time with db_load.loadJsonToDB, largest files first. What the workers share is limited
+across all of them:
+
+- Embedding requests are held to --embed-rate texts per second in total.
+- Writes to the database (uploads and deletes) are all made by this process, at most
+  --write-concurrency at a time. This also lets the workers load into local Qdrant
+  storage, which only one process can open.
+
+A file that fails, or that has a batch that fails to embed or upload, is loaded again up
+to --retries times, after a delay that doubles each time. With --incremental, a retry only
+embeds and uploads what the failed attempt didn't. Progress and throughput are printed
+every --progress-interval seconds, and --summary writes a JSON report of every file.
+
+Each file is loaded into the site named after it (its name without the extension), unless
+--site is given. Directories are expanded to the files in them matching --pattern.
+
+--stub-embeddings DIM replaces the embedding provider with vectors of DIM dimensions
+computed from a hash of each text. Use it with a local Qdrant endpoint to run the whole
+pipeline without any service, for instance to measure its throughput.
+
+Run from the code/python directory:
+    python -m data_loading.parallel_load <files or directories> [--workers 4] [--embed-rate 1000]
+        [--write-concurrency 2] [--retries 2] [--database qdrant_local] [--incremental]
+        [--summary summary.json] [--stub-embeddings 1536]
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.config import CONFIG
+from core.retriever import delete_documents_by_ids, delete_replaced_documents, upload_documents
+
+# Embedding provider name recorded by workers using stub embeddings, so that incremental
+# manifests don't take stub vectors for the configured model's
+STUB_PROVIDER = "stub"
+
+
+@dataclass
+class FileLoad:
+    """A file to load, and how loading it went."""
+    path: str
+    site: str
+    size: int
+    status: str = "pending"  # pending, running, retrying, done or failed
+    attempts: int = 0
+    documents: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class SharedRateLimiter:
+    """
+    A rate limit shared by processes. Each process reserves its share before spending it,
+    and waits until the time the reservation starts.
+    """
+
+    def __init__(self, rate: float, context=None):
+        self.rate = rate
+        # When the next reservation can start, on the monotonic clock, which all processes share
+        self._next = (context or multiprocessing).Value("d", 0.0)
+
+    def reserve(self, cost: float) -> float:
+        """Reserve cost units. Returns the seconds to wait before spending them."""
+        with self._next.get_lock():
+            now = time.monotonic()
+            start = max(now, self._next.value)
+            self._next.value = start + cost / self.rate
+        return start - now
+
+
+async def stub_embeddings(texts: List[str], dimensions: int, *args, **kwargs) -> List[List[float]]:
+    """Unit vectors derived from a hash of each text: the same text always gets the same vector."""
+    embeddings = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+        vector = np.random.default_rng(seed).standard_normal(dimensions)
+        embeddings.append((vector / np.linalg.norm(vector)).tolist())
+    return embeddings
+
+
+# ---------- Worker processes ----------
+
+# Set up by _init_worker in each worker process
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(messages, limiter: Optional[SharedRateLimiter], stub_dimensions: Optional[int], verbose: bool):
+    from data_loading import db_load
+
+    embed = db_load.batch_get_embeddings
+    if stub_dimensions:
+        CONFIG.preferred_embedding_provider = STUB_PROVIDER
+
+        async def embed(texts, *args, **kwargs):
+            return await stub_embeddings(texts, stub_dimensions)
+
+    _worker.update(messages=messages, limiter=limiter, verbose=verbose)
+    # db_load embeds and writes through these names, so a worker's loads go through the shared limits
+    db_load.batch_get_embeddings = _limited_embeddings(embed)
+    db_load.upload_documents = _remote_write("upload")
+    db_load.delete_documents_by_ids = _remote_write("delete_by_ids")
+    db_load.delete_replaced_documents = _remote_write("delete_replaced")
+
+
+def _limited_embeddings(embed):
+    async def batch_get_embeddings(texts, *args, **kwargs):
+        if _worker["limiter"] is not None:
+            await asyncio.sleep(_worker["limiter"].reserve(len(texts)))
+        try:
+            embeddings = await embed(texts, *args, **kwargs)
+        except Exception as e:
+            _worker["errors"].append(f"embedding failed: {e}")
+            raise
+        _worker["messages"].put(("embedded", len(texts)))
+        return embeddings
+    return batch_get_embeddings
+
+
+def _remote_write(operation: str):
+    async def write(*args, **kwargs):
+        # Keyword arguments (the endpoint override) are dropped: the orchestrator picks the endpoint
+        _worker["messages"].put(("write", operation, args, _worker["replies"]))
+        status, value = await asyncio.to_thread(_worker["replies"].get)
+        if status == "unsupported":
+            raise NotImplementedError(value)
+        if status == "error":
+            _worker["errors"].append(f"{operation} failed: {value}")
+            raise RuntimeError(value)
+        return value
+    return write
+
+
+def _load_file(path: str, site: str, options: Dict[str, Any], replies) -> int:
+    """Load a file in a worker process. Returns the number of documents loaded."""
+    from data_loading import db_load
+
+    _worker.update(replies=replies, errors=[])
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if _worker["verbose"] else devnull):
+        documents = asyncio.run(db_load.loadJsonToDB(
+            path, site, options["batch_size"], False, options["force_recompute"], options["database"],
+            incremental=options["incremental"],
+        ))
+    # db_load goes on after a batch fails, so the file is retried here
+    if _worker["errors"]:
+        raise RuntimeError(f"{len(_worker['errors'])} batches failed, the first with: {_worker['errors'][0]}")
+    return documents
+
+
+# ---------- Orchestrator ----------
+
+class IngestionOrchestrator:
+    """Loads files with a pool of worker processes, under global embedding and write limits."""
+
+    def __init__(self, files: List[FileLoad], workers: int = 4, batch_size: int = 100,
+                 embed_rate: Optional[float] = None, write_concurrency: int = 2, retries: int = 2,
+                 retry_delay: float = 5.0, database: Optional[str] = None, incremental: bool = False,
+                 force_recompute: bool = False, stub_dimensions: Optional[int] = None,
+                 progress_interval: float = 5.0, verbose: bool = False):
+        # Largest files first, so that the last ones to finish are small
+        self.files = sorted(files, key=lambda f: f.size, reverse=True)
+        self.workers = workers
+        self.embed_rate = embed_rate
+        self.write_concurrency = write_concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.stub_dimensions = stub_dimensions
+        self.progress_interval = progress_interval
+        self.verbose = verbose
+        self.options = {"batch_size": batch_size, "database": database, "incremental": incremental,
+                        "force_recompute": force_recompute}
+
+        self.embedded = 0
+        self.uploaded = 0
+        self.deleted = 0
+        self.failed_writes = 0
+        self._started = None
+
+    @staticmethod
+    def find_files(paths: List[str], pattern: str = "*.txt", site: Optional[str] = None) -> List[FileLoad]:
+        """The files to load: the files given, and those in the directories given that match the pattern."""
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                matches = sorted(p for p in glob.glob(os.path.join(path, pattern)) if os.path.isfile(p))
+            else:
+                matches = [path]
+            for match in matches:
+                name = os.path.splitext(os.path.basename(match))[0]
+                files.append(FileLoad(match, site or name, os.path.getsize(match) if os.path.exists(match) else 0))
+        return files
+
+    async def run(self) -> Dict[str, Any]:
+        """Load all files. Returns the summary."""
+        self._started = time.monotonic()
+        started_at = datetime.now(timezone.utc).isoformat()
+        context = multiprocessing.get_context("spawn")
+        limiter = SharedRateLimiter(self.embed_rate, context) if self.embed_rate else None
+        self._messages = context.Queue()
+        self._write_slots = asyncio.Semaphore(self.write_concurrency)
+        self._file_slots = asyncio.Semaphore(self.workers)
+        self._writes = set()
+        self._new_executor = lambda: ProcessPoolExecutor(
+            self.workers, mp_context=context, initializer=_init_worker,
+            initargs=(self._messages, limiter, self.stub_dimensions, self.verbose))
+
+        loop = asyncio.get_running_loop()
+        reader = threading.Thread(target=self._read_messages, args=(loop,), daemon=True)
+        reader.start()
+        progress = asyncio.create_task(self._report_progress())
+        self._executor = self._new_executor()
+        try:
+            with context.Manager() as manager:
+                await asyncio.gather(*(self._load(file, manager) for file in self.files))
+        finally:
+            progress.cancel()
+            self._executor.shutdown()
+            self._messages.put(None)
+            reader.join()
+        # Count the last messages
+        await asyncio.sleep(0)
+        self._print_progress()
+        return self.summary(started_at)
+
+    async def _load(self, file: FileLoad, manager):
+        """Load a file, retrying it if it fails."""
+        loop = asyncio.get_running_loop()
+        while True:
+            async with self._file_slots:
+                file.status = "running"
+                file.attempts += 1
+                executor = self._executor
+                start = time.monotonic()
+                try:
+                    file.documents = await loop.run_in_executor(
+                        executor, _load_file, file.path, file.site, self.options, manager.Queue())
+                    file.status, file.error = "done", None
+                    return
+                except BrokenProcessPool as e:
+                    # A worker died, taking the files it and the others were loading with it
+                    file.error = f"worker process died: {e}"
+                    if self._executor is executor:
+                        self._executor = self._new_executor()
+                except Exception as e:
+                    file.error = f"{type(e).__name__}: {e}"
+                finally:
+                    file.seconds += time.monotonic() - start
+
+            if file.attempts > self.retries:
+                file.status = "failed"
+                print(f"Failed to load {file.path} after {file.attempts} attempts: {file.error}")
+                return
+            delay = self.retry_delay * 2 ** (file.attempts - 1)
+            file.status = "retrying"
+            print(f"Loading {file.path} failed ({file.error}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    def _read_messages(self, loop: asyncio.AbstractEventLoop):
+        """Pass the workers' messages to the event loop, until the None that ends them."""
+        while True:
+            message = self._messages.get()
+            if message is None:
+                return
+            loop.call_soon_threadsafe(self._handle_message, message)
+
+    def _handle_message(self, message):
+        if message[0] == "embedded":
+            self.embedded += message[1]
+        elif message[0] == "write":
+            task = asyncio.create_task(self._write(*message[1:]))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, operation: str, args, replies):
+        """Make a write for a worker, and send it the result."""
+        async with self._write_slots:
+            try:
+                if operation == "upload":
+                    value = await upload_documents(*args)
+                    self.uploaded += value
+                elif operation == "delete_replaced":
+                    value = await delete_replaced_documents(*args)
+                    self.deleted += value
+                else:
+                    value = await delete_documents_by_ids(*args)
+                    self.deleted += value
+                reply = ("ok", value)
+            except NotImplementedError as e:
+                # Raised again in the worker, where db_load handles it
+                reply = ("unsupported", str(e))
+            except Exception as e:
+                self.failed_writes += 1
+                reply = ("error", f"{type(e).__name__}: {e}")
+        await asyncio.to_thread(replies.put, reply)
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self._print_progress()
+
+    def _print_progress(self):
+        elapsed = time.monotonic() - self._started
+        counts = {status: sum(1 for f in self.files if f.status == status)
+                  for status in ("done", "failed", "running", "retrying")}
+        print(f"Files: {counts['done']}/{len(self.files)} done, {counts['running']} running, "
+              f"{counts['retrying']} retrying, {counts['failed']} failed | "
+              f"Embedded: {self.embedded} ({self.embedded / elapsed:.1f}/s) | "
+              f"Uploaded: {self.uploaded} ({self.uploaded / elapsed:.1f}/s) | "
+              f"Elapsed: {elapsed:.0f}s", flush=True)
+
+    def summary(self, started_at: str) -> Dict[str, Any]:
+        """A machine-readable report of the run and of each file."""
+        elapsed = time.monotonic() - self._started
+        return {
+            "started_at": started_at,
+            "elapsed_seconds": round(elapsed, 3),
+            "settings": {**self.options, "workers": self.workers, "embed_rate": self.embed_rate,
+                         "write_concurrency": self.write_concurrency, "retries": self.retries,
+                         "stub_embeddings": self.stub_dimensions},
+            "totals": {
+                "files": len(self.files),
+                "succeeded": sum(1 for f in self.files if f.status == "done"),
+                "failed": sum(1 for f in self.files if f.status == "failed"),
+                "documents": sum(f.documents for f in self.files),
+                "embedded": self.embedded,
+                "uploaded": self.uploaded,
+                "deleted": self.deleted,
+                "failed_writes": self.failed_writes,
+                "embedded_per_second": round(self.embedded / elapsed, 2),
+                "uploaded_per_second": round(self.uploaded / elapsed, 2),
+            },
+            "files": [asdict(f) for f in self.files],
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load many files into the vector database in parallel")
+    parser.add_argument("paths", nargs="+", help="Files, or directories of files, to load")
+    parser.add_argument("--pattern", default="*.txt", help="Files to load from directories (default: *.txt)")
+    parser.add_argument("--site", help="Site to load all files into (default: each file's name without its extension)")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes (default: 4)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents embedded and uploaded per batch (default: 100)")
+    parser.add_argument("--embed-rate", type=float, default=None,
+                        help="Texts embedded per second, across all workers (default: unlimited)")
+    parser.add_argument("--write-concurrency", type=int, default=2,
+                        help="Database writes in flight at once, across all workers (default: 2)")
+    parser.add_argument("--retries", type=int, default=2, help="Times a failed file is loaded again (default: 2)")
+    parser.add_argument("--retry-delay", type=float, default=5.0,
+                        help="Seconds before the first retry of a file, doubling with each retry (default: 5)")
+    parser.add_argument("--database", help="Database endpoint to load into (default: write_endpoint from config_retrieval.yaml)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed and upload documents that changed since each file was last loaded incrementally")
+    parser.add_argument("--force-recompute", action="store_true",
+                        help="Compute embeddings even for files that have a file with embeddings")
+    parser.add_argument("--stub-embeddings", type=int, metavar="DIM",
+                        help="Use hash-based vectors of DIM dimensions instead of the embedding provider")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress reports (default: 5)")
+    parser.add_argument("--summary", help="File to write the JSON summary to")
+    parser.add_argument("--verbose", action="store_true", help="Show db_load's output for each file")
+    args = parser.parse_args()
+
+    if args.database:
+        if args.database not in CONFIG.retrieval_endpoints:
+            parser.error(f"Database endpoint '{args.database}' not found in configuration. "
+                         f"Available options: {', '.join(CONFIG.retrieval_endpoints.keys())}")
+        # Uploads go to the write endpoint
+        CONFIG.write_endpoint = args.database
+
+    files = IngestionOrchestrator.find_files(args.paths, args.pattern, args.site)
+    if not files:
+        print("No files to load")
+        return 0
+    print(f"Loading {len(files)} files with {args.workers} workers")
+
+    orchestrator = IngestionOrchestrator(
+        files, workers=args.workers, batch_size=args.batch_size, embed_rate=args.embed_rate,
+        write_concurrency=args.write_concurrency, retries=args.retries, retry_delay=args.retry_delay,
+        database=args.database, incremental=args.incremental, force_recompute=args.force_recompute,
+        stub_dimensions=args.stub_embeddings, progress_interval=args.progress_interval, verbose=args.verbose,
+    )
+    summary = await orchestrator.run()
+    totals = summary["totals"]
+    print(f"Loaded {totals['succeeded']} of {totals['files']} files ({totals['documents']} documents) "
+          f"in {summary['elapsed_seconds']:.1f}s, {totals['failed']} failed")
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Wrote summary to {args.summary}")
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
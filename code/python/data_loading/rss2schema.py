@@ -5,12 +5,14 @@
 RSS to Schema.org converter
 Transforms RSS/Atom feeds into Schema.org JSON format.
 From the oldest to the newer to the latest.
+Feeds are parsed incrementally, so large feeds can be converted in bounded memory.
 """
 
+import gzip
 import xml.etree.ElementTree as ET
 import re
 import traceback
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import BinaryIO, Iterator, List, Dict, Any, Optional, Tuple, Union
 from urllib.parse import urlparse
 import json
 import os
@@ -225,25 +227,17 @@ def extract_best_url(item: ET.Element, feed_url: Optional[str] = None) -> Option
     # Return the first (best) candidate
     return candidates[0]
 
-def parse_rss_2_0(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict[str, Any]]:
+def _rss_series(channel: ET.Element, feed_url: Optional[str] = None) -> Dict[str, Any]:
     """
-    Parse an RSS 2.0 feed into Schema.org format.
+    Build the PodcastSeries of an RSS 2.0 channel.
     
     Args:
-        root: XML root element
+        channel: The channel element
         feed_url: URL of the feed
         
     Returns:
-        List of Schema.org formatted items
+        Schema.org PodcastSeries
     """
-    result = []
-    
-    # Get channel element
-    channel = root.find('channel')
-    if channel is None:
-        print("Warning: No channel element found in RSS feed")
-        return result
-    
     # Extract podcast (feed) information
     podcast_title = safe_get_text(channel.find('title'))
     podcast_description = safe_get_text(channel.find('description'))
@@ -279,124 +273,161 @@ def parse_rss_2_0(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict
     if podcast_language:
         podcast_series["inLanguage"] = podcast_language
     
-    # Process each item (episode)
-    for item in channel.findall('item'):
-        try:
-            # Basic fields
-            title = safe_get_text(item.find('title'))
-            description = safe_get_text(item.find('description'))
-            pub_date = safe_get_text(item.find('pubDate'))
-            
-            # URL (critical field)
-            url = extract_best_url(item, feed_url)
-            
-            if not url and not title:
-                # Skip items without any identifiable information
-                continue
-            
-            # Create episode schema
-            episode = {
-                "@type": "PodcastEpisode",
-                "name": title,
-                "description": description,
-                "datePublished": pub_date
+    return podcast_series
+
+def _rss_episode(item: ET.Element, podcast_series: Dict[str, Any], feed_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Convert an RSS 2.0 item into a PodcastEpisode.
+    
+    Args:
+        item: The item element
+        podcast_series: PodcastSeries of the item's channel
+        feed_url: URL of the feed
+        
+    Returns:
+        Schema.org PodcastEpisode, or None for items without a URL or title
+    """
+    # Basic fields
+    title = safe_get_text(item.find('title'))
+    description = safe_get_text(item.find('description'))
+    pub_date = safe_get_text(item.find('pubDate'))
+    
+    # URL (critical field)
+    url = extract_best_url(item, feed_url)
+    
+    if not url and not title:
+        # Skip items without any identifiable information
+        return None
+    
+    # Create episode schema
+    episode = {
+        "@type": "PodcastEpisode",
+        "name": title,
+        "description": description,
+        "datePublished": pub_date
+    }
+    
+    if url:
+        episode["url"] = url
+    
+    # Add GUID if available
+    guid = extract_guid(item)
+    if guid and guid != url:
+        episode["identifier"] = guid
+    
+    # Add enclosure (audio file)
+    enclosure = item.find('enclosure')
+    if enclosure is not None:
+        enclosure_url = enclosure.get('url')
+        enclosure_type = enclosure.get('type')
+        enclosure_length = enclosure.get('length')
+        
+        if enclosure_url:
+            audio_object = {
+                "@type": "AudioObject",
+                "contentUrl": fix_url(enclosure_url)
             }
             
-            if url:
-                episode["url"] = url
-            
-            # Add GUID if available
-            guid = extract_guid(item)
-            if guid and guid != url:
-                episode["identifier"] = guid
-            
-            # Add enclosure (audio file)
-            enclosure = item.find('enclosure')
-            if enclosure is not None:
-                enclosure_url = enclosure.get('url')
-                enclosure_type = enclosure.get('type')
-                enclosure_length = enclosure.get('length')
-                
-                if enclosure_url:
-                    audio_object = {
-                        "@type": "AudioObject",
-                        "contentUrl": fix_url(enclosure_url)
-                    }
-                    
-                    if enclosure_type:
-                        audio_object["encodingFormat"] = enclosure_type
-                    
-                    if enclosure_length:
-                        try:
-                            audio_object["contentSize"] = int(enclosure_length)
-                        except ValueError:
-                            pass
-                    
-                    episode["associatedMedia"] = audio_object
+            if enclosure_type:
+                audio_object["encodingFormat"] = enclosure_type
             
-            # Add iTunes specific fields
-            for ns_prefix, ns_uri in NAMESPACES.items():
-                if ns_prefix == 'itunes':
-                    # Duration
-                    duration_elem = item.find(f".//{{{ns_uri}}}duration")
-                    if duration_elem is not None and duration_elem.text:
-                        duration = extract_duration(duration_elem.text)
-                        if duration:
-                            episode["duration"] = duration
-                    
-                    # Episode number
-                    episode_number = item.find(f".//{{{ns_uri}}}episode")
-                    if episode_number is not None and episode_number.text:
-                        try:
-                            episode["episodeNumber"] = int(episode_number.text)
-                        except ValueError:
-                            pass
-                    
-                    # Season number
-                    season_number = item.find(f".//{{{ns_uri}}}season")
-                    if season_number is not None and season_number.text:
-                        try:
-                            episode["partOfSeason"] = {
-                                "@type": "PodcastSeason",
-                                "seasonNumber": int(season_number.text)
-                            }
-                        except ValueError:
-                            pass
+            if enclosure_length:
+                try:
+                    audio_object["contentSize"] = int(enclosure_length)
+                except ValueError:
+                    pass
             
-            # Add image if available
-            for ns_prefix, ns_uri in NAMESPACES.items():
-                if ns_prefix == 'itunes':
-                    itunes_image = item.find(f".//{{{ns_uri}}}image")
-                    if itunes_image is not None and 'href' in itunes_image.attrib:
-                        episode["image"] = {
-                            "@type": "ImageObject",
-                            "url": fix_url(itunes_image.get('href'))
-                        }
+            episode["associatedMedia"] = audio_object
+    
+    # Add iTunes specific fields
+    for ns_prefix, ns_uri in NAMESPACES.items():
+        if ns_prefix == 'itunes':
+            # Duration
+            duration_elem = item.find(f".//{{{ns_uri}}}duration")
+            if duration_elem is not None and duration_elem.text:
+                duration = extract_duration(duration_elem.text)
+                if duration:
+                    episode["duration"] = duration
             
-            # Add podcast series reference
-            episode["partOf"] = podcast_series
+            # Episode number
+            episode_number = item.find(f".//{{{ns_uri}}}episode")
+            if episode_number is not None and episode_number.text:
+                try:
+                    episode["episodeNumber"] = int(episode_number.text)
+                except ValueError:
+                    pass
             
-            # Add to result
-            result.append(episode)
+            # Season number
+            season_number = item.find(f".//{{{ns_uri}}}season")
+            if season_number is not None and season_number.text:
+                try:
+                    episode["partOfSeason"] = {
+                        "@type": "PodcastSeason",
+                        "seasonNumber": int(season_number.text)
+                    }
+                except ValueError:
+                    pass
+    
+    # Add image if available
+    for ns_prefix, ns_uri in NAMESPACES.items():
+        if ns_prefix == 'itunes':
+            itunes_image = item.find(f".//{{{ns_uri}}}image")
+            if itunes_image is not None and 'href' in itunes_image.attrib:
+                episode["image"] = {
+                    "@type": "ImageObject",
+                    "url": fix_url(itunes_image.get('href'))
+                }
+    
+    # Add podcast series reference
+    episode["partOf"] = podcast_series
+    
+    return episode
+
+def parse_rss_2_0(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse an RSS 2.0 feed into Schema.org format.
+    
+    Args:
+        root: XML root element
+        feed_url: URL of the feed
+        
+    Returns:
+        List of Schema.org formatted items
+    """
+    result = []
+    
+    # Get channel element
+    channel = root.find('channel')
+    if channel is None:
+        print("Warning: No channel element found in RSS feed")
+        return result
+    
+    podcast_series = _rss_series(channel, feed_url)
+    
+    # Process each item (episode)
+    for item in channel.findall('item'):
+        try:
+            episode = _rss_episode(item, podcast_series, feed_url)
+            if episode:
+                result.append(episode)
         except Exception as e:
             print(f"Error processing RSS item: {str(e)}")
             traceback.print_exc()
     
     return result
 
-def parse_atom(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict[str, Any]]:
+def _atom_series(root: ET.Element, feed_url: Optional[str] = None) -> Dict[str, Any]:
     """
-    Parse an Atom feed into Schema.org format.
+    Build the PodcastSeries of an Atom feed.
     
     Args:
-        root: XML root element
+        root: The feed element
         feed_url: URL of the feed
         
     Returns:
-        List of Schema.org formatted items
+        Schema.org PodcastSeries
     """
-    result = []
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
+    ns = {"atom": NAMESPACES['atom']}
     
     # Extract feed information
     feed_title = safe_get_text(root.find('atom:title', ns))
@@ -415,140 +446,212 @@ def parse_atom(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict[st
     feed_link = fix_url(feed_link or "")
     
     # Create podcast series schema
-    podcast_series = {
+    return {
         "@type": "PodcastSeries",
         "name": feed_title,
         "description": feed_subtitle,
         "url": feed_link
     }
+
+def _atom_episode(entry: ET.Element, podcast_series: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert an Atom entry into a PodcastEpisode.
+    
+    Args:
+        entry: The entry element
+        podcast_series: PodcastSeries of the feed
+        
+    Returns:
+        Schema.org PodcastEpisode, or None for entries without a URL or title
+    """
+    ns = {"atom": NAMESPACES['atom']}
+    
+    # Basic fields
+    title = safe_get_text(entry.find('atom:title', ns))
+    summary = safe_get_text(entry.find('atom:summary', ns))
+    published = safe_get_text(entry.find('atom:published', ns))
+    updated = safe_get_text(entry.find('atom:updated', ns))
+    
+    # Extract link (URL)
+    entry_url = None
+    for link in entry.findall('atom:link', ns):
+        rel = link.get('rel', 'alternate')
+        if rel == 'alternate':
+            entry_url = link.get('href')
+            break
+    
+    if not entry_url:
+        # Try any link
+        for link in entry.findall('atom:link', ns):
+            if 'href' in link.attrib:
+                entry_url = link.get('href')
+                break
+    
+    entry_url = fix_url(entry_url or "")
+    
+    if not entry_url and not title:
+        # Skip entries without any identifiable information
+        return None
+    
+    # Create episode schema
+    episode = {
+        "@type": "PodcastEpisode",
+        "name": title,
+        "description": summary,
+        "datePublished": published or updated
+    }
+    
+    if entry_url:
+        episode["url"] = entry_url
+    
+    # Add ID if available
+    entry_id = safe_get_text(entry.find('atom:id', ns))
+    if entry_id and entry_id != entry_url:
+        episode["identifier"] = entry_id
+    
+    # Extract media enclosures
+    for link in entry.findall('atom:link', ns):
+        rel = link.get('rel', '')
+        if rel == 'enclosure' or link.get('type', '').startswith('audio/'):
+            href = link.get('href')
+            if href:
+                audio_object = {
+                    "@type": "AudioObject",
+                    "contentUrl": fix_url(href)
+                }
+                
+                mime_type = link.get('type')
+                if mime_type:
+                    audio_object["encodingFormat"] = mime_type
+                
+                length = link.get('length')
+                if length:
+                    try:
+                        audio_object["contentSize"] = int(length)
+                    except ValueError:
+                        pass
+                
+                episode["associatedMedia"] = audio_object
+                break
+    
+    # Add podcast series reference
+    episode["partOf"] = podcast_series
+    
+    return episode
+
+def parse_atom(root: ET.Element, feed_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse an Atom feed into Schema.org format.
+    
+    Args:
+        root: XML root element
+        feed_url: URL of the feed
+        
+    Returns:
+        List of Schema.org formatted items
+    """
+    result = []
+    podcast_series = _atom_series(root, feed_url)
     
     # Process each entry
-    for entry in root.findall('atom:entry', ns):
+    for entry in root.findall('atom:entry', {"atom": NAMESPACES['atom']}):
         try:
-            # Basic fields
-            title = safe_get_text(entry.find('atom:title', ns))
-            summary = safe_get_text(entry.find('atom:summary', ns))
-            published = safe_get_text(entry.find('atom:published', ns))
-            updated = safe_get_text(entry.find('atom:updated', ns))
-            
-            # Extract link (URL)
-            entry_url = None
-            for link in entry.findall('atom:link', ns):
-                rel = link.get('rel', 'alternate')
-                if rel == 'alternate':
-                    entry_url = link.get('href')
-                    break
-            
-            if not entry_url:
-                # Try any link
-                for link in entry.findall('atom:link', ns):
-                    if 'href' in link.attrib:
-                        entry_url = link.get('href')
-                        break
-            
-            entry_url = fix_url(entry_url or "")
-            
-            if not entry_url and not title:
-                # Skip entries without any identifiable information
-                continue
-            
-            # Create episode schema
-            episode = {
-                "@type": "PodcastEpisode",
-                "name": title,
-                "description": summary,
-                "datePublished": published or updated
-            }
-            
-            if entry_url:
-                episode["url"] = entry_url
-            
-            # Add ID if available
-            entry_id = safe_get_text(entry.find('atom:id', ns))
-            if entry_id and entry_id != entry_url:
-                episode["identifier"] = entry_id
-            
-            # Extract media enclosures
-            for link in entry.findall('atom:link', ns):
-                rel = link.get('rel', '')
-                if rel == 'enclosure' or link.get('type', '').startswith('audio/'):
-                    href = link.get('href')
-                    if href:
-                        audio_object = {
-                            "@type": "AudioObject",
-                            "contentUrl": fix_url(href)
-                        }
-                        
-                        mime_type = link.get('type')
-                        if mime_type:
-                            audio_object["encodingFormat"] = mime_type
-                        
-                        length = link.get('length')
-                        if length:
-                            try:
-                                audio_object["contentSize"] = int(length)
-                            except ValueError:
-                                pass
-                        
-                        episode["associatedMedia"] = audio_object
-                        break
-            
-            # Add podcast series reference
-            episode["partOf"] = podcast_series
-            
-            # Add to result
-            result.append(episode)
+            episode = _atom_episode(entry, podcast_series)
+            if episode:
+                result.append(episode)
         except Exception as e:
             print(f"Error processing Atom entry: {str(e)}")
             traceback.print_exc()
     
     return result
 
-def feed_to_schema(feed_path: str) -> List[Dict[str, Any]]:
+def _open_feed(feed_path: str) -> BinaryIO:
     """
-    Convert an RSS/Atom feed to Schema.org format.
+    Open a feed file for reading, decompressing it if it is gzipped.
+    """
+    f = open(feed_path, 'rb')
+    if f.read(2) == b'\x1f\x8b':
+        f.seek(0)
+        return gzip.GzipFile(fileobj=f)
+    f.seek(0)
+    return f
+
+def iter_feed_to_schema(feed_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Convert an RSS/Atom feed to Schema.org format, yielding each item as soon as it is parsed.
+    
+    The feed is read incrementally, and each item is dropped once converted, so memory use
+    doesn't grow with the size of the feed. The feed's own details (title, image, ...) are
+    taken from the elements before its first item, where feeds put them.
     
     Args:
-        feed_path: Path to the feed file
+        feed_path: Path to the feed file, which may be gzipped
         
-    Returns:
-        List of Schema.org formatted items
+    Yields:
+        Schema.org formatted items
     """
+    # Determine feed URL (for generating proper URLs if needed)
+    feed_url = None
+    if feed_path.startswith(('http://', 'https://')):
+        feed_url = feed_path
+    
     try:
-        # Determine feed URL (for generating proper URLs if needed)
-        feed_url = None
-        if feed_path.startswith(('http://', 'https://')):
-            feed_url = feed_path
-        
-        # Parse the XML
-        tree = ET.parse(feed_path)
-        root = tree.getroot()
-        
-        # Determine feed type
-        if root.tag == 'rss':
-            # RSS 2.0
-            return parse_rss_2_0(root, feed_url)
-        elif root.tag.endswith('feed'):
-            # Atom
-            return parse_atom(root, feed_url)
-        elif root.tag == 'RDF':
-            # RSS 1.0 (RDF) - not fully supported, use the channel as a fallback
-            channel = root.find('channel')
-            if channel is not None:
-                return parse_rss_2_0(root, feed_url)
-        
-        # Unknown format, try to look for channel element anyway
-        channel = root.find('channel')
-        if channel is not None:
-            return parse_rss_2_0(root, feed_url)
-        
-        print(f"Unsupported feed format: {root.tag}")
-        return []
+        with _open_feed(feed_path) as source:
+            events = ET.iterparse(source, events=('start', 'end'))
+            _, root = next(events)
+            is_atom = root.tag.endswith('feed')
+            item_tag = f"{{{NAMESPACES['atom']}}}entry" if is_atom else 'item'
+            # The element holding the items: the Atom feed, or the RSS channel once it starts
+            container = root if is_atom else None
+            podcast_series = None
+            path = [root]
+            
+            for event, elem in events:
+                if event == 'start':
+                    parent = path[-1]
+                    path.append(elem)
+                    if elem.tag == 'channel' and parent is root and container is None:
+                        container = elem
+                    elif elem.tag == item_tag and parent is container and podcast_series is None:
+                        # Everything before the first item describes the feed
+                        podcast_series = _atom_series(root, feed_url) if is_atom else _rss_series(container, feed_url)
+                    continue
+                
+                path.pop()
+                if elem.tag != item_tag or path[-1] is not container:
+                    continue
+                try:
+                    episode = _atom_episode(elem, podcast_series) if is_atom else _rss_episode(elem, podcast_series, feed_url)
+                except Exception as e:
+                    print(f"Error processing {'Atom entry' if is_atom else 'RSS item'}: {str(e)}")
+                    traceback.print_exc()
+                    episode = None
+                # Drop the item's subtree before handing the episode on
+                container.remove(elem)
+                if episode:
+                    yield episode
+            
+            if container is None:
+                if root.tag == 'rss':
+                    print("Warning: No channel element found in RSS feed")
+                else:
+                    print(f"Unsupported feed format: {root.tag}")
     
     except Exception as e:
         print(f"Error converting feed to schema: {str(e)}")
         traceback.print_exc()
-        return []
+
+def feed_to_schema(feed_path: str) -> List[Dict[str, Any]]:
+    """
+    Convert an RSS/Atom feed to Schema.org format.
+    
+    Args:
+        feed_path: Path to the feed file
+        
+    Returns:
+        List of Schema.org formatted items
+    """
+    return list(iter_feed_to_schema(feed_path))
 
 def main():
     """Command-line interface for testing."""
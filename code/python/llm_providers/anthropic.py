@@ -19,7 +19,7 @@ from anthropic import AsyncAnthropic
 from core.config import CONFIG
 import threading
 
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +56,7 @@ class AnthropicProvider(LLMProvider):
         with cls._client_lock:  # Thread-safe client initialization
             if cls._client is None:
                 api_key = cls.get_api_key()
-                cls._client = AsyncAnthropic(api_key=api_key)
+                cls._client = AsyncAnthropic(api_key=api_key, http_client=create_pooled_http_client())
         return cls._client
 
     @classmethod
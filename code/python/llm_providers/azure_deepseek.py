@@ -18,7 +18,7 @@ import threading
 import re
 from typing import Dict, Any, Optional
 
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 from misc.logger.logging_config_helper import get_configured_logger
 logger = get_configured_logger("deepseek_azure")
 
@@ -89,7 +89,8 @@ class DeepSeekAzureProvider(LLMProvider):
                         azure_endpoint=endpoint,
                         api_key=api_key,
                         api_version=api_version,
-                        timeout=30.0
+                        timeout=30.0,
+                        http_client=create_pooled_http_client()
                     )
                     logger.info("DeepSeek Azure client initialized successfully")
                 except Exception as e:
@@ -15,7 +15,7 @@ import asyncio
 import threading
 from typing import Dict, Any, Optional
 
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("azure_oai")
 
@@ -91,7 +91,8 @@ class AzureOpenAIProvider(LLMProvider):
                         azure_endpoint=endpoint,
                         api_key=api_key,
                         api_version=api_version,
-                        timeout=30.0  # Set timeout explicitly
+                        timeout=30.0,  # Set timeout explicitly
+                        http_client=create_pooled_http_client()
                     )
                     logger.debug("Azure OpenAI client initialized successfully")
                 except Exception as e:
@@ -226,6 +227,61 @@ class AzureOpenAIProvider(LLMProvider):
             logger.error(f"Azure OpenAI completion failed: {type(e).__name__}: {str(e)}")
             raise
 
+    async def stream_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 8.0,
+        high_tier: bool = False,
+        **kwargs
+    ):
+        """
+        Stream a completion from Azure OpenAI, yielding content deltas as they arrive.
+        
+        Args:
+            prompt: The prompt to send to the model
+            schema: JSON schema for the expected response
+            model: Specific model to use (overrides configuration)
+            temperature: Model temperature
+            max_tokens: Maximum tokens in the generated response
+            timeout: Timeout in seconds for the stream to start
+            high_tier: Whether to use the high-tier model from config
+            **kwargs: Additional provider-specific arguments
+            
+        Yields:
+            Chunks of the response text
+        """
+        model_to_use = model if model else self.get_model_from_config(high_tier)
+        
+        client = self.get_client()
+        system_prompt = f"""Provide a response that matches this JSON schema: {json.dumps(schema)}"""
+        
+        logger.debug(f"Sending streaming completion request to Azure OpenAI with model: {model_to_use}")
+        
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=0.1,
+                stream=True,
+                presence_penalty=0.0,
+                frequency_penalty=0.0,
+                model=model_to_use
+            ),
+            timeout=timeout
+        )
+        async for chunk in stream:
+            # Azure sends an initial chunk with content filter results and no choices
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 
 # Create a singleton instance
 provider = AzureOpenAIProvider()
@@ -9,15 +9,15 @@ Backwards compatibility is not guaranteed at this time.
 """
 
 import os
-import requests
 import json
 import re
-import aiohttp
 import asyncio
 import threading
 from typing import Dict, Any, Optional
 
-from llm_providers.llm_provider import LLMProvider
+import httpx
+
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 
 
 class ConfigurationError(RuntimeError):
@@ -35,6 +35,9 @@ class InceptionProvider(LLMProvider):
     
     API_URL = "https://api.inceptionlabs.ai/v1/chat/completions"  # Mercury chat endpoint
 
+    _client_lock = threading.Lock()
+    _client = None
+
     @classmethod
     def get_api_key(cls) -> str:
         """Get API key from environment variables."""
@@ -44,12 +47,14 @@ class InceptionProvider(LLMProvider):
         return key
 
     @classmethod
-    def get_client(cls):
+    def get_client(cls) -> httpx.AsyncClient:
         """
-        Inception uses direct HTTP calls, so there's no persistent client.
-        This method is implemented to satisfy the interface but returns None.
+        Inception uses direct HTTP calls; return the pooled HTTP client they share.
         """
-        return None
+        with cls._client_lock:
+            if cls._client is None:
+                cls._client = create_pooled_http_client()
+        return cls._client
 
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
@@ -115,21 +120,20 @@ class InceptionProvider(LLMProvider):
             payload["diffusing"] = True
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.API_URL, 
-                    headers=HEADERS, 
-                    json=payload, 
-                    timeout=timeout
-                ) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    content = data["choices"][0]["message"]["content"]
-                    
-                    # If schema was provided, parse the response as JSON
-                    if schema:
-                        return self.clean_response(content)
-                    return content
+            resp = await self.get_client().post(
+                self.API_URL, 
+                headers=HEADERS, 
+                json=payload, 
+                timeout=timeout
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            content = data["choices"][0]["message"]["content"]
+            
+            # If schema was provided, parse the response as JSON
+            if schema:
+                return self.clean_response(content)
+            return content
         except Exception as e:
             # Log the error and return empty response
             import logging
@@ -4,11 +4,100 @@
 """
 Abstract base class for LLM providers.
 
-This module defines the interface that all LLM providers must implement.
+This module defines the interface that all LLM providers must implement,
+and the shared lifecycle of their HTTP clients: connection pools sized from the
+`connection_pool` settings in config_llm.yaml, created once per provider and
+closed explicitly on server shutdown.
 """
 
+import asyncio
+import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, List
+
+import httpx
+
+from core.config import CONFIG, LLMConnectionPoolConfig
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_provider")
+
+# Pooled HTTP clients handed out to providers, closed by close_pooled_http_clients()
+_pooled_http_clients: List[httpx.AsyncClient] = []
+_pooled_http_clients_lock = threading.Lock()
+
+
+def _pool_config() -> LLMConnectionPoolConfig:
+    return getattr(CONFIG, "llm_connection_pool", None) or LLMConnectionPoolConfig()
+
+
+def pooled_client_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for an httpx client with the configured pool size, keep-alive and HTTP/2.
+    Useful for SDKs that build their own httpx client from extra keyword arguments.
+    """
+    pool = _pool_config()
+    http2 = pool.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 is enabled for LLM providers but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=pool.max_connections,
+            max_keepalive_connections=pool.max_keepalive_connections,
+            keepalive_expiry=pool.keepalive_expiry,
+        ),
+        "http2": http2,
+    }
+
+
+def create_pooled_http_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Create a pooled httpx.AsyncClient for a provider. The client is tracked so that
+    close_pooled_http_clients() can release its connections on shutdown.
+    
+    Args:
+        **kwargs: Additional httpx.AsyncClient arguments (base_url, headers, timeout, ...)
+        
+    Returns:
+        The pooled client
+    """
+    options = pooled_client_options()
+    options.setdefault("timeout", httpx.Timeout(60.0, connect=_pool_config().connect_timeout))
+    options.update(kwargs)
+    client = httpx.AsyncClient(**options)
+    with _pooled_http_clients_lock:
+        _pooled_http_clients.append(client)
+    return client
+
+
+async def close_client(client: Any):
+    """Close an SDK or HTTP client, whichever of aclose()/close() it offers."""
+    close = getattr(client, "aclose", None) or getattr(client, "close", None)
+    if close is None:
+        # Some SDK clients (e.g. older ollama releases) only wrap an httpx client
+        inner = getattr(client, "_client", None)
+        if isinstance(inner, httpx.AsyncClient):
+            await inner.aclose()
+        return
+    result = close()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def close_pooled_http_clients():
+    """Close every pooled HTTP client created by create_pooled_http_client()."""
+    with _pooled_http_clients_lock:
+        clients = list(_pooled_http_clients)
+        _pooled_http_clients.clear()
+    for client in clients:
+        if not client.is_closed:
+            await client.aclose()
+
 
 class LLMProvider(ABC):
     """
@@ -50,6 +139,57 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def stream_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Send a completion request and yield the raw response text as it is generated.
+        
+        Providers that support streaming override this. The default implementation waits
+        for get_completion and yields the whole parsed response as a single JSON chunk,
+        so callers can always consume the output incrementally.
+        
+        Args:
+            prompt: The text prompt to send to the LLM
+            schema: JSON schema that the response should conform to
+            model: The specific model to use (if None, use default from config)
+            temperature: Controls randomness of the output (0-1)
+            max_tokens: Maximum tokens in the generated response
+            timeout: Timeout in seconds for the request to start producing output
+            **kwargs: Additional provider-specific arguments
+            
+        Yields:
+            Chunks of the response text
+        """
+        result = await self.get_completion(
+            prompt, schema, model=model, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout, **kwargs
+        )
+        if result:
+            yield json.dumps(result)
+    
+    async def close(self):
+        """
+        Close this provider's client and release its pooled connections.
+        The next get_client() call creates a fresh client.
+        """
+        cls = type(self)
+        client = getattr(cls, "_client", None)
+        if client is None:
+            return
+        cls._client = None
+        try:
+            await close_client(client)
+        except Exception as e:
+            logger.warning(f"Error closing {cls.__name__} client: {e}")
+    
     @classmethod
     @abstractmethod
     def get_client(cls):
@@ -16,7 +16,7 @@ import threading
 import re
 from typing import Dict, Any, Optional
 
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, pooled_client_options
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 
 
@@ -58,7 +58,8 @@ class OllamaProvider(LLMProvider):
                     raise ValueError(error_msg)
 
                 try:
-                    cls._client = AsyncClient(host=endpoint)
+                    # Extra keyword arguments are passed through to the underlying httpx client
+                    cls._client = AsyncClient(host=endpoint, **pooled_client_options())
                     logger.info("Ollama client initialized successfully")
                 except Exception as e:
                     logger.error("Failed to initialize Ollama client")
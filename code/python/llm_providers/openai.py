@@ -22,7 +22,7 @@ from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
 
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("llm")
@@ -60,7 +60,7 @@ class OpenAIProvider(LLMProvider):
         with cls._client_lock:  # Thread-safe client initialization
             if cls._client is None:
                 api_key = cls.get_api_key()
-                cls._client = AsyncOpenAI(api_key=api_key)
+                cls._client = AsyncOpenAI(api_key=api_key, http_client=create_pooled_http_client())
         return cls._client
 
     @classmethod
@@ -133,6 +133,40 @@ class OpenAIProvider(LLMProvider):
             logger.error(f"Error processing OpenAI response: {e}")
             return {}
 
+    async def stream_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ):
+        """
+        Send an async streaming chat completion request and yield content deltas.
+        """
+        if model is None:
+            provider_config = CONFIG.llm_endpoints["openai"]
+            model = provider_config.models.high
+        
+        client = self.get_client()
+        messages = self._build_messages(prompt, schema)
+
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            ),
+            timeout
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 
 
 # Create a singleton instance
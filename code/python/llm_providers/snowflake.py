@@ -16,11 +16,12 @@ Backwards compatibility is not guaranteed at this time.
 import json
 import re
 import logging
+import threading
 import httpx
 from typing import Dict, Any, List, Optional
 
 from core.config import CONFIG
-from llm_providers.llm_provider import LLMProvider
+from llm_providers.llm_provider import LLMProvider, create_pooled_http_client
 from core.utils import snowflake
 
 logger = logging.getLogger(__name__)
@@ -29,10 +30,16 @@ logger = logging.getLogger(__name__)
 class SnowflakeProvider(LLMProvider):
     """Implementation of LLMProvider for Snowflake LLM REST API calls."""
 
+    _client_lock = threading.Lock()
+    _client = None
+
     @classmethod
-    def get_client(cls):
-        """No-op since no persistent client is needed."""
-        return None
+    def get_client(cls) -> httpx.AsyncClient:
+        """Return the pooled HTTP client shared by all Cortex REST calls."""
+        with cls._client_lock:
+            if cls._client is None:
+                cls._client = create_pooled_http_client()
+        return cls._client
 
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
@@ -124,24 +131,24 @@ async def cortex_complete(
 
 async def post(api: str, request: dict, timeout: float) -> dict:
     cfg = CONFIG.llm_endpoints.get("snowflake")
-    async with httpx.AsyncClient() as client:
-        response =  await client.post(
-            snowflake.get_account_url(cfg) + api,
-            json=request,
-            headers={
-                    "Authorization": f"Bearer {snowflake.get_pat(cfg)}",
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-            },
-            timeout=timeout,
-        )
-        if response.status_code == 400:
-            logger.error(f"Snowflake API error: {response.json()}")
-            return {}
-        try:
-            response.raise_for_status()
-        except Exception as e:
-            logger.error(f"Snowflake API request failed: {e}")
-            return {}
-        return response.json()
+    client = SnowflakeProvider.get_client()
+    response =  await client.post(
+        snowflake.get_account_url(cfg) + api,
+        json=request,
+        headers={
+                "Authorization": f"Bearer {snowflake.get_pat(cfg)}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+        },
+        timeout=timeout,
+    )
+    if response.status_code == 400:
+        logger.error(f"Snowflake API error: {response.json()}")
+        return {}
+    try:
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Snowflake API request failed: {e}")
+        return {}
+    return response.json()
 
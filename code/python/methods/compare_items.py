@@ -15,7 +15,7 @@ from core.prompts import PromptRunner
 from core.prompts import find_prompt, fill_prompt
 from misc.logger.logging_config_helper import get_configured_logger
 from core.utils.json_utils import trim_json
-from core.retriever import search, search_by_url
+from core.retriever import search_many, search_by_url
 from core.llm import ask_llm
 
 
@@ -50,10 +50,23 @@ class CompareItemsHandler():
                 return
 
             # Find matching items for both searches in parallel
-            # Use URL-based retrieval if URLs are provided, otherwise use vector search
+            # Use URL-based retrieval if URLs are provided, otherwise use vector search,
+            # with the items without URLs searched for in one batch
+            names_to_search = [name for name, url in ((self.item1_name, self.item1_url),
+                                                      (self.item2_name, self.item2_url)) if not url]
+            candidates = {}
+            if names_to_search:
+                logger.info(f"Searching for items: {names_to_search}")
+                results = await search_many(
+                    names_to_search,
+                    self.handler.site,
+                    num_results=20,
+                    query_params=self.handler.query_params
+                )
+                candidates = dict(zip(names_to_search, results))
             matching_tasks = [
-                self._get_item_by_url(self.item1_url, self.item1_name) if self.item1_url else self._find_matching_items(self.item1_name),
-                self._get_item_by_url(self.item2_url, self.item2_name) if self.item2_url else self._find_matching_items(self.item2_name)
+                self._get_item_by_url(self.item1_url, self.item1_name) if self.item1_url else self._find_matching_items(self.item1_name, candidates[self.item1_name]),
+                self._get_item_by_url(self.item2_url, self.item2_name) if self.item2_url else self._find_matching_items(self.item2_name, candidates[self.item2_name])
             ]
             await asyncio.gather(*matching_tasks)
 
@@ -71,16 +84,8 @@ class CompareItemsHandler():
             await self._send_no_items_found_message()
             return
     
-    async def _find_matching_items(self, item_name):
-        """Find items that match the requested item using parallel LLM calls."""
-
-        candidate_items = await search(
-            item_name, 
-            self.handler.site, 
-            num_results=20,
-            query_params=self.handler.query_params
-        )
-        logger.info(f"Searching for item: {item_name}")
+    async def _find_matching_items(self, item_name, candidate_items):
+        """Find the retrieved items that match the requested item using parallel LLM calls."""
         # Create tasks for parallel evaluation
         tasks = []
         for item in candidate_items:
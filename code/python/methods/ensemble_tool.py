@@ -1,7 +1,7 @@
 import asyncio
 import json
 from typing import List, Dict, Any, Optional
-from core.retriever import search
+from core.retriever import search_many
 from core.utils.trim import trim_json_hard
 from core.llm import ask_llm
 from core.prompts import find_prompt, fill_prompt
@@ -233,30 +233,9 @@ class EnsembleToolHandler:
                 }
             })
     
-    async def _retrieve_and_rank_for_query(self, query: str, query_idx: int, queries_count: int, query_params: Dict[str, Any], original_query: str) -> List[Dict]:
-        """Retrieve and rank results for a single query."""
+    async def _rank_and_report_query(self, results: List[tuple], query: str, query_idx: int, original_query: str) -> List[Dict]:
+        """Rank the results retrieved for a single query, and send its top results."""
         try:
-            # Execute search with appropriate limit per query
-            # Aim for ~60 total results across all queries
-            results_per_query = max(10, 60 // queries_count)
-            
-            # Get site from handler or query_params
-            site = self.handler.site if hasattr(self, 'handler') and self.handler else query_params.get('site', 'all')
-            
-            # Send intermediate message for this query
-            await self.handler.send_message({
-                "message_type": "intermediate_message",
-                "message": f"Looking for {query}"
-            })
-            
-            # Use the search abstraction from retriever.py
-            results = await search(
-                query=query,
-                site=site,
-                num_results=results_per_query,
-                query_params=query_params
-            )
-            
             # Immediately rank the results for this query
             ranked_results = await self._rank_query_results(results, original_query, query, query_idx)
             
@@ -293,13 +272,39 @@ class EnsembleToolHandler:
             return ranked_results
             
         except Exception as e:
-            logger.error(f"Error in retrieve and rank for query '{query}': {str(e)}")
+            logger.error(f"Error ranking results for query '{query}': {str(e)}")
             return []
     
     async def _execute_parallel_retrieval_and_ranking(self, queries: List[str], query_params: Dict[str, Any], original_query: str) -> List[List[Dict]]:
-        """Execute retrieval and ranking in parallel for all queries."""
-        # Execute retrieval and ranking for all queries in parallel
-        tasks = [self._retrieve_and_rank_for_query(query, idx, len(queries), query_params, original_query) for idx, query in enumerate(queries)]
+        """Retrieve results for all queries in one batch search, then rank each query's results in parallel."""
+        if not queries:
+            return []
+        
+        # Aim for ~60 total results across all queries
+        results_per_query = max(10, 60 // len(queries))
+        
+        # Get site from handler or query_params
+        site = self.handler.site if hasattr(self, 'handler') and self.handler else query_params.get('site', 'all')
+        
+        for query in queries:
+            await self.handler.send_message({
+                "message_type": "intermediate_message",
+                "message": f"Looking for {query}"
+            })
+        
+        try:
+            results_per_query_list = await search_many(
+                queries,
+                site=site,
+                num_results=results_per_query,
+                query_params=query_params
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving results for queries {queries}: {str(e)}")
+            return [[] for _ in queries]
+        
+        tasks = [self._rank_and_report_query(results, query, idx, original_query)
+                 for idx, (query, results) in enumerate(zip(queries, results_per_query_list))]
         ranked_results_per_query = await asyncio.gather(*tasks)
         
         return ranked_results_per_query
@@ -15,7 +15,8 @@ from core.llm import ask_llm
 from core.prompts import PromptRunner
 from core.retriever import search
 from core.prompts import find_prompt, fill_prompt
-from core.utils.json_utils import trim_json, trim_json_hard
+from core.utils.retrieved_item import RetrievedItem
+from core.utils.stage_graph import StageGraph
 from misc.logger.logging_config_helper import get_configured_logger
 from core.utils.utils import log
 import core.query_analysis.analyze_query as analyze_query
@@ -63,27 +64,23 @@ class GenerateAnswer(NLWebHandler):
     async def prepare(self):
         # runs the tasks that need to be done before retrieval, ranking, etc.
         logger.info("Starting preparation phase")
-        tasks = []
-        
-        # Adding all necessary preparation tasks
-        tasks.append(asyncio.create_task(analyze_query.DetectItemType(self).do()))
-        tasks.append(asyncio.create_task(self.decontextualizeQuery().do()))
-        tasks.append(asyncio.create_task(relevance_detection.RelevanceDetection(self).do()))
-        tasks.append(asyncio.create_task(memory.Memory(self).do()))
-        tasks.append(asyncio.create_task(required_info.RequiredInfo(self).do()))
+        graph = StageGraph("prepare", stop_event=self.query_done_event)
+        self.add_pre_check(graph, "DetectItemType", analyze_query.DetectItemType, abort_on_stop=True)
+        graph.add("Decon", self.decontextualizeQuery().do, abort_on_stop=True)
+        self.add_pre_check(graph, "Relevance", relevance_detection.RelevanceDetection)
+        self.add_pre_check(graph, "Memory", memory.Memory)
+        self.add_pre_check(graph, "RequiredInfo", required_info.RequiredInfo)
          
         try:
-            logger.debug(f"Running {len(tasks)} preparation tasks concurrently")
-            await asyncio.gather(*tasks, return_exceptions=True)
-        except Exception as e:
-            logger.exception(f"Error during preparation tasks: {e}")
+            await self.run_stage_graph(graph, pre_checks=list(graph.stages), raise_errors=False)
         finally:
             self.pre_checks_done_event.set()  # Signal completion regardless of errors
             self.state.set_pre_checks_done()
             
         logger.info("Preparation phase completed")
    
-    async def rankItem(self, url, json_str, name, site):
+    async def rankItem(self, item):
+        url, name, site = item.url, item.name, item.site
         if not self.connection_alive_event.is_set():
             logger.warning("Connection lost, skipping item ranking")
             return
@@ -91,7 +88,7 @@ class GenerateAnswer(NLWebHandler):
         try:
             logger.debug(f"Ranking item: {name} from {site}")
             prompt_str, ans_struc = find_prompt(site, self.item_type, self.RANKING_PROMPT_NAME)
-            description = trim_json_hard(json_str)
+            description = item.text_for_ranking()
             prompt = fill_prompt(prompt_str, self, {"item.description": description})
             logger.debug(f"Sending ranking request to LLM for item: {name}")
             ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.query_params)
@@ -101,7 +98,7 @@ class GenerateAnswer(NLWebHandler):
                 'site': site,
                 'name': name,
                 'ranking': ranking,
-                'schema_object': json.loads(json_str),
+                'schema_object': item.schema,
                 'sent': False,
             }
             
@@ -122,14 +119,15 @@ class GenerateAnswer(NLWebHandler):
             top_embeddings = await search(
                 self.decontextualized_query, 
                 self.site,
+                num_results=self.num_retrieval_results,
                 query_params=self.query_params
             )
-            self.items = top_embeddings  # Store all retrieved items
+            self.items = [RetrievedItem.from_result(item) for item in top_embeddings]  # Store all retrieved items
             logger.debug(f"Retrieved {len(top_embeddings)} items from database")
             # Rank each item
             tasks = []
-            for url, json_str, name, site in top_embeddings:
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
+            for item in self.items:
+                tasks.append(asyncio.create_task(self.rankItem(item)))
             
             
             logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
@@ -143,17 +141,23 @@ class GenerateAnswer(NLWebHandler):
             logger.exception(f"Error in get_ranked_answers: {e}")
             raise
 
-    async def getDescription(self, url, json_str, query, answer, name, site):
+    async def getDescription(self, item, query, answer):
         try:
-            logger.debug(f"Getting description for item: {name}")
+            logger.debug(f"Getting description for item: {item.name}")
             description = await PromptRunner(self).run_prompt(self.DESCRIPTION_PROMPT_NAME)
-            logger.debug(f"Got description for item: {name}")
-            return (url, name, site, description["description"], json_str)
+            logger.debug(f"Got description for item: {item.name}")
+            return (item, description["description"])
         except Exception as e:
-            logger.error(f"Error getting description for {name}: {str(e)}")
+            logger.error(f"Error getting description for {item.name}: {str(e)}")
             logger.debug("Full error trace: ", exc_info=True)
             raise
 
+    async def send_answer_delta(self, update):
+        # Stream the answer text as it is generated; the complete answer and its
+        # items still follow in "nlws" messages
+        if update.name == "answer" and update.delta and self.connection_alive_event.is_set():
+            await self.send_message({"message_type": "nlws_delta", "delta": update.delta})
+
     async def synthesizeAnswer(self): 
         if not self.connection_alive_event.is_set():
             logger.warning("Connection lost, skipping answer synthesis")
@@ -173,7 +177,8 @@ class GenerateAnswer(NLWebHandler):
                 await self.send_message(message)
                 return
                 
-            response = await PromptRunner(self).run_prompt(self.SYNTHESIZE_PROMPT_NAME, timeout=100, verbose=True)
+            response = await PromptRunner(self).run_prompt_streaming(
+                self.SYNTHESIZE_PROMPT_NAME, self.send_answer_delta, timeout=100)
             logger.debug(f"Synthesis response received")
             
             json_results = []
@@ -187,17 +192,18 @@ class GenerateAnswer(NLWebHandler):
             
             # Process each URL mentioned in the response
             if "urls" in response and response["urls"]:
+                items_by_url = {}
+                for item in self.items:
+                    items_by_url.setdefault(item.url, item)
                 for url in response["urls"]:
                     # Find the matching item in our items list
-                    matching_items = [item for item in self.items if item[0] == url]
-                    if not matching_items:
+                    item = items_by_url.get(url)
+                    if item is None:
                         logger.warning(f"URL {url} referenced in response not found in items")
                         continue
                         
-                    item = matching_items[0]
-                    (url, json_str, name, site) = item
-                    logger.debug(f"Creating description task for item: {name}")
-                    t = asyncio.create_task(self.getDescription(url, json_str, self.decontextualized_query, answer, name, site))
+                    logger.debug(f"Creating description task for item: {item.name}")
+                    t = asyncio.create_task(self.getDescription(item, self.decontextualized_query, answer))
                     description_tasks.append(t)
                     
                 if description_tasks:
@@ -209,14 +215,14 @@ class GenerateAnswer(NLWebHandler):
                             logger.error(f"Error getting description: {result}")
                             continue
                             
-                        url, name, site, description, json_str = result
-                        logger.debug(f"Adding result for {name} to final message")
+                        item, description = result
+                        logger.debug(f"Adding result for {item.name} to final message")
                         json_results.append({
-                            "url": url,
-                            "name": name,
+                            "url": item.url,
+                            "name": item.name,
                             "description": description,
-                            "site": site,
-                            "schema_object": json.loads(json_str),
+                            "site": item.site,
+                            "schema_object": item.schema,
                         })
                         
                     # Update message with descriptions
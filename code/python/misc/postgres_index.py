@@ -0,0 +1,149 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Manage the pgvector index of a PostgreSQL endpoint.
+
+The index is built with the `index` settings of the endpoint in config_retrieval.yaml:
+method (hnsw or ivfflat), hnsw_m / hnsw_ef_construct or ivfflat_lists, plus btree
+indexes on the payload_indexes columns. `tune` measures recall@k and latency of sampled
+queries for a range of ef_search (HNSW) or probes (IVFFlat) values against exact search,
+to pick search_ef / ivfflat_probes; both can also be passed per query to search().
+
+Run from the code/python directory:
+    python -m misc.postgres_index list
+    python -m misc.postgres_index create [--method hnsw|ivfflat] [--replace]
+    python -m misc.postgres_index drop <index name>
+    python -m misc.postgres_index tune [--queries 100] [--values 10,20,40,80] [--target 0.95]
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+from retrieval_providers.postgres_client import PgVectorClient
+
+DEFAULT_VALUES = {
+    "hnsw": [10, 20, 40, 80, 160, 320],
+    "ivfflat": [1, 2, 5, 10, 20, 50],
+}
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def sample_vectors(client: PgVectorClient, count: int) -> List[str]:
+    """Embeddings of random stored documents, as vector literals, to use as queries."""
+    async def _sample(conn):
+        async with conn.cursor() as cur:
+            await cur.execute(f"SELECT embedding::text FROM {client.table_name} ORDER BY random() LIMIT %s", (count,))
+            return [row[0] for row in await cur.fetchall()]
+
+    return await client._execute_with_retry(_sample)
+
+
+async def tune(client: PgVectorClient, args) -> Optional[int]:
+    """Print recall and latency for each setting, and return the smallest one that reaches the target."""
+    indexes = await client.list_vector_indexes()
+    method = indexes[0]["method"] if indexes else client.index_config.method
+    if not indexes:
+        print(f"No vector index on {client.table_name}; every setting does exact search")
+    values = [int(v) for v in args.values.split(",")] if args.values else DEFAULT_VALUES[method]
+    setting = "ef_search" if method == "hnsw" else "probes"
+    site = args.site or "all"
+
+    queries = await sample_vectors(client, args.queries)
+    if not queries:
+        print(f"Table {client.table_name} is empty")
+        return None
+
+    exact = []
+    for vector in queries:
+        results = await client.search_by_vector(vector, site, args.top_k, exact=True)
+        exact.append({result[0] for result in results})
+
+    print(f"{method} index, {len(queries)} queries, recall@{args.top_k} against exact search")
+    chosen = None
+    for value in values:
+        recalls, latencies = [], []
+        for vector, expected in zip(queries, exact):
+            start = time.perf_counter()
+            results = await client.search_by_vector(vector, site, args.top_k, **{setting: value})
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len({result[0] for result in results} & expected) / max(1, len(expected)))
+        recall = statistics.mean(recalls)
+        print(f"  {setting} {value:>4}: recall {recall:.3f}, "
+              f"p50 {percentile(latencies, 50) * 1000:.2f} ms, p95 {percentile(latencies, 95) * 1000:.2f} ms")
+        if chosen is None and recall >= args.target:
+            chosen = value
+
+    config_key = "search_ef" if method == "hnsw" else "ivfflat_probes"
+    if chosen is None:
+        print(f"No setting reached recall {args.target}; try larger values")
+    else:
+        print(f"Smallest setting with recall >= {args.target}: set index.{config_key}: {chosen}")
+    return chosen
+
+
+async def run(args) -> int:
+    client = PgVectorClient(args.endpoint)
+    try:
+        if args.command == "list":
+            indexes = await client.list_vector_indexes()
+            if not indexes:
+                print(f"No vector index on {client.table_name}")
+            for index in indexes:
+                print(f"{index['name']} ({index['method']}): {index['definition']}")
+        elif args.command == "create":
+            name = await client.create_vector_index(args.method, args.metric, replace=args.replace,
+                                                    concurrently=not args.blocking)
+            print(f"Vector index {name} is ready")
+        elif args.command == "drop":
+            await client.drop_vector_index(args.name, concurrently=not args.blocking)
+            print(f"Dropped {args.name}")
+        elif args.command == "tune":
+            await tune(client, args)
+    finally:
+        await client.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Manage the pgvector index of a PostgreSQL endpoint")
+    parser.add_argument("--endpoint", default="postgres", help="Name of the PostgreSQL endpoint to use")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List the vector indexes on the table")
+
+    create = commands.add_parser("create", help="Create the vector index with the configured settings")
+    create.add_argument("--method", choices=["hnsw", "ivfflat"], help="Index type (default: index.method)")
+    create.add_argument("--metric", default="cosine", choices=["cosine", "inner_product", "euclidean"])
+    create.add_argument("--replace", action="store_true",
+                        help="Rebuild the index and drop the table's other vector indexes once it is built")
+    create.add_argument("--blocking", action="store_true",
+                        help="Build without CONCURRENTLY: faster, but blocks writes to the table")
+
+    drop = commands.add_parser("drop", help="Drop a vector index")
+    drop.add_argument("name")
+    drop.add_argument("--blocking", action="store_true", help="Drop without CONCURRENTLY")
+
+    tune_parser = commands.add_parser("tune", help="Measure recall and latency for ef_search / probes values")
+    tune_parser.add_argument("--queries", type=int, default=100, help="Stored documents to sample as queries")
+    tune_parser.add_argument("--top-k", type=int, default=10)
+    tune_parser.add_argument("--values", help="Comma-separated ef_search / probes values to try")
+    tune_parser.add_argument("--target", type=float, default=0.95, help="Recall to reach")
+    tune_parser.add_argument("--site", help="Filter queries to one site")
+
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,11 +56,6 @@ CREATE TABLE IF NOT EXISTS documents (
     site TEXT NOT NULL,              -- Site or domain of the document
     embedding vector(1536) NOT NULL  -- Vector embedding (adjust dimension to match your model)
 );
-
--- Create a vector index for faster similarity searches
-CREATE INDEX IF NOT EXISTS embedding_cosine_idx 
-ON documents USING hnsw (embedding vector_cosine_ops) 
-WITH (m = 16, ef_construction = 200);
 """
 
 async def setup_postgres_schema(args):
@@ -109,7 +104,10 @@ async def setup_postgres_schema(args):
         
         try:
             await client._execute_with_retry(_create_schema)
-            print(f"Successfully created table '{client.table_name}' and indexes")
+            # The vector index is built with the endpoint's index settings
+            # (python -m misc.postgres_index manages it afterwards)
+            index_name = await client.create_vector_index()
+            print(f"Successfully created table '{client.table_name}' and index '{index_name}'")
         except Exception as e:
             print(f"ERROR creating schema: {e}")
             await client.close()  # Make sure to close the connection on error
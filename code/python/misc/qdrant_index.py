@@ -0,0 +1,66 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Apply the index settings of a Qdrant endpoint to its existing collections.
+
+Collections are created with the `index` settings of the endpoint in config_retrieval.yaml:
+payload_indexes, hnsw_m / hnsw_ef_construct and quantization. Changing those settings
+doesn't touch collections that already exist; `migrate` adds their missing payload indexes
+and updates their HNSW and quantization settings, which makes Qdrant rebuild the affected
+indexes in the background. `show` prints a collection's current settings. Local mode
+(database_path) has none of these settings and is left alone.
+
+Run from the code/python directory:
+    python -m misc.qdrant_index show [--collection name]
+    python -m misc.qdrant_index migrate [--collection name]
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from retrieval_providers.qdrant import QdrantVectorClient
+
+
+async def run(args) -> int:
+    client = QdrantVectorClient(args.endpoint)
+    collection = args.collection or client.default_collection_name
+    qdrant = await client._get_qdrant_client()
+    try:
+        if client._is_local():
+            print(f"Endpoint {args.endpoint} is not a reachable Qdrant server; local mode has no index settings")
+            return 1
+        if not await client.collection_exists(collection):
+            print(f"Collection {collection} does not exist")
+            return 1
+        if args.command == "show":
+            info = await qdrant.get_collection(collection)
+            print(f"Payload indexes: {', '.join(sorted(info.payload_schema or {})) or 'none'}")
+            print(f"HNSW: m={info.config.hnsw_config.m}, ef_construct={info.config.hnsw_config.ef_construct}")
+            print(f"Quantization: {info.config.quantization_config or 'none'}")
+        elif args.command == "migrate":
+            if await client.migrate_collection(collection):
+                print(f"Updated collection {collection}; Qdrant rebuilds its indexes in the background")
+            else:
+                print(f"Collection {collection} already has the configured index settings")
+    finally:
+        await qdrant.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply the index settings of a Qdrant endpoint to its collections")
+    parser.add_argument("--endpoint", default="qdrant_url", help="Name of the Qdrant endpoint to use")
+    parser.add_argument("--collection", help="Collection to use (default: the endpoint's index_name)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show", help="Show the collection's payload indexes, HNSW and quantization settings")
+    commands.add_parser("migrate", help="Apply the configured index settings to the collection")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,11 +30,15 @@ from azure.search.documents.indexes.models import (
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.utils.retrieved_item import RetrievedItem
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
 logger = get_configured_logger("azure_search_client")
 
+# Fields of every index this client creates, including those created before ranking_text was added
+BASE_FIELDS = frozenset(["id", "url", "name", "site", "schema_json", "embedding"])
+
 class AzureSearchClient:
     """
     Client for Azure AI Search operations, providing a unified interface for 
@@ -52,6 +56,7 @@ class AzureSearchClient:
         self._client_lock = threading.Lock()
         self._search_clients = {}  # Cache for search clients
         self._index_clients = {}   # Cache for index clients
+        self._index_fields = {}    # Cache of the field names of each index
         
         # Get endpoint configuration
         self.endpoint_config = self._get_endpoint_config()
@@ -155,6 +160,7 @@ class AzureSearchClient:
             SimpleField(name="name", type=SearchFieldDataType.String, filterable=True, sortable=True),
             SimpleField(name="site", type=SearchFieldDataType.String, filterable=True, sortable=True, facetable=True),
             SimpleField(name="schema_json", type=SearchFieldDataType.String, filterable=False),
+            SimpleField(name="ranking_text", type=SearchFieldDataType.String, filterable=False),
             SearchField(
                 name="embedding",
                 type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
@@ -166,6 +172,44 @@ class AzureSearchClient:
         vector_search = self._create_vector_search_config(profile_name=profile_name)
         return SearchIndex(name=index_name, fields=fields, vector_search=vector_search)
     
+    async def _get_index_fields(self, index_name: str) -> frozenset:
+        """
+        The names of the fields of an index, read once per index. Indexes created before a
+        field was added to the index definition don't have it, and Azure rejects documents
+        with unknown fields. If the index can't be read, the fields every index has are
+        assumed, and that is remembered too.
+        """
+        with self._client_lock:
+            fields = self._index_fields.get(index_name)
+        if fields is not None:
+            return fields
+        
+        def get_index_sync():
+            return self._get_index_client().get_index(index_name)
+        
+        try:
+            index = await asyncio.get_event_loop().run_in_executor(None, get_index_sync)
+            fields = frozenset(field.name for field in index.fields)
+        except Exception as e:
+            logger.warning(f"Could not read the fields of index '{index_name}', assuming the base fields: {e}")
+            fields = BASE_FIELDS
+        with self._client_lock:
+            self._index_fields[index_name] = fields
+        return fields
+    
+    async def _select(self, index_name: str) -> str:
+        """The fields search results are read from, with the stored ranking text if the index has it."""
+        if "ranking_text" in await self._get_index_fields(index_name):
+            return "url,name,site,schema_json,ranking_text"
+        return "url,name,site,schema_json"
+    
+    @staticmethod
+    def _format_result(result: Dict[str, Any]) -> RetrievedItem:
+        """A search result as a RetrievedItem, with its ranking text if it was stored."""
+        item = RetrievedItem.from_result((result["url"], result["schema_json"], result["name"], result["site"]))
+        item.ranking_text = result.get("ranking_text")
+        return item
+    
     def index_exists(self, index_name: Optional[str] = None) -> bool:
         """
         Check if the specified index exists.
@@ -255,6 +299,7 @@ class AzureSearchClient:
             with self._client_lock:
                 if index_name in self._search_clients:
                     del self._search_clients[index_name]
+                self._index_fields.pop(index_name, None)
                     
             return True
         except Exception as e:
@@ -370,6 +415,11 @@ class AzureSearchClient:
         search_client = self._get_search_client(index_name)
         
         try:
+            # Only send the fields the index has; loaders add others (e.g. ranking_text) that
+            # indexes created before them don't store
+            fields = await self._get_index_fields(index_name)
+            documents = [{key: value for key, value in doc.items() if key in fields} for doc in documents]
+            
             # Upload the documents asynchronously
             def upload_sync():
                 return search_client.upload_documents(documents)
@@ -468,7 +518,7 @@ class AzureSearchClient:
                 }
             ],
             "top": top_n,
-            "select": "url,name,site,schema_json"
+            "select": await self._select(index_name)
         }
         
         try:
@@ -481,8 +531,7 @@ class AzureSearchClient:
             # Process results into a more convenient format
             processed_results = []
             for result in results:
-                processed_result = [result["url"], result["schema_json"], result["name"], result["site"]]
-                processed_results.append(processed_result)
+                processed_results.append(self._format_result(result))
             
             logger.debug(f"Retrieved {len(processed_results)} results")
             return processed_results
@@ -523,7 +572,7 @@ class AzureSearchClient:
         search_options = {
             "filter": f"url eq '{url}'",
             "top": top_n,
-            "select": "url,name,site,schema_json"
+            "select": await self._select(index_name)
         }
         
         try:
@@ -535,7 +584,7 @@ class AzureSearchClient:
             
             for result in results:
                 logger.info(f"Successfully retrieved item for URL: {url}")
-                return [result["url"], result["schema_json"], result["name"], result["site"]]
+                return self._format_result(result)
             
             logger.warning(f"No item found for URL: {url}")
             return None
@@ -595,7 +644,7 @@ class AzureSearchClient:
                     }
                 ],
                 "top": num_results,
-                "select": "url,name,site,schema_json"
+                "select": await self._select(index_name)
             }
             
             # Execute the search asynchronously
@@ -607,8 +656,7 @@ class AzureSearchClient:
             # Process results into a more convenient format
             processed_results = []
             for result in results:
-                processed_result = [result["url"], result["schema_json"], result["name"], result["site"]]
-                processed_results.append(processed_result)
+                processed_results.append(self._format_result(result))
             
             logger.info(f"Global search completed, found {len(processed_results)} results")
             return processed_results
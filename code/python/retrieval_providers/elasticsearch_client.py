@@ -13,7 +13,7 @@ from typing import List, Dict, Union, Optional, Any
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from core.config import CONFIG
-from core.embedding import get_embedding
+from core.embedding import batch_get_embeddings, get_embedding
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -476,6 +476,82 @@ class ElasticsearchClient:
         return results
     
     
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          embeddings: Optional[List[List[float]]] = None,
+                          query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for several queries in one _msearch request. The queries are embedded in one
+        batch, unless their embeddings are given.
+        
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites ("all" for every site), the same for all queries
+            num_results: Maximum number of results to return per query
+            embeddings: Optional embeddings of the queries, in the same order
+            query_params: Query parameters for embedding generation
+            **kwargs: Additional parameters
+            
+        Returns:
+            List[List[List[str]]]: The results of each query, in the order of queries
+        """
+        if not queries:
+            return []
+        index_name = kwargs.get('index_name', self.default_index_name)
+        
+        start_embed = time.time()
+        if embeddings is None:
+            embeddings = await batch_get_embeddings(queries, query_params=query_params)
+        embed_time = time.time() - start_embed
+        
+        filter = None
+        if site != "all":
+            sites = [site] if isinstance(site, str) else site
+            filter = {"term": {"site": sites[0]}} if len(sites) == 1 else {"terms": {"site": sites}}
+        
+        searches = []
+        for embedding in embeddings:
+            knn = {"field": "embedding", "query_vector": embedding, "k": num_results}
+            if filter:
+                knn["filter"] = filter
+            searches.append({"index": index_name})
+            searches.append({"knn": knn, "_source": ["url", "site", "schema_json", "name"], "size": num_results})
+        
+        start_retrieve = time.time()
+        client = await self._get_es_client()
+        try:
+            response = await client.msearch(searches=searches)
+        except Exception as e:
+            logger.exception("Error in Elasticsearch multi-search")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Elasticsearch multi-search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "queries": len(queries),
+                    "num_results": num_results
+                }
+            )
+            raise
+        
+        results = []
+        for item in response['responses']:
+            if 'error' in item:
+                raise RuntimeError(f"Elasticsearch multi-search query failed: {item['error']}")
+            results.append(await self._format_es_response(item))
+        
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Elasticsearch multi-search completed",
+            {
+                "queries": len(queries),
+                "embedding_time": f"{embed_time:.2f}s",
+                "retrieval_time": f"{time.time() - start_retrieve:.2f}s",
+                "results_count": sum(len(r) for r in results)
+            }
+        )
+        return results
+    
     async def search_by_url(self, url: str, **kwargs) -> Optional[List[str]]:
         """
         Retrieve records by exact URL match
@@ -5,6 +5,7 @@
 OpenSearch Client - Interface for OpenSearch operations.
 """
 
+import asyncio
 import time
 import threading
 import base64
@@ -13,7 +14,7 @@ from typing import List, Dict, Union, Optional, Any
 import httpx
 
 from core.config import CONFIG
-from core.embedding import get_embedding
+from core.embedding import batch_get_embeddings, get_embedding
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -561,6 +562,103 @@ class OpenSearchClient:
             )
             raise
     
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          embeddings: Optional[List[List[float]]] = None,
+                          query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for several queries in one _msearch request. The queries are embedded in one
+        batch, unless their embeddings are given.
+        
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites ("all" for every site), the same for all queries
+            num_results: Maximum number of results to return per query
+            embeddings: Optional embeddings of the queries, in the same order
+            query_params: Query parameters for embedding generation
+            **kwargs: Additional parameters
+            
+        Returns:
+            List[List[List[str]]]: The results of each query, in the order of queries
+        """
+        if not queries:
+            return []
+        if not self.use_knn:
+            # Script scoring endpoints are searched one query at a time
+            if site == "all":
+                searches = [self.search_all_sites(q, num_results, query_params=query_params, **kwargs) for q in queries]
+            else:
+                searches = [self.search(q, site, num_results, query_params=query_params, **kwargs) for q in queries]
+            return list(await asyncio.gather(*searches))
+        
+        index_name = kwargs.get('index_name', self.default_index_name)
+        start_embed = time.time()
+        if embeddings is None:
+            embeddings = await batch_get_embeddings(queries, query_params=query_params)
+        embed_time = time.time() - start_embed
+        
+        site_filter = None
+        if site != "all":
+            sites = [site] if isinstance(site, str) else site
+            site_filter = {"term": {"site": sites[0]}} if len(sites) == 1 else {"terms": {"site": sites}}
+        
+        # _msearch takes newline-delimited JSON: a header line, then the query, for each search
+        lines = []
+        for embedding in embeddings:
+            knn_query = {"knn": {"embedding": {"vector": embedding, "k": num_results}}}
+            if site_filter:
+                knn_query = {"bool": {"must": [knn_query], "filter": [site_filter]}}
+            lines.append(json.dumps({"index": index_name}))
+            lines.append(json.dumps({"size": num_results, "_source": ["url", "site", "schema_json", "name"],
+                                     "query": knn_query}))
+        headers = dict(self._get_auth_headers(), **{"Content-Type": "application/x-ndjson"})
+        
+        start_retrieve = time.time()
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.api_endpoint}/_msearch",
+                    content="\n".join(lines) + "\n",
+                    headers=headers,
+                    timeout=60
+                )
+                response.raise_for_status()
+                responses = response.json().get('responses', [])
+        except Exception as e:
+            logger.exception("Error in OpenSearch multi-search")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "OpenSearch multi-search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "queries": len(queries),
+                    "num_results": num_results
+                }
+            )
+            raise
+        
+        results = []
+        for item in responses:
+            if 'error' in item:
+                raise RuntimeError(f"OpenSearch multi-search query failed: {item['error']}")
+            results.append([
+                [hit.get('_source', {}).get('url', ''), hit.get('_source', {}).get('schema_json', '{}'),
+                 hit.get('_source', {}).get('name', ''), hit.get('_source', {}).get('site', '')]
+                for hit in item.get('hits', {}).get('hits', [])
+            ])
+        
+        logger.log_with_context(
+            LogLevel.INFO,
+            "OpenSearch multi-search completed",
+            {
+                "queries": len(queries),
+                "embedding_time": f"{embed_time:.2f}s",
+                "retrieval_time": f"{time.time() - start_retrieve:.2f}s",
+                "results_count": sum(len(r) for r in results)
+            }
+        )
+        return results
+    
     async def _search_by_site_and_vector(self, sites: Union[str, List[str]], 
                                        vector_embedding: List[float], 
                                        top_n: int = 10, 
@@ -8,10 +8,11 @@ Uses psycopg3 for improved async support and performance.
 """
 
 import json
+import math
 import os
 import asyncio
 import time
-from typing import List, Dict, Union, Optional, Any, Tuple, Set
+from typing import List, Dict, Union, Optional, Any, Tuple, Set, AsyncIterator
 
 from urllib.parse import urlparse, parse_qs
 
@@ -22,12 +23,39 @@ from psycopg_pool import AsyncConnectionPool
 import pgvector.psycopg
 
 from core.config import CONFIG
-from core.embedding import get_embedding
+from core.embedding import batch_get_embeddings, get_embedding
+from core.utils.circuit_breaker import CircuitBreaker, get_breaker
 from misc.logger.logging_config_helper  import get_configured_logger
 from misc.logger.logger import LogLevel
 
 logger = get_configured_logger("postgres_client")
 
+# Columns of the documents table, in the order rows are written
+DOCUMENT_COLUMNS = ["id", "url", "name", "schema_json", "site", "embedding"]
+
+# Documents per COPY when uploading
+COPY_BATCH_SIZE = 1000
+
+# Distance operator and index operator class for each similarity metric
+DISTANCE_OPERATORS = {
+    "cosine": ("<=>", "vector_cosine_ops"),           # Cosine distance
+    "inner_product": ("<#>", "vector_ip_ops"),        # Negative inner product
+    "euclidean": ("<->", "vector_l2_ops"),            # Euclidean distance
+}
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+
+def _json_text(value: Any) -> str:
+    """schema_json as JSON text; loaders pass either the text or the decoded object."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _vector_text(embedding: List[float]) -> str:
+    """An embedding as a pgvector literal."""
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+
 class PgVectorClient:
     """
     Client for PostgreSQL vector database operations with pgvector extension.
@@ -67,6 +95,8 @@ class PgVectorClient:
         self.username = self.pg_raw_config.get("username") 
         self.password = self.api_key or self.pg_raw_config.get("password")
         self.table_name = self.default_collection_name or "documents"
+        self.index_config = self.endpoint_config.index
+        self.prepare_statements = self.endpoint_config.prepare_statements
 
         # Validate critical configuration
         if not self.host:
@@ -163,12 +193,16 @@ class PgVectorClient:
                         # Log connection attempt (without sensitive information)
                         logger.info(f"Connecting to PostgreSQL at {self.host}:{self.port}/{self.dbname} with user {self.username}")
                         
-                        # Set up async connection pool with reasonable defaults
+                        # Set up the async connection pool with the configured size. The search
+                        # queries run with prepare=True, so each connection prepares them on first
+                        # use and reuses the plan while it stays open in the pool.
                         conninfo = f"host={self.host} port={self.port} dbname={self.dbname} user={self.username} password={self.password}"
                         self._pool = AsyncConnectionPool(
                             conninfo=conninfo,
-                            min_size=1,
-                            max_size=10, 
+                            min_size=self.endpoint_config.pool_min_size,
+                            max_size=self.endpoint_config.pool_max_size,
+                            kwargs={} if self.prepare_statements else {"prepare_threshold": None},
+                            configure=self._configure_connection,
                             open=False # Don't open immediately, we will do it explicitly later
                         )
                         # Explicitly open the pool as recommended in newer psycopg versions
@@ -177,9 +211,6 @@ class PgVectorClient:
                         
                         # Verify pgvector extension is installed
                         async with self._pool.connection() as conn:
-                            # Register vector type
-                            await pgvector.psycopg.register_vector_async(conn)
-                            
                             async with conn.cursor() as cur:
                                 await cur.execute("SELECT * FROM pg_extension WHERE extname = 'vector'")
                                 row = await cur.fetchone()
@@ -192,6 +223,17 @@ class PgVectorClient:
         
         return self._pool
 
+    async def _configure_connection(self, conn):
+        """Set up a new pool connection: register the vector type once instead of on every checkout."""
+        try:
+            await pgvector.psycopg.register_vector_async(conn)
+        except psycopg.ProgrammingError as e:
+            # The extension isn't created yet (the setup script creates it through this pool).
+            # Queries pass vectors as literals cast with ::vector, so they work without it.
+            logger.warning(f"pgvector type not registered: {e}")
+        # register_vector_async queries the catalog, which leaves a transaction open
+        await conn.rollback()
+
     async def close(self):
         """Close the connection pool when done"""
         if self._pool:
@@ -201,6 +243,9 @@ class PgVectorClient:
         """
         Execute a database query with retry logic for transient failures.
         
+        Transient failures are recorded on the endpoint's circuit breaker (the one the
+        retriever ejects endpoints with), and are not retried once it has opened.
+        
         Args:
             query_func: Function that performs the database query
             max_retries: Maximum number of retry attempts
@@ -211,23 +256,27 @@ class PgVectorClient:
         """
         retry_count = 0
         backoff_time = initial_backoff
+        breaker = get_breaker("retrieval", self.endpoint_name, CONFIG.retrieval_circuit_breaker)
         
         while True:
             try:
                 # With psycopg3, we can use async directly
                 async with (await self._get_connection_pool()).connection() as conn:
-                    # Register vector type
-                    await pgvector.psycopg.register_vector_async(conn)
                     return await query_func(conn)
             
             except (psycopg.OperationalError, psycopg.InternalError) as e:
                 # Handle transient errors like connection issues
                 retry_count += 1
+                breaker.record_failure(e)
                 
                 if retry_count > max_retries:
                     logger.error(f"Maximum retries exceeded: {e}")
                     raise
                 
+                if breaker.state == CircuitBreaker.OPEN:
+                    logger.error(f"Endpoint {self.endpoint_name} was ejected by its circuit breaker, not retrying: {e}")
+                    raise
+                
                 logger.warning(f"Database error (attempt {retry_count}/{max_retries}): {e}")
                 logger.warning(f"Retrying in {backoff_time:.2f} seconds...")
                 
@@ -272,127 +321,354 @@ class PgVectorClient:
             logger.exception(f"Error deleting documents for site {site}: {e}")
             raise
     
-    async def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> int:
+    async def delete_documents_by_ids(self, site: str, ids: List[str], **kwargs) -> int:
         """
-        Upload documents to the database.
-        Each document should have: id, name, embedding, url, and optionally schema_json.
+        Delete documents of a site by their IDs.
         
         Args:
-            documents: List of document objects
+            site: Site identifier the documents belong to
+            ids: Document IDs
             **kwargs: Additional parameters
             
         Returns:
-            Number of documents uploaded
+            Number of documents deleted
         """
-        logger.info(f"Uploading {len(documents)} documents")
+        if not ids:
+            return 0
         
+        async def _delete_docs(conn):
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"DELETE FROM {self.table_name} WHERE site = %s AND id = ANY(%s)",
+                    (site, list(ids))
+                )
+                count = cur.rowcount
+                await conn.commit()
+                return count
+        
+        count = await self._execute_with_retry(_delete_docs)
+        logger.info(f"Deleted {count} documents of site: {site}")
+        return count
+    
+    async def delete_replaced_documents(self, site: str, ids_by_url: Dict[str, str], **kwargs) -> int:
+        """
+        Delete documents of a site that have one of the given URLs but another ID than the
+        one given for it.
+        
+        Args:
+            site: Site identifier the documents belong to
+            ids_by_url: The current document ID of each URL
+            **kwargs: Additional parameters
+            
+        Returns:
+            Number of documents deleted
+        """
+        if not ids_by_url:
+            return 0
+        
+        async def _delete_docs(conn):
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"DELETE FROM {self.table_name} AS doc "
+                    f"USING unnest(%s::text[], %s::text[]) AS current(url, id) "
+                    f"WHERE doc.site = %s AND doc.url = current.url AND doc.id <> current.id",
+                    (list(ids_by_url), list(ids_by_url.values()), site)
+                )
+                count = cur.rowcount
+                await conn.commit()
+                return count
+        
+        count = await self._execute_with_retry(_delete_docs)
+        logger.info(f"Deleted {count} replaced documents of site: {site}")
+        return count
+    
+    def _valid_document(self, doc: Dict[str, Any]) -> bool:
+        """Whether a document has all fields and a usable embedding, logging why not."""
+        missing = [k for k in DOCUMENT_COLUMNS if k not in doc]
+        if missing:
+            logger.warning(f"Skipping document with missing fields: {missing}")
+            return False
+
+        # Validate embedding format - should be a non-empty list of numbers
+        embedding = doc["embedding"]
+        if not isinstance(embedding, list):
+            logger.warning(f"Skipping document with invalid embedding type: {type(embedding)}")
+            return False
+        if len(embedding) == 0:
+            logger.warning("Skipping document with empty embedding")
+            return False
+        if not all(isinstance(x, (int, float)) for x in embedding):
+            logger.warning(f"Skipping document with non-numeric embedding values: {str(embedding[:5])}...")
+            return False
+        return True
+
+    async def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> int:
+        """
+        Upload documents to the database.
+        Each document should have: id, name, embedding, url, site and schema_json.
+
+        Each batch is streamed with COPY into a temporary staging table and merged into the
+        table with one INSERT ... ON CONFLICT, in a single transaction, so a batch costs a
+        few round trips however many documents it holds.
+
+        Args:
+            documents: List of document objects
+            **kwargs: Additional parameters (batch_size: documents per COPY, default 1000)
+
+        Returns:
+            Number of documents inserted or updated
+        """
+        logger.info(f"Uploading {len(documents)} documents")
+
         # Handle empty documents list
         if not documents:
             logger.warning("Empty documents list provided")
             return 0
-        
-        batch_size = kwargs.get("batch_size", 100)  # Default to 100 docs per batch
+
+        batch_size = kwargs.get("batch_size", COPY_BATCH_SIZE)
+        # The merge can't update the same row twice, so keep the last document for each id
+        valid = list({doc["id"]: doc for doc in documents if self._valid_document(doc)}.values())
+        if not valid:
+            logger.warning("No valid documents to upload")
+            return 0
+
+        columns = ", ".join(DOCUMENT_COLUMNS)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in DOCUMENT_COLUMNS if c != "id")
+        staging = "nlweb_upload_staging"
+        merge_sql = f"""
+            INSERT INTO {self.table_name} ({columns})
+            SELECT {columns} FROM {staging}
+            ON CONFLICT (id) DO UPDATE SET {updates}
+        """
+
         inserted_count = 0
-        
-        # Process documents in batches for better performance
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            logger.debug(f"Processing batch {i//batch_size + 1} with {len(batch)} documents")
-            
-            async def _upload_batch(conn):
-                async with conn.cursor() as cur:
-                    # Prepare the query and values
-                    placeholders = []
-                    values = []
-
-                    for idx, doc in enumerate(batch):
-                        try:
-                            # Ensure required fields are present
-                            if not all(k in doc for k in ["id", "url", "name","schema_json", "site", "embedding"]):
-                                missing = [k for k in ["id", "url", "name","schema_json", "site", "embedding"] if k not in doc]
-                                logger.warning(f"Skipping document with missing fields: {missing}")
-                                continue
-
-                            # Validate embedding format - should be a list of numbers
-                            embedding = doc["embedding"]
-                            if not isinstance(embedding, list):
-                                logger.warning(f"Skipping document with invalid embedding type: {type(embedding)}")
-                                continue
-                                
-                            if len(embedding) == 0:
-                                logger.warning(f"Skipping document with empty embedding")
-                                continue
-                                
-                            # Check if embedding is properly formatted
-                            if not all(isinstance(x, (int, float)) for x in embedding):
-                                logger.warning(f"Skipping document with non-numeric embedding values")
-                                print(f"Invalid embedding example: {str(embedding[:5])}...")
-                                continue
-                            
-                            # Add placeholder for this row
-                            placeholders.append("(%s, %s, %s, %s, %s, %s::vector)")
-                            
-                            # Add values
-                            values.extend([
-                                doc["id"],
-                                doc["url"], 
-                                doc["name"],
-                                doc["schema_json"],
-                                doc["site"],
-                                embedding  # This should be a list of floats
-                            ])
-                            
-                        except Exception as e:
-                            logger.warning(f"Error processing document {idx} in batch: {e}")
-                            print(f"Document error: {e}, document keys: {list(doc.keys())}")
-                            continue
-                    
-                    if not placeholders:
-                        logger.warning("No valid documents to insert in batch")
-                        return 0
-                    
-                    # Build and execute the query
-                    query = f"""
-                        INSERT INTO {self.table_name} (id, url, name, schema_json, site, embedding)
-                        VALUES {', '.join(placeholders)}
-                        ON CONFLICT (id) DO UPDATE SET
-                            url = EXCLUDED.url,
-                            name = EXCLUDED.name,
-                            schema_json = EXCLUDED.schema_json,
-                            site = EXCLUDED.site,
-                            embedding = EXCLUDED.embedding
-                    """
-                    
-                    print(f"Executing query with {len(values) // 6} rows")
-                    try:
-                        await cur.execute(query, values)
-                        count = cur.rowcount
-                        await conn.commit()
-                        print(f"Successfully inserted/updated {count} rows")
-                        return count
-                    except Exception as e:
-                        await conn.rollback()
-                        print(f"SQL Error: {e}")
-                        # Try logging part of the query and values for debugging
-                        print(f"Query start: {query[:200]}...")
-                        print(f"First few values: {str(values[:10])}")
-                        raise
-            
+        num_batches = (len(valid) + batch_size - 1) // batch_size
+        for i in range(0, len(valid), batch_size):
+            batch = valid[i:i + batch_size]
+
+            async def _copy_batch(conn, batch=batch):
+                async with conn.transaction():
+                    async with conn.cursor() as cur:
+                        await cur.execute(
+                            f"CREATE TEMP TABLE {staging} (LIKE {self.table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                        )
+                        # Text format COPY: the server parses the JSON and vector literals
+                        async with cur.copy(f"COPY {staging} ({columns}) FROM STDIN") as copy:
+                            for doc in batch:
+                                await copy.write_row((
+                                    doc["id"],
+                                    doc["url"],
+                                    doc["name"],
+                                    _json_text(doc["schema_json"]),
+                                    doc["site"],
+                                    _vector_text(doc["embedding"]),
+                                ))
+                        await cur.execute(merge_sql)
+                        return cur.rowcount
+
             try:
-                print(f"Attempting to upload batch {i//batch_size + 1}/{(len(documents) + batch_size - 1) // batch_size}")
-                batch_count = await self._execute_with_retry(_upload_batch)
+                batch_count = await self._execute_with_retry(_copy_batch)
                 inserted_count += batch_count
-                print("-" * 80)
-                print(f"Batch {i//batch_size + 1} completed: {batch_count} documents inserted/updated")
-                logger.info(f"Batch {i//batch_size + 1} inserted: {batch_count} documents")
+                logger.info(f"Batch {i//batch_size + 1}/{num_batches} inserted: {batch_count} documents")
             except Exception as e:
                 logger.exception(f"Error uploading batch {i//batch_size + 1}: {e}")
-                print(f"ERROR in batch {i//batch_size + 1}: {type(e).__name__}: {e}")
                 raise
-        
+
         logger.info(f"Successfully uploaded {inserted_count} documents")
         return inserted_count
-    
+
+    async def export_documents(self, site: str, batch_size: int = 100, **kwargs) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Read back all documents of a site, with their embeddings, in the format
+        upload_documents takes. Rows are streamed through a server-side cursor.
+
+        Args:
+            site: Site identifier
+            batch_size: Documents per batch
+            **kwargs: Additional parameters
+
+        Yields:
+            Batches of documents
+        """
+        async with (await self._get_connection_pool()).connection() as conn:
+            async with conn.cursor(name="nlweb_export", row_factory=dict_row) as cur:
+                await cur.execute(
+                    f"SELECT id, url, name, schema_json::text AS schema_json, site, embedding::text AS embedding "
+                    f"FROM {self.table_name} WHERE site = %s",
+                    (site,)
+                )
+                while True:
+                    rows = await cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    # The text form of a vector, [1,2,3], is also a JSON array
+                    yield [dict(row, embedding=json.loads(row["embedding"])) for row in rows]
+
+    def _search_sql(self, similarity_metric: str, filtered: bool) -> str:
+        """
+        The similarity search query. Its text only depends on the metric and whether sites are
+        filtered (sites are passed as one array parameter), so each variant is prepared once per
+        connection. schema_json is returned as the stored JSON text, not decoded and re-encoded.
+        """
+        operator = DISTANCE_OPERATORS.get(similarity_metric, DISTANCE_OPERATORS["cosine"])[0]
+        where_clause = "WHERE site = ANY(%s)" if filtered else ""
+        return f"""
+            SELECT url, schema_json::text AS schema_json, name, site
+            FROM {self.table_name}
+            {where_clause}
+            ORDER BY embedding {operator} %s::vector
+            LIMIT %s
+        """
+
+    def _search_many_sql(self, similarity_metric: str, filtered: bool) -> str:
+        """
+        The similarity search for several query vectors in one statement: each vector is
+        searched on its own through a LATERAL subquery, so each one can use the vector index.
+        Rows come back ordered by query, then by distance.
+        """
+        operator = DISTANCE_OPERATORS.get(similarity_metric, DISTANCE_OPERATORS["cosine"])[0]
+        where_clause = "WHERE site = ANY(%s)" if filtered else ""
+        return f"""
+            SELECT q.ord, d.url, d.schema_json, d.name, d.site
+            FROM unnest(%s::vector[]) WITH ORDINALITY AS q(query_vector, ord)
+            CROSS JOIN LATERAL (
+                SELECT url, schema_json::text AS schema_json, name, site,
+                       embedding {operator} q.query_vector AS distance
+                FROM {self.table_name}
+                {where_clause}
+                ORDER BY embedding {operator} q.query_vector
+                LIMIT %s
+            ) d
+            ORDER BY q.ord, d.distance
+        """
+
+    def _search_settings(self, ef_search: Optional[int] = None, probes: Optional[int] = None,
+                         exact: bool = False) -> List[Tuple[str, str]]:
+        """Planner settings for one search: the configured ef_search / probes unless overridden."""
+        if exact:
+            return [("enable_indexscan", "off")]
+        settings = []
+        ef_search = ef_search or self.index_config.search_ef
+        probes = probes or self.index_config.ivfflat_probes
+        if ef_search:
+            settings.append(("hnsw.ef_search", str(int(ef_search))))
+        if probes:
+            settings.append(("ivfflat.probes", str(int(probes))))
+        return settings
+
+    async def search_by_vector(self, query_embedding: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, similarity_metric: str = "cosine",
+                               ef_search: Optional[int] = None, probes: Optional[int] = None,
+                               exact: bool = False) -> List[List[str]]:
+        """
+        Search for the documents nearest to an embedding.
+
+        Args:
+            query_embedding: Query vector
+            site: Site identifier or list of sites ("all" or [] for every site)
+            num_results: Maximum number of results to return
+            similarity_metric: "cosine", "inner_product" or "euclidean"
+            ef_search: HNSW candidate list size for this query (index.search_ef if unset)
+            probes: IVFFlat clusters to search for this query (index.ivfflat_probes if unset)
+            exact: Skip the vector index and compare against every row
+
+        Returns:
+            List of search results, where each result is a list of strings:
+            [url, schema_json, name, site]
+        """
+        sites = []
+        if isinstance(site, list):
+            sites = site
+        elif isinstance(site, str) and site != "all":
+            sites = [site]
+
+        query_sql = self._search_sql(similarity_metric, bool(sites))
+        params = ([sites] if sites else []) + [query_embedding, num_results]
+        settings = self._search_settings(ef_search, probes, exact)
+
+        async def _search_docs(conn):
+            # SET LOCAL only lasts until the end of the transaction, so the settings
+            # apply to this query and not to the next user of the connection
+            async with conn.transaction():
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    for name, value in settings:
+                        await cur.execute("SELECT set_config(%s, %s, true)", (name, value),
+                                          prepare=self.prepare_statements)
+                    await cur.execute(query_sql, params, prepare=self.prepare_statements)
+                    rows = await cur.fetchall()
+
+            return [[row["url"], row["schema_json"], row["name"], row["site"]] for row in rows]
+
+        return await self._execute_with_retry(_search_docs)
+
+    async def search_many_by_vector(self, query_embeddings: List[List[float]], site: Union[str, List[str]],
+                                    num_results: int = 50, similarity_metric: str = "cosine",
+                                    ef_search: Optional[int] = None, probes: Optional[int] = None,
+                                    exact: bool = False) -> List[List[List[str]]]:
+        """
+        Search for the documents nearest to each of several embeddings, in one query.
+        Takes the same options as search_by_vector.
+
+        Returns:
+            The results for each embedding, in order
+        """
+        if not query_embeddings:
+            return []
+        sites = []
+        if isinstance(site, list):
+            sites = site
+        elif isinstance(site, str) and site != "all":
+            sites = [site]
+
+        query_sql = self._search_many_sql(similarity_metric, bool(sites))
+        # The embeddings are sent as vector literals, in one text array parameter
+        params = [[_vector_text(embedding) for embedding in query_embeddings]] + ([sites] if sites else []) + [num_results]
+        settings = self._search_settings(ef_search, probes, exact)
+
+        async def _search_docs(conn):
+            async with conn.transaction():
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    for name, value in settings:
+                        await cur.execute("SELECT set_config(%s, %s, true)", (name, value),
+                                          prepare=self.prepare_statements)
+                    await cur.execute(query_sql, params, prepare=self.prepare_statements)
+                    rows = await cur.fetchall()
+
+            results = [[] for _ in query_embeddings]
+            for row in rows:
+                results[row["ord"] - 1].append([row["url"], row["schema_json"], row["name"], row["site"]])
+            return results
+
+        return await self._execute_with_retry(_search_docs)
+
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          embeddings: Optional[List[List[float]]] = None,
+                          query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for several queries in one database round-trip. The queries are embedded in
+        one batch, unless their embeddings are given.
+
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites, the same for all queries
+            num_results: Maximum number of results to return per query
+            embeddings: Optional embeddings of the queries, in the same order
+            **kwargs: Additional parameters (similarity_metric, ef_search, probes)
+
+        Returns:
+            The results of each query, in the order of queries
+        """
+        if not queries:
+            return []
+        if embeddings is None:
+            embeddings = await batch_get_embeddings(queries, query_params=query_params)
+        return await self.search_many_by_vector(
+            embeddings, site, num_results,
+            similarity_metric=kwargs.get("similarity_metric", "cosine"),
+            ef_search=kwargs.get("ef_search"),
+            probes=kwargs.get("probes"),
+        )
+
     async def search(self, query: str, site: Union[str, List[str]], 
                     num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
         """
@@ -402,7 +678,7 @@ class PgVectorClient:
             query: Search query string
             site: Site identifier or list of sites
             num_results: Maximum number of results to return
-            **kwargs: Additional parameters (e.g., similarity_metric)
+            **kwargs: Additional parameters (similarity_metric, ef_search, probes)
             
         Returns:
             List of search results, where each result is a list of strings:
@@ -418,69 +694,14 @@ class PgVectorClient:
         except Exception as e:
             logger.exception(f"Error generating embedding for query: {e}")
             raise
-        
-        # Process site parameter
-        sites = []
-        if isinstance(site, list):
-            sites = site
-        elif isinstance(site, str) and site != "all":
-            sites = [site]
-        
-        similarity_metric = kwargs.get("similarity_metric", "cosine")  # Default to cosine similarity
-        
-        # Select appropriate similarity function based on metric
-        similarity_func = {
-            "cosine": "<=>",          # Cosine distance
-            "inner_product": "<#>",    # Negative inner product
-            "euclidean": "<->",        # Euclidean distance
-        }.get(similarity_metric, "<=>")  # Default to cosine
-        
-        async def _search_docs(conn):
-            # Use dict_row to get results as dictionaries
-            async with conn.cursor(row_factory=dict_row) as cur:
-                # Build WHERE clause for site filtering if needed
-                where_clause = ""
-                params = [query_embedding]
-                
-                if sites:
-                    # Create placeholders for site parameters
-                    site_placeholders = ", ".join(["%s"] * len(sites))
-                    where_clause = f"WHERE site IN ({site_placeholders})"
-                    params.extend(sites)
-                
-                # Construct and execute query
-                query_sql = f"""
-                    SELECT 
-                        name,
-                        url,
-                        embedding {similarity_func} %s::vector AS similarity_score,
-                        site,
-                        schema_json
-                    FROM {self.table_name}
-                    {where_clause}
-                    ORDER BY similarity_score
-                    LIMIT %s
-                """
-                
-                params.append(num_results)
-                await cur.execute(query_sql, params)
-                rows = await cur.fetchall()
-                
-                # Format results
-                results = []
-                for row in rows:
-                    result = [
-                        row["url"],
-                        json.dumps(row["schema_json"], indent=4),
-                        row["name"],
-                        row["site"],
-                    ]
-                    results.append(result)
-                
-                return results
-        
+
         try:
-            results = await self._execute_with_retry(_search_docs)
+            results = await self.search_by_vector(
+                query_embedding, site, num_results,
+                similarity_metric=kwargs.get("similarity_metric", "cosine"),
+                ef_search=kwargs.get("ef_search"),
+                probes=kwargs.get("probes"),
+            )
             
             end_time = time.time()
             search_duration = end_time - start_time
@@ -507,14 +728,14 @@ class PgVectorClient:
         async def _search_by_url(conn):
             async with conn.cursor(row_factory=dict_row) as cur:
                 await cur.execute(
-                    f"SELECT url, schema_json, site, name FROM {self.table_name} WHERE url ILIKE %s",
-                    (f"%{url}%",)
+                    f"SELECT url, schema_json::text AS schema_json, site, name FROM {self.table_name} WHERE url ILIKE %s",
+                    (f"%{url}%",),
+                    prepare=self.prepare_statements
                 )
-                print(url)
                 row = await cur.fetchone()
                 
                 if row:
-                    return [row["url"], json.dumps(row["schema_json"], indent=4), row["name"], row["site"]]
+                    return [row["url"], row["schema_json"], row["name"], row["site"]]
                 return None
         
         try:
@@ -783,6 +1004,127 @@ class PgVectorClient:
                 "needs_corrections": [f"Exception occurred: {e}"]
             }
 
+    def _index_base_name(self) -> str:
+        return self.table_name.split(".")[-1]
+
+    def _ivfflat_lists(self, row_count: int) -> int:
+        """IVFFlat clusters: the configured number, or pgvector's guideline for the row count."""
+        if self.index_config.ivfflat_lists:
+            return self.index_config.ivfflat_lists
+        if row_count <= 1_000_000:
+            return max(1, row_count // 1000)
+        return int(math.sqrt(row_count))
+
+    def _vector_index_sql(self, name: str, method: str, similarity_metric: str = "cosine",
+                          lists: Optional[int] = None, concurrently: bool = True) -> str:
+        """CREATE INDEX for a vector index built with the configured settings."""
+        if method not in INDEX_METHODS:
+            raise ValueError(f"Unknown vector index method {method!r}, expected one of {', '.join(INDEX_METHODS)}")
+        if similarity_metric not in DISTANCE_OPERATORS:
+            raise ValueError(f"Unknown similarity metric {similarity_metric!r}")
+        opclass = DISTANCE_OPERATORS[similarity_metric][1]
+        if method == "hnsw":
+            options = {"m": self.index_config.hnsw_m, "ef_construction": self.index_config.hnsw_ef_construct}
+        else:
+            options = {"lists": lists}
+        options = {k: int(v) for k, v in options.items() if v is not None}
+        with_clause = f" WITH ({', '.join(f'{k} = {v}' for k, v in options.items())})" if options else ""
+        return (f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+                f"ON {self.table_name} USING {method} (embedding {opclass}){with_clause}")
+
+    async def list_vector_indexes(self) -> List[Dict[str, str]]:
+        """The HNSW and IVFFlat indexes on the table, as dicts with name, method and definition."""
+        async def _list_indexes(conn):
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
+                    "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s",
+                    (self._index_base_name(),)
+                )
+                rows = await cur.fetchall()
+            indexes = []
+            for row in rows:
+                method = next((m for m in INDEX_METHODS if f" USING {m} " in row["indexdef"]), None)
+                if method:
+                    indexes.append({"name": row["indexname"], "method": method, "definition": row["indexdef"]})
+            return indexes
+
+        return await self._execute_with_retry(_list_indexes)
+
+    async def create_vector_index(self, method: Optional[str] = None, similarity_metric: str = "cosine",
+                                  replace: bool = False, concurrently: bool = True) -> str:
+        """
+        Create the vector index on the embedding column, and btree indexes on the
+        index.payload_indexes columns, with the endpoint's index settings.
+
+        Args:
+            method: "hnsw" or "ivfflat" (index.method if unset)
+            similarity_metric: Metric the index serves; searches must use the same one
+            replace: Rebuild the index even if it exists and drop the other vector indexes
+                on the table. The new index is built before the old ones are dropped.
+            concurrently: Build without locking the table against writes (slower)
+
+        Returns:
+            Name of the vector index
+        """
+        method = method or self.index_config.method
+        name = f"{self._index_base_name()}_embedding_{method}_idx"
+        existing = [index["name"] for index in await self.list_vector_indexes()]
+        build_name = f"{name}_new" if replace and name in existing else name
+        keyword = "CONCURRENTLY " if concurrently else ""
+
+        async def _create_index(conn):
+            # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+            await conn.set_autocommit(True)
+            try:
+                async with conn.cursor() as cur:
+                    lists = None
+                    if method == "ivfflat":
+                        await cur.execute(f"SELECT count(*) FROM {self.table_name}")
+                        row_count = (await cur.fetchone())[0]
+                        if row_count == 0:
+                            logger.warning("Building an IVFFlat index on an empty table; its clusters are "
+                                           "computed from the rows present, so load documents first")
+                        lists = self._ivfflat_lists(row_count)
+                    sql = self._vector_index_sql(build_name, method, similarity_metric, lists, concurrently)
+                    logger.info(f"Creating vector index: {sql}")
+                    await cur.execute(sql)
+
+                    for column in self.index_config.payload_indexes:
+                        if column in ("id", "url", "name", "site"):
+                            await cur.execute(
+                                f"CREATE INDEX {keyword}IF NOT EXISTS {self._index_base_name()}_{column}_idx "
+                                f"ON {self.table_name} ({column})"
+                            )
+
+                    if replace:
+                        for old_name in existing:
+                            if old_name != build_name:
+                                logger.info(f"Dropping vector index {old_name}")
+                                await cur.execute(f"DROP INDEX {keyword}IF EXISTS {old_name}")
+                        if build_name != name:
+                            await cur.execute(f"ALTER INDEX {build_name} RENAME TO {name}")
+            finally:
+                await conn.set_autocommit(False)
+            return name
+
+        # An interrupted concurrent build leaves an invalid index behind, so don't retry
+        return await self._execute_with_retry(_create_index, max_retries=0)
+
+    async def drop_vector_index(self, name: str, concurrently: bool = True):
+        """Drop one of the table's vector indexes."""
+        if name not in [index["name"] for index in await self.list_vector_indexes()]:
+            raise ValueError(f"No vector index named {name!r} on table {self.table_name}")
+
+        async def _drop_index(conn):
+            await conn.set_autocommit(True)
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}")
+            finally:
+                await conn.set_autocommit(False)
+
+        await self._execute_with_retry(_drop_index, max_retries=0)
+
 
 # Example usage and testing (disabled in production)
 if __name__ == "__main__":
@@ -5,20 +5,24 @@
 Qdrant Vector Database Client - Interface for Qdrant operations.
 """
 
+import asyncio
 import os
 import sys
 import threading
 import time
 import uuid
 import json
-from typing import List, Dict, Union, Optional, Any, Tuple, Set
+from typing import List, Dict, Union, Optional, Any, Tuple, Set, AsyncIterator
 
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
 
 from core.config import CONFIG
-from core.embedding import get_embedding
+from core.embedding import batch_get_embeddings, get_embedding
+from core.utils.circuit_breaker import CircuitBreaker, get_breaker
+from core.utils.json_utils import ranking_text
+from core.utils.retrieved_item import RetrievedItem
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -40,6 +44,11 @@ class QdrantVectorClient:
         self.endpoint_name = endpoint_name or CONFIG.write_endpoint
         self._client_lock = threading.Lock()
         self._qdrant_clients = {}  # Cache for Qdrant clients
+        # Whether the cached client is the local fallback storage of an unreachable Qdrant server
+        self._using_fallback = False
+        # Collections known to exist, so searches don't check before every query
+        self._known_collections: Set[str] = set()
+        self._collection_lock = asyncio.Lock()
         
         # Get endpoint configuration
         self.endpoint_config = self._get_endpoint_config()
@@ -121,6 +130,10 @@ class QdrantVectorClient:
             params["url"] = url
             if api_key:
                 params["api_key"] = api_key
+            if self.endpoint_config.prefer_grpc:
+                params["prefer_grpc"] = True
+                if self.endpoint_config.grpc_port:
+                    params["grpc_port"] = self.endpoint_config.grpc_port
         elif path:
             # Resolve relative paths for local file-based storage
             resolved_path = self._resolve_path(path)
@@ -135,10 +148,35 @@ class QdrantVectorClient:
         logger.debug(f"Final client parameters: {params}")
         return params
     
+    def _server_breaker(self) -> CircuitBreaker:
+        """
+        The breaker of the Qdrant server of a URL endpoint. While it is open, the server is
+        not tried and the local fallback storage is used instead.
+        """
+        return get_breaker("qdrant_server", self.endpoint_name, CONFIG.retrieval_circuit_breaker)
+    
+    def _server_unreachable(self, error: Exception) -> bool:
+        """
+        Whether a failed call means the Qdrant server is unreachable. If so, the failure is
+        recorded on the server's breaker and the client dropped, so the call can be retried
+        on the local fallback storage.
+        """
+        if not self.api_endpoint or self._using_fallback or not _is_connection_error(error):
+            return False
+        self._server_breaker().record_failure(error)
+        with self._client_lock:
+            self._qdrant_clients.pop(self.endpoint_name, None)
+        return True
+    
     async def _get_qdrant_client(self) -> AsyncQdrantClient:
         """
         Get or initialize Qdrant client.
         
+        If the Qdrant server of a URL endpoint can't be reached, local file-based storage is
+        used instead. Connection failures go to the server's circuit breaker: once it opens,
+        the server is skipped, and it is only tried again when the breaker lets a trial
+        call through, replacing the fallback client if the server is back.
+        
         Returns:
             AsyncQdrantClient: Qdrant client instance
         """
@@ -146,10 +184,16 @@ class QdrantVectorClient:
         
         # First check if we already have a client
         with self._client_lock:
-            if client_key in self._qdrant_clients:
-                return self._qdrant_clients[client_key]
+            cached = self._qdrant_clients.get(client_key)
+        if cached is not None and not self._using_fallback:
+            return cached
+        
+        breaker = self._server_breaker() if self.api_endpoint else None
+        if breaker is not None and not breaker.allow_request():
+            return cached if cached is not None else await self._create_fallback_client()
         
         # If not, create a new client (outside the lock to avoid deadlocks during async init)
+        start_time = time.time()
         try:
             logger.info(f"Initializing Qdrant client for endpoint: {self.endpoint_name}")
             
@@ -164,41 +208,53 @@ class QdrantVectorClient:
             logger.debug(f"Available collections: {collections.collections}")
             logger.info(f"Successfully initialized Qdrant client for {self.endpoint_name}")
             
-            # Store in cache with lock
-            with self._client_lock:
-                self._qdrant_clients[client_key] = client
-            
-            return client
-            
         except Exception as e:
             logger.exception(f"Failed to initialize Qdrant client: {str(e)}")
+            if breaker is None:
+                raise
+            breaker.record_failure(e)
             
-            # If we failed with the URL endpoint, try a fallback to local file-based storage
-            if self.api_endpoint and "Connection refused" in str(e):
-                logger.info("Connection to Qdrant server failed, trying local file-based storage")
-                
-                # Create a default local client as fallback
-                logger.info("Creating default local client")
-                default_path = self._resolve_path("../data/db")
-                logger.info(f"Using default local path: {default_path}")
-                
-                fallback_client = AsyncQdrantClient(path=default_path)
-                
-                # Test connection
-                await fallback_client.get_collections()
-                
-                # Store in cache with lock
-                with self._client_lock:
-                    self._qdrant_clients[client_key] = fallback_client
-                
-                logger.info("Successfully created fallback local client")
-                return fallback_client
-            else:
+            # If we failed with the URL endpoint, fall back to local file-based storage
+            if not _is_connection_error(e):
                 raise
+            logger.info("Connection to Qdrant server failed, using local file-based storage")
+            return cached if cached is not None else await self._create_fallback_client()
+        
+        if breaker is not None:
+            breaker.record_success(time.time() - start_time)
+        
+        # Store in cache with lock
+        with self._client_lock:
+            self._qdrant_clients[client_key] = client
+            self._using_fallback = False
+        if cached is not None:
+            logger.info(f"Qdrant server for {self.endpoint_name} is reachable again, leaving local storage")
+            await cached.close()
+        
+        return client
+    
+    async def _create_fallback_client(self) -> AsyncQdrantClient:
+        """Create and cache a client of the local file-based storage, used while the Qdrant server is unreachable."""
+        default_path = self._resolve_path("../data/db")
+        logger.info(f"Using default local path: {default_path}")
+        
+        fallback_client = AsyncQdrantClient(path=default_path)
+        
+        # Test connection
+        await fallback_client.get_collections()
+        
+        # Store in cache with lock
+        with self._client_lock:
+            self._qdrant_clients[self.endpoint_name] = fallback_client
+            self._using_fallback = True
+        
+        logger.info("Successfully created fallback local client")
+        return fallback_client
     
     async def collection_exists(self, collection_name: Optional[str] = None) -> bool:
         """
-        Check if a collection exists in Qdrant.
+        Check if a collection exists in Qdrant. Collections found to exist are remembered
+        and not checked again, unless an operation on them fails.
         
         Args:
             collection_name: Name of the collection to check
@@ -207,10 +263,15 @@ class QdrantVectorClient:
             bool: True if the collection exists, False otherwise
         """
         collection_name = collection_name or self.default_collection_name
+        if collection_name in self._known_collections:
+            return True
         client = await self._get_qdrant_client()
         
         try:
-            return await client.collection_exists(collection_name)
+            exists = await client.collection_exists(collection_name)
+            if exists:
+                self._known_collections.add(collection_name)
+            return exists
         except Exception as e:
             logger.error(f"Error checking if collection '{collection_name}' exists: {str(e)}")
             return False
@@ -234,15 +295,14 @@ class QdrantVectorClient:
             # Check if collection exists
             if await client.collection_exists(collection_name):
                 logger.info(f"Collection '{collection_name}' already exists")
+                self._known_collections.add(collection_name)
                 return False
             
             # Create collection
             logger.info(f"Creating collection '{collection_name}' with vector size {vector_size}")
-            await client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-            )
+            await self._create_collection(client, collection_name, vector_size)
             logger.info(f"Successfully created collection '{collection_name}'")
+            self._known_collections.add(collection_name)
             return True
         
         except Exception as e:
@@ -250,17 +310,111 @@ class QdrantVectorClient:
             # Try again if collection doesn't exist
             if "Collection not found" in str(e):
                 try:
-                    await client.create_collection(
-                        collection_name=collection_name,
-                        vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-                    )
+                    await self._create_collection(client, collection_name, vector_size)
                     logger.info(f"Successfully created collection '{collection_name}' on second attempt")
+                    self._known_collections.add(collection_name)
                     return True
                 except Exception as e2:
                     logger.error(f"Error creating collection on second attempt: {str(e2)}")
                     raise
             raise
     
+    def _is_local(self) -> bool:
+        """Whether the client runs Qdrant in local mode, which has no payload indexes, HNSW or quantization."""
+        return self._using_fallback or not (self.api_endpoint and self.api_endpoint.startswith(("http://", "https://")))
+    
+    def _hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        index = self.endpoint_config.index
+        if index.hnsw_m is None and index.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=index.hnsw_m, ef_construct=index.hnsw_ef_construct)
+    
+    def _quantization_config(self) -> Optional[models.QuantizationConfig]:
+        quantization = self.endpoint_config.index.quantization
+        if not quantization:
+            return None
+        if quantization == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        raise ValueError(f"Unknown quantization '{quantization}' for endpoint {self.endpoint_name} (use int8 or binary)")
+    
+    def _search_params(self) -> Optional[models.SearchParams]:
+        """Search-time HNSW and quantization parameters from the endpoint's index settings."""
+        index = self.endpoint_config.index
+        quantization = None
+        if index.quantization:
+            quantization = models.QuantizationSearchParams(
+                rescore=index.quantization_rescore, oversampling=index.quantization_oversampling
+            )
+        if index.search_ef is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=index.search_ef, quantization=quantization)
+    
+    async def _create_collection(self, client: AsyncQdrantClient, collection_name: str, vector_size: int):
+        """Create a collection with the endpoint's HNSW and quantization settings and payload indexes."""
+        await client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+            hnsw_config=self._hnsw_config(),
+            quantization_config=self._quantization_config(),
+        )
+        await self._create_payload_indexes(client, collection_name, set())
+    
+    async def _create_payload_indexes(self, client: AsyncQdrantClient, collection_name: str, existing: Set[str]):
+        if self._is_local():
+            return
+        for field_name in self.endpoint_config.index.payload_indexes:
+            if field_name not in existing:
+                logger.info(f"Creating keyword payload index on '{field_name}' in collection '{collection_name}'")
+                await client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+    
+    async def migrate_collection(self, collection_name: Optional[str] = None) -> bool:
+        """
+        Bring an existing collection in line with the endpoint's index settings: create
+        missing payload indexes, and update the HNSW and quantization settings if they
+        differ. Qdrant rebuilds the affected indexes in the background. Run explicitly
+        (python -m misc.qdrant_index migrate), never from the search or upload path.
+        
+        Returns:
+            bool: True if anything was changed
+        """
+        collection_name = collection_name or self.default_collection_name
+        if self._is_local():
+            return False
+        client = await self._get_qdrant_client()
+        info = await client.get_collection(collection_name)
+        changed = False
+        
+        missing = [f for f in self.endpoint_config.index.payload_indexes if f not in (info.payload_schema or {})]
+        if missing:
+            await self._create_payload_indexes(client, collection_name, set(info.payload_schema or {}))
+            changed = True
+        
+        update = {}
+        hnsw_config = self._hnsw_config()
+        current_hnsw = info.config.hnsw_config
+        if hnsw_config and ((hnsw_config.m is not None and hnsw_config.m != current_hnsw.m) or
+                            (hnsw_config.ef_construct is not None and hnsw_config.ef_construct != current_hnsw.ef_construct)):
+            update["hnsw_config"] = hnsw_config
+        quantization_config = self._quantization_config()
+        current_quantization = info.config.quantization_config
+        if quantization_config is None and current_quantization is not None:
+            update["quantization_config"] = models.Disabled.DISABLED
+        elif quantization_config is not None and type(quantization_config) is not type(current_quantization):
+            update["quantization_config"] = quantization_config
+        if update:
+            logger.info(f"Updating {', '.join(update)} of collection '{collection_name}'")
+            await client.update_collection(collection_name=collection_name, **update)
+            changed = True
+        return changed
+    
     async def recreate_collection(self, collection_name: Optional[str] = None, 
                                 vector_size: int = 1536) -> bool:
         """
@@ -278,18 +432,17 @@ class QdrantVectorClient:
         
         try:
             # Delete collection if it exists
+            self._known_collections.discard(collection_name)
             if await client.collection_exists(collection_name):
                 logger.info(f"Dropping existing collection '{collection_name}'")
                 await client.delete_collection(collection_name)
 
             # Create new collection
             logger.info(f"Creating collection '{collection_name}' with vector size {vector_size}")
-            await client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-            )
+            await self._create_collection(client, collection_name, vector_size)
             
             logger.info(f"Successfully recreated collection '{collection_name}'")
+            self._known_collections.add(collection_name)
             return True
             
         except Exception as e:
@@ -297,11 +450,9 @@ class QdrantVectorClient:
             # Try again if collection doesn't exist
             if "Collection not found" in str(e):
                 try:
-                    await client.create_collection(
-                        collection_name=collection_name,
-                        vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-                    )
+                    await self._create_collection(client, collection_name, vector_size)
                     logger.info(f"Successfully created collection '{collection_name}' on second attempt")
+                    self._known_collections.add(collection_name)
                     return True
                 except Exception as e2:
                     logger.error(f"Error creating collection on second attempt: {str(e2)}")
@@ -322,10 +473,13 @@ class QdrantVectorClient:
         """
         collection_name = collection_name or self.default_collection_name
         
-        if await self.collection_exists(collection_name):
-            logger.info(f"Collection '{collection_name}' already exists")
+        if collection_name in self._known_collections:
             return True
-        else:
+        async with self._collection_lock:
+            # Another task may have created it meanwhile. Existing collections are left as they
+            # are; index setting changes are applied by migrate_collection (misc.qdrant_index).
+            if await self.collection_exists(collection_name):
+                return True
             logger.info(f"Collection '{collection_name}' does not exist. Creating it...")
             await self.create_collection(collection_name, vector_size)
             return False
@@ -346,7 +500,7 @@ class QdrantVectorClient:
         collection_name = collection_name or self.default_collection_name
         client = await self._get_qdrant_client()
 
-        if not await client.collection_exists(collection_name):
+        if not await self.collection_exists(collection_name):
             logger.warning(
                 f"Collection '{collection_name}' does not exist. No points to delete."
             )
@@ -369,6 +523,85 @@ class QdrantVectorClient:
 
         return count
 
+    async def delete_documents_by_ids(
+        self, site: str, ids: List[str], collection_name: Optional[str] = None
+    ) -> int:
+        """
+        Delete documents of a site by the IDs they were uploaded with.
+
+        Args:
+            site: The site the documents belong to
+            ids: Document IDs, from which the point IDs are derived as in upload_documents
+            collection_name: Optional collection name (defaults to configured name)
+
+        Returns:
+            int: Number of documents deleted
+        """
+        collection_name = collection_name or self.default_collection_name
+        if not ids or not await self.collection_exists(collection_name):
+            return 0
+        client = await self._get_qdrant_client()
+
+        point_ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, str(doc_id))) for doc_id in ids]
+        filter_condition = models.Filter(
+            must=[
+                models.FieldCondition(key="site", match=models.MatchValue(value=site)),
+                models.HasIdCondition(has_id=point_ids),
+            ]
+        )
+        count = (
+            await client.count(
+                collection_name=collection_name, count_filter=filter_condition
+            )
+        ).count
+        await client.delete(
+            collection_name=collection_name, points_selector=filter_condition
+        )
+        logger.info(f"Deleted {count} points")
+
+        return count
+
+    async def delete_replaced_documents(
+        self, site: str, ids_by_url: Dict[str, str], collection_name: Optional[str] = None
+    ) -> int:
+        """
+        Delete points of a site that have one of the given URLs but not the point ID derived
+        from the document ID given for it.
+
+        Args:
+            site: The site the documents belong to
+            ids_by_url: The current document ID of each URL
+            collection_name: Optional collection name (defaults to configured name)
+
+        Returns:
+            int: Number of documents deleted
+        """
+        collection_name = collection_name or self.default_collection_name
+        if not ids_by_url or not await self.collection_exists(collection_name):
+            return 0
+        client = await self._get_qdrant_client()
+
+        point_ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, str(doc_id))) for doc_id in ids_by_url.values()]
+        filter_condition = models.Filter(
+            must=[
+                models.FieldCondition(key="site", match=models.MatchValue(value=site)),
+                models.FieldCondition(key="url", match=models.MatchAny(any=list(ids_by_url))),
+            ],
+            must_not=[models.HasIdCondition(has_id=point_ids)],
+        )
+        count = (
+            await client.count(
+                collection_name=collection_name, count_filter=filter_condition
+            )
+        ).count
+        if count:
+            await client.delete(
+                collection_name=collection_name, points_selector=filter_condition
+            )
+            logger.info(f"Deleted {count} replaced points")
+
+        return count
+
     async def upload_documents(self, documents: List[Dict[str, Any]], 
                              collection_name: Optional[str] = None) -> int:
         """
@@ -410,9 +643,10 @@ class QdrantVectorClient:
                 if "embedding" not in doc or not doc["embedding"]:
                     continue
                     
-                # Generate a deterministic UUID from the document ID or URL
+                # Generate a deterministic UUID from the document ID or URL, unless the
+                # document was exported from another collection with its point ID
                 doc_id = doc.get("id", doc.get("url", str(uuid.uuid4())))
-                point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, str(doc_id)))
+                point_id = doc.get("point_id") or str(uuid.uuid5(uuid.NAMESPACE_URL, str(doc_id)))
                 
                 points.append(models.PointStruct(
                     id=point_id,
@@ -421,36 +655,21 @@ class QdrantVectorClient:
                         "url": doc.get("url"),
                         "name": doc.get("name"),
                         "site": doc.get("site"),
-                        "schema_json": doc.get("schema_json")
+                        "schema_json": doc.get("schema_json"),
+                        "ranking_text": doc.get("ranking_text") or ranking_text(doc.get("schema_json") or "{}"),
+                        "content_hash": doc.get("content_hash"),
                     }
                 ))
             
             if points:
-                # Upload in batches
-                batch_size = 100  # Smaller batch size for stability
-                total_uploaded = 0
-                
-                for i in range(0, len(points), batch_size):
-                    batch = points[i:i+batch_size]
-                    try:
-                        await client.upsert(collection_name=collection_name, points=batch)
-                        total_uploaded += len(batch)
-                        logger.info(f"Uploaded batch of {len(batch)} points (total: {total_uploaded})")
-                    except Exception as e:
-                        logger.error(f"Error uploading batch: {str(e)}")
-                        # Try to create the collection if it doesn't exist
-                        if "Collection not found" in str(e):
-                            logger.info(f"Collection '{collection_name}' not found during upload. Creating it...")
-                            await client.create_collection(
-                                collection_name=collection_name,
-                                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-                            )
-                            # Try upload again
-                            await client.upsert(collection_name=collection_name, points=batch)
-                            total_uploaded += len(batch)
-                            logger.info(f"Uploaded batch of {len(batch)} points after creating collection")
-                        else:
-                            raise
+                # Upload in batches, keeping a bounded number of upserts in flight
+                batch_size = max(1, self.endpoint_config.upsert_batch_size)
+                window = asyncio.Semaphore(max(1, self.endpoint_config.upsert_concurrency))
+                uploaded = await asyncio.gather(*(
+                    self._upsert_batch(client, collection_name, points[i:i+batch_size], vector_size, window)
+                    for i in range(0, len(points), batch_size)
+                ))
+                total_uploaded = sum(uploaded)
                 
                 logger.info(f"Successfully uploaded {total_uploaded} points to collection '{collection_name}'")
                 return total_uploaded
@@ -461,6 +680,25 @@ class QdrantVectorClient:
             logger.exception(f"Error uploading documents to collection '{collection_name}': {str(e)}")
             raise
     
+    async def _upsert_batch(self, client: AsyncQdrantClient, collection_name: str,
+                            batch: List[models.PointStruct], vector_size: int,
+                            window: asyncio.Semaphore) -> int:
+        """Upsert one batch of points once a slot in the in-flight window is free."""
+        async with window:
+            try:
+                await client.upsert(collection_name=collection_name, points=batch)
+            except Exception as e:
+                if "Collection not found" not in str(e) and "Not found" not in str(e):
+                    logger.error(f"Error uploading batch: {str(e)}")
+                    raise
+                # Deleted since it was last checked
+                logger.info(f"Collection '{collection_name}' not found during upload. Creating it...")
+                self._known_collections.discard(collection_name)
+                await self.ensure_collection_exists(collection_name, vector_size)
+                await client.upsert(collection_name=collection_name, points=batch)
+        logger.info(f"Uploaded batch of {len(batch)} points")
+        return len(batch)
+    
     def _create_site_filter(self, site: Union[str, List[str]]):
         """
         Create a Qdrant filter for site filtering.
@@ -485,15 +723,16 @@ class QdrantVectorClient:
             must=[models.FieldCondition(key="site", match=models.MatchAny(any=sites))]
         )
     
-    def _format_results(self, search_result: List[models.ScoredPoint]) -> List[List[str]]:
+    def _format_results(self, search_result: List[models.ScoredPoint]) -> List[RetrievedItem]:
         """
-        Format Qdrant search results to match expected API: [url, text_json, name, site].
+        Format Qdrant search results to match expected API: [url, text_json, name, site],
+        as RetrievedItems carrying the similarity score and the ranking text stored at ingestion.
         
         Args:
             search_result: Qdrant search results
             
         Returns:
-            List[List[str]]: Formatted results
+            List[RetrievedItem]: Formatted results
         """
         results = []
         for item in search_result:
@@ -503,7 +742,10 @@ class QdrantVectorClient:
             name = payload.get("name", "")
             site_name = payload.get("site", "")
 
-            results.append([url, schema, name, site_name])
+            result = RetrievedItem.from_result((url, schema, name, site_name), score=item.score)
+            # Collections loaded before ranking text was stored don't have it; it is computed when needed
+            result.ranking_text = payload.get("ranking_text")
+            results.append(result)
 
         return results
     
@@ -546,18 +788,17 @@ class QdrantVectorClient:
                 results = []
             else:
                 # Perform the search
-                search_result = (
-                    await client.search(
-                        collection_name=collection_name,
-                        query_vector=embedding,
-                        limit=num_results,
-                        query_filter=filter_condition,
-                        with_payload=True,
-                    )
+                response = await client.query_points(
+                    collection_name=collection_name,
+                    query=embedding,
+                    limit=num_results,
+                    query_filter=filter_condition,
+                    search_params=self._search_params(),
+                    with_payload=True,
                 )
                 
                 # Format the results
-                results = self._format_results(search_result)
+                results = self._format_results(response.points)
             
             retrieve_time = time.time() - start_retrieve
             
@@ -577,17 +818,12 @@ class QdrantVectorClient:
             
         except Exception as e:
             logger.exception(f"Error in Qdrant search: {str(e)}")
+            # The collection may have been deleted; check again next time
+            self._known_collections.discard(collection_name)
             
-            # Try fallback if we're using a URL endpoint and it fails
-            if self.api_endpoint and "Connection refused" in str(e):
+            # Try again on local storage if the Qdrant server of a URL endpoint is unreachable
+            if self._server_unreachable(e):
                 logger.info("Connection to Qdrant server failed, trying fallback")
-                # Create a new client with local path as fallback
-                self.api_endpoint = None  # Disable URL for fallback
-                
-                # Clear client cache to force recreation
-                with self._client_lock:
-                    self._qdrant_clients = {}
-                    
                 # Try search again with new local client
                 return await self.search(query, site, num_results, collection_name, query_params)
             
@@ -603,6 +839,76 @@ class QdrantVectorClient:
             )
             raise
     
+    async def search_many(self, queries: List[str], site: Union[str, List[str]],
+                          num_results: int = 50, embeddings: Optional[List[List[float]]] = None,
+                          collection_name: Optional[str] = None,
+                          query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[RetrievedItem]]:
+        """
+        Search for several queries at once: the queries are embedded in one batch (unless
+        their embeddings are given), and searched in a single Qdrant request.
+        
+        Args:
+            queries: The search queries
+            site: Site to filter by (string or list of strings), the same for all queries
+            num_results: Maximum number of results to return per query
+            embeddings: Optional embeddings of the queries, in the same order
+            collection_name: Optional collection name (defaults to configured name)
+            query_params: Additional query parameters
+            
+        Returns:
+            List[List[RetrievedItem]]: The results of each query, in the order of queries
+        """
+        if not queries:
+            return []
+        start_embed = time.time()
+        if embeddings is None:
+            embeddings = await batch_get_embeddings(queries, query_params=query_params)
+        embed_time = time.time() - start_embed
+        
+        start_retrieve = time.time()
+        results = await self.search_vectors_batch(embeddings, site, num_results, collection_name)
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Qdrant batch search completed",
+            {
+                "queries": len(queries),
+                "embedding_time": f"{embed_time:.2f}s",
+                "retrieval_time": f"{time.time() - start_retrieve:.2f}s",
+                "results_count": sum(len(r) for r in results),
+            }
+        )
+        return results
+    
+    async def search_vectors_batch(self, vectors: List[List[float]], site: Union[str, List[str]],
+                                   num_results: int = 50,
+                                   collection_name: Optional[str] = None) -> List[List[RetrievedItem]]:
+        """
+        Search for several query embeddings in one round-trip.
+        
+        Returns:
+            List[List[RetrievedItem]]: The results for each vector, in order
+        """
+        collection_name = collection_name or self.default_collection_name
+        if not vectors:
+            return []
+        client = await self._get_qdrant_client()
+        if not await self.ensure_collection_exists(collection_name, len(vectors[0])):
+            logger.info(f"Collection '{collection_name}' was just created. Returning empty results.")
+            return [[] for _ in vectors]
+        
+        filter_condition = self._create_site_filter(site)
+        requests = [
+            models.QueryRequest(query=vector, filter=filter_condition, params=self._search_params(),
+                                limit=num_results, with_payload=True)
+            for vector in vectors
+        ]
+        try:
+            responses = await client.query_batch_points(collection_name=collection_name, requests=requests)
+        except Exception:
+            self._known_collections.discard(collection_name)
+            raise
+        return [self._format_results(response.points) for response in responses]
+    
     async def search_by_url(self, url: str, collection_name: Optional[str] = None) -> Optional[List[str]]:
         """
         Retrieve a specific item by URL from Qdrant database.
@@ -659,16 +965,9 @@ class QdrantVectorClient:
         except Exception as e:
             logger.exception(f"Error retrieving item with URL: {url}")
             
-            # Try fallback if we're using a URL endpoint and it fails
-            if self.api_endpoint and "Connection refused" in str(e):
+            # Try again on local storage if the Qdrant server of a URL endpoint is unreachable
+            if self._server_unreachable(e):
                 logger.info("Connection to Qdrant server failed, trying fallback")
-                # Create a new client with local path as fallback
-                self.api_endpoint = None  # Disable URL for fallback
-                
-                # Clear client cache to force recreation
-                with self._client_lock:
-                    self._qdrant_clients = {}
-                    
                 # Try search again with new local client
                 return await self.search_by_url(url, collection_name)
             
@@ -719,7 +1018,7 @@ class QdrantVectorClient:
             client = await self._get_qdrant_client()
             
             # Check if collection exists
-            if not await client.collection_exists(collection_name):
+            if not await self.collection_exists(collection_name):
                 logger.warning(f"Collection '{collection_name}' does not exist")
                 return []
             
@@ -757,16 +1056,9 @@ class QdrantVectorClient:
         except Exception as e:
             logger.exception(f"Error retrieving sites from collection '{collection_name}': {str(e)}")
             
-            # Try fallback if we're using a URL endpoint and it fails
-            if self.api_endpoint and "Connection refused" in str(e):
+            # Try again on local storage if the Qdrant server of a URL endpoint is unreachable
+            if self._server_unreachable(e):
                 logger.info("Connection to Qdrant server failed, trying fallback")
-                # Create a new client with local path as fallback
-                self.api_endpoint = None  # Disable URL for fallback
-                
-                # Clear client cache to force recreation
-                with self._client_lock:
-                    self._qdrant_clients = {}
-                    
                 # Try get_sites again with new local client
                 return await self.get_sites(collection_name)
             
@@ -779,4 +1071,53 @@ class QdrantVectorClient:
                     "collection": collection_name,
                 }
             )
-            raise
\ No newline at end of file
+            raise
+
+    async def export_documents(self, site: str, batch_size: int = 100,
+                               collection_name: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Read back all points of a site, with their vectors, in the format upload_documents takes.
+        Each document keeps its point ID (as point_id), so uploading it elsewhere and then
+        re-loading the site there updates the same points.
+        
+        Args:
+            site: The site to export
+            batch_size: Points per batch
+            collection_name: Optional collection name (defaults to configured name)
+            
+        Yields:
+            Batches of documents
+        """
+        collection_name = collection_name or self.default_collection_name
+        if not await self.collection_exists(collection_name):
+            return
+        client = await self._get_qdrant_client()
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=collection_name,
+                scroll_filter=self._create_site_filter(site),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                yield [{
+                    "id": point.payload.get("url"),
+                    "point_id": str(point.id),
+                    "url": point.payload.get("url"),
+                    "name": point.payload.get("name"),
+                    "site": point.payload.get("site"),
+                    "schema_json": point.payload.get("schema_json"),
+                    "ranking_text": point.payload.get("ranking_text"),
+                    "content_hash": point.payload.get("content_hash"),
+                    "embedding": list(point.vector),
+                } for point in points]
+            if offset is None:
+                break
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Whether an error means the Qdrant server could not be reached at all."""
+    return isinstance(error, (ResponseHandlingException, ConnectionError)) or "Connection refused" in str(error)
@@ -15,16 +15,18 @@ Main scripts:
   Usage: python -m code.scraping.crawlAndLoadSite <domain>
 """
 
-from .urlsFromSitemap import extract_urls_from_sitemap, process_site_or_sitemap, get_sitemaps_from_robots
+from .urlsFromSitemap import extract_urls_from_sitemap, iter_sitemap_urls, process_site_or_sitemap, get_sitemaps_from_robots
 from .expBackOffCrawl import SimpleCrawler
-from .extractMarkup import process_directory, extract_schema_markup, extract_canonical_url
+from .extractMarkup import process_directory, extract_markup, extract_schema_markup, extract_canonical_url
 
 __all__ = [
     'extract_urls_from_sitemap',
+    'iter_sitemap_urls',
     'process_site_or_sitemap',
     'get_sitemaps_from_robots',
     'SimpleCrawler',
     'process_directory',
+    'extract_markup',
     'extract_schema_markup',
     'extract_canonical_url'
 ]
\ No newline at end of file
@@ -1,63 +1,169 @@
+"""
+Extract schema.org JSON-LD markup and canonical URLs from saved HTML pages.
+
+Pages are parsed with selectolax's HTML5 parser when it is installed (pip install selectolax),
+and otherwise scanned with a tokenizer that reads start tags without building a DOM, skipping
+comments and the contents of scripts and styles. BeautifulSoup, the original full DOM parser,
+remains available as parser="dom"; benchmark/run_markup_benchmark.py compares the three.
+"""
+
+import html
 import json
+import re
 import sys
 import os
 
-# Try to import BeautifulSoup, install if not available
 try:
-    from bs4 import BeautifulSoup
+    from selectolax.lexbor import LexborHTMLParser
 except ImportError:
-    print("BeautifulSoup4 not found. Installing...")
-    import subprocess
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "beautifulsoup4"])
-        from bs4 import BeautifulSoup
-        print("BeautifulSoup4 installed successfully!")
-    except Exception as e:
-        print(f"Error installing BeautifulSoup4: {e}")
-        print("Please install manually with: pip install beautifulsoup4")
-        sys.exit(1)
+    LexborHTMLParser = None
 
-def extract_schema_markup(html_file):
-    # Read the HTML file
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    # Parse HTML with BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Find all script tags with type "application/ld+json"
-    schema_tags = soup.find_all('script', type='application/ld+json')
-    
+# The fastest parser available, used unless another is asked for
+DEFAULT_PARSER = "selectolax" if LexborHTMLParser is not None else "tokenizer"
+
+_BeautifulSoup = None
+
+
+def _beautiful_soup():
+    """BeautifulSoup, installed if not available."""
+    global _BeautifulSoup
+    if _BeautifulSoup is None:
+        try:
+            from bs4 import BeautifulSoup
+        except ImportError:
+            print("BeautifulSoup4 not found. Installing...")
+            import subprocess
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", "beautifulsoup4"])
+                from bs4 import BeautifulSoup
+                print("BeautifulSoup4 installed successfully!")
+            except Exception as e:
+                print(f"Error installing BeautifulSoup4: {e}")
+                print("Please install manually with: pip install beautifulsoup4")
+                sys.exit(1)
+        _BeautifulSoup = BeautifulSoup
+    return _BeautifulSoup
+
+
+# Comments and start tags. Every start tag is matched, so that markup quoted in attribute values is skipped
+_TAG_RE = re.compile(r'<!--|<([a-zA-Z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+_ATTR_RE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_END_TAG_RES = {name: re.compile(f'</{name}', re.IGNORECASE) for name in ("script", "style", "textarea", "title")}
+
+
+def _attributes(text):
+    attrs = {}
+    for name, double_quoted, single_quoted, unquoted in _ATTR_RE.findall(text):
+        # As in browsers, the first of repeated attributes wins
+        attrs.setdefault(name.lower(), html.unescape(double_quoted or single_quoted or unquoted))
+    return attrs
+
+
+def _is_json_ld(script_type):
+    return script_type is not None and script_type.strip().lower() == "application/ld+json"
+
+
+def _is_canonical(rel):
+    return rel is not None and "canonical" in rel.lower().split()
+
+
+def _scan_tokens(html_content):
+    """Find the canonical URL and JSON-LD blocks by tokenizing start tags, without building a DOM."""
+    canonical_url, canonical_found = None, False
+    blocks = []
+    pos = 0
+    while True:
+        match = _TAG_RE.search(html_content, pos)
+        if match is None:
+            break
+        if match.group(1) is None:
+            # A comment; an unterminated one runs to the end of the page
+            end = html_content.find('-->', match.end())
+            if end < 0:
+                break
+            pos = end + 3
+            continue
+        name = match.group(1).lower()
+        pos = match.end()
+        if name != 'link' and name not in _END_TAG_RES:
+            continue
+        attrs = _attributes(match.group(2))
+        if name == 'link':
+            if not canonical_found and _is_canonical(attrs.get('rel')):
+                canonical_url, canonical_found = attrs.get('href'), True
+            continue
+        # Skip the element's text, in which tags are not markup
+        end_match = _END_TAG_RES[name].search(html_content, pos)
+        end = end_match.start() if end_match else len(html_content)
+        if name == 'script' and _is_json_ld(attrs.get('type')):
+            blocks.append(html_content[pos:end])
+        pos = end
+    return canonical_url, blocks
+
+
+def _scan_selectolax(html_content):
+    """Find the canonical URL and JSON-LD blocks with selectolax's lexbor parser."""
+    if LexborHTMLParser is None:
+        raise ImportError("selectolax is not installed; install it with: pip install selectolax")
+    tree = LexborHTMLParser(html_content)
+    blocks = [node.text(deep=True) for node in tree.css('script') if _is_json_ld(node.attributes.get('type'))]
+    canonical_url = None
+    for node in tree.css('link'):
+        if _is_canonical(node.attributes.get('rel')):
+            canonical_url = node.attributes.get('href')
+            break
+    return canonical_url, blocks
+
+
+def _scan_dom(html_content):
+    """Find the canonical URL and JSON-LD blocks in a full BeautifulSoup DOM."""
+    soup = _beautiful_soup()(html_content, 'html.parser')
+    blocks = [tag.string or '' for tag in soup.find_all('script', type='application/ld+json')]
+    canonical_tag = soup.find('link', {'rel': 'canonical'})
+    canonical_url = canonical_tag['href'] if canonical_tag and 'href' in canonical_tag.attrs else None
+    return canonical_url, blocks
+
+
+_SCANNERS = {"selectolax": _scan_selectolax, "tokenizer": _scan_tokens, "dom": _scan_dom}
+
+
+def extract_markup(html_content, parser=None):
+    """
+    Extract the canonical URL and schema.org JSON-LD markup of a page.
+
+    Args:
+        html_content: The page's HTML
+        parser: "selectolax", "tokenizer" or "dom" (default: the fastest available)
+
+    Returns:
+        (canonical URL or None, the page's schemas as a single line JSON list)
+    """
+    canonical_url, blocks = _SCANNERS[parser or DEFAULT_PARSER](html_content)
     schemas = []
-    for tag in schema_tags:
+    for block in blocks:
         try:
             # Parse JSON content
-            schema = json.loads(tag.string)
-            schemas.append(schema)
+            schemas.append(json.loads(block))
         except json.JSONDecodeError as e:
-            print(f"Error parsing schema JSON: {e}, tag content: {tag.string}")
+            print(f"Error parsing schema JSON: {e}, tag content: {block}")
             continue
     # Convert schemas list to a single line string
-    schema_str = json.dumps(schemas, separators=(',', ':'))
-    return schema_str
+    return canonical_url, json.dumps(schemas, separators=(',', ':'))
 
-def extract_canonical_url(html_file):
-    # Read the HTML file
+
+def extract_markup_from_file(html_file, parser=None):
+    """extract_markup() for a saved HTML file."""
     with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    # Parse HTML with BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Find canonical link tag
-    canonical_tag = soup.find('link', {'rel': 'canonical'})
-    
-    if canonical_tag and 'href' in canonical_tag.attrs:
-        return canonical_tag['href']
-    
-    # If no canonical tag found, return None
-    return None
+        return extract_markup(f.read(), parser)
+
+
+def extract_schema_markup(html_file):
+    return extract_markup_from_file(html_file)[1]
+
 
+def extract_canonical_url(html_file):
+    # If no canonical tag found, returns None
+    return extract_markup_from_file(html_file)[0]
 
 
 def get_files_in_directory(directory):
@@ -88,8 +194,7 @@ def process_directory(directory):
         for html_file in files:
             try:
                 # Extract canonical URL and schemas
-                canonical_url = extract_canonical_url(html_file)
-                schemas = extract_schema_markup(html_file)
+                canonical_url, schemas = extract_markup_from_file(html_file)
                 
                 # Skip if no canonical URL found
                 if not canonical_url:
@@ -1,12 +1,21 @@
 #!/usr/bin/env python3
 """
 Incremental website crawler with schema markup extraction and database loading.
-This script crawls URLs one by one, maintaining state to allow resumption.
+
+URLs are fetched concurrently, within a global limit and a per-host limit, and politely:
+robots.txt is obeyed, and requests to a host are spaced by its Crawl-delay (or --delay).
+Pages are fetched with conditional GETs (ETag / Last-Modified), so that unchanged pages are
+not downloaded or processed again. The schema markup extracted from pages is embedded and
+uploaded in batches by a separate stage, concurrently with the crawl.
+
+Crawl state is appended to crawl_status.jsonl as it changes, one JSON record per line, so
+that an interrupted crawl can be resumed. The log is compacted when it is loaded.
 
 Usage - run this from the 'python' directory:
     python -m scraping.incrementalCrawlAndLoad example.com
     python -m scraping.incrementalCrawlAndLoad example.com --max-pages 100
-    python -m scraping.incrementalCrawlAndLoad example.com --resume
+    python -m scraping.incrementalCrawlAndLoad example.com --concurrency 32 --per-host 4
+    python -m scraping.incrementalCrawlAndLoad example.com --refresh
 """
 
 import os
@@ -18,13 +27,14 @@ import asyncio
 import aiohttp
 from datetime import datetime
 from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
 import hashlib
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import logging
 
 # Import local scraping modules
 from .urlsFromSitemap import process_site_or_sitemap
-from .extractMarkup import extract_schema_markup, extract_canonical_url
+from .extractMarkup import extract_markup, extract_markup_from_file
 
 # Import database and embedding modules
 from data_loading.db_load_utils import prepare_documents_from_json
@@ -45,30 +55,134 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("azure").setLevel(logging.WARNING)
 logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
 
+USER_AGENT = "NLWebCrawler/1.0"
+
+# Responses worth retrying, after the Retry-After delay if the server gives one
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Marks the end of the pages sent to the upload stage
+_DONE = object()
+
+
+class CrawlStateLog:
+    """
+    Crawl state per URL hash, persisted as an append-only log of JSON records. Each record
+    updates the fields of one URL's state, so the latest value of each field wins on replay.
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.state: Dict[str, Dict[str, Any]] = {}
+        records = self._replay()
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            # Carry over the state of crawls made before the log existed
+            try:
+                with open(legacy_path, 'r') as f:
+                    self.state = json.load(f)
+                logger.info(f"Imported the state of {len(self.state)} URLs from {legacy_path}")
+            except Exception as e:
+                logger.warning(f"Error loading status file {legacy_path}: {e}. Starting fresh.")
+        if not os.path.exists(path) or records > 2 * len(self.state) + 1000:
+            self.compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _replay(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        records = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A record cut short by an interrupted crawl
+                    continue
+                records += 1
+                self.state.setdefault(record.pop("hash"), {}).update(record)
+        return records
+
+    def compact(self):
+        """Rewrite the log with one record per URL."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for url_hash, entry in self.state.items():
+                f.write(json.dumps({"hash": url_hash, **entry}) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def get(self, url_hash: str) -> Dict[str, Any]:
+        return self.state.get(url_hash, {})
+
+    def update(self, url_hash: str, **fields):
+        """Update a URL's state, appending the change to the log."""
+        self.state.setdefault(url_hash, {}).update(fields)
+        self._file.write(json.dumps({"hash": url_hash, **fields}) + "\n")
+        self._file.flush()
+
+    def clear(self):
+        self.state = {}
+        self._file.close()
+        self.compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        self._file.close()
+
+
+class HostPolicy:
+    """What a crawler may fetch from one host, and when: its robots.txt rules and request spacing."""
+
+    def __init__(self, min_delay: float):
+        self.robots: Optional[RobotFileParser] = None
+        self.min_delay = min_delay
+        self.delay = min_delay
+        self.next_request_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait_turn(self):
+        """Wait until the host's delay since the previous request has passed."""
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_request_at > now:
+                await asyncio.sleep(self.next_request_at - now)
+            self.next_request_at = time.monotonic() + self.delay
+
 
 class IncrementalCrawler:
-    """Incremental crawler that maintains state and processes URLs one by one."""
-    
-    def __init__(self, domain: str, output_dir: str, db_name: str, max_retries: int = 3, database: str = None, reprocess_mode: bool = False):
+    """Incremental crawler that maintains state and processes URLs concurrently."""
+
+    def __init__(self, domain: str, output_dir: str, db_name: str, max_retries: int = 3, database: str = None,
+                 reprocess_mode: bool = False, concurrency: int = 16, per_host: int = 4, delay: float = 0.0,
+                 upload_batch_size: int = 100, upload_concurrency: int = 2, refresh: bool = False,
+                 user_agent: str = USER_AGENT, timeout: float = 30.0):
         self.domain = domain
         self.output_dir = output_dir
         self.db_name = db_name
         self.max_retries = max_retries
         self.database = database  # Specific retrieval backend to use
         self.reprocess_mode = reprocess_mode  # Whether to reprocess existing files
-        
+        self.refresh = refresh  # Whether to revisit uploaded pages, skipping the unchanged ones
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.upload_batch_size = upload_batch_size
+        self.upload_concurrency = upload_concurrency
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.flush_interval = 2.0  # Seconds a partial upload batch waits for more pages
+
         # Set up directories
         self.urls_dir = os.path.join(output_dir, "urls")
         self.html_dir = os.path.join(output_dir, "html")
-        self.status_file = os.path.join(output_dir, "crawl_status.json")
-        
+        self.status_file = os.path.join(output_dir, "crawl_status.jsonl")
+
         # Create directories
         os.makedirs(self.urls_dir, exist_ok=True)
         os.makedirs(self.html_dir, exist_ok=True)
-        
+
         # Load or initialize status
-        self.status = self._load_status()
-        
+        self.status = CrawlStateLog(self.status_file, legacy_path=os.path.join(output_dir, "crawl_status.json"))
+        self.hosts: Dict[str, HostPolicy] = {}
+
         # Statistics
         self.stats = {
             "total_urls": 0,
@@ -77,36 +191,19 @@ class IncrementalCrawler:
             "failed": 0,
             "skipped": 0,
             "already_crawled": 0,
+            "not_modified": 0,
+            "disallowed": 0,
             "reprocessed": 0,
             "total_json_size": 0,
             "total_schemas": 0,
             "total_documents_uploaded": 0,
             "schema_types": {}  # Count of each @type found
         }
-        
-    def _load_status(self) -> Dict[str, Dict]:
-        """Load crawl status from file or create new one."""
-        if os.path.exists(self.status_file):
-            try:
-                with open(self.status_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Error loading status file: {e}. Starting fresh.")
-                return {}
-        return {}
-    
-    def _save_status(self):
-        """Save current status to file."""
-        try:
-            with open(self.status_file, 'w') as f:
-                json.dump(self.status, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving status file: {e}")
-    
+
     def _get_url_hash(self, url: str) -> str:
         """Generate a unique hash for a URL."""
         return hashlib.md5(url.encode()).hexdigest()
-    
+
     def _get_html_filename(self, url: str) -> str:
         """Generate filename for saving HTML content."""
         url_hash = self._get_url_hash(url)
@@ -119,11 +216,11 @@ class IncrementalCrawler:
         # Remove problematic characters
         path = "".join(c for c in path if c.isalnum() or c in ('_', '-', '.'))
         return f"{url_hash}_{path}.html"
-    
+
     def _extract_schema_types(self, schema_obj):
         """Recursively extract @type values from schema objects."""
         types = []
-        
+
         if isinstance(schema_obj, dict):
             # Check for @type at current level
             if '@type' in schema_obj:
@@ -132,19 +229,19 @@ class IncrementalCrawler:
                     types.extend(schema_type)
                 else:
                     types.append(schema_type)
-            
+
             # Recursively check all values
             for key, value in schema_obj.items():
                 if isinstance(value, (dict, list)):
                     types.extend(self._extract_schema_types(value))
-                    
+
         elif isinstance(schema_obj, list):
             # Process each item in the list
             for item in schema_obj:
                 types.extend(self._extract_schema_types(item))
-                
+
         return types
-    
+
     def _print_status(self):
         """Print current crawl status on a single line."""
         processed = self.stats["processed"]
@@ -156,12 +253,12 @@ class IncrementalCrawler:
         total_json_kb = self.stats["total_json_size"] / 1024
         total_schemas = self.stats["total_schemas"]
         total_docs = self.stats["total_documents_uploaded"]
-        
+
         if total > 0:
             progress_pct = (processed / total) * 100
         else:
             progress_pct = 0
-            
+
         if self.reprocess_mode:
             status_line = (
                 f"\rProgress: {processed}/{total} ({progress_pct:.1f}%) | "
@@ -174,119 +271,177 @@ class IncrementalCrawler:
             status_line = (
                 f"\rProgress: {processed}/{total} ({progress_pct:.1f}%) | "
                 f"Success: {successful} | Failed: {failed} | "
-                f"Already crawled: {already_crawled} | "
+                f"Already crawled: {already_crawled} | Unchanged: {self.stats['not_modified']} | "
+                f"Disallowed: {self.stats['disallowed']} | "
                 f"JSON: {total_json_kb:.1f}KB | Schemas: {total_schemas} | "
                 f"Docs uploaded: {total_docs}"
             )
-        
+
         # Add top schema types to status line
         if self.stats["schema_types"]:
             # Get top 3 types by count
             sorted_types = sorted(self.stats["schema_types"].items(), key=lambda x: -x[1])[:3]
             types_str = ", ".join([f"{t}:{c}" for t, c in sorted_types])
             status_line += f" | Types: {types_str}"
-        
+
         # Print without newline and flush
         print(status_line, end='', flush=True)
-    
-    async def _fetch_page(self, url: str) -> Optional[Tuple[str, int]]:
-        """Fetch a single page and return HTML content and size."""
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(self.max_retries):
-                try:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            return html, len(html.encode('utf-8'))
-                        else:
-                            logger.debug(f"HTTP {response.status} for {url}")
-                            if attempt == self.max_retries - 1:
-                                return None
-                except Exception as e:
-                    logger.debug(f"Error fetching {url} (attempt {attempt + 1}): {e}")
-                    if attempt == self.max_retries - 1:
-                        return None
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-        return None
-    
-    def _html_file_exists(self, url: str) -> Tuple[bool, Optional[str]]:
-        """Check if HTML file for URL already exists."""
-        filename = self._get_html_filename(url)
-        filepath = os.path.join(self.html_dir, filename)
-        if os.path.exists(filepath):
-            return True, filepath
-        return False, None
-    
-    async def _process_single_url(self, url: str) -> bool:
-        """Process a single URL: fetch, extract, embed, and upload."""
+
+    # Politeness
+
+    async def _host_policy(self, session: aiohttp.ClientSession, url: str) -> HostPolicy:
+        """The policy of a URL's host, fetching its robots.txt the first time."""
+        parsed = urlparse(url)
+        host = f"{parsed.scheme}://{parsed.netloc}"
+        policy = self.hosts.setdefault(host, HostPolicy(self.delay))
+        async with policy.lock:
+            if policy.robots is None:
+                policy.robots = await self._fetch_robots(session, host)
+                crawl_delay = policy.robots.crawl_delay(self.user_agent)
+                if crawl_delay:
+                    policy.delay = max(policy.min_delay, float(crawl_delay))
+                    logger.info(f"{host} asks for {policy.delay}s between requests")
+        return policy
+
+    async def _fetch_robots(self, session: aiohttp.ClientSession, host: str) -> RobotFileParser:
+        """
+        Fetch and parse a host's robots.txt. As in RFC 9309, a missing robots.txt (4xx)
+        allows everything, and an unreachable one (5xx or network errors) allows nothing.
+        """
+        robots = RobotFileParser(f"{host}/robots.txt")
+        try:
+            async with session.get(f"{host}/robots.txt", timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status >= 500:
+                    logger.warning(f"robots.txt of {host} returned HTTP {response.status}, not crawling the host")
+                    robots.disallow_all = True
+                elif response.status >= 400:
+                    robots.allow_all = True
+                else:
+                    body = await response.read()
+                    robots.parse(body.decode('utf-8', errors='replace').splitlines())
+        except Exception as e:
+            logger.warning(f"Could not fetch robots.txt of {host} ({e}), not crawling the host")
+            robots.disallow_all = True
+        return robots
+
+    # Fetching
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str,
+                          previous: Dict[str, Any]) -> Tuple[int, Optional[str], Dict[str, str]]:
+        """
+        Fetch a page, conditionally on the validators stored for it.
+
+        Returns:
+            (HTTP status, HTML or None, validators to store), with status 0 for network errors
+        """
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        policy = await self._host_policy(session, url)
+        status = 0
+        for attempt in range(self.max_retries):
+            await policy.wait_turn()
+            retry_after = None
+            try:
+                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    status = response.status
+                    if status == 200:
+                        body = await response.read()
+                        html = body.decode(response.charset or 'utf-8', errors='replace')
+                        validators = {"etag": response.headers.get("ETag"),
+                                      "last_modified": response.headers.get("Last-Modified")}
+                        return status, html, validators
+                    if status == 304:
+                        return status, None, {}
+                    logger.debug(f"HTTP {status} for {url}")
+                    if status not in RETRY_STATUSES:
+                        return status, None, {}
+                    retry_after = response.headers.get("Retry-After")
+            except Exception as e:
+                logger.debug(f"Error fetching {url} (attempt {attempt + 1}): {e}")
+                status = 0
+            if attempt < self.max_retries - 1:
+                delay = 2 ** attempt  # Exponential backoff
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                await asyncio.sleep(delay)
+        return status, None, {}
+
+    def _store_and_extract(self, url: str, html: Optional[str], html_filepath: str) -> Tuple[str, str]:
+        """Save a fetched page (unless it is already on disk) and extract its canonical URL and schemas."""
+        if html is not None:
+            with open(html_filepath, 'w', encoding='utf-8') as f:
+                f.write(html)
+            canonical_url, schemas_str = extract_markup(html)
+        else:
+            canonical_url, schemas_str = extract_markup_from_file(html_filepath)
+        # Use canonical URL if found, otherwise use original URL
+        return canonical_url or url, schemas_str
+
+    async def _process_single_url(self, session: Optional[aiohttp.ClientSession], url: str,
+                                  upload_queue: asyncio.Queue) -> bool:
+        """Process a single URL: fetch and extract, and queue its documents for upload."""
         url_hash = self._get_url_hash(url)
-        
-        # Check if HTML file already exists (page already crawled)
-        file_exists, html_filepath = self._html_file_exists(url)
-        
-        if file_exists:
-            # Check if it's been fully processed
-            if url_hash in self.status and self.status[url_hash].get("uploaded", False) and not self.reprocess_mode:
-                self.stats["already_crawled"] += 1
+        previous = self.status.get(url_hash)
+        html_filepath = os.path.join(self.html_dir, self._get_html_filename(url))
+        file_exists = os.path.exists(html_filepath)
+
+        if self.reprocess_mode:
+            if not file_exists:
+                # In reprocess mode, skip URLs without existing HTML
+                logger.debug(f"No HTML file for {url} in reprocess mode, skipping")
+                self.stats["skipped"] += 1
                 return True
-            else:
-                # HTML exists but not fully processed, or we're in reprocess mode
-                if self.reprocess_mode:
-                    logger.debug(f"Reprocessing existing HTML for {url}")
-                    self.stats["reprocessed"] += 1
-                else:
-                    logger.debug(f"HTML exists for {url}, continuing with processing")
-        
-        # Initialize or update status entry
-        if url_hash not in self.status:
-            self.status[url_hash] = {
-                "url": url,
-                "started_at": datetime.now().isoformat(),
-                "completed": False,
-                "uploaded": False
-            }
-        
+            self.stats["reprocessed"] += 1
+        elif previous.get("uploaded") and file_exists and not self.refresh:
+            self.stats["already_crawled"] += 1
+            return True
+
+        if not previous:
+            self.status.update(url_hash, url=url, started_at=datetime.now().isoformat(),
+                               completed=False, uploaded=False)
+
         try:
-            # Step 1: Fetch the page if not already downloaded
-            if not file_exists:
-                if self.reprocess_mode:
-                    # In reprocess mode, skip URLs without existing HTML
-                    logger.debug(f"No HTML file for {url} in reprocess mode, skipping")
-                    self.stats["skipped"] += 1
+            html = None
+            if not self.reprocess_mode and (self.refresh or not file_exists):
+                policy = await self._host_policy(session, url)
+                if not policy.robots.can_fetch(self.user_agent, url):
+                    logger.debug(f"robots.txt disallows {url}")
+                    self.status.update(url_hash, error="Disallowed by robots.txt", completed_at=datetime.now().isoformat())
+                    self.stats["disallowed"] += 1
+                    return False
+
+                # Only send validators for pages we still have
+                status, html, validators = await self._fetch_page(session, url, previous if file_exists else {})
+                if status == 304:
+                    self.status.update(url_hash, checked_at=datetime.now().isoformat())
+                    self.stats["not_modified"] += 1
                     return True
-                    
-                result = await self._fetch_page(url)
-                if result is None:
-                    self.status[url_hash]["error"] = "Failed to fetch page"
-                    self.status[url_hash]["completed_at"] = datetime.now().isoformat()
-                    self._save_status()
+                if html is None:
+                    self.status.update(url_hash, error=f"Failed to fetch page (HTTP {status})" if status else "Failed to fetch page",
+                                       completed_at=datetime.now().isoformat())
                     self.stats["failed"] += 1
                     return False
-                
-                html_content, page_size = result
-                self.status[url_hash]["page_size"] = page_size
-                self.status[url_hash]["fetched_at"] = datetime.now().isoformat()
-                
-                # Save HTML to file
-                filename = self._get_html_filename(url)
-                html_filepath = os.path.join(self.html_dir, filename)
-                with open(html_filepath, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                self.status[url_hash]["html_file"] = filename
-                self._save_status()
+
+                content_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+                if file_exists and previous.get("uploaded") and previous.get("content_hash") == content_hash:
+                    # The server doesn't support conditional requests, but the page is unchanged
+                    self.status.update(url_hash, checked_at=datetime.now().isoformat(), **validators)
+                    self.stats["not_modified"] += 1
+                    return True
+                self.status.update(url_hash, page_size=len(html.encode('utf-8')), fetched_at=datetime.now().isoformat(),
+                                   html_file=os.path.basename(html_filepath), content_hash=content_hash,
+                                   uploaded=False, error=None, **validators)
             else:
-                # Read existing file size
-                self.status[url_hash]["page_size"] = os.path.getsize(html_filepath)
-                self.status[url_hash]["html_file"] = os.path.basename(html_filepath)
-            
-            # Step 2: Extract schema markup from saved file
-            canonical_url = extract_canonical_url(html_filepath)
-            schemas_str = extract_schema_markup(html_filepath)
-            
-            # Use canonical URL if found, otherwise use original URL
-            final_url = canonical_url or url
-            
+                self.status.update(url_hash, page_size=os.path.getsize(html_filepath),
+                                   html_file=os.path.basename(html_filepath))
+
+            # Parsing is CPU-bound, so it runs off the event loop
+            final_url, schemas_str = await asyncio.to_thread(self._store_and_extract, url, html, html_filepath)
+
             # Parse schemas
             schemas = []
             if schemas_str:
@@ -295,115 +450,152 @@ class IncrementalCrawler:
                     logger.debug(f"Extracted {len(schemas)} schemas from {url}")
                 except json.JSONDecodeError:
                     logger.error(f"Failed to parse schemas for {url}")
-            
+
             if not schemas:
                 logger.debug(f"No schemas found for {url}, skipping upload")
-                self.status[url_hash]["json_size"] = 0
-                self.status[url_hash]["schema_count"] = 0
-                self.status[url_hash]["completed"] = True
-                self.status[url_hash]["uploaded"] = True
-                self.status[url_hash]["completed_at"] = datetime.now().isoformat()
-                self._save_status()
+                self.status.update(url_hash, json_size=0, schema_count=0, completed=True, uploaded=True,
+                                   completed_at=datetime.now().isoformat())
                 self.stats["successful"] += 1
                 return True
-            
 
-            logger.debug(f"Processing {len(schemas)} schemas from {url}")
-            
             # Process schemas and prepare for upload
             total_json_size = len(schemas_str.encode('utf-8'))
-            self.status[url_hash]["json_size"] = total_json_size
-            self.status[url_hash]["schema_count"] = len(schemas)
-            
+            self.status.update(url_hash, json_size=total_json_size, schema_count=len(schemas))
+
             # Update global statistics
             self.stats["total_json_size"] += total_json_size
             self.stats["total_schemas"] += len(schemas)
-            
+
             # Extract and count @type values
             for schema in schemas:
-                types_found = self._extract_schema_types(schema)
-                for schema_type in types_found:
-                    if schema_type in self.stats["schema_types"]:
-                        self.stats["schema_types"][schema_type] += 1
-                    else:
-                        self.stats["schema_types"][schema_type] = 1
-            
-            # Step 3: Prepare documents for database
-            documents_to_upload = []
-                
-            # Log successful upload
-            logger.debug(f"Preparing {len(schemas)} schemas for upload from {url}")
-            docs, _ = prepare_documents_from_json(final_url, schemas_str, self.db_name)
-            documents_to_upload.extend(docs)
-            # Log successful upload
-            logger.debug(f"Prepared {len(documents_to_upload)} documents from {url}")
-            
-            # Step 4: Generate embeddings and upload
-            if documents_to_upload:
-                # Get embedding provider
-                provider = CONFIG.preferred_embedding_provider
-                provider_config = CONFIG.get_embedding_provider(provider)
-                model = provider_config.model if provider_config else None
-                
-                # Extract texts for embedding
-                texts = [doc["schema_json"] for doc in documents_to_upload]
-                
-                # Generate embeddings
-                embeddings = await batch_get_embeddings(texts, provider, model)
-                
-                # Add embeddings to documents
-                for i, doc in enumerate(documents_to_upload):
-                    if i < len(embeddings):
-                        doc["embedding"] = embeddings[i]
-                
-                # Upload to database
-                # Use specified database or default
-                query_params = {"db": [self.database]} if self.database else None
-                await upload_documents(documents_to_upload, query_params=query_params)
-                
-                # Log successful upload
-                logger.debug(f"Uploaded {len(documents_to_upload)} documents from {url}")
-                
-                self.status[url_hash]["uploaded_at"] = datetime.now().isoformat()
-                self.status[url_hash]["documents_uploaded"] = len(documents_to_upload)
-                
-                # Update global statistics
-                self.stats["total_documents_uploaded"] += len(documents_to_upload)
-            
-            # Mark as completed
-            self.status[url_hash]["completed"] = True
-            self.status[url_hash]["uploaded"] = True
-            self.status[url_hash]["completed_at"] = datetime.now().isoformat()
-            self._save_status()
-            self.stats["successful"] += 1
+                for schema_type in self._extract_schema_types(schema):
+                    self.stats["schema_types"][schema_type] = self.stats["schema_types"].get(schema_type, 0) + 1
+
+            # Prepare documents for database; they are embedded and uploaded by the upload stage
+            docs, texts = prepare_documents_from_json(final_url, schemas_str, self.db_name)
+            logger.debug(f"Prepared {len(docs)} documents from {url}")
+            if not docs:
+                self.status.update(url_hash, completed=True, uploaded=True, completed_at=datetime.now().isoformat())
+                self.stats["successful"] += 1
+                return True
+            await upload_queue.put((url_hash, docs, texts))
             return True
-            
+
         except Exception as e:
             logger.error(f"Error processing {url}: {e}")
-            self.status[url_hash]["error"] = str(e)
-            self.status[url_hash]["completed_at"] = datetime.now().isoformat()
-            self._save_status()
+            self.status.update(url_hash, error=str(e), completed_at=datetime.now().isoformat())
             self.stats["failed"] += 1
             return False
-    
+
+    async def _fetch_worker(self, session: Optional[aiohttp.ClientSession], urls: Iterator[str],
+                            upload_queue: asyncio.Queue):
+        # The workers share one iterator, so each URL is processed by exactly one of them
+        for url in urls:
+            await self._process_single_url(session, url, upload_queue)
+            self.stats["processed"] += 1
+            self._print_status()
+
+    # Embedding and upload
+
+    async def _embed_and_upload(self, pages: List[Tuple[str, List[Dict[str, Any]], List[str]]]):
+        """Embed and upload the documents of several pages in one batch, and record the outcome."""
+        documents = [doc for _, docs, _ in pages for doc in docs]
+        texts = [text for _, _, page_texts in pages for text in page_texts]
+        try:
+            # Get embedding provider
+            provider = CONFIG.preferred_embedding_provider
+            provider_config = CONFIG.get_embedding_provider(provider)
+            model = provider_config.model if provider_config else None
+
+            embeddings = await batch_get_embeddings(texts, provider, model)
+            for doc, embedding in zip(documents, embeddings):
+                doc["embedding"] = embedding
+
+            # Use specified database or default
+            query_params = {"db": [self.database]} if self.database else None
+            await upload_documents(documents, query_params=query_params)
+            logger.debug(f"Uploaded {len(documents)} documents from {len(pages)} pages")
+        except Exception as e:
+            logger.error(f"Error uploading {len(documents)} documents from {len(pages)} pages: {e}")
+            for url_hash, _, _ in pages:
+                self.status.update(url_hash, error=str(e), completed_at=datetime.now().isoformat())
+            self.stats["failed"] += len(pages)
+            return
+
+        now = datetime.now().isoformat()
+        for url_hash, docs, _ in pages:
+            self.status.update(url_hash, completed=True, uploaded=True, uploaded_at=now, completed_at=now,
+                               documents_uploaded=len(docs))
+        self.stats["successful"] += len(pages)
+        self.stats["total_documents_uploaded"] += len(documents)
+
+    async def _upload_stage(self, upload_queue: asyncio.Queue):
+        """
+        Collect the pages' documents into batches of upload_batch_size, and embed and upload up to
+        upload_concurrency batches at a time. A partial batch is sent after flush_interval.
+        """
+        slots = asyncio.Semaphore(self.upload_concurrency)
+        uploads = set()
+        batch, batch_docs = [], 0
+
+        async def _send(pages):
+            try:
+                await self._embed_and_upload(pages)
+            finally:
+                slots.release()
+
+        while True:
+            try:
+                page = await asyncio.wait_for(upload_queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                page = None
+            if page is not None and page is not _DONE:
+                batch.append(page)
+                batch_docs += len(page[1])
+            if batch and (page is None or page is _DONE or batch_docs >= self.upload_batch_size):
+                await slots.acquire()
+                upload = asyncio.create_task(_send(batch))
+                uploads.add(upload)
+                upload.add_done_callback(uploads.discard)
+                batch, batch_docs = [], 0
+            if page is _DONE:
+                break
+        if uploads:
+            await asyncio.gather(*uploads)
+
     async def crawl(self, urls: List[str], resume: bool = True):
         """Crawl a list of URLs incrementally."""
         self.stats["total_urls"] = len(urls)
-        
-        logger.info(f"Starting incremental crawl of {len(urls)} URLs")
-        if resume and self.status:
-            already_processed = sum(1 for s in self.status.values() if s.get("uploaded", False))
+
+        logger.info(f"Starting incremental crawl of {len(urls)} URLs "
+                    f"({self.concurrency} concurrent requests, {self.per_host} per host)")
+        if not resume and self.status.state:
+            logger.info("Clearing previous crawl status")
+            self.status.clear()
+        if resume and self.status.state:
+            already_processed = sum(1 for s in self.status.state.values() if s.get("uploaded", False))
             logger.info(f"Resuming from previous state: {already_processed} URLs already fully processed")
-        
-        # Process URLs one by one
-        for i, url in enumerate(urls):
-            self.stats["processed"] = i + 1
-            await self._process_single_url(url)
-            self._print_status()
-        
+
+        # Bounded, so that fetching waits for uploads when they fall behind
+        upload_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, 4 * self.upload_batch_size))
+        uploader = asyncio.create_task(self._upload_stage(upload_queue))
+
+        urls_iter = iter(urls)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        try:
+            async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": self.user_agent}) as session:
+                workers = [asyncio.create_task(self._fetch_worker(session, urls_iter, upload_queue))
+                           for _ in range(max(1, min(self.concurrency, len(urls))))]
+                await asyncio.gather(*workers)
+            await upload_queue.put(_DONE)
+            await uploader
+        finally:
+            uploader.cancel()
+            self.status.close()
+
         # Print final newline
         print()
-        
+
         # Print summary
         if self.reprocess_mode:
             logger.info(f"Reprocessing completed: {self.stats['reprocessed']} files reprocessed, "
@@ -411,10 +603,11 @@ class IncrementalCrawler:
                        f"{self.stats['skipped']} skipped (no HTML file)")
         else:
             logger.info(f"Crawl completed: {self.stats['successful']} successful, "
-                       f"{self.stats['failed']} failed, {self.stats['already_crawled']} already crawled")
+                       f"{self.stats['failed']} failed, {self.stats['already_crawled']} already crawled, "
+                       f"{self.stats['not_modified']} unchanged, {self.stats['disallowed']} disallowed by robots.txt")
         logger.info(f"Total JSON extracted: {self.stats['total_json_size'] / 1024:.1f}KB from {self.stats['total_schemas']} schemas")
         logger.info(f"Total documents uploaded to database: {self.stats['total_documents_uploaded']}")
-        
+
         # Show schema types found
         if self.stats["schema_types"]:
             logger.info("Schema types found:")
@@ -422,7 +615,7 @@ class IncrementalCrawler:
             sorted_types = sorted(self.stats["schema_types"].items(), key=lambda x: (-x[1], x[0]))
             for schema_type, count in sorted_types:
                 logger.info(f"  {schema_type}: {count}")
-        
+
         # Show which database was used
         if self.database:
             logger.info(f"Data uploaded to: {self.database}")
@@ -437,25 +630,28 @@ async def main():
 Examples:
   %(prog)s example.com
       Incrementally crawl example.com and load schemas into database
-  
+
   %(prog)s example.com --max-pages 100
       Limit crawling to 100 pages
-  
+
   %(prog)s example.com --resume
       Resume a previous crawl (default behavior)
-  
+
+  %(prog)s example.com --refresh
+      Revisit pages crawled before, and reload the ones that changed
+
   %(prog)s example.com --no-resume
       Start fresh, ignoring previous progress
-  
+
   %(prog)s example.com --output-dir ./my-data
       Use custom output directory
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
-    
-    parser.add_argument("site", 
+
+    parser.add_argument("site",
                        help="Website domain or URL (e.g., example.com, https://example.com)")
-    parser.add_argument("--output-dir", default=None, 
+    parser.add_argument("--output-dir", default=None,
                        help="Output directory (default: data/<site> or $NLWEB_OUTPUT_DIR/<site>)")
     parser.add_argument("--sitemap", default=None,
                        help="Specific sitemap URL to use instead of auto-discovery")
@@ -465,23 +661,37 @@ Examples:
                        help="Maximum retries for failed requests (default: 3)")
     parser.add_argument("--no-resume", action="store_true",
                        help="Start fresh instead of resuming previous crawl")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Revisit pages crawled before with conditional requests, reloading changed pages")
     parser.add_argument("--reprocess", action="store_true",
                        help="Reprocess existing HTML files (skip download, recompute embeddings and upload)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                       help="Maximum concurrent requests (default: 16)")
+    parser.add_argument("--per-host", type=int, default=4,
+                       help="Maximum concurrent requests per host (default: 4)")
+    parser.add_argument("--delay", type=float, default=0.0,
+                       help="Minimum seconds between requests to a host; robots.txt Crawl-delay can raise it (default: 0)")
+    parser.add_argument("--upload-batch-size", type=int, default=100,
+                       help="Documents embedded and uploaded per batch (default: 100)")
+    parser.add_argument("--upload-concurrency", type=int, default=2,
+                       help="Batches embedded and uploaded at the same time (default: 2)")
+    parser.add_argument("--user-agent", default=USER_AGENT,
+                       help=f"User agent for requests and robots.txt rules (default: {USER_AGENT})")
     parser.add_argument("--db-name", default=None,
                        help="Database name for loading (default: domain name)")
     parser.add_argument("--database", default=None,
                        help="Specific database endpoint to use (e.g., azure_ai_search, qdrant_local)")
     parser.add_argument("--verbose", action="store_true",
                        help="Enable verbose output")
-    
+
     args = parser.parse_args()
-    
+
     # Parse domain
     domain = args.site
     if domain.startswith("http://") or domain.startswith("https://"):
         parsed = urlparse(domain)
         domain = parsed.netloc
-    
+
     # Set up output directory
     if args.output_dir:
         base_dir = args.output_dir
@@ -496,10 +706,10 @@ Examples:
             nlweb_dir = os.path.dirname(code_dir)  # NLWeb dir
             output_base = os.path.join(nlweb_dir, 'data')
         base_dir = os.path.join(output_base, domain.replace('.', '_'))
-    
+
     # Database name
     db_name = args.db_name or domain.replace('.', '_')
-    
+
     logger.info(f"Starting incremental crawl for {domain}")
     logger.info(f"Output directory: {base_dir}")
     if args.reprocess:
@@ -508,44 +718,42 @@ Examples:
         logger.info(f"Using database endpoint: {args.database}")
     else:
         logger.info("Using default database endpoint from configuration")
-    
+
     # Initialize crawler
-    crawler = IncrementalCrawler(domain, base_dir, db_name, args.max_retries, args.database, args.reprocess)
-    
+    crawler = IncrementalCrawler(domain, base_dir, db_name, args.max_retries, args.database, args.reprocess,
+                                 concurrency=args.concurrency, per_host=args.per_host, delay=args.delay,
+                                 upload_batch_size=args.upload_batch_size,
+                                 upload_concurrency=args.upload_concurrency,
+                                 refresh=args.refresh, user_agent=args.user_agent)
+
     # Step 1: Get URLs from sitemap
     urls_file = os.path.join(crawler.urls_dir, f"{domain}_urls.txt")
-    
+
     # Always refresh the URL list to check for new pages
     logger.info("Extracting URLs from sitemap...")
-    
+
     if args.sitemap:
         logger.info(f"Using provided sitemap: {args.sitemap}")
         process_site_or_sitemap(args.sitemap, urls_file, verbose=args.verbose)
     else:
         logger.info(f"Checking robots.txt and default locations for {domain}")
         process_site_or_sitemap(domain, urls_file, verbose=args.verbose)
-    
+
     # Read URLs
     with open(urls_file, 'r') as f:
         all_urls = [line.strip() for line in f if line.strip()]
-    
+
     url_count = len(all_urls)
     logger.info(f"Found {url_count} URLs")
-    
+
     # Limit URLs if max_pages is set
     if args.max_pages and url_count > args.max_pages:
         logger.info(f"Limiting to {args.max_pages} pages")
         all_urls = all_urls[:args.max_pages]
-    
-    # Clear status if not resuming
-    if args.no_resume and os.path.exists(crawler.status_file):
-        logger.info("Clearing previous crawl status")
-        os.remove(crawler.status_file)
-        crawler.status = {}
-    
+
     # Start crawling
     await crawler.crawl(all_urls, resume=not args.no_resume)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
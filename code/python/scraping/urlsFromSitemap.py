@@ -1,65 +1,123 @@
+"""
+Extract page URLs from a site's sitemaps.
+
+Sitemaps are parsed as they download, with each <url> entry dropped once read, so huge
+sitemaps and sitemap indexes are read in bounded memory. Gzipped sitemaps are decompressed
+on the fly. URLs are deduplicated across all the sitemaps of a run with an on-disk set.
+
+Run from the code/python directory:
+    python -m scraping.urlsFromSitemap <sitemap_url_or_domain> <output_file> [--verbose]
+"""
+
+import io
 import requests
 import xml.etree.ElementTree as ET
 import gzip
-from io import BytesIO
 import sys
+from typing import Iterator, Optional, Set
 from urllib.parse import urljoin, urlparse
 
-def extract_urls_from_sitemap(sitemap_url, output_file, verbose=False):
+from core.utils.seen_urls import SeenUrls
+
+SITEMAP_HEADERS = {'User-Agent': 'Mozilla/5.0', 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8', 'Accept-Language': 'en-US,en;q=0.5', 'Accept-Encoding': 'gzip, deflate', 'DNT': '1', 'Connection': 'keep-alive', 'Upgrade-Insecure-Requests': '1'}
+
+
+def _local_name(tag):
+    """A tag without its namespace."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _sitemap_stream(response):
+    """The sitemap XML of a streamed response, decompressing a gzipped sitemap as it is read."""
+    # Undo any Content-Encoding; a .gz sitemap is still gzipped after that
+    response.raw.decode_content = True
+    # Let the reader see the end of the stream, rather than a closed file
+    response.raw.auto_close = False
+    stream = io.BufferedReader(response.raw)
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def iter_sitemap_urls(sitemap_url, verbose=False, _visited: Optional[Set[str]] = None) -> Iterator[str]:
+    """
+    Yield the page URLs listed in a sitemap as it is parsed, following sitemap indexes.
+    """
+    visited = set() if _visited is None else _visited
+    if sitemap_url in visited:
+        return
+    visited.add(sitemap_url)
+
+    child_sitemaps = []
     try:
         if verbose:
             print(f"Processing sitemap: {sitemap_url}")
-            
-        # Fetch sitemap content
-        response = requests.get(sitemap_url, headers={'User-Agent': 'Mozilla/5.0', 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8', 'Accept-Language': 'en-US,en;q=0.5', 'Accept-Encoding': 'gzip, deflate', 'DNT': '1', 'Connection': 'keep-alive', 'Upgrade-Insecure-Requests': '1'})
-        
-        if response.status_code != 200:
-            print(f"Warning: HTTP {response.status_code} for {sitemap_url}")
-            return
-            
-        if sitemap_url.endswith('.gz'):
-            content = gzip.GzipFile(fileobj=BytesIO(response.content)).read()
-        else:
-            content = response.content
 
-        # Parse XML
-        root = ET.fromstring(content)
+        with requests.get(sitemap_url, headers=SITEMAP_HEADERS, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                print(f"Warning: HTTP {response.status_code} for {sitemap_url}")
+                return
 
-        # Handle both sitemap index files and regular sitemaps
-        # Remove namespace for easier parsing
-        namespace = root.tag[1:].split("}")[0] if "}" in root.tag else ""
-        ns = {"ns": namespace} if namespace else {}
+            events = ET.iterparse(_sitemap_stream(response), events=('start', 'end'))
+            _, root = next(events)
+            url_count = 0
+            for event, elem in events:
+                if event != 'end':
+                    continue
+                name = _local_name(elem.tag)
+                if name not in ('url', 'sitemap'):
+                    continue
+                loc = next((child.text for child in elem if _local_name(child.tag) == 'loc'), None)
+                # Drop the entries read so far, so the tree doesn't grow
+                root.clear()
+                if not loc or not loc.strip():
+                    continue
+                if name == 'sitemap':
+                    # This is a sitemap index; its sitemaps are read once it is closed
+                    child_sitemaps.append(loc.strip())
+                else:
+                    url_count += 1
+                    yield loc.strip()
 
-        # Open output file in append mode
-        with open(output_file, 'a') as f:
-            # Check if this is a sitemap index
-            sitemaps = root.findall(".//ns:sitemap", ns) if ns else root.findall(".//sitemap")
-            if sitemaps:
-                # This is a sitemap index
-                if verbose:
-                    print(f"  Found sitemap index with {len(sitemaps)} sitemaps")
-                for sitemap in sitemaps:
-                    loc = sitemap.find("ns:loc", ns) if ns else sitemap.find("loc")
-                    if loc is not None and loc.text:
-                        # Recursively process each sitemap
-                        extract_urls_from_sitemap(loc.text.strip(), output_file, verbose)
+        if verbose:
+            if child_sitemaps:
+                print(f"  Found sitemap index with {len(child_sitemaps)} sitemaps")
             else:
-                # This is a regular sitemap
-                urls = root.findall(".//ns:url", ns) if ns else root.findall(".//url")
-                if verbose:
-                    print(f"  Found {len(urls)} URLs in sitemap")
-                url_count = 0
-                for url in urls:
-                    loc = url.find("ns:loc", ns) if ns else url.find("loc")
-                    if loc is not None and loc.text:
-                        f.write(loc.text.strip() + '\n')
-                        url_count += 1
-                if verbose:
-                    print(f"  Wrote {url_count} URLs to file")
+                print(f"  Found {url_count} URLs in sitemap")
 
     except Exception as e:
         print(f"Error processing sitemap {sitemap_url}: {str(e)}")
 
+    for child_sitemap in child_sitemaps:
+        # Recursively process each sitemap
+        yield from iter_sitemap_urls(child_sitemap, verbose, visited)
+
+
+def extract_urls_from_sitemap(sitemap_url, output_file, verbose=False, seen: Optional[SeenUrls] = None):
+    """
+    Append the URLs of a sitemap to a file, skipping URLs already in seen.
+
+    Returns:
+        Number of URLs written
+    """
+    own_seen = seen is None
+    if own_seen:
+        seen = SeenUrls()
+    try:
+        url_count = 0
+        # Open output file in append mode
+        with open(output_file, 'a') as f:
+            for url in iter_sitemap_urls(sitemap_url, verbose):
+                if seen.add(url):
+                    f.write(url + '\n')
+                    url_count += 1
+        if verbose:
+            print(f"  Wrote {url_count} URLs to file")
+        return url_count
+    finally:
+        if own_seen:
+            seen.close()
+
 def get_sitemaps_from_robots(domain):
     """Extract sitemap URLs from robots.txt"""
     # Ensure domain has protocol
@@ -96,12 +154,16 @@ def process_site_or_sitemap(input_arg, output_file, verbose=True):
     """
     # Clear/create the output file
     open(output_file, 'w').close()
-    
+    with SeenUrls() as seen:
+        _process_site_or_sitemap(input_arg, output_file, verbose, seen)
+
+
+def _process_site_or_sitemap(input_arg, output_file, verbose, seen):
     # Check if input looks like a sitemap URL
     if input_arg.endswith(('.xml', '.xml.gz')) or '/sitemap' in input_arg:
         # Direct sitemap URL provided
         print(f"Processing sitemap: {input_arg}")
-        extract_urls_from_sitemap(input_arg, output_file, verbose)
+        extract_urls_from_sitemap(input_arg, output_file, verbose, seen)
     else:
         # Assume it's a domain, check robots.txt
         print(f"Checking robots.txt for domain: {input_arg}")
@@ -111,7 +173,7 @@ def process_site_or_sitemap(input_arg, output_file, verbose=True):
             print(f"Found {len(sitemaps)} sitemap(s) in robots.txt")
             for sitemap in sitemaps:
                 print(f"Processing sitemap: {sitemap}")
-                extract_urls_from_sitemap(sitemap, output_file, verbose)
+                extract_urls_from_sitemap(sitemap, output_file, verbose, seen)
         else:
             # Try default sitemap locations
             domain = input_arg
@@ -134,7 +196,7 @@ def process_site_or_sitemap(input_arg, output_file, verbose=True):
                     response = requests.head(sitemap, timeout=5, headers={'User-Agent': 'Mozilla/5.0'})
                     if response.status_code == 200:
                         print(f"Found sitemap at: {sitemap}")
-                        extract_urls_from_sitemap(sitemap, output_file, verbose)
+                        extract_urls_from_sitemap(sitemap, output_file, verbose, seen)
                         break
                 except:
                     continue
@@ -144,11 +206,11 @@ def process_site_or_sitemap(input_arg, output_file, verbose=True):
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python urlsFromSitemap.py <sitemap_url_or_domain> <output_file> [--verbose]")
+        print("Usage: python -m scraping.urlsFromSitemap <sitemap_url_or_domain> <output_file> [--verbose]")
         print("Examples:")
-        print("  python urlsFromSitemap.py https://example.com/sitemap.xml urls.txt")
-        print("  python urlsFromSitemap.py example.com urls.txt")
-        print("  python urlsFromSitemap.py example.com urls.txt --verbose")
+        print("  python -m scraping.urlsFromSitemap https://example.com/sitemap.xml urls.txt")
+        print("  python -m scraping.urlsFromSitemap example.com urls.txt")
+        print("  python -m scraping.urlsFromSitemap example.com urls.txt --verbose")
         sys.exit(1)
 
     input_arg = sys.argv[1]
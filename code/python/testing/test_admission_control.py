@@ -0,0 +1,129 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from core import llm
+from core.baseHandler import NLWebHandler
+from core.config import CONFIG, LLMProviderConfig, ModelConfig, CircuitBreakerConfig
+from core.utils import circuit_breaker
+from webserver.middleware import setup_middleware
+from webserver.middleware.admission import AdmissionController, ADMIT, DEGRADE, REJECT, LATENCY_KEY
+from webserver.routes.api import setup_api_routes
+
+SCHEMA = {"score": "integer between 0 and 100"}
+LLM_CALLS_PER_REQUEST = 10
+
+
+class StubProvider:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def get_completion(self, prompt, schema, model=None, timeout=None, max_tokens=None):
+        await asyncio.sleep(self.delay)
+        return {"score": 80}
+
+
+def test_decisions_follow_thresholds():
+    depth = {"value": 0}
+    controller = AdmissionController({"max_in_flight": 4, "degrade_in_flight": 2, "max_llm_queue_depth": 100,
+                                      "degrade_llm_queue_depth": 50, "degrade_p95": 1.0, "latency_window": 10},
+                                     queue_depth=lambda: depth["value"])
+    assert controller.decide()[0] == ADMIT
+    controller.in_flight = 2
+    assert controller.decide()[0] == DEGRADE
+    controller.in_flight = 4
+    assert controller.decide() == (REJECT, "4 requests in flight")
+
+    controller.in_flight = 0
+    depth["value"] = 60
+    assert controller.decide()[0] == DEGRADE
+    depth["value"] = 100
+    assert controller.decide()[0] == REJECT
+
+    depth["value"] = 0
+    for _ in range(10):
+        controller.latency.record(LATENCY_KEY, 2.0)
+    assert controller.decide() == (DEGRADE, "p95 latency 2.0s")
+
+
+@pytest.fixture
+async def overloaded_server(monkeypatch):
+    """/ask behind the middleware stack, with a handler that makes LLM calls like ranking does."""
+    stub = StubProvider(delay=0.2)
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        "stub": LLMProviderConfig(llm_type="stub", api_key="test", models=ModelConfig(high="high", low="low"))
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "stub")
+    monkeypatch.setattr(CONFIG, "llm_failover", {})
+    monkeypatch.setattr(CONFIG, "llm_circuit_breaker", CircuitBreakerConfig())
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: stub)
+    circuit_breaker.reset_breakers()
+
+    served = []
+
+    async def run_query(self):
+        served.append(self)
+        await asyncio.gather(*[llm.ask_llm(f"Rank item {i}", SCHEMA) for i in range(LLM_CALLS_PER_REQUEST)])
+        return {"profile": self.profile_name, "num_results": self.num_retrieval_results}
+
+    monkeypatch.setattr(NLWebHandler, "runQuery", run_query)
+
+    app = web.Application()
+    app['config'] = {'server': {'admission_control': {
+        'max_in_flight': 8, 'degrade_in_flight': 4,
+        'max_llm_queue_depth': 1000, 'degrade_llm_queue_depth': 500, 'retry_after': 3,
+    }}}
+    setup_middleware(app)
+    setup_api_routes(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/ask", app['admission_controller'], served
+    await runner.cleanup()
+    circuit_breaker.reset_breakers()
+
+
+async def test_overload_is_shed_and_degraded(overloaded_server):
+    url, controller, served = overloaded_server
+
+    async def ask(session, i):
+        async with session.get(url, params={"query": f"query {i}", "streaming": "False"}) as response:
+            return response.status, response.headers.get("Retry-After"), await response.json()
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*[ask(session, i) for i in range(20)])
+
+    rejected = [r for r in results if r[0] == 503]
+    admitted = [r[2] for r in results if r[0] == 200]
+    assert len(admitted) == 8
+    assert len(rejected) == 12
+    assert all(retry_after == "3" for _, retry_after, _ in rejected)
+    degraded = [r for r in admitted if r["profile"] == "economy"]
+    assert len(degraded) == 4
+    assert {r["num_results"] for r in degraded} == {CONFIG.nlweb.execution_profiles["economy"].num_results}
+    assert controller.counts == {ADMIT: 4, DEGRADE: 4, REJECT: 12}
+    assert controller.in_flight == 0
+    assert llm.llm_queue_depth() == 0
+
+    # Once the load has drained, requests are admitted in full again
+    async with aiohttp.ClientSession() as session:
+        status, _, body = await ask(session, 99)
+    assert status == 200 and body["profile"] == CONFIG.nlweb.default_execution_profile
+
+
+def test_execution_profile_selects_pre_checks_and_llm_tier():
+    handler = NLWebHandler({"query": ["spicy noodles"], "profile": ["economy"]}, None)
+    economy = CONFIG.nlweb.execution_profiles["economy"]
+    assert handler.profile_name == "economy"
+    assert handler.num_retrieval_results == economy.num_results
+    assert handler.llm_level("high") == economy.max_llm_level
+    if not economy.summarize:
+        assert NLWebHandler({"query": ["q"], "profile": ["economy"], "generate_mode": ["summarize"]}, None).generate_mode == "none"
+
+    # Unknown profiles fall back to the default
+    handler = NLWebHandler({"query": ["spicy noodles"], "profile": ["turbo"]}, None)
+    assert handler.profile_name == CONFIG.nlweb.default_execution_profile
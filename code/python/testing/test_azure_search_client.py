@@ -0,0 +1,99 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import CONFIG, RetrievalProviderConfig
+from data_loading.db_load_utils import add_ranking_text, prepare_documents_from_json
+from retrieval_providers.azure_search_client import AzureSearchClient
+
+OLD_FIELDS = ["id", "url", "name", "site", "schema_json", "embedding"]
+
+
+class FakeIndexClient:
+    """An Azure service whose indexes have the given fields."""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.lookups = []
+
+    def get_index(self, name):
+        self.lookups.append(name)
+        if name not in self.indexes:
+            raise ConnectionError("service unavailable")
+        return SimpleNamespace(fields=[SimpleNamespace(name=field) for field in self.indexes[name]])
+
+
+class FakeSearchClient:
+    """An index that, like Azure, rejects documents with fields it doesn't have."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.documents = []
+
+    def upload_documents(self, documents):
+        for doc in documents:
+            unknown = set(doc) - set(self.fields)
+            if unknown:
+                raise ValueError(f"The property '{unknown.pop()}' does not exist on type 'search.documentFields'")
+        self.documents.extend(documents)
+
+    def search(self, search_text=None, select="", **kwargs):
+        return [{field: doc.get(field) for field in select.split(",")} for doc in self.documents]
+
+
+@pytest.fixture
+def azure(monkeypatch):
+    monkeypatch.setitem(CONFIG.retrieval_endpoints, "azure_test", RetrievalProviderConfig(
+        db_type="azure_ai_search", enabled=True, index_name="old", api_endpoint="https://search.example", api_key="key",
+    ))
+    client = AzureSearchClient("azure_test")
+    indexes = {"old": OLD_FIELDS, "new": [field.name for field in client._create_index_definition("new", 3).fields]}
+    search_clients = {name: FakeSearchClient(fields) for name, fields in indexes.items()}
+    # An index whose definition can't be read
+    search_clients["unreadable"] = FakeSearchClient(indexes["new"])
+    index_client = FakeIndexClient(indexes)
+    monkeypatch.setattr(client, "_get_index_client", lambda: index_client)
+    monkeypatch.setattr(client, "_get_search_client", lambda index_name=None: search_clients[index_name or "old"])
+    client.index_client = index_client
+    return client, search_clients
+
+
+def documents():
+    recipe = {"@type": "Recipe", "name": "Noodles", "image": "https://example.com/1.jpg"}
+    docs, _ = prepare_documents_from_json("https://a", json.dumps(recipe), "example")
+    for doc in docs:
+        doc["embedding"] = [0.1, 0.2, 0.3]
+        doc["content_hash"] = "0" * 64
+    return add_ranking_text(docs)
+
+
+async def test_upload_only_sends_the_fields_the_index_has(azure):
+    client, search_clients = azure
+    assert await client.upload_documents(documents(), index_name="old") == 1
+    assert set(search_clients["old"].documents[0]) == set(OLD_FIELDS)
+    # Results of an index without stored ranking text compute it when it is needed
+    [item] = await client._retrieve_by_site_and_vector("example", [0.0] * 1536, index_name="old")
+    assert item.url == "https://a" and item.ranking_text is None
+    assert json.loads(item.text_for_ranking()) == {"@type": ["Recipe"], "name": ["Noodles"]}
+
+
+async def test_new_indexes_store_and_return_the_ranking_text(azure):
+    client, search_clients = azure
+    docs = documents()
+    assert await client.upload_documents(docs, index_name="new") == 1
+    assert "content_hash" not in search_clients["new"].documents[0]
+    [item] = await client._retrieve_by_site_and_vector("example", [0.0] * 1536, index_name="new")
+    assert item.ranking_text == docs[0]["ranking_text"]
+    assert (await client.search_by_url("https://a", index_name="new")).ranking_text == docs[0]["ranking_text"]
+
+
+async def test_index_fields_are_read_once_and_failures_remembered(azure, monkeypatch):
+    client, search_clients = azure
+    monkeypatch.setattr(client, "ensure_index_exists", lambda index_name, embedding_size: True)
+    for _ in range(2):
+        await client._retrieve_by_site_and_vector("example", [0.0] * 1536, index_name="new")
+        # The base fields are assumed, which every index has
+        assert await client.upload_documents(documents(), index_name="unreadable") == 1
+    assert client.index_client.lookups == ["new", "unreadable"]
+    assert set(search_clients["unreadable"].documents[0]) == set(OLD_FIELDS)
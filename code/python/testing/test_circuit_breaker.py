@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from core.config import CircuitBreakerConfig
+from core.utils import circuit_breaker
+from core.utils.circuit_breaker import CircuitBreaker, get_breaker, register_probe, breaker_states
+
+
+@pytest.fixture(autouse=True)
+def clean_breakers():
+    circuit_breaker.reset_breakers()
+    yield
+    circuit_breaker.reset_breakers()
+
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    settings = dict(window_size=10, min_calls=4, failure_rate_threshold=0.5,
+                    slow_call_threshold=1.0, slow_call_rate_threshold=0.75, open_duration=60.0)
+    settings.update(overrides)
+    return CircuitBreaker("test:endpoint", CircuitBreakerConfig(**settings))
+
+
+def test_opens_on_error_rate():
+    breaker = make_breaker()
+    breaker.record_success(0.1)
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_opens_on_slow_calls():
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_success(2.0)
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_one_trial_and_closes_on_success():
+    breaker = make_breaker(open_duration=0.05)
+    for _ in range(4):
+        breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_half_open_reopens_on_failure():
+    breaker = make_breaker(open_duration=0.05)
+    for _ in range(4):
+        breaker.record_failure(RuntimeError("boom"))
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure(RuntimeError("still down"))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["last_error"] == "RuntimeError: still down"
+
+
+async def test_background_probe_recovers_endpoint():
+    config = CircuitBreakerConfig(min_calls=2, open_duration=0.0, probe_timeout=1.0)
+    breaker = get_breaker("retrieval", "flaky", config)
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    probed = []
+
+    async def probe():
+        probed.append(True)
+
+    register_probe("retrieval", "flaky", probe)
+    await circuit_breaker.probe_ejected_endpoints()
+
+    assert probed
+    assert breaker_states()["retrieval"]["flaky"]["state"] == CircuitBreaker.CLOSED
+
+
+async def test_probe_timeout_keeps_endpoint_ejected():
+    config = CircuitBreakerConfig(min_calls=1, open_duration=0.0, probe_timeout=0.01)
+    breaker = get_breaker("llm", "slow", config)
+    breaker.record_failure(RuntimeError("boom"))
+
+    async def probe():
+        await asyncio.sleep(1)
+
+    register_probe("llm", "slow", probe)
+    await circuit_breaker.probe_ejected_endpoints()
+
+    assert breaker_states()["llm"]["slow"]["state"] in (CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)
+    assert breaker._opened_at > 0
+
+
+@pytest.fixture
+def endpoint(tmp_path, monkeypatch):
+    """Configures a retrieval endpoint whose breaker opens after two failures."""
+    from core.config import CONFIG, RetrievalProviderConfig
+    monkeypatch.setattr(CONFIG, "retrieval_circuit_breaker", CircuitBreakerConfig(min_calls=2, open_duration=60.0))
+
+    def configure(name, **settings):
+        monkeypatch.setitem(CONFIG.retrieval_endpoints, name, RetrievalProviderConfig(enabled=True, **settings))
+    return configure
+
+
+async def test_unreachable_qdrant_server_is_skipped_once_ejected(endpoint, tmp_path, monkeypatch):
+    from retrieval_providers.qdrant import QdrantVectorClient
+    # Nothing listens on port 1, so connections are refused
+    endpoint("qdrant_remote", db_type="qdrant", api_endpoint="http://127.0.0.1:1", index_name="test")
+    client = QdrantVectorClient("qdrant_remote")
+    monkeypatch.setattr(client, "_resolve_path", lambda path: str(tmp_path / "fallback"))
+    attempts = []
+    create_client_params = client._create_client_params
+    monkeypatch.setattr(client, "_create_client_params", lambda: attempts.append(1) or create_client_params())
+
+    for _ in range(4):
+        assert await client.get_sites() == []
+    # Two connection failures open the server's breaker; later calls go straight to local storage
+    assert len(attempts) == 2
+    assert breaker_states()["qdrant_server"]["qdrant_remote"]["state"] == CircuitBreaker.OPEN
+    assert client._is_local()
+    await (await client._get_qdrant_client()).close()
+
+
+async def test_postgres_retries_stop_once_the_endpoint_is_ejected(endpoint, monkeypatch):
+    import psycopg
+    from retrieval_providers.postgres_client import PgVectorClient
+    endpoint("pg", db_type="postgres", api_endpoint="postgresql://127.0.0.1:1/nlweb?user=u&password=p")
+    client = PgVectorClient("pg")
+    attempts = []
+
+    class Pool:
+        def connection(self):
+            attempts.append(1)
+            raise psycopg.OperationalError("connection refused")
+
+    async def get_connection_pool():
+        return Pool()
+    monkeypatch.setattr(client, "_get_connection_pool", get_connection_pool)
+
+    with pytest.raises(psycopg.OperationalError):
+        await client._execute_with_retry(lambda conn: None, max_retries=5, initial_backoff=0.01)
+    assert len(attempts) == 2
+    assert get_breaker("retrieval", "pg").state == CircuitBreaker.OPEN
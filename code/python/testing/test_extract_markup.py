@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from scraping.extractMarkup import LexborHTMLParser, extract_markup
+
+pytest.importorskip("bs4")
+
+PARSERS = ["tokenizer", "dom"] + (["selectolax"] if LexborHTMLParser is not None else [])
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Recipes &lt;link rel="canonical" href="/title"&gt;</title>
+<!-- <link rel="canonical" href="/commented"> -->
+<link rel="stylesheet" href="/site.css">
+<LINK REL="canonical" HREF='https://example.com/recipe?a=1&amp;b=2'>
+<link rel="canonical" href="/second">
+<script>var s = '<script type="application/ld+json">{"@type": "InScript"}</' + 'script>';</script>
+<style>a[data-x=">"] { color: red }</style>
+<script type="application/ld+json">{"@type": "Recipe", "name": "Noodles", "text": "a <b>bold</b> claim"}</script>
+<!-- <script type="application/ld+json">{"@type": "Commented"}</script> -->
+</head><body data-note="<script type='application/ld+json'>">
+<script type='application/ld+json'>[{"@type": "BreadcrumbList"}, {"@type": "Organization"}]</script>
+<script type="application/ld+json">{not json}</script>
+</body></html>"""
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parsers_find_the_same_markup(parser):
+    canonical_url, schemas = extract_markup(PAGE, parser)
+    assert canonical_url == "https://example.com/recipe?a=1&b=2"
+    assert json.loads(schemas) == [
+        {"@type": "Recipe", "name": "Noodles", "text": "a <b>bold</b> claim"},
+        [{"@type": "BreadcrumbList"}, {"@type": "Organization"}],
+    ]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_pages_without_markup(parser):
+    assert extract_markup("<html><head><link rel=canonical></head><body>Hi<!-- unterminated", parser) == (None, "[]")
+    assert extract_markup("<p>No head", parser) == (None, "[]")
@@ -0,0 +1,136 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("bs4")
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from scraping import incrementalCrawlAndLoad
+from scraping.incrementalCrawlAndLoad import IncrementalCrawler
+
+
+def page(name, body=""):
+    markup = json.dumps({"@context": "https://schema.org", "@type": "Recipe", "name": name})
+    return f'<html><head><script type="application/ld+json">{markup}</script></head><body>{body}</body></html>'
+
+
+@pytest.fixture
+async def site():
+    """A local site with robots.txt rules, validators on its pages, and a record of the requests."""
+    state = {"requests": [], "versions": {f"/recipes/{i}": 1 for i in range(6)},
+             "robots": "User-agent: *\nDisallow: /private\n"}
+
+    async def robots(request):
+        return web.Response(text=state["robots"])
+
+    async def recipe(request):
+        state["requests"].append((request.path, request.headers.get("If-None-Match")))
+        version = state["versions"].get(request.path)
+        if version is None:
+            return web.Response(status=404)
+        etag = f'"{request.path}-{version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(text=page(f"{request.path} v{version}"), content_type="text/html", headers={"ETag": etag})
+
+    async def private(request):
+        state["requests"].append((request.path, None))
+        return web.Response(text=page("secret"), content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/robots.txt", robots)
+    app.router.add_get("/recipes/{id}", recipe)
+    app.router.add_get("/private/{id}", private)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    server = web.TCPSite(runner, "127.0.0.1", 0)
+    await server.start()
+    port = server._server.sockets[0].getsockname()[1]
+    state["base"] = f"http://127.0.0.1:{port}"
+    yield state
+    await runner.cleanup()
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    uploaded = []
+
+    async def batch_get_embeddings(texts, provider=None, model=None):
+        return [[0.1, 0.2] for _ in texts]
+
+    async def upload_documents(documents, **kwargs):
+        uploaded.append([doc["name"] for doc in documents])
+        return len(documents)
+
+    monkeypatch.setattr(incrementalCrawlAndLoad, "batch_get_embeddings", batch_get_embeddings)
+    monkeypatch.setattr(incrementalCrawlAndLoad, "upload_documents", upload_documents)
+    return uploaded
+
+
+def crawler(tmp_path, **kwargs):
+    return IncrementalCrawler("127.0.0.1", str(tmp_path), "test_site", max_retries=1, concurrency=4,
+                              per_host=2, upload_batch_size=2, **kwargs)
+
+
+async def test_crawls_politely_and_uploads_in_batches(site, uploads, tmp_path):
+    urls = [f"{site['base']}/recipes/{i}" for i in range(6)] + [f"{site['base']}/private/1",
+                                                              f"{site['base']}/recipes/missing"]
+    first = crawler(tmp_path)
+    await first.crawl(urls)
+
+    assert ("/private/1", None) not in site["requests"]
+    assert first.stats["disallowed"] == 1 and first.stats["failed"] == 1
+    assert first.stats["successful"] == 6
+    assert sorted(name for batch in uploads for name in batch) == [f"/recipes/{i} v1" for i in range(6)]
+    # Pages are uploaded in batches of at least upload_batch_size documents, when enough arrive in time
+    assert len(uploads) < 6
+
+    # The state log holds records appended as the crawl went on
+    with open(tmp_path / "crawl_status.jsonl") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) > len(urls)
+    state = first.status.state
+    uploaded = [entry for entry in state.values() if entry.get("uploaded")]
+    assert len(uploaded) == 6 and all(entry["etag"] for entry in uploaded)
+
+    # Resuming skips what was uploaded
+    site["requests"].clear()
+    uploads.clear()
+    resumed = crawler(tmp_path)
+    await resumed.crawl(urls[:6])
+    assert resumed.stats["already_crawled"] == 6 and site["requests"] == [] and uploads == []
+
+
+async def test_crawl_delay_spaces_requests(site, tmp_path):
+    site["robots"] = "User-agent: *\nCrawl-delay: 2\n"
+    polite = crawler(tmp_path, delay=0.5)
+    async with aiohttp.ClientSession() as session:
+        policy = await polite._host_policy(session, f"{site['base']}/recipes/1")
+        assert policy.delay == 2
+        await policy.wait_turn()
+        assert policy.next_request_at - time.monotonic() > 1.5
+    polite.status.close()
+
+
+async def test_refresh_reloads_only_changed_pages(site, uploads, tmp_path):
+    urls = [f"{site['base']}/recipes/{i}" for i in range(6)]
+    await crawler(tmp_path).crawl(urls)
+
+    site["versions"]["/recipes/2"] = 2
+    site["requests"].clear()
+    uploads.clear()
+    refreshed = crawler(tmp_path, refresh=True)
+    await refreshed.crawl(urls)
+
+    # Every page was asked for conditionally, and only the changed one was sent again
+    assert all(etag is not None for _, etag in site["requests"])
+    assert refreshed.stats["not_modified"] == 5
+    assert uploads == [["/recipes/2 v2"]]
+
+    # The log is replayed into the latest state of each page, and compacted on load
+    reloaded = crawler(tmp_path)
+    entry = reloaded.status.get(reloaded._get_url_hash(urls[2]))
+    assert entry["etag"] == '"/recipes/2-2"' and entry["uploaded"]
+    reloaded.status.close()
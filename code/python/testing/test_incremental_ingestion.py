@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from core.config import CONFIG, RetrievalProviderConfig
+from data_loading import db_load
+from data_loading.db_load_utils import int64_hash
+from retrieval_providers.qdrant import QdrantVectorClient
+
+
+def recipe(i, version=1):
+    url = f"https://recipes.example/{i}"
+    return url, json.dumps({"@context": "https://schema.org", "@type": "Recipe", "url": url,
+                            "name": f"Recipe {i} v{version}"})
+
+
+def write_source(path, versions):
+    path.write_text("".join(f"{url}\t{markup}\n" for url, markup in (recipe(i, v) for i, v in versions.items())))
+
+
+@pytest.fixture
+async def qdrant(tmp_path, monkeypatch):
+    """A local Qdrant collection that db_load uploads to and deletes from, and a record of the embedded texts."""
+    monkeypatch.setitem(CONFIG.retrieval_endpoints, "qdrant_test", RetrievalProviderConfig(
+        db_type="qdrant", enabled=True, index_name="test", database_path=str(tmp_path / "db"),
+    ))
+    monkeypatch.setattr(CONFIG.nlweb, "json_with_embeddings_folder", str(tmp_path / "embeddings"))
+    client = QdrantVectorClient("qdrant_test")
+    embedded = []
+
+    async def batch_get_embeddings(texts, provider=None, model=None):
+        embedded.extend(json.loads(text)["name"] for text in texts)
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+    async def upload_documents(documents, **kwargs):
+        return await client.upload_documents(documents)
+
+    async def delete_documents_by_ids(site, ids, **kwargs):
+        return await client.delete_documents_by_ids(site, ids)
+
+    async def delete_replaced_documents(site, ids_by_url, **kwargs):
+        return await client.delete_replaced_documents(site, ids_by_url)
+
+    monkeypatch.setattr(db_load, "batch_get_embeddings", batch_get_embeddings)
+    monkeypatch.setattr(db_load, "upload_documents", upload_documents)
+    monkeypatch.setattr(db_load, "delete_documents_by_ids", delete_documents_by_ids)
+    monkeypatch.setattr(db_load, "delete_replaced_documents", delete_replaced_documents)
+    yield client, embedded
+    await (await client._get_qdrant_client()).close()
+
+
+async def stored(client, site="recipes"):
+    batches = [batch async for batch in client.export_documents(site)]
+    return {doc["url"]: doc for batch in batches for doc in batch}
+
+
+def test_ids_are_stable_across_processes():
+    # hash() would give another value in each process
+    assert int64_hash("https://recipes.example/1") == 7420320638939683408
+
+
+async def test_reload_embeds_only_changes_and_deletes_vanished(qdrant, tmp_path):
+    client, embedded = qdrant
+    source = tmp_path / "recipes.txt"
+    write_source(source, {i: 1 for i in range(5)})
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 5
+    # Another site's documents are never touched
+    await client.upload_documents([{"id": "x", "url": "https://other.example/x", "name": "x", "site": "other",
+                                    "schema_json": "{}", "embedding": [0.1, 0.2, 0.3]}])
+
+    # Recipe 1 changes, recipe 3 goes away and recipe 5 is new
+    embedded.clear()
+    write_source(source, {0: 1, 1: 2, 2: 1, 4: 1, 5: 1})
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 2
+    assert sorted(embedded) == ["Recipe 1 v2", "Recipe 5 v1"]
+
+    documents = await stored(client)
+    assert sorted(documents) == [f"https://recipes.example/{i}" for i in (0, 1, 2, 4, 5)]
+    assert json.loads(documents["https://recipes.example/1"]["schema_json"])["name"] == "Recipe 1 v2"
+    assert all(len(doc["content_hash"]) == 64 for doc in documents.values())
+    assert len(await stored(client, "other")) == 1
+
+    # Nothing changed
+    embedded.clear()
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 0
+    assert embedded == []
+
+
+async def test_first_load_deletes_copies_stored_under_earlier_ids(qdrant, tmp_path):
+    client, embedded = qdrant
+    # Loaded before document IDs were stable: recipes 0 and 1 from this source, 9 from another one
+    await client.upload_documents([{"id": f"old-{i}", "url": f"https://recipes.example/{i}", "name": "old",
+                                    "site": "recipes", "schema_json": "{}", "embedding": [0.1, 0.2, 0.3]}
+                                   for i in (0, 1, 9)])
+    source = tmp_path / "recipes.txt"
+    write_source(source, {i: 1 for i in range(3)})
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 3
+
+    urls = [doc["url"] async for batch in client.export_documents("recipes") for doc in batch]
+    assert sorted(urls) == [f"https://recipes.example/{i}" for i in (0, 1, 2, 9)]
+    assert (await stored(client))["https://recipes.example/0"]["name"] == "Recipe 0 v1"
+    with open(db_load.open_manifest("recipes", str(source), "qdrant_test").path) as f:
+        assert json.load(f)["old_ids_deleted"]
+
+    # Later loads leave the site's other documents alone
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 0
+    assert "https://recipes.example/9" in await stored(client)
+
+
+async def test_only_documents_that_were_uploaded_are_recorded(qdrant, tmp_path, monkeypatch):
+    client, embedded = qdrant
+    source = tmp_path / "recipes.txt"
+    write_source(source, {i: 1 for i in range(4)})
+    embed, upload = db_load.batch_get_embeddings, db_load.upload_documents
+
+    # Recipe 0 gets no embedding, and the database drops one of the others without saying which
+    async def batch_get_embeddings(texts, provider=None, model=None):
+        return [[] if "Recipe 0 " in text else vector for text, vector in zip(texts, await embed(texts))]
+
+    async def partial_upload(documents, **kwargs):
+        return await client.upload_documents(documents[1:])
+    monkeypatch.setattr(db_load, "batch_get_embeddings", batch_get_embeddings)
+    monkeypatch.setattr(db_load, "upload_documents", partial_upload)
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 2
+    monkeypatch.setattr(db_load, "batch_get_embeddings", embed)
+    monkeypatch.setattr(db_load, "upload_documents", upload)
+
+    embedded.clear()
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 4
+    assert sorted(embedded) == [f"Recipe {i} v1" for i in range(4)]
+
+
+async def test_failed_batches_and_model_changes_are_reloaded(qdrant, tmp_path, monkeypatch):
+    client, embedded = qdrant
+    source = tmp_path / "recipes.txt"
+    write_source(source, {i: 1 for i in range(4)})
+    await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True)
+
+    # The batch with the changed recipe fails to upload, so it is retried by the next load
+    write_source(source, {0: 2, 1: 1, 2: 1, 3: 1})
+    upload = db_load.upload_documents
+
+    async def failing_upload(documents, **kwargs):
+        raise ConnectionError("database unavailable")
+    monkeypatch.setattr(db_load, "upload_documents", failing_upload)
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 0
+    monkeypatch.setattr(db_load, "upload_documents", upload)
+    embedded.clear()
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 1
+    assert embedded == ["Recipe 0 v2"]
+
+    # Documents embedded with another model are all reloaded
+    manifest = db_load.open_manifest("recipes", str(source), "qdrant_test")
+    with open(manifest.path) as f:
+        data = json.load(f)
+    data["embedding"] = "other/model"
+    with open(manifest.path, "w") as f:
+        json.dump(data, f)
+    embedded.clear()
+    assert await db_load.loadJsonToDB(str(source), "recipes", database="qdrant_test", incremental=True) == 4
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from core import llm
+from core.config import CONFIG, LLMProviderConfig, ModelConfig, LLMConnectionPoolConfig, CircuitBreakerConfig
+from core.utils import circuit_breaker
+from llm_providers import llm_provider
+from llm_providers.openai import OpenAIProvider
+
+MAX_CONNECTIONS = 10
+CONCURRENT_CALLS = 200
+RANKING_SCHEMA = {"score": "integer between 0 and 100", "description": "short description of the item"}
+
+
+@pytest.fixture
+async def completion_server():
+    """Local OpenAI-compatible completion server that records the client connections it sees."""
+    connections = set()
+
+    async def chat_completions(request):
+        connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(0.01)
+        content = json.dumps({"score": 80, "description": "relevant"})
+        return web.json_response({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/v1", connections
+    await runner.cleanup()
+
+
+@pytest.fixture
+def openai_pointed_at(monkeypatch, completion_server):
+    base_url, connections = completion_server
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        "openai": LLMProviderConfig(llm_type="openai", api_key="test", models=ModelConfig(high="test-model", low="test-model"))
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "openai")
+    monkeypatch.setattr(CONFIG, "llm_failover", {})
+    monkeypatch.setattr(CONFIG, "llm_circuit_breaker", CircuitBreakerConfig())
+    monkeypatch.setattr(CONFIG, "llm_connection_pool", LLMConnectionPoolConfig(
+        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS))
+    circuit_breaker.reset_breakers()
+    OpenAIProvider._client = None
+    yield connections
+    OpenAIProvider._client = None
+    circuit_breaker.reset_breakers()
+
+
+async def test_concurrent_ranking_calls_share_pooled_connections(openai_pointed_at):
+    connections = openai_pointed_at
+    llm.warm_up_clients()
+
+    results = await asyncio.gather(*[
+        llm.ask_llm(f"Rank item {i}", RANKING_SCHEMA, level="low", timeout=30)
+        for i in range(CONCURRENT_CALLS)
+    ])
+
+    assert all(result == {"score": 80, "description": "relevant"} for result in results)
+    assert 0 < len(connections) <= MAX_CONNECTIONS
+
+    # A second burst reuses the kept-alive connections instead of opening new ones
+    seen = set(connections)
+    await asyncio.gather(*[llm.ask_llm("Rank again", RANKING_SCHEMA, timeout=30) for _ in range(20)])
+    assert connections == seen
+
+    await llm.shutdown()
+    assert OpenAIProvider._client is None
+    assert llm_provider._pooled_http_clients == []
+
+
+async def test_shutdown_closes_pooled_clients(openai_pointed_at):
+    client = llm_provider.create_pooled_http_client()
+    assert not client.is_closed
+    await llm_provider.close_pooled_http_clients()
+    assert client.is_closed
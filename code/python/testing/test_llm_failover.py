@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import pytest
+
+from core import llm
+from core.config import CONFIG, LLMProviderConfig, LLMFailoverConfig, ModelConfig, CircuitBreakerConfig
+from core.utils import circuit_breaker
+
+
+class StubProvider:
+    """LLM provider stand-in with injected latency, errors and responses."""
+
+    def __init__(self, name, delay=0.0, error=None, response=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.response = response if response is not None else {"answer": name}
+        self.calls = 0
+        self.cancelled = False
+
+    async def get_completion(self, prompt, schema, model=None, timeout=None, max_tokens=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.response
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    stubs = {}
+
+    def install(*stub_list, chain=None, hedge_delay=None, level="low"):
+        for stub in stub_list:
+            stubs[stub.name] = stub
+        monkeypatch.setattr(CONFIG, "llm_endpoints", {
+            stub.name: LLMProviderConfig(llm_type=stub.name, api_key="test",
+                                         models=ModelConfig(high=f"{stub.name}-high", low=f"{stub.name}-low"))
+            for stub in stub_list
+        })
+        monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", stub_list[0].name)
+        failover = {level: LLMFailoverConfig(chain=chain, hedge_delay=hedge_delay)} if chain else {}
+        monkeypatch.setattr(CONFIG, "llm_failover", failover)
+        return stubs
+
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: stubs[llm_type])
+    monkeypatch.setattr(CONFIG, "llm_circuit_breaker", CircuitBreakerConfig(min_calls=2, open_duration=60.0))
+    circuit_breaker.reset_breakers()
+    yield install
+    circuit_breaker.reset_breakers()
+
+
+async def test_single_provider_without_failover(providers):
+    providers(StubProvider("primary", error=RuntimeError("down")), StubProvider("secondary"))
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {}
+
+
+async def test_fails_over_on_error(providers):
+    stubs = providers(StubProvider("primary", error=RuntimeError("down")), StubProvider("secondary"),
+                      chain=["primary", "secondary"])
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {"answer": "secondary"}
+    assert stubs["primary"].calls == 1
+
+
+async def test_fails_over_on_empty_response(providers):
+    providers(StubProvider("primary", response={}), StubProvider("secondary"), StubProvider("tertiary"),
+              chain=["secondary", "tertiary"])
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {"answer": "secondary"}
+
+
+async def test_fails_over_on_timeout_within_overall_budget(providers):
+    providers(StubProvider("primary", delay=5.0), StubProvider("secondary"),
+              chain=["secondary"])
+    start = time.time()
+    result = await llm.ask_llm("prompt", {"answer": "string"}, timeout=0.3)
+    assert result == {}
+    assert time.time() - start < 1.0
+
+
+async def test_hedges_slow_primary(providers):
+    stubs = providers(StubProvider("primary", delay=2.0), StubProvider("secondary", delay=0.05),
+                      chain=["secondary"], hedge_delay=0.1)
+    start = time.time()
+    result = await llm.ask_llm("prompt", {"answer": "string"})
+    assert result == {"answer": "secondary"}
+    assert time.time() - start < 1.0
+    await asyncio.sleep(0.05)
+    assert stubs["primary"].cancelled
+
+
+async def test_no_hedge_when_primary_is_fast(providers):
+    stubs = providers(StubProvider("primary", delay=0.01), StubProvider("secondary"),
+                      chain=["secondary"], hedge_delay=0.5)
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {"answer": "primary"}
+    assert stubs["secondary"].calls == 0
+
+
+async def test_hedge_chain_walks_all_levels(providers):
+    providers(StubProvider("openai", delay=2.0), StubProvider("azure_openai", delay=2.0),
+              StubProvider("ollama", delay=0.01), chain=["openai", "azure_openai", "ollama"], hedge_delay=0.05)
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {"answer": "ollama"}
+
+
+async def test_failover_is_per_level(providers):
+    providers(StubProvider("primary", error=RuntimeError("down")), StubProvider("secondary"),
+              chain=["secondary"], level="high")
+    assert await llm.ask_llm("prompt", {"answer": "string"}, level="low") == {}
+    assert await llm.ask_llm("prompt", {"answer": "string"}, level="high") == {"answer": "secondary"}
+
+
+async def test_explicit_provider_is_not_failed_over(providers):
+    providers(StubProvider("primary"), StubProvider("secondary", error=RuntimeError("down")),
+              chain=["primary"])
+    assert await llm.ask_llm("prompt", {"answer": "string"}, provider="secondary") == {}
+
+
+async def test_all_providers_failing_returns_empty(providers):
+    providers(StubProvider("primary", error=RuntimeError("down")), StubProvider("secondary", response={}),
+              chain=["secondary"], hedge_delay=0.05)
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {}
+
+
+async def test_ejected_provider_is_skipped(providers):
+    stubs = providers(StubProvider("primary", error=RuntimeError("down")), StubProvider("secondary"),
+                      chain=["secondary"])
+    for _ in range(2):
+        await llm.ask_llm("prompt", {"answer": "string"})
+    assert stubs["primary"].calls == 2
+
+    assert await llm.ask_llm("prompt", {"answer": "string"}) == {"answer": "secondary"}
+    assert stubs["primary"].calls == 2
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from core import llm
+from core.config import CONFIG, LLMProviderConfig, ModelConfig, LLMFailoverConfig, CircuitBreakerConfig
+from core.utils import circuit_breaker
+from core.utils.json_stream import IncrementalJSONFieldExtractor
+from llm_providers.llm_provider import LLMProvider
+
+
+class StubProvider(LLMProvider):
+    """Provider without native streaming: relies on the base class fallback."""
+
+    def __init__(self, response=None, error=None):
+        self.response = response if response is not None else {"answer": "complete"}
+        self.error = error
+
+    async def get_completion(self, prompt, schema, model=None, temperature=0.7, max_tokens=2048, timeout=30.0, **kwargs):
+        if self.error:
+            raise self.error
+        return self.response
+
+    @classmethod
+    def get_client(cls):
+        return None
+
+    @classmethod
+    def clean_response(cls, content):
+        return json.loads(content)
+
+
+class StreamingStubProvider(StubProvider):
+    """Provider that streams its response in small chunks."""
+
+    def __init__(self, text, chunk_size=3, delay=0.0, fail_after=None):
+        super().__init__()
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.fail_after = fail_after
+
+    async def stream_completion(self, prompt, schema, model=None, temperature=0.7, max_tokens=2048, timeout=30.0, **kwargs):
+        for i in range(0, len(self.text), self.chunk_size):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("stream broke")
+            await asyncio.sleep(self.delay)
+            yield self.text[i:i + self.chunk_size]
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    stubs = {}
+
+    def install(chain=None, **named_stubs):
+        stubs.update(named_stubs)
+        names = list(named_stubs)
+        monkeypatch.setattr(CONFIG, "llm_endpoints", {
+            name: LLMProviderConfig(llm_type=name, api_key="test", models=ModelConfig(high="high", low="low"))
+            for name in names
+        })
+        monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", names[0])
+        monkeypatch.setattr(CONFIG, "llm_failover", {"low": LLMFailoverConfig(chain=chain)} if chain else {})
+
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: stubs[llm_type])
+    monkeypatch.setattr(CONFIG, "llm_circuit_breaker", CircuitBreakerConfig())
+    circuit_breaker.reset_breakers()
+    yield install
+    circuit_breaker.reset_breakers()
+
+
+async def collect(**kwargs):
+    updates = []
+    async for update in llm.ask_llm_stream("prompt", {"summary": "string"}, **kwargs):
+        updates.append(update)
+    return updates
+
+
+def test_extractor_handles_arbitrary_chunking():
+    expected = {"score": 72, "description": "Says \"hi\"\nthen é and \U0001F600", "tags": ["a", "b}"], "ok": True}
+    text = "```json\n" + json.dumps(expected, indent=2) + "\n```"
+    for _ in range(50):
+        extractor = IncrementalJSONFieldExtractor()
+        streamed = ""
+        position = 0
+        while position < len(text):
+            size = random.randint(1, 8)
+            for update in extractor.feed(text[position:position + size]):
+                if update.name == "description":
+                    streamed += update.delta
+            position += size
+        assert extractor.fields == expected
+        assert streamed == expected["description"]
+        assert extractor.done
+
+
+def test_extractor_reports_score_before_rest_of_object():
+    extractor = IncrementalJSONFieldExtractor()
+    updates = extractor.feed('{"score": 12, "description": "a long')
+    assert updates[0].name == "score" and updates[0].complete and updates[0].value == 12
+    assert updates[1].name == "description" and updates[1].delta == "a long" and not updates[1].complete
+    assert extractor.partial("description") == "a long"
+
+
+async def test_streams_string_field_incrementally(providers):
+    providers(primary=StreamingStubProvider('{"summary": "The quick brown fox"}', chunk_size=4))
+    updates = await collect()
+    deltas = [u.delta for u in updates if u.name == "summary" and u.delta]
+    assert len(deltas) > 1
+    assert "".join(deltas) == "The quick brown fox"
+    assert updates[-1].complete and updates[-1].value == "The quick brown fox"
+
+
+async def test_non_streaming_provider_falls_back_to_single_chunk(providers):
+    providers(primary=StubProvider(response={"summary": "all at once"}))
+    updates = await collect()
+    assert [u.value for u in updates if u.complete] == ["all at once"]
+
+
+async def test_fails_over_before_first_chunk(providers):
+    providers(chain=["backup"], primary=StubProvider(error=RuntimeError("down")),
+              backup=StreamingStubProvider('{"summary": "from backup"}'))
+    updates = await collect()
+    assert updates[-1].value == "from backup"
+
+
+async def test_does_not_fail_over_after_partial_output(providers):
+    providers(chain=["backup"], primary=StreamingStubProvider('{"summary": "partial answer"}', chunk_size=4, fail_after=20),
+              backup=StreamingStubProvider('{"summary": "from backup"}'))
+    updates = await collect()
+    assert "".join(u.delta for u in updates) == "partial"
+    assert not any(u.complete for u in updates)
+
+
+async def test_stream_respects_overall_timeout(providers):
+    providers(primary=StreamingStubProvider('{"summary": "very slow output"}', chunk_size=1, delay=0.05))
+    updates = await collect(timeout=0.2)
+    assert not any(u.complete for u in updates)
+
+
+async def test_empty_stream_reports_failure_to_half_open_breaker(providers):
+    providers(primary=StreamingStubProvider(""))
+    breaker = llm._provider_breaker("primary")
+    for _ in range(5):
+        breaker.record_failure(RuntimeError("down"))
+    breaker._opened_at = 0
+    assert await collect() == []
+    # The trial call failed, so the breaker opens again rather than waiting on its slot
+    assert breaker.state == circuit_breaker.CircuitBreaker.OPEN
+
+
+async def test_streams_count_as_llm_calls_in_flight(providers):
+    providers(primary=StreamingStubProvider('{"summary": "The quick brown fox"}', chunk_size=4))
+    depths = [llm.llm_queue_depth() async for _ in llm.ask_llm_stream("prompt", {"summary": "string"})]
+    assert depths and set(depths) == {1}
+    assert llm.llm_queue_depth() == 0
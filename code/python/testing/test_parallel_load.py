@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from core import retriever
+from core.config import CONFIG, RetrievalProviderConfig
+from data_loading.parallel_load import IngestionOrchestrator, SharedRateLimiter
+
+
+def write_site(path, count, version=1):
+    lines = []
+    for i in range(count):
+        url = f"https://{path.stem}.example/{i}"
+        markup = json.dumps({"@context": "https://schema.org", "@type": "Recipe", "url": url,
+                             "name": f"{path.stem} {i} v{version if i == 0 else 1}"})
+        lines.append(f"{url}\t{markup}\n")
+    path.write_text("".join(lines))
+
+
+@pytest.fixture
+async def local_qdrant(tmp_path, monkeypatch):
+    """Writes go to a local Qdrant collection, and the workers keep their files in tmp_path."""
+    monkeypatch.setitem(CONFIG.retrieval_endpoints, "qdrant_test", RetrievalProviderConfig(
+        db_type="qdrant", enabled=True, index_name="test", database_path=str(tmp_path / "db"),
+    ))
+    monkeypatch.setattr(CONFIG, "write_endpoint", "qdrant_test")
+    monkeypatch.setenv("NLWEB_OUTPUT_DIR", str(tmp_path / "output"))
+    monkeypatch.setattr(retriever, "_client_cache", {})
+    client = await retriever.get_vector_db_client().get_client("qdrant_test")
+    yield await client._get_qdrant_client()
+    await (await client._get_qdrant_client()).close()
+
+
+def test_rate_limit_is_shared():
+    limiter = SharedRateLimiter(100)
+    assert limiter.reserve(50) == 0
+    assert limiter.reserve(100) == pytest.approx(0.5, abs=0.05)
+    assert limiter.reserve(10) == pytest.approx(1.5, abs=0.05)
+
+
+async def test_loads_files_in_parallel_with_retries_and_summary(local_qdrant, tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    for name, count in (("pasta", 30), ("soup", 12), ("bread", 5)):
+        write_site(data / f"{name}.txt", count)
+    (data / "notes.md").write_text("not loaded")
+
+    files = IngestionOrchestrator.find_files([str(data), str(tmp_path / "missing.txt")])
+    assert sorted(f.site for f in files) == ["bread", "missing", "pasta", "soup"]
+    options = dict(workers=2, batch_size=10, embed_rate=1000, write_concurrency=2, retries=1, retry_delay=0.01,
+                   database="qdrant_test", incremental=True, stub_dimensions=8, progress_interval=60)
+    summary = await IngestionOrchestrator(files, **options).run()
+
+    totals = summary["totals"]
+    assert (totals["succeeded"], totals["failed"], totals["documents"]) == (3, 1, 47)
+    assert totals["embedded"] == totals["uploaded"] == 47
+    by_site = {f["site"]: f for f in summary["files"]}
+    assert by_site["missing"]["status"] == "failed" and by_site["missing"]["attempts"] == 2
+    assert by_site["pasta"]["status"] == "done" and by_site["pasta"]["attempts"] == 1
+    json.dumps(summary)
+
+    assert (await local_qdrant.count("test")).count == 47
+
+    # Loading again only embeds what changed, and deletes what is gone
+    write_site(data / "pasta.txt", 28, version=2)
+    files = IngestionOrchestrator.find_files([str(data)])
+    summary = await IngestionOrchestrator(files, **options).run()
+    assert summary["totals"]["embedded"] == 1 and summary["totals"]["deleted"] == 2
+    assert (await local_qdrant.count("test")).count == 45
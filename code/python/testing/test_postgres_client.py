@@ -0,0 +1,184 @@
+"""
+Tests for the PostgreSQL client's SQL, COPY loader and index management.
+
+The integration tests run against a local Postgres with the pgvector extension, given as
+    NLWEB_TEST_POSTGRES_URL="postgresql://localhost:5432/nlweb_test?user=postgres&password=postgres"
+They create and drop their own table, and are skipped if the variable is not set.
+"""
+
+import json
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("psycopg_pool")
+pytest.importorskip("pgvector")
+
+from core.config import CONFIG, RetrievalProviderConfig, VectorIndexConfig
+from retrieval_providers.postgres_client import PgVectorClient
+
+POSTGRES_URL = os.environ.get("NLWEB_TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(table="documents", url="postgresql://localhost:5432/nlweb?user=nlweb", **settings):
+        index = VectorIndexConfig(**settings.pop("index", {}))
+        monkeypatch.setitem(CONFIG.retrieval_endpoints, "postgres_test", RetrievalProviderConfig(
+            db_type="postgres", enabled=True, api_endpoint=url, api_key="secret",
+            index_name=table, index=index, **settings
+        ))
+        return PgVectorClient("postgres_test")
+    return make
+
+
+def test_search_sql_is_fixed_per_metric_and_filter(make_client):
+    client = make_client()
+    filtered = client._search_sql("cosine", True)
+    assert filtered == client._search_sql("cosine", True)
+    assert "site = ANY(%s)" in filtered and "<=>" in filtered
+    assert "schema_json::text" in filtered
+    assert "WHERE" not in client._search_sql("euclidean", False)
+    assert "<->" in client._search_sql("euclidean", False)
+
+
+def test_search_settings_use_config_unless_overridden(make_client):
+    client = make_client(index={"search_ef": 64, "ivfflat_probes": 4})
+    assert client._search_settings() == [("hnsw.ef_search", "64"), ("ivfflat.probes", "4")]
+    assert client._search_settings(ef_search=200) == [("hnsw.ef_search", "200"), ("ivfflat.probes", "4")]
+    assert client._search_settings(exact=True) == [("enable_indexscan", "off")]
+    assert make_client()._search_settings() == []
+
+
+def test_vector_index_sql(make_client):
+    client = make_client(index={"hnsw_m": 24, "hnsw_ef_construct": 128})
+    sql = client._vector_index_sql("idx", "hnsw", "inner_product")
+    assert sql == ("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx ON documents USING hnsw "
+                   "(embedding vector_ip_ops) WITH (m = 24, ef_construction = 128)")
+    sql = client._vector_index_sql("idx", "ivfflat", lists=50, concurrently=False)
+    assert sql.endswith("USING ivfflat (embedding vector_cosine_ops) WITH (lists = 50)")
+    with pytest.raises(ValueError):
+        client._vector_index_sql("idx", "diskann")
+
+
+def test_ivfflat_lists_follow_row_count(make_client):
+    client = make_client()
+    assert client._ivfflat_lists(0) == 1
+    assert client._ivfflat_lists(500_000) == 500
+    assert client._ivfflat_lists(4_000_000) == 2000
+    assert make_client(index={"ivfflat_lists": 64})._ivfflat_lists(500_000) == 64
+
+
+def test_pool_settings_come_from_config(make_client):
+    client = make_client(pool_min_size=2, pool_max_size=32, prepare_statements=False)
+    assert client.endpoint_config.pool_min_size == 2
+    assert client.endpoint_config.pool_max_size == 32
+    assert client.prepare_statements is False
+
+
+def document(i, vector, site="site1"):
+    url = f"https://example.com/{i}"
+    return {"id": url, "url": url, "name": f"Item {i}", "site": site,
+            "schema_json": json.dumps({"@type": "Thing", "name": f"Item {i}"}), "embedding": vector}
+
+
+@pytest.fixture
+async def pg_client(make_client):
+    if not POSTGRES_URL:
+        pytest.skip("NLWEB_TEST_POSTGRES_URL is not set")
+    client = make_client(table=f"test_docs_{uuid.uuid4().hex[:8]}", url=POSTGRES_URL,
+                         pool_max_size=4, index={"hnsw_m": 8, "hnsw_ef_construct": 32})
+    client.api_key = client.password = client.pg_raw_config.get("password")
+
+    async def _create(conn):
+        async with conn.cursor() as cur:
+            await cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await cur.execute(f"""
+                CREATE TABLE {client.table_name} (
+                    id TEXT PRIMARY KEY, url TEXT NOT NULL, name TEXT NOT NULL,
+                    schema_json JSONB NOT NULL, site TEXT NOT NULL, embedding vector(3) NOT NULL
+                )""")
+        await conn.commit()
+
+    await client._execute_with_retry(_create)
+    yield client
+
+    async def _drop(conn):
+        async with conn.cursor() as cur:
+            await cur.execute(f"DROP TABLE IF EXISTS {client.table_name}")
+        await conn.commit()
+
+    await client._execute_with_retry(_drop)
+    await client.close()
+
+
+async def test_copy_upload_and_search(pg_client):
+    documents = [document(i, [1.0, i / 10, 0.0], site=f"site{i % 2}") for i in range(25)]
+    # A later document with the same id replaces the earlier one
+    documents.append(dict(document(3, [0.0, 0.0, 1.0], site="site1"), name="Updated"))
+    assert await pg_client.upload_documents(documents, batch_size=10) == 25
+
+    results = await pg_client.search_by_vector([0.0, 0.0, 1.0], "site1", num_results=3)
+    url, schema_json, name, site = results[0]
+    assert (url, name, site) == ("https://example.com/3", "Updated", "site1")
+    assert json.loads(schema_json) == {"@type": "Thing", "name": "Item 3"}
+    assert all(result[3] == "site1" for result in results)
+
+    # Re-uploading updates in place
+    assert await pg_client.upload_documents(documents[:5]) == 5
+    everything = await pg_client.search_by_vector([1.0, 0.0, 0.0], "all", num_results=100, ef_search=100)
+    assert len(everything) == 25
+
+    # Deleting by id only removes the site's own documents
+    ids = [documents[i]["id"] for i in (1, 2, 4)]
+    assert await pg_client.delete_documents_by_ids("site1", ids) == 1
+    everything = await pg_client.search_by_vector([1.0, 0.0, 0.0], "all", num_results=100, ef_search=100)
+    assert len(everything) == 24
+
+    # A document stored under another ID than the current one of its URL is a replaced copy
+    await pg_client.upload_documents([dict(documents[5], id="old-5"), dict(documents[6], id="old-6")])
+    assert await pg_client.delete_replaced_documents("site1", {documents[5]["url"]: documents[5]["id"]}) == 1
+    everything = await pg_client.search_by_vector([1.0, 0.0, 0.0], "all", num_results=100, ef_search=100)
+    assert [result[0] for result in everything].count(documents[5]["url"]) == 1
+    assert len(everything) == 25
+
+
+async def test_index_management(pg_client):
+    await pg_client.upload_documents([document(i, [1.0, i / 10, (i % 3) / 3]) for i in range(50)])
+
+    name = await pg_client.create_vector_index("hnsw")
+    assert [index["method"] for index in await pg_client.list_vector_indexes()] == ["hnsw"]
+
+    # Rebuilding as IVFFlat drops the HNSW index once the new one is built
+    ivfflat_name = await pg_client.create_vector_index("ivfflat", replace=True)
+    indexes = await pg_client.list_vector_indexes()
+    assert [(index["name"], index["method"]) for index in indexes] == [(ivfflat_name, "ivfflat")]
+    assert "lists='1'" in indexes[0]["definition"]
+
+    # Rebuilding the same index builds it under a new name and renames it once the old one is gone
+    assert await pg_client.create_vector_index("ivfflat", replace=True) == ivfflat_name
+    assert [index["name"] for index in await pg_client.list_vector_indexes()] == [ivfflat_name]
+
+    results = await pg_client.search_by_vector([1.0, 0.5, 0.0], "site1", num_results=5, probes=1)
+    exact = await pg_client.search_by_vector([1.0, 0.5, 0.0], "site1", num_results=5, exact=True)
+    assert len(results) == len(exact) == 5
+
+    await pg_client.drop_vector_index(ivfflat_name)
+    assert await pg_client.list_vector_indexes() == []
+    with pytest.raises(ValueError):
+        await pg_client.drop_vector_index(name)
+
+
+async def test_search_many_runs_one_query_per_batch(pg_client):
+    await pg_client.upload_documents([document(i, [1.0, i / 10, 0.0], site=f"site{i % 2}") for i in range(20)])
+    vectors = [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+
+    batched = await pg_client.search_many_by_vector(vectors, "site1", num_results=4)
+    single = [await pg_client.search_by_vector(vector, "site1", num_results=4) for vector in vectors]
+    assert [[r[0] for r in results] for results in batched] == [[r[0] for r in results] for results in single]
+    assert all(len(results) == 4 for results in batched)
+
+    everywhere = await pg_client.search_many(["a", "b"], "all", num_results=30, embeddings=vectors[:2])
+    assert [len(results) for results in everywhere] == [20, 20]
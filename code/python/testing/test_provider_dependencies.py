@@ -0,0 +1,53 @@
+import subprocess
+
+import pytest
+
+from core import llm, retriever
+from core.config import CONFIG, LLMFailoverConfig, LLMProviderConfig, ModelConfig
+from core.utils import dependencies
+from core.utils.dependencies import MissingDependencyError, is_module_available, require_packages
+
+
+@pytest.fixture(autouse=True)
+def no_pip(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("packages must not be installed at runtime")
+    monkeypatch.setattr(subprocess, "check_call", fail)
+    monkeypatch.setattr(dependencies, "_verified", set())
+
+
+def test_availability_is_checked_without_importing():
+    assert is_module_available("json")
+    assert not is_module_available("no_such_package_nlweb")
+    assert not is_module_available("no_such_package_nlweb.submodule")
+
+
+def test_missing_packages_fail_fast():
+    with pytest.raises(MissingDependencyError) as error:
+        require_packages("llm", "fake", {"json": "json", "no-such-package>=1.0": "no_such_package_nlweb"})
+    assert error.value.requirements == ["no-such-package>=1.0"]
+    assert "core.preflight --install" in str(error.value)
+
+    require_packages("llm", "fake", {"json": "json"})
+    assert ("llm", "fake") in dependencies._verified
+
+
+def test_llm_provider_with_missing_packages_is_not_installed(monkeypatch):
+    monkeypatch.setitem(llm._llm_type_packages, "ollama", {"ollama-missing": "no_such_package_nlweb"})
+    monkeypatch.delitem(llm._loaded_providers, "ollama", raising=False)
+    with pytest.raises(MissingDependencyError):
+        llm._get_provider("ollama")
+    assert "ollama" not in llm._loaded_providers
+
+
+def test_only_enabled_providers_are_loaded(monkeypatch):
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        name: LLMProviderConfig(llm_type=llm_type, api_key="test", models=ModelConfig(high="h", low="l"))
+        for name, llm_type in [("primary", "openai"), ("backup", "ollama"), ("unused", "anthropic")]
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "primary")
+    monkeypatch.setattr(CONFIG, "llm_failover", {"low": LLMFailoverConfig(chain=["primary", "backup"])})
+    assert llm.enabled_llm_types() == ["openai", "ollama"]
+
+    with pytest.raises(ValueError, match="Unsupported database type"):
+        retriever._load_client_class("no_such_db")
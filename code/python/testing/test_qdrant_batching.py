@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from core.config import CONFIG, RetrievalProviderConfig
+from retrieval_providers.qdrant import QdrantVectorClient
+
+VECTOR_SIZE = 8
+
+
+@pytest.fixture
+async def client(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG.retrieval_endpoints, "qdrant_test", RetrievalProviderConfig(
+        db_type="qdrant", enabled=True, index_name="test", database_path=str(tmp_path / "db"),
+        upsert_batch_size=7, upsert_concurrency=3,
+    ))
+    client = QdrantVectorClient("qdrant_test")
+    yield client
+    await (await client._get_qdrant_client()).close()
+
+
+def documents(count, rng):
+    return [{
+        "url": f"https://example.com/{i}", "name": f"Item {i}", "site": f"site{i % 2}",
+        "schema_json": '{"name": "Item %d"}' % i, "embedding": [rng.random() for _ in range(VECTOR_SIZE)],
+    } for i in range(count)]
+
+
+async def test_concurrent_upload_and_batch_search(client):
+    rng = random.Random(0)
+    assert await client.upload_documents(documents(50, rng)) == 50
+    qdrant = await client._get_qdrant_client()
+    assert (await qdrant.count("test")).count == 50
+
+    vectors = [[rng.random() for _ in range(VECTOR_SIZE)] for _ in range(3)]
+    results = await client.search_vectors_batch(vectors, "site1", num_results=5)
+    assert [len(r) for r in results] == [5, 5, 5]
+    assert all(item.site == "site1" and item.score is not None for r in results for item in r)
+
+    # With precomputed embeddings, search_many only runs the batch search
+    many = await client.search_many(["a", "b", "c"], "site1", num_results=5, embeddings=vectors)
+    assert [[item.url for item in r] for r in many] == [[item.url for item in r] for r in results]
+
+
+async def test_collection_existence_is_remembered(client, monkeypatch):
+    rng = random.Random(1)
+    await client.upload_documents(documents(3, rng))
+    qdrant = await client._get_qdrant_client()
+    checks = []
+    original = qdrant.collection_exists
+
+    async def counting_collection_exists(name):
+        checks.append(name)
+        return await original(name)
+    monkeypatch.setattr(qdrant, "collection_exists", counting_collection_exists)
+
+    for _ in range(3):
+        assert await client.ensure_collection_exists("test", VECTOR_SIZE)
+    assert checks == []
+
+    await qdrant.delete_collection("test")
+    with pytest.raises(Exception):
+        await client.search_vectors_batch([[0.5] * VECTOR_SIZE], "all")
+    assert await client.search_vectors_batch([[0.5] * VECTOR_SIZE], "all") == [[]]
+    assert checks
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.http import models
+
+from core.config import CONFIG, RetrievalProviderConfig, VectorIndexConfig
+from retrieval_providers.qdrant import QdrantVectorClient
+
+
+class FakeQdrant:
+    """Records the collection changes a client makes to a server collection."""
+
+    def __init__(self, payload_schema, hnsw_m, quantization_config):
+        self.info = SimpleNamespace(
+            payload_schema=payload_schema,
+            config=SimpleNamespace(hnsw_config=SimpleNamespace(m=hnsw_m, ef_construct=100),
+                                   quantization_config=quantization_config),
+        )
+        self.calls = []
+
+    async def get_collection(self, name):
+        return self.info
+
+    async def create_payload_index(self, collection_name, field_name, field_schema):
+        self.calls.append(("index", field_name))
+
+    async def update_collection(self, collection_name, **update):
+        self.calls.append(("update", update))
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(**index):
+        monkeypatch.setitem(CONFIG.retrieval_endpoints, "qdrant_server", RetrievalProviderConfig(
+            db_type="qdrant", enabled=True, api_endpoint="http://qdrant:6333", index=VectorIndexConfig(**index)
+        ))
+        return QdrantVectorClient("qdrant_server")
+    return make
+
+
+def test_search_params_follow_index_settings(make_client):
+    client = make_client(search_ef=128, quantization="int8", quantization_oversampling=2.0)
+    assert isinstance(client._quantization_config(), models.ScalarQuantization)
+    params = client._search_params()
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore and params.quantization.oversampling == 2.0
+
+    assert make_client()._search_params() is None
+    with pytest.raises(ValueError):
+        make_client(quantization="int4")._quantization_config()
+
+
+async def test_migration_adds_missing_indexes_and_updates_settings(make_client, monkeypatch):
+    client = make_client(payload_indexes=["site", "url"], hnsw_m=32, quantization="int8")
+    qdrant = FakeQdrant({"site": "keyword"}, hnsw_m=16, quantization_config=None)
+    monkeypatch.setattr(client, "_get_qdrant_client", lambda: _return(qdrant))
+
+    assert await client.migrate_collection("docs")
+    assert qdrant.calls[0] == ("index", "url")
+    update = qdrant.calls[1][1]
+    assert update["hnsw_config"].m == 32
+    assert isinstance(update["quantization_config"], models.ScalarQuantization)
+
+    in_sync = FakeQdrant({"site": "keyword", "url": "keyword"}, hnsw_m=32,
+                         quantization_config=client._quantization_config())
+    monkeypatch.setattr(client, "_get_qdrant_client", lambda: _return(in_sync))
+    assert not await client.migrate_collection("docs")
+    assert in_sync.calls == []
+
+
+async def test_existing_collections_are_only_migrated_on_request(make_client, monkeypatch):
+    client = make_client(payload_indexes=["site", "url"], hnsw_m=32)
+    qdrant = FakeQdrant({"site": "keyword"}, hnsw_m=16, quantization_config=None)
+    monkeypatch.setattr(client, "_get_qdrant_client", lambda: _return(qdrant))
+    monkeypatch.setattr(client, "collection_exists", lambda name=None: _return(True))
+
+    # Searches and uploads make sure the collection exists, without changing its settings
+    assert await client.ensure_collection_exists("docs")
+    assert qdrant.calls == []
+
+
+async def _return(value):
+    return value
@@ -0,0 +1,147 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from core import embedding, llm
+from core.baseHandler import NLWebHandler
+from core.config import CONFIG, LLMProviderConfig, ModelConfig, CircuitBreakerConfig
+from core.retriever import VectorDBClient
+from core.utils import cancellation, circuit_breaker
+from core.utils.cancellation import CancellationToken, RequestCancelledError, cancellation_scope
+from webserver.aiohttp_streaming_wrapper import AioHttpStreamingWrapper
+from webserver.routes.api import setup_api_routes
+
+SCHEMA = {"score": "integer between 0 and 100"}
+
+
+class SlowStub:
+    """Stand-in for an LLM provider, embedding provider or retrieval backend."""
+
+    def __init__(self, delay=5.0, result=None):
+        self.delay = delay
+        self.result = result
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self, *args, **kwargs):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.result
+
+    async def get_completion(self, prompt, schema, model=None, timeout=None, max_tokens=None):
+        return await self.call()
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    llm_stub = SlowStub(result={"score": 90})
+    embedding_stub = SlowStub(result=[0.1, 0.2])
+    retrieval_stub = SlowStub(result=[])
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        "stub": LLMProviderConfig(llm_type="stub", api_key="test", models=ModelConfig(high="high", low="low"))
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "stub")
+    monkeypatch.setattr(CONFIG, "llm_failover", {})
+    monkeypatch.setattr(CONFIG, "llm_circuit_breaker", CircuitBreakerConfig())
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: llm_stub)
+    monkeypatch.setattr(embedding, "_get_embedding", embedding_stub.call)
+    monkeypatch.setattr(VectorDBClient, "_search", lambda self, *args, **kwargs: retrieval_stub.call())
+    circuit_breaker.reset_breakers()
+    cancellation.reset_metrics()
+    yield llm_stub, embedding_stub, retrieval_stub
+    circuit_breaker.reset_breakers()
+    cancellation.reset_metrics()
+
+
+async def test_cancel_aborts_in_flight_calls_and_skips_new_ones(stubs):
+    llm_stub, embedding_stub, retrieval_stub = stubs
+    client = VectorDBClient.__new__(VectorDBClient)
+    token = CancellationToken()
+
+    with cancellation_scope(token):
+        calls = [asyncio.create_task(llm.ask_llm("prompt", SCHEMA, timeout=30)) for _ in range(5)]
+        calls.append(asyncio.create_task(embedding.get_embedding("query")))
+        calls.append(asyncio.create_task(client.search("query", "site")))
+        await asyncio.sleep(0.05)
+        token.cancel("client disconnected")
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        with pytest.raises(RequestCancelledError):
+            await llm.ask_llm("prompt", SCHEMA)
+
+    await asyncio.sleep(0)
+    assert (llm_stub.cancelled, embedding_stub.cancelled, retrieval_stub.cancelled) == (5, 1, 1)
+    assert llm_stub.started == 5
+    assert cancellation.wasted_work_avoided() == {
+        "requests_cancelled": 1,
+        "llm_calls_aborted": 5,
+        "embedding_calls_aborted": 1,
+        "retrieval_calls_aborted": 1,
+        "llm_calls_skipped": 1,
+    }
+
+
+async def test_calls_outside_a_request_are_unaffected(stubs):
+    llm_stub, _, _ = stubs
+    llm_stub.delay = 0.01
+    assert await llm.ask_llm("prompt", SCHEMA) == {"score": 90}
+
+
+@pytest.fixture
+async def ask_server(monkeypatch, stubs):
+    """The /ask route, with a handler that streams one message and then ranks items like Ranking.do."""
+    llm_stub = stubs[0]
+    handlers = []
+
+    async def run_query(self):
+        handlers.append(self)
+        await self.send_message({"message_type": "result_batch", "results": []})
+        rankings = [llm.ask_llm(f"Rank item {i}", SCHEMA, timeout=30) for i in range(20)]
+        await asyncio.gather(*rankings, return_exceptions=True)
+        await llm.ask_llm("Summarize", SCHEMA, timeout=30)
+        return self.return_value
+
+    monkeypatch.setattr(NLWebHandler, "runQuery", run_query)
+    monkeypatch.setattr(AioHttpStreamingWrapper, "DISCONNECT_POLL_INTERVAL", 0.02)
+    app = web.Application()
+    setup_api_routes(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/ask", llm_stub, handlers
+    await runner.cleanup()
+
+
+async def test_disconnect_mid_stream_cancels_llm_work(ask_server):
+    url, llm_stub, handlers = ask_server
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params={"query": "spicy noodles", "site": "example"}) as response:
+            async for line in response.content:
+                if line.startswith(b"data:") and b"result_batch" in line:
+                    break
+            await asyncio.sleep(0.05)
+            assert llm_stub.started == 20
+        # Leaving the block closes the connection mid-stream
+
+    for _ in range(100):
+        if llm_stub.cancelled == 20:
+            break
+        await asyncio.sleep(0.02)
+
+    assert llm_stub.cancelled == 20
+    # The summary call after ranking is never started
+    assert llm_stub.started == 20
+    assert not handlers[0].connection_alive_event.is_set()
+    metrics = cancellation.wasted_work_avoided()
+    assert metrics["llm_calls_aborted"] == 20
+    assert metrics["llm_calls_skipped"] == 1
@@ -0,0 +1,149 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import core.ranking as ranking
+import core.retriever as retriever
+from core.config import CONFIG, RetrievalProviderConfig
+from core.ranking import Ranking
+from core.retriever import SearchResults, VectorDBClient
+from core.utils import circuit_breaker
+from core.utils.latency import LatencyTracker
+
+
+def item(url, site="site1"):
+    return [url, json.dumps({"@type": "Recipe", "name": url}), url, site]
+
+
+class StubClient:
+    """An endpoint that answers after a delay, noting whether its request was cancelled."""
+
+    def __init__(self, urls, delay=0.0):
+        self.urls = urls
+        self.delay = delay
+        self.cancelled = False
+
+    async def get_sites(self):
+        return None
+
+    async def search(self, query, site, num_results=50, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return [item(url) for url in self.urls]
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    def make(clients, replicas=None):
+        replicas = replicas or {}
+        endpoints = {
+            name: RetrievalProviderConfig(db_type="qdrant", enabled=name not in replicas.values(),
+                                          database_path=str(tmp_path / name),
+                                          replicas=[replicas[name]] if name in replicas else [])
+            for name in clients
+        }
+        monkeypatch.setattr(CONFIG, "retrieval_endpoints", endpoints)
+        monkeypatch.setattr(CONFIG, "write_endpoint", None)
+        monkeypatch.setattr(CONFIG.sharding, "enabled", False)
+
+        async def get_client(self, endpoint_name):
+            return clients[endpoint_name]
+        monkeypatch.setattr(VectorDBClient, "get_client", get_client)
+        return VectorDBClient()
+
+    monkeypatch.setattr(retriever, "_endpoint_latency", LatencyTracker())
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    fan_out = CONFIG.retrieval_fan_out
+    for name, value in (("deadline", 0.05), ("endpoint_timeout", 2.0), ("late_results_enabled", True),
+                        ("hedge_enabled", True), ("hedge_default_delay", 0.05), ("hedge_min_delay", 0.01)):
+        monkeypatch.setattr(fan_out, name, value)
+    return make
+
+
+async def test_deadline_returns_partial_results_and_late_ones_follow(make_client):
+    client = make_client({"fast": StubClient(["https://a", "https://b"]),
+                          "slow": StubClient(["https://b", "https://c"], delay=0.3)})
+
+    results = await client.search("pasta", "site1", num_results=10)
+
+    assert [r.url for r in results] == ["https://a", "https://b"]
+    assert not results.late_results.done()
+    # The slow endpoint's results arrive later, without the ones already returned
+    assert [r.url for r in await results.late_results] == ["https://c"]
+
+
+async def test_slow_endpoints_are_hedged_to_their_replica(make_client):
+    primary = StubClient(["https://primary"], delay=1.0)
+    replica = StubClient(["https://replica"])
+    client = make_client({"primary": primary, "primary_replica": replica}, replicas={"primary": "primary_replica"})
+    CONFIG.retrieval_fan_out.deadline = 0.5
+
+    results = await client.search("pasta", "site1", num_results=10)
+
+    assert [r.url for r in results] == ["https://replica"]
+    assert results.late_results is None
+    await asyncio.sleep(0)
+    # The request that lost the race is cancelled
+    assert primary.cancelled
+
+
+class StubHandler:
+    def __init__(self):
+        self.connection_alive_event = asyncio.Event()
+        self.connection_alive_event.set()
+        self.pre_checks_done_event = asyncio.Event()
+        self.pre_checks_done_event.set()
+        self.state = SimpleNamespace(should_abort_fast_track=lambda: False)
+        self.site = "site1"
+        self.item_type = "{http://schema.org/}Recipe"
+        self.required_item_type = None
+        self.query_params = {}
+        self.query_id = "q1"
+        self.final_ranked_answers = []
+        self.messages = []
+
+    async def send_message(self, message):
+        self.messages.append(message)
+
+
+async def test_late_results_are_ranked_in_a_second_wave(monkeypatch):
+    ranked = []
+
+    async def ask_llm(prompt, ans_struc, **kwargs):
+        ranked.append(json.loads(prompt)["name"][0])
+        # Good enough to show, but not to be sent early: results are only sent by the final sends
+        return {"score": 55, "description": prompt}
+    monkeypatch.setattr(ranking, "ask_llm", ask_llm)
+    monkeypatch.setattr(ranking, "fill_prompt", lambda prompt_str, handler, pr_dict: pr_dict["item.description"])
+    monkeypatch.setattr(Ranking, "get_ranking_prompt", lambda self: Ranking.RANKING_PROMPT)
+
+    late_arrived = asyncio.Event()
+
+    async def late_results():
+        await late_arrived.wait()
+        # The late wave can repeat items of the first one
+        return [item("https://b"), item("https://c")]
+
+    handler = StubHandler()
+    items = SearchResults([item("https://a"), item("https://b")], late_results=asyncio.create_task(late_results()))
+    ranking_task = asyncio.create_task(Ranking(handler, items, Ranking.REGULAR_TRACK).do())
+
+    # The first wave is sent without waiting for the late results
+    async def first_batch():
+        while not handler.messages:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(first_batch(), timeout=1)
+    assert not ranking_task.done()
+    assert {r["url"] for m in handler.messages for r in m["results"]} == {"https://a", "https://b"}
+
+    late_arrived.set()
+    await ranking_task
+    assert sorted(ranked) == ["https://a", "https://b", "https://c"]
+    sent = [r["url"] for m in handler.messages for r in m["results"]]
+    assert sorted(sent) == ["https://a", "https://b", "https://c"]
+    assert {r["url"] for r in handler.final_ranked_answers} == {"https://a", "https://b", "https://c"}
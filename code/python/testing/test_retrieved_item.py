@@ -0,0 +1,66 @@
+import json
+
+from data_loading.db_load_utils import prepare_documents_from_json
+from core.config import CONFIG
+from core.retriever import VectorDBClient
+from core.utils.json_utils import ranking_text
+from core.utils.retrieved_item import RetrievedItem
+
+
+def result(url, schema, site="example"):
+    return [url, json.dumps(schema), schema.get("name", ""), site]
+
+
+def test_item_parses_once_and_unpacks_like_a_list():
+    item = RetrievedItem.from_result(result("https://a", {"@type": "Recipe", "name": "A"}))
+    assert item.schema is item.schema
+    url, json_str, name, site = item
+    assert (url, name, site, item[1]) == ("https://a", "A", "example", json_str)
+    assert len(item) == 4
+
+    item = RetrievedItem.from_result(["https://b", [{"name": "B"}, {"name": "C"}], "B", "example"])
+    assert item.schema_object == {"name": "B"}
+    assert json.loads(item.json_str) == item.schema
+
+
+def test_aggregation_interleaves_endpoints_and_merges_duplicates():
+    client = VectorDBClient.__new__(VectorDBClient)
+    aggregated = client._aggregate_results({
+        "first": [result("https://a", {"name": "A", "cookTime": "PT10M"}), result("https://b", {"name": "B"})],
+        "second": [RetrievedItem.from_result(result("https://c", {"name": "C"}), score=0.9),
+                   result("https://a", {"name": "A", "prepTime": "PT5M"})],
+    })
+    assert [item.url for item in aggregated] == ["https://a", "https://c", "https://b"]
+    assert all(isinstance(item, RetrievedItem) for item in aggregated)
+    assert aggregated[0].schema == {"name": "A", "cookTime": "PT10M", "prepTime": "PT5M"}
+    assert json.loads(aggregated[0].json_str) == aggregated[0].schema
+    assert aggregated[1].score == 0.9
+
+
+def test_ranking_text_is_stored_at_ingestion_and_used_as_is():
+    recipe = {"@type": "Recipe", "name": "Noodles", "image": "https://example.com/1.jpg",
+              "recipeIngredient": ["noodles"] * 1000}
+    documents, _ = prepare_documents_from_json("https://a", json.dumps(recipe), "example")
+    text = documents[0]["ranking_text"]
+    assert text == ranking_text(recipe)
+    assert "image" not in text
+
+    stored = RetrievedItem("https://a", documents[0]["schema_json"], "Noodles", "example", ranking_text="stored")
+    assert stored.text_for_ranking() == "stored"
+    computed = RetrievedItem.from_result(result("https://b", {"@type": "Recipe", "name": "Soup", "author": "A"}))
+    assert json.loads(computed.text_for_ranking()) == {"@type": ["Recipe"], "name": ["Soup"]}
+
+
+def test_long_items_are_cut_by_structure_to_valid_json(monkeypatch):
+    recipe = {"@type": "Recipe", "name": "Noodles", "recipeIngredient": [f"ingredient {i}" for i in range(1000)],
+              "recipeInstructions": "Boil. " * 1000, "description": "Quick noodles"}
+    short = json.loads(ranking_text(recipe, max_tokens=100))
+    assert short["name"] == ["Noodles"] and "recipeInstructions" not in short
+    assert 0 < len(short["recipeIngredient"][0]) < 1000
+    assert short["recipeIngredient"][0][0] == "ingredient 0"
+    assert json.loads(ranking_text(recipe, max_tokens=1)) == {"@type": ["Recipe"], "name": ["Noodles"]}
+    # Arrays of items are cut too
+    assert json.loads(ranking_text([recipe] * 20, max_tokens=100))[0]["name"] == "Noodles"
+    # The budget defaults to the item.description prompt budget; without one the trimmed item is kept whole
+    monkeypatch.setattr(CONFIG.nlweb, "prompt_token_budgets", {})
+    assert len(json.loads(ranking_text(recipe))["recipeIngredient"][0]) == 1000
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+import core.retriever as retriever
+from core.config import CONFIG, RetrievalProviderConfig
+from core.retriever import VectorDBClient
+
+
+def item(url, site):
+    return [url, json.dumps({"name": url}), url, site]
+
+
+class PlainClient:
+    """A backend without multi-search, searched once per query."""
+
+    def __init__(self):
+        self.searches = []
+
+    async def get_sites(self):
+        return None
+
+    async def search(self, query, site, num_results=50, **kwargs):
+        self.searches.append(query)
+        return [item(f"https://plain/{query}/{i}", site) for i in range(num_results)]
+
+
+class NativeClient(PlainClient):
+    """A backend with multi-search, which takes precomputed embeddings."""
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.batches = []
+        self.fail = fail
+
+    async def search_many(self, queries, site, num_results=50, embeddings=None, **kwargs):
+        self.batches.append((list(queries), embeddings))
+        if self.fail:
+            raise ConnectionError("endpoint down")
+        return [[item(f"https://native/{query}", site)] for query in queries]
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    def make(clients):
+        monkeypatch.setattr(CONFIG, "retrieval_endpoints", {
+            name: RetrievalProviderConfig(db_type="qdrant", enabled=True, database_path=str(tmp_path / name))
+            for name in clients
+        })
+        monkeypatch.setattr(CONFIG, "write_endpoint", None)
+        monkeypatch.setattr(CONFIG.sharding, "enabled", False)
+        monkeypatch.setattr(CONFIG.retrieval_fan_out, "hedge_enabled", False)
+
+        async def get_client(self, endpoint_name):
+            return clients[endpoint_name]
+        monkeypatch.setattr(VectorDBClient, "get_client", get_client)
+        return VectorDBClient()
+    return make
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+
+    async def batch_get_embeddings(texts, **kwargs):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+    monkeypatch.setattr(retriever, "batch_get_embeddings", batch_get_embeddings)
+    return calls
+
+
+async def test_queries_are_embedded_once_and_sent_together(make_client, embed_calls):
+    native, plain = NativeClient(), PlainClient()
+    client = make_client({"native": native, "plain": plain})
+
+    results = await client.search_many(["pasta", "soup"], "site1", num_results=2)
+
+    assert embed_calls == [["pasta", "soup"]]
+    assert native.batches == [(["pasta", "soup"], [[5.0], [4.0]])]
+    assert sorted(plain.searches) == ["pasta", "soup"]
+    assert [{r.url for r in query_results} for query_results in results] == [
+        {"https://native/pasta", "https://plain/pasta/0"},
+        {"https://native/soup", "https://plain/soup/0"},
+    ]
+
+
+async def test_failed_endpoints_are_left_out(make_client, embed_calls):
+    client = make_client({"native": NativeClient(fail=True), "plain": PlainClient()})
+    results = await client.search_many(["pasta"], "site1", num_results=3)
+    assert [r.url for r in results[0]] == [f"https://plain/pasta/{i}" for i in range(3)]
+
+    client = make_client({"native": NativeClient(fail=True)})
+    with pytest.raises(ValueError):
+        await client.search_many(["pasta"], "site1")
+
+
+async def test_backends_without_multi_search_skip_batch_embedding(make_client, embed_calls):
+    plain = PlainClient()
+    client = make_client({"plain": plain})
+    results = await client.search_many(["a", "b", "c"], "site1", num_results=1)
+    assert embed_calls == []
+    assert [[r.url for r in query_results] for query_results in results] == [
+        ["https://plain/a/0"], ["https://plain/b/0"], ["https://plain/c/0"]
+    ]
+    assert await client.search_many([], "site1") == []
@@ -0,0 +1,224 @@
+import json
+
+import pytest
+
+from core import sharding
+from core.config import CONFIG, RetrievalProviderConfig, ShardConfig, ShardingConfig
+from core.retriever import VectorDBClient
+from core.sharding import COPYING, SWITCHED, ShardRouter, ShardingError
+
+
+def endpoints(tmp_path):
+    return {
+        "qdrant_a": RetrievalProviderConfig(db_type="qdrant", enabled=False, index_name="docs",
+                                            database_path=str(tmp_path / "db")),
+        "qdrant_b": RetrievalProviderConfig(db_type="qdrant", enabled=False, index_name="docs",
+                                            database_path=str(tmp_path / "db_b")),
+        "postgres": RetrievalProviderConfig(db_type="postgres", enabled=False, api_endpoint="postgresql://x",
+                                            api_key="secret", index_name="documents"),
+    }
+
+
+def sharding_config(tmp_path, **overrides):
+    settings = dict(
+        enabled=True,
+        shards={"main": ShardConfig("qdrant_a"), "big": ShardConfig("qdrant_a", "big_sites"),
+                "other": ShardConfig("qdrant_b")},
+        routes={"seriouseats": "big", "news-*": "other"},
+        default_shard="main",
+        state_file=str(tmp_path / "shard_routes.json"),
+        reload_interval=0.0,
+    )
+    settings.update(overrides)
+    return ShardingConfig(**settings)
+
+
+@pytest.fixture
+def router(tmp_path):
+    return ShardRouter(sharding_config(tmp_path), endpoints(tmp_path))
+
+
+def test_routes_sites_and_groups(router):
+    assert router.read_shard("seriouseats").name == "big"
+    assert router.read_shard("news-bbc").name == "other"
+    assert router.read_shard("imdb").name == "main"
+    assert router.collection_kwargs(router.shards["big"]) == {"collection_name": "big_sites"}
+    assert router.collection_kwargs(router.shards["main"]) == {}
+
+    groups = router.group_sites(["imdb", "seriouseats", "news-bbc", "news-cnn"])
+    assert {shard.name: sites for shard, sites in groups.items()} == {
+        "main": ["imdb"], "big": ["seriouseats"], "other": ["news-bbc", "news-cnn"]
+    }
+    # Only a shard with nothing but literal routes can be searched without a site filter
+    assert router.is_dedicated(router.shards["big"], ["seriouseats"])
+    assert not router.is_dedicated(router.shards["other"], ["news-bbc"])
+    assert not router.is_dedicated(router.shards["main"], ["imdb"])
+
+
+def test_invalid_routing_tables(tmp_path):
+    with pytest.raises(ShardingError):
+        ShardRouter(sharding_config(tmp_path, default_shard="missing"), endpoints(tmp_path))
+    with pytest.raises(ShardingError):
+        ShardRouter(sharding_config(tmp_path, routes={"imdb": "missing"}), endpoints(tmp_path))
+    with pytest.raises(ShardingError):
+        ShardRouter(sharding_config(tmp_path, shards={"main": ShardConfig("postgres", "other_table")}),
+                    endpoints(tmp_path))
+
+
+def test_migration_phases_are_shared_through_the_state_file(router, tmp_path):
+    other_process = ShardRouter(sharding_config(tmp_path), endpoints(tmp_path))
+
+    source, target = router.begin_migration("imdb", "big")
+    assert (source.name, target.name) == ("main", "big")
+    with pytest.raises(ShardingError):
+        router.begin_migration("imdb", "other")
+    with pytest.raises(ShardingError):
+        router.finish_migration("imdb")
+
+    other_process.refresh(force=True)
+    assert other_process.migrations["imdb"].phase == COPYING
+    assert [s.name for s in other_process.write_shards("imdb")] == ["main", "big"]
+    assert other_process.read_shard("imdb").name == "main"
+    # The shards taking part in a migration hold sites in flux
+    assert not other_process.is_dedicated(other_process.shards["big"], ["seriouseats"])
+
+    router.switch_migration("imdb")
+    other_process.refresh(force=True)
+    assert other_process.migrations["imdb"].phase == SWITCHED
+    assert [s.name for s in other_process.write_shards("imdb")] == ["big", "main"]
+    with pytest.raises(ShardingError):
+        router.abort_migration("imdb")
+
+    router.finish_migration("imdb")
+    other_process.refresh(force=True)
+    assert other_process.migrations == {}
+    assert [s.name for s in other_process.write_shards("imdb")] == ["big"]
+    assert json.loads(open(tmp_path / "shard_routes.json").read()) == {"routes": {"imdb": "big"}, "migrations": {}}
+
+    # Moving a site back to its configured shard drops the override
+    router.begin_migration("imdb", "main")
+    router.switch_migration("imdb")
+    router.finish_migration("imdb")
+    assert router.overrides == {}
+
+
+class FakeClient:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    async def upload_documents(self, documents, **kwargs):
+        self.calls.append(("upload", [doc["url"] for doc in documents], kwargs))
+        return len(documents)
+
+    async def delete_documents_by_site(self, site, **kwargs):
+        self.calls.append(("delete", site, kwargs))
+        return 1
+
+    async def search(self, query, site, num_results=50, **kwargs):
+        self.calls.append(("search", site, kwargs))
+        sites = site if isinstance(site, list) else [site]
+        return [[f"https://{s}/{self.name}", json.dumps({"name": s}), s, s] for s in sites]
+
+    async def search_all_sites(self, query, num_results=50, **kwargs):
+        self.calls.append(("search", "all", kwargs))
+        return [[f"https://all/{self.name}", "{}", "all", "all"]]
+
+    async def search_by_url(self, url, **kwargs):
+        self.calls.append(("search_by_url", url, kwargs))
+        return [url, "{}", "name", "site"] if kwargs.get("collection_name") == "big_sites" else None
+
+
+@pytest.fixture
+def sharded_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(CONFIG, "retrieval_endpoints", endpoints(tmp_path))
+    monkeypatch.setattr(CONFIG, "write_endpoint", None)
+    monkeypatch.setattr(CONFIG, "sharding", sharding_config(tmp_path))
+    monkeypatch.setattr(sharding, "_router", None)
+    monkeypatch.setattr(CONFIG.retrieval_fan_out, "hedge_enabled", False)
+
+    fakes = {name: FakeClient(name) for name in ("qdrant_a", "qdrant_b")}
+
+    async def get_client(self, endpoint_name):
+        return fakes[endpoint_name]
+    monkeypatch.setattr(VectorDBClient, "get_client", get_client)
+    return VectorDBClient(), fakes
+
+
+async def test_writes_follow_the_routes(sharded_client):
+    client, fakes = sharded_client
+    documents = [{"url": f"https://{site}/1", "site": site} for site in ("imdb", "seriouseats", "news-bbc")]
+    assert await client.upload_documents(documents) == 3
+    assert sorted(fakes["qdrant_a"].calls) == [
+        ("upload", ["https://imdb/1"], {}),
+        ("upload", ["https://seriouseats/1"], {"collection_name": "big_sites"}),
+    ]
+    assert fakes["qdrant_b"].calls == [("upload", ["https://news-bbc/1"], {})]
+
+    # While a site is moving, its writes go to both shards, but count once
+    client.router.begin_migration("imdb", "other")
+    fakes["qdrant_b"].calls.clear()
+    assert await client.upload_documents(documents[:1]) == 1
+    assert fakes["qdrant_b"].calls == [("upload", ["https://imdb/1"], {})]
+    assert await client.delete_documents_by_site("imdb") == 1
+    assert fakes["qdrant_b"].calls[-1] == ("delete", "imdb", {})
+    assert fakes["qdrant_a"].calls[-1] == ("delete", "imdb", {})
+
+
+async def test_searches_go_to_the_shards_of_the_sites(sharded_client):
+    client, fakes = sharded_client
+    results = await client.search("pasta", ["imdb", "seriouseats", "news-bbc"], num_results=10)
+    assert {item.url for item in results} == {"https://imdb/qdrant_a", "https://all/qdrant_a",
+                                              "https://news-bbc/qdrant_b"}
+    # The dedicated shard is searched without a site filter
+    assert sorted(fakes["qdrant_a"].calls, key=str) == [
+        ("search", "all", {"collection_name": "big_sites"}),
+        ("search", "imdb", {}),
+    ]
+    assert fakes["qdrant_b"].calls == [("search", "news-bbc", {})]
+
+    # Without a site, a URL is looked up in every shard
+    assert (await client.search_by_url("https://seriouseats/1"))[0] == "https://seriouseats/1"
+    assert len(fakes["qdrant_a"].calls) == 4 and len(fakes["qdrant_b"].calls) == 2
+    # With one, only in the shard of the site
+    await client.search_by_url("https://news-bbc/1", site="news-bbc")
+    assert fakes["qdrant_b"].calls[-1] == ("search_by_url", "https://news-bbc/1", {})
+    assert len(fakes["qdrant_a"].calls) == 4
+
+
+async def test_migrate_site_between_collections(tmp_path, monkeypatch):
+    pytest.importorskip("qdrant_client")
+    from data_loading.migrate_site import abort_migration, migrate_site
+    from retrieval_providers.qdrant import QdrantVectorClient
+
+    monkeypatch.setattr(CONFIG, "retrieval_endpoints", endpoints(tmp_path))
+    router = ShardRouter(sharding_config(tmp_path), CONFIG.retrieval_endpoints)
+    documents = [{
+        "url": f"https://example.com/{site}/{i}", "name": f"Item {i}", "site": site,
+        "schema_json": json.dumps({"name": f"Item {i}"}), "embedding": [1.0, i / 10, 0.5, 0.0],
+    } for site in ("imdb", "tripadvisor") for i in range(7)]
+    loader = QdrantVectorClient("qdrant_a")
+    assert await loader.upload_documents(documents) == 14
+    await (await loader._get_qdrant_client()).close()
+
+    # An aborted move leaves the site where it was, without a partial copy
+    router.begin_migration("imdb", "big")
+    assert await abort_migration("imdb", router, wait=0) == 0
+    assert router.read_shard("imdb").name == "main"
+
+    assert await migrate_site("imdb", "big", batch_size=3, router=router, wait=0) == 7
+    assert router.read_shard("imdb").name == "big" and router.migrations == {}
+
+    client = QdrantVectorClient("qdrant_a")
+    try:
+        qdrant = await client._get_qdrant_client()
+        assert (await qdrant.count("big_sites")).count == 7
+        assert (await qdrant.count("docs")).count == 7
+        moved = await client.search_by_url("https://example.com/imdb/3", collection_name="big_sites")
+        assert moved[2] == "Item 3"
+        assert await client.search_by_url("https://example.com/imdb/3") is None
+        results = await client.search_vectors_batch([[1.0, 0.3, 0.5, 0.0]], "imdb", num_results=3,
+                                                    collection_name="big_sites")
+        assert results[0][0].url == "https://example.com/imdb/3"
+    finally:
+        await (await client._get_qdrant_client()).close()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from core.baseHandler import NLWebHandler
+from core.utils import stage_graph
+from core.utils.stage_graph import StageGraph
+
+
+def recorder(order, name, delay=0.0, error=None, cancelled=None):
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(name)
+            raise
+        if error:
+            raise error
+        order.append(name)
+    return run
+
+
+async def test_stage_waits_for_its_dependencies():
+    order = []
+    graph = StageGraph("test")
+    graph.add("decon", recorder(order, "decon", delay=0.05))
+    graph.add("retrieve", recorder(order, "retrieve", delay=0.01))
+    graph.add("rank", recorder(order, "rank"), depends_on=["decon", "retrieve"])
+    await graph.run()
+    assert order == ["retrieve", "decon", "rank"]
+    assert graph.critical_path() == ["decon", "rank"]
+    assert graph.timings()["rank"]["start"] >= graph.timings()["decon"]["end"]
+
+
+async def test_failed_dependency_cancels_dependents():
+    order = []
+    graph = StageGraph("test")
+    graph.add("decon", recorder(order, "decon", error=RuntimeError("boom")))
+    graph.add("tools", recorder(order, "tools"), depends_on=["decon"])
+    graph.add("rank", recorder(order, "rank"), depends_on=["tools"])
+    await graph.run()
+    assert order == []
+    assert graph.stages["decon"].status == stage_graph.FAILED
+    assert graph.stages["tools"].status == stage_graph.CANCELLED
+    assert graph.stages["rank"].status == stage_graph.CANCELLED
+
+    with pytest.raises(RuntimeError):
+        graph = StageGraph("test")
+        graph.add("decon", recorder(order, "decon", error=RuntimeError("boom")))
+        await graph.run(raise_errors=True)
+
+
+async def test_stage_timeout_and_dependency_wait_timeout():
+    order = []
+    graph = StageGraph("test")
+    graph.add("slow", recorder(order, "slow", delay=1.0), timeout=0.05)
+    graph.add("decon", recorder(order, "decon", delay=1.0))
+    graph.add("rank", recorder(order, "rank"), depends_on=["decon"], wait_timeout=0.05)
+    await asyncio.wait_for(graph.run(), 2.0)
+    assert graph.stages["slow"].status == stage_graph.TIMED_OUT
+    assert graph.stages["rank"].status == stage_graph.SKIPPED
+    assert order == ["decon"]
+
+
+async def test_short_circuit_cancels_in_flight_work():
+    handler = NLWebHandler({"query": ["spicy noodles"], "site": ["example"]}, None)
+    order, cancelled = [], []
+
+    async def required_info():
+        await asyncio.sleep(0.02)
+        handler.query_done = True
+        order.append("required_info")
+
+    graph = StageGraph("prepare", stop_event=handler.query_done_event)
+    graph.add("RequiredInfo", required_info)
+    graph.add("ToolSelector", recorder(order, "tools", delay=1.0, cancelled=cancelled), abort_on_stop=True)
+    graph.add("FastTrackRanking", recorder(order, "rank", delay=1.0, cancelled=cancelled), abort_on_stop=True)
+    graph.add("Memory", recorder(order, "memory", delay=0.05))
+
+    await asyncio.wait_for(graph.run(), 0.5)
+    assert order == ["required_info", "memory"]
+    assert sorted(cancelled) == ["rank", "tools"]
+    assert graph.timings()["ToolSelector"]["status"] == stage_graph.CANCELLED
+    assert graph.timings()["ToolSelector"]["reason"] == "stopped"
+    assert graph.stages["ToolSelector"].duration < 0.5
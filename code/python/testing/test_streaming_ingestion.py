@@ -0,0 +1,118 @@
+import gzip
+import http.server
+import threading
+import tracemalloc
+import xml.etree.ElementTree as ET
+from functools import partial
+
+import pytest
+
+from core.utils.seen_urls import SeenUrls
+from data_loading import db_load, rss2schema
+from scraping.urlsFromSitemap import process_site_or_sitemap
+
+
+def feed(items):
+    episodes = "".join(
+        f"<item><title>Episode {i}</title><link>https://pod.example/{i % 1000}</link>"
+        f"<description>{'Talk. ' * 50}</description><enclosure url='https://pod.example/{i}.mp3' length='1'/>"
+        f"<itunes:duration>10:00</itunes:duration></item>" for i in range(items)
+    )
+    return ('<?xml version="1.0"?><rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"><channel>'
+            f'<title>Pod</title><link>https://pod.example</link><itunes:image href="https://pod.example/i.jpg"/>'
+            f'{episodes}</channel></rss>')
+
+
+def test_seen_urls_persist(tmp_path):
+    with SeenUrls(str(tmp_path / "seen.db")) as seen:
+        assert seen.add("https://a/1") and seen.add("https://a/2")
+        assert not seen.add("https://a/1")
+    with SeenUrls(str(tmp_path / "seen.db")) as seen:
+        assert "https://a/2" in seen and "https://a/3" not in seen and len(seen) == 2
+
+    temporary = SeenUrls()
+    temporary.add("https://a/1")
+    temporary.close()
+    assert not (tmp_path / temporary.path).exists()
+
+
+def test_feeds_stream_in_bounded_memory(tmp_path):
+    content = feed(3000)
+    (tmp_path / "feed.rss").write_text(content)
+    with gzip.open(tmp_path / "feed.rss.gz", "wt") as f:
+        f.write(content)
+
+    expected = rss2schema.parse_rss_2_0(ET.fromstring(content))
+    assert rss2schema.feed_to_schema(str(tmp_path / "feed.rss")) == expected
+    assert rss2schema.feed_to_schema(str(tmp_path / "feed.rss.gz")) == expected
+    assert expected[0]["partOf"]["image"]["url"] == "https://pod.example/i.jpg"
+
+    tracemalloc.start()
+    for _ in rss2schema.iter_feed_to_schema(str(tmp_path / "feed.rss")):
+        pass
+    streamed_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    ET.parse(str(tmp_path / "feed.rss"))
+    tree_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert streamed_peak * 10 < tree_peak
+
+    # Episodes are deduplicated by URL
+    with SeenUrls() as seen:
+        documents = list(db_load.iter_rss_documents(str(tmp_path / "feed.rss"), "pod", seen))
+    assert len(documents) == 1000
+
+
+async def test_feed_batches_upload_while_parsing(tmp_path, monkeypatch):
+    (tmp_path / "feed.rss").write_text(feed(250))
+    events = []
+
+    def documents():
+        for document in db_load.iter_rss_documents(str(tmp_path / "feed.rss"), "pod"):
+            events.append("parsed")
+            yield document
+
+    async def batch_get_embeddings(texts, provider=None, model=None):
+        return [[0.5] for _ in texts]
+
+    async def upload_documents(documents, **kwargs):
+        events.append(f"uploaded {len(documents)}")
+        return len(documents)
+
+    monkeypatch.setattr(db_load, "batch_get_embeddings", batch_get_embeddings)
+    monkeypatch.setattr(db_load, "upload_documents", upload_documents)
+    assert await db_load.embed_and_upload_documents(documents(), batch_size=100) == 250
+    assert [e for e in events if e != "parsed"] == ["uploaded 100", "uploaded 100", "uploaded 50"]
+    assert events.index("uploaded 100") == 100
+
+
+@pytest.fixture
+def sitemap_server(tmp_path):
+    urlset = '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>'
+    entries = lambda urls: "".join(f"<url><loc> https://site.example/{u} </loc></url>" for u in urls)
+    (tmp_path / "pages.xml").write_text(urlset.format(entries(["a", "b", "c"])))
+    with gzip.open(tmp_path / "more.xml.gz", "wt") as f:
+        f.write(urlset.format(entries(["c", "d", "a", "e"])))
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(tmp_path)))
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    (tmp_path / "sitemap_index.xml").write_text(
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<sitemap><loc>{base}/pages.xml</loc></sitemap><sitemap><loc>{base}/more.xml.gz</loc></sitemap>"
+        f"<sitemap><loc>{base}/sitemap_index.xml</loc></sitemap></sitemapindex>"
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield base
+    server.shutdown()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def test_sitemap_index_with_gzip_and_duplicates(sitemap_server, tmp_path):
+    output = tmp_path / "urls.txt"
+    process_site_or_sitemap(f"{sitemap_server}/sitemap_index.xml", str(output), verbose=False)
+    assert output.read_text().split() == [f"https://site.example/{u}" for u in "abcde"]
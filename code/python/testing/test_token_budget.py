@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from core import llm
+from core.config import CONFIG, LLMProviderConfig, ModelConfig
+from core.prompts import fill_prompt
+from core.utils import token_budget
+from core.utils.token_budget import count_tokens, register_tokenizer, truncate_to_tokens
+
+
+class WordTokenizer:
+    """One token per space-separated word."""
+
+    def encode(self, text):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def tokenizers(monkeypatch):
+    monkeypatch.setattr(CONFIG.nlweb, "tokenizer", "estimate")
+    monkeypatch.setattr(token_budget, "_registered", {})
+    monkeypatch.setattr(token_budget, "_by_model", {})
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        "stub": LLMProviderConfig(llm_type="stub", api_key="test", models=ModelConfig(high="words-high", low="chars-low"))
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "stub")
+    register_tokenizer("words", WordTokenizer())
+
+
+def test_estimate_without_tokenizer():
+    assert count_tokens("abcdefghi", "chars-low") == 3
+    assert truncate_to_tokens("a" * 100, 10, "chars-low") == "a" * 37 + "..."
+    assert truncate_to_tokens("a" * 100, 10, "chars-low", max_chars=50, marker="") == "a" * 50
+    assert truncate_to_tokens("short", 10, "chars-low") == "short"
+
+
+def test_registered_tokenizer_is_used_for_its_models():
+    text = " ".join(["word"] * 20)
+    assert count_tokens(text, "words-high") == 20
+    assert truncate_to_tokens(text, 5, "words-high") == "word word word word..."
+
+
+def test_fill_prompt_caps_variables_for_the_model_of_the_level(monkeypatch):
+    monkeypatch.setattr(CONFIG.nlweb, "prompt_token_budgets", {"item.description": 4})
+    description = " ".join(["tasty"] * 10)
+    prompt = "Rank {item.description} for {request.rawQuery}"
+    values = {"item.description": description, "request.rawQuery": "noodles " * 10}
+
+    assert fill_prompt(prompt, None, values, level="high") == \
+        f"Rank tasty tasty tasty... for {values['request.rawQuery']}"
+    assert fill_prompt(prompt, None, values, level="low") == \
+        f"Rank {description[:13]}... for {values['request.rawQuery']}"
+
+
+def test_fill_prompt_keeps_json_descriptions_valid(monkeypatch):
+    monkeypatch.setattr(CONFIG.nlweb, "prompt_token_budgets", {"item.description": 10})
+    item = {"@type": "Recipe", "name": "Noodles", "recipeIngredient": ["salt"] * 20}
+    description = json.dumps(item, separators=(",", ":"))
+
+    for level in ("low", "high"):
+        filled = fill_prompt("{item.description}", None, {"item.description": description}, level=level)
+        assert json.loads(filled)["name"] == "Noodles"
+        assert count_tokens(filled, llm.model_for_level(level)) <= 10
+
+
+async def test_token_usage_is_recorded_per_model(monkeypatch):
+    class Provider:
+        async def get_completion(self, prompt, schema, model=None, timeout=None, max_tokens=None):
+            return {"answer": "yes"}
+
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: Provider())
+    monkeypatch.setattr(llm, "_llm_tokens", {})
+    await llm.ask_llm("one two three", {"answer": "string"}, level="high")
+    await llm.ask_llm("one two three", {"answer": "string"}, level="high")
+    # Estimated from the character counts, without tokenizing
+    assert llm.llm_token_usage() == {"words-high": {"calls": 2, "tokens_in": 8, "tokens_out": 10}}
+
+
+def test_tokenizers_are_loaded_ahead_of_use():
+    token_budget.warm_up(["words-high", "chars-low"])
+    assert token_budget._by_model == {"words-high": token_budget._registered["words"], "chars-low": None}
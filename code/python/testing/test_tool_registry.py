@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from core import router
+from core.router import ToolConfigError, ToolRegistry
+
+
+def tools_xml(tmp_path, item_handler="methods.item_details.ItemDetailsHandler", name="tools.xml"):
+    path = tmp_path / name
+    path.write_text(f"""<root>
+  <Item>
+    <Tool name="search"><prompt>Search</prompt></Tool>
+    <Tool name="details"><prompt>Item details</prompt><handler>{item_handler}</handler></Tool>
+  </Item>
+  <Recipe>
+    <Tool name="details"><prompt>Recipe details</prompt><handler>methods.item_details.ItemDetailsHandler</handler></Tool>
+    <Tool name="substitution"><prompt>Substitute</prompt><handler>methods.recipe_substitution.SubstitutionHandler</handler></Tool>
+  </Recipe>
+</root>""")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def restore_registry(monkeypatch):
+    monkeypatch.setattr(router, "_registry", None)
+
+
+def test_tools_are_indexed_by_type_with_handlers_resolved(tmp_path):
+    from methods.item_details import ItemDetailsHandler
+    registry = ToolRegistry.load(tools_xml(tmp_path))
+
+    recipe_tools = {tool.name: tool for tool in registry.tools_for_type("Recipe")}
+    assert sorted(recipe_tools) == ["details", "search", "substitution"]
+    assert recipe_tools["details"].prompt == "Recipe details"
+    assert registry.tools_for_type("Unlisted") is registry.tools_for_type("Item")
+    assert registry.handler_for(recipe_tools["details"]) is ItemDetailsHandler
+    assert registry.handler_for(recipe_tools["search"]) is None
+
+
+def test_misconfigured_handler_fails_when_loading(tmp_path):
+    with pytest.raises(ToolConfigError, match="details"):
+        ToolRegistry.load(tools_xml(tmp_path, item_handler="methods.item_details.NoSuchHandler"))
+    with pytest.raises(ToolConfigError):
+        ToolRegistry.load(str(tmp_path / "missing.xml"))
+
+
+def test_reload_on_change_keeps_current_tools_if_new_file_is_broken(tmp_path):
+    path = tools_xml(tmp_path)
+    registry = router.load_tools(path)
+    assert not router.reload_tools_if_changed()
+
+    tools_xml(tmp_path, item_handler="methods.item_details.NoSuchHandler")
+    os.utime(path, (registry.mtime + 10, registry.mtime + 10))
+    assert not router.reload_tools_if_changed()
+    assert router.get_registry() is registry
+
+    tools_xml(tmp_path)
+    os.utime(path, (registry.mtime + 20, registry.mtime + 20))
+    assert router.reload_tools_if_changed()
+    assert router.get_registry() is not registry
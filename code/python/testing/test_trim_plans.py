@@ -0,0 +1,26 @@
+from core.utils import json_utils
+from core.utils.json_utils import trim_json, trim_json_hard
+
+RECIPE = {"@type": "Recipe", "name": "Noodles", "image": "https://example.com/1.jpg",
+          "recipeInstructions": ["Stir"], "author": {"name": "A. Cook"}}
+
+
+def test_trim_follows_the_rules_for_the_type():
+    assert trim_json(RECIPE) == {"@type": ["Recipe"], "name": ["Noodles"], "recipeInstructions": [["Stir"]]}
+    assert trim_json_hard(RECIPE) == {"@type": ["Recipe"], "name": ["Noodles"]}
+    movie = {"@type": ["Movie"], "name": "Odyssey", "actor": [{"name": "A"}], "genre": "SF"}
+    assert trim_json(movie) == {"@type": [["Movie"]], "name": ["Odyssey"], "genre": ["SF"]}
+
+    # Types without rules, and items without a type, are left as they are
+    product = {"@type": "Product", "name": "Shoe", "image": "https://example.com/shoe.jpg"}
+    assert trim_json(product) is product
+    assert trim_json('{"name": "untyped"}') == {"name": "untyped"}
+
+
+def test_plans_are_compiled_once_per_type():
+    json_utils._trim_plans.clear()
+    trim_json(RECIPE)
+    plan = json_utils._trim_plans[("Recipe", False)]
+    trim_json(dict(RECIPE, name="Soup"))
+    assert json_utils._trim_plans[("Recipe", False)] is plan
+    assert "image" in plan
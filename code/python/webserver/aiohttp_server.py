@@ -134,12 +134,36 @@ class AioHTTPServer:
         timeout = aiohttp.ClientTimeout(total=30)
         app['client_session'] = aiohttp.ClientSession(timeout=timeout)
         
+        # Probe endpoints ejected by their circuit breakers in the background
+        from core.config import CONFIG
+        from core.utils.circuit_breaker import start_probing
+        start_probing(min(CONFIG.retrieval_circuit_breaker.probe_interval,
+                          CONFIG.llm_circuit_breaker.probe_interval))
+        
+        # Open pooled LLM provider clients up front; they are reused for the server's lifetime
+        from core import llm
+        llm.warm_up_clients()
+        
+        # Pick up changes to tools.xml without a restart
+        from core import router
+        app['tools_watcher'] = asyncio.create_task(router.watch_tools())
+        
         logger.info(f"Server starting on {self.config['server']['host']}:{self.config['port']}")
         logger.info(f"Mode: {self.config['mode']}")
         logger.info(f"CORS enabled: {self.config['server']['enable_cors']}")
     
     async def _on_cleanup(self, app: web.Application):
         """Cleanup resources"""
+        from core.utils.circuit_breaker import stop_probing
+        await stop_probing()
+        
+        if app.get('tools_watcher'):
+            app['tools_watcher'].cancel()
+        
+        # Release pooled LLM provider connections
+        from core import llm
+        await llm.shutdown()
+        
         if app['client_session']:
             await app['client_session'].close()
     
@@ -12,6 +12,7 @@ import json
 import logging
 from typing import Dict, Any, Optional
 from aiohttp import web
+from core.utils.cancellation import CancellationToken
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +25,19 @@ class AioHttpStreamingWrapper:
     
     protocol_version = 'HTTP/1.1'
     
+    # How often to check whether the client has gone away
+    DISCONNECT_POLL_INTERVAL = 0.5
+    
     def __init__(self, request: web.Request, response: web.StreamResponse, query_params: Dict[str, Any]):
         self.request = request
         self.response = response
         self.query_params = query_params
         self.connection_alive = True
         self.heartbeat_task: Optional[asyncio.Task] = None
+        self.disconnect_watch_task: Optional[asyncio.Task] = None
+        
+        # Cancelled when the client disconnects, aborting the request's LLM and retrieval calls
+        self.cancellation_token = CancellationToken()
         
         # Extract compatibility attributes from request
         self.method = request.method
@@ -52,6 +60,27 @@ class AioHttpStreamingWrapper:
         except Exception as e:
             logger.debug(f"Heartbeat error: {e}")
     
+    async def watch_disconnect(self):
+        """Notice a client disconnect even while nothing is being written"""
+        try:
+            while self.connection_alive:
+                await asyncio.sleep(self.DISCONNECT_POLL_INTERVAL)
+                if self.connection_alive and self._transport_closed():
+                    self.mark_disconnected("client disconnected")
+        except asyncio.CancelledError:
+            pass
+    
+    def _transport_closed(self) -> bool:
+        transport = self.request.transport
+        return transport is None or transport.is_closing()
+    
+    def mark_disconnected(self, reason: str):
+        """The client has gone away: stop writing and cancel the work done for it"""
+        self.connection_alive = False
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+        self.cancellation_token.cancel(reason)
+    
     async def write_keepalive(self):
         """Send SSE keepalive comment"""
         if not self.connection_alive:
@@ -60,7 +89,7 @@ class AioHttpStreamingWrapper:
         try:
             await self.response.write(b": keepalive\n\n")
         except Exception:
-            self.connection_alive = False
+            self.mark_disconnected("keepalive failed")
     
     async def write_stream(self, message: Dict[str, Any], end_response: bool = False):
         """
@@ -75,8 +104,8 @@ class AioHttpStreamingWrapper:
             
         try:
             # Check if connection is still alive
-            if self.request.transport and self.request.transport.is_closing():
-                self.connection_alive = False
+            if self._transport_closed():
+                self.mark_disconnected("client disconnected")
                 return
             
             # Format as SSE
@@ -93,9 +122,7 @@ class AioHttpStreamingWrapper:
                     
         except Exception as e:
             logger.debug(f"Error writing to stream: {e}")
-            self.connection_alive = False
-            if self.heartbeat_task:
-                self.heartbeat_task.cancel()
+            self.mark_disconnected("write failed")
     
     async def sendMessage(self, message: Dict[str, Any]):
         """
@@ -127,15 +154,17 @@ class AioHttpStreamingWrapper:
             
         # Start heartbeat task
         self.heartbeat_task = asyncio.create_task(self.start_heartbeat())
+        self.disconnect_watch_task = asyncio.create_task(self.watch_disconnect())
     
     async def finish_response(self):
         """Clean up the response"""
-        if self.heartbeat_task:
-            self.heartbeat_task.cancel()
-            try:
-                await self.heartbeat_task
-            except asyncio.CancelledError:
-                pass
+        for task in (self.heartbeat_task, self.disconnect_watch_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
         if self.connection_alive and not self.response._eof_sent:
             try:
@@ -5,6 +5,7 @@ from .error_handler import error_middleware
 from .logging_middleware import logging_middleware
 from .auth import auth_middleware
 from .streaming import streaming_middleware
+from .admission import admission_middleware, setup_admission_control
 
 
 def setup_middleware(app):
@@ -15,7 +16,9 @@ def setup_middleware(app):
     app.middlewares.append(logging_middleware)
     app.middlewares.append(cors_middleware)
     app.middlewares.append(auth_middleware)
+    app.middlewares.append(admission_middleware)
     app.middlewares.append(streaming_middleware)
+    setup_admission_control(app)
 
 
 __all__ = [
@@ -24,5 +27,6 @@ __all__ = [
     'error_middleware',
     'logging_middleware',
     'auth_middleware',
+    'admission_middleware',
     'streaming_middleware'
 ]
\ No newline at end of file
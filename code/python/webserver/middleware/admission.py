@@ -0,0 +1,132 @@
+"""Admission control middleware for aiohttp server
+
+Each /ask request fans out into dozens of LLM calls, so under overload it is better to
+turn some requests away quickly (503 with Retry-After) or serve them with a cheaper,
+degraded pipeline than to let latency collapse for everyone.
+
+Load is judged from the number of requests in flight, the number of LLM calls in flight
+(the LLM queue depth) and the recent p95 latency of admitted requests. Above the
+degrade thresholds requests are admitted but run with a cheaper execution profile
+(see execution_profiles in config_nlweb.yaml); above the hard limits
+they are rejected. Latency only ever triggers degradation: rejected requests produce no
+latency samples, so a latency-based rejection would never clear.
+"""
+
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+from core.utils.latency import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+ADMIT = "admit"
+DEGRADE = "degrade"
+REJECT = "reject"
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'paths': ['/ask'],
+    'max_in_flight': 64,  # Reject above this many concurrent requests
+    'degrade_in_flight': 32,  # Degrade above this many
+    'max_llm_queue_depth': 2000,  # Reject above this many LLM calls in flight
+    'degrade_llm_queue_depth': 800,
+    'degrade_p95': 20.0,  # Degrade while the recent p95 request latency (seconds) is above this
+    'retry_after': 2,  # Seconds, sent in the Retry-After header of 503 responses
+    'degrade_profile': 'economy',  # Execution profile (config_nlweb.yaml) for degraded requests
+    'latency_window': 200,  # Number of recent requests the p95 is computed over
+}
+
+LATENCY_KEY = "request"
+
+
+def _llm_queue_depth() -> int:
+    from core.llm import llm_queue_depth
+    return llm_queue_depth()
+
+
+class AdmissionController:
+    """Decides whether to admit, degrade or reject each request, and tracks the load it causes."""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, queue_depth=_llm_queue_depth):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings or {})
+        self.in_flight = 0
+        self.latency = LatencyTracker(window_size=self.settings['latency_window'])
+        self.queue_depth = queue_depth
+        self.counts = {ADMIT: 0, DEGRADE: 0, REJECT: 0}
+
+    def applies_to(self, path: str) -> bool:
+        return self.settings['enabled'] and path in self.settings['paths']
+
+    def decide(self) -> Tuple[str, str]:
+        """
+        Returns:
+            The decision (ADMIT, DEGRADE or REJECT) and the reason for it
+        """
+        settings = self.settings
+        queue_depth = self.queue_depth()
+        if self.in_flight >= settings['max_in_flight']:
+            return REJECT, f"{self.in_flight} requests in flight"
+        if queue_depth >= settings['max_llm_queue_depth']:
+            return REJECT, f"{queue_depth} LLM calls in flight"
+        if self.in_flight >= settings['degrade_in_flight']:
+            return DEGRADE, f"{self.in_flight} requests in flight"
+        if queue_depth >= settings['degrade_llm_queue_depth']:
+            return DEGRADE, f"{queue_depth} LLM calls in flight"
+        p95 = self.latency.percentile(LATENCY_KEY, 95)
+        if p95 is not None and p95 >= settings['degrade_p95']:
+            return DEGRADE, f"p95 latency {p95:.1f}s"
+        return ADMIT, ""
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'llm_queue_depth': self.queue_depth(),
+            'p95': self.latency.percentile(LATENCY_KEY, 95),
+            'decisions': dict(self.counts),
+        }
+
+
+def setup_admission_control(app: web.Application):
+    """Create the app's admission controller from the server config"""
+    settings = app['config'].get('server', {}).get('admission_control') or {}
+    app['admission_controller'] = AdmissionController(settings)
+
+
+@web.middleware
+async def admission_middleware(request: web.Request, handler):
+    """Reject or degrade requests to expensive endpoints when the server is overloaded"""
+
+    controller: Optional[AdmissionController] = request.app.get('admission_controller')
+    if controller is None or not controller.applies_to(request.path):
+        return await handler(request)
+
+    decision, reason = controller.decide()
+    controller.counts[decision] += 1
+
+    if decision == REJECT:
+        logger.warning(f"Rejecting {request.path}: {reason}")
+        return web.json_response(
+            {
+                'error': 'Server is overloaded, please retry later',
+                'reason': reason,
+            },
+            status=503,
+            headers={'Retry-After': str(controller.settings['retry_after'])}
+        )
+
+    if decision == DEGRADE:
+        logger.info(f"Degrading {request.path} to the {controller.settings['degrade_profile']} profile: {reason}")
+        request['admission_profile'] = controller.settings['degrade_profile']
+    request['admission'] = decision
+
+    controller.in_flight += 1
+    start_time = time.time()
+    try:
+        return await handler(request)
+    finally:
+        controller.in_flight -= 1
+        controller.latency.record(LATENCY_KEY, time.time() - start_time)
@@ -1,6 +1,7 @@
 """Core API routes for aiohttp server"""
 
 from aiohttp import web
+import asyncio
 import logging
 import json
 from typing import Dict, Any
@@ -9,6 +10,7 @@ from methods.generate_answer import GenerateAnswer
 from webserver.aiohttp_streaming_wrapper import AioHttpStreamingWrapper
 from core.retriever import get_vector_db_client
 from core.utils.utils import get_param
+from core.utils.cancellation import cancellation_scope
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,10 @@ async def ask_handler(request: web.Request) -> web.Response:
         except Exception as e:
             logger.warning(f"Failed to parse POST body: {e}")
     
+    # The admission controller picks a cheaper execution profile when the server is overloaded
+    if request.get('admission') == 'degrade':
+        query_params['profile'] = request['admission_profile']
+    
     # Check if SSE streaming is requested
     is_sse = request.get('is_sse', False)
     streaming = get_param(query_params, "streaming", str, "True")
@@ -77,18 +83,26 @@ async def handle_streaming_ask(request: web.Request, query_params: Dict[str, Any
         # Determine which handler to use based on generate_mode
         generate_mode = query_params.get('generate_mode', 'none')
         
-        if generate_mode == 'generate':
-            handler = GenerateAnswer(query_params, wrapper)
-            await handler.runQuery()
-        else:
-            # Use base NLWebHandler for other modes
-            from core.baseHandler import NLWebHandler
-            handler = NLWebHandler(query_params, wrapper)
-            await handler.runQuery()
+        # LLM, embedding and retrieval calls made for this request are aborted if the client disconnects
+        with cancellation_scope(wrapper.cancellation_token):
+            if generate_mode == 'generate':
+                handler = GenerateAnswer(query_params, wrapper)
+                await handler.runQuery()
+            else:
+                # Use base NLWebHandler for other modes
+                from core.baseHandler import NLWebHandler
+                handler = NLWebHandler(query_params, wrapper)
+                await handler.runQuery()
         
         # Send completion message
         await wrapper.write_stream({"message_type": "complete"})
         
+    except asyncio.CancelledError:
+        # Work aborted by the request's cancellation token (a RequestCancelledError, or the
+        # plain CancelledError it becomes when it leaves a task)
+        if not wrapper.cancellation_token.cancelled:
+            raise
+        logger.info(f"Client disconnected, abandoned request: {wrapper.cancellation_token.reason}")
     except Exception as e:
         logger.error(f"Error in streaming ask handler: {e}", exc_info=True)
         await wrapper.send_error_response(500, str(e))
@@ -22,12 +22,17 @@ async def health_check(request: web.Request) -> web.Response:
     
     uptime = time.time() - SERVER_START_TIME
     
+    # Calls that were aborted or never made because their client had disconnected
+    from core.utils.cancellation import wasted_work_avoided
+    
     return web.json_response({
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'uptime_seconds': round(uptime, 2),
         'version': '2.0.0',  # TODO: Get from config or package
-        'mode': request.app['config'].get('mode', 'unknown')
+        'mode': request.app['config'].get('mode', 'unknown'),
+        'wasted_work_avoided': wasted_work_avoided(),
+        'admission': request.app['admission_controller'].snapshot() if 'admission_controller' in request.app else None
     })
 
 
@@ -52,6 +57,16 @@ async def readiness_check(request: web.Request) -> web.Response:
         checks['http_client'] = False
         all_ready = False
     
+    # Circuit breaker state for retrieval endpoints and LLM providers. The server is
+    # not ready when every known endpoint of a kind has been ejected.
+    from core.utils.circuit_breaker import breaker_states
+    circuit_breakers = breaker_states()
+    checks['circuit_breakers'] = circuit_breakers
+    for group, endpoints in circuit_breakers.items():
+        if endpoints and all(b['state'] == 'open' for b in endpoints.values()):
+            checks[f'{group}_available'] = False
+            all_ready = False
+    
     # TODO: Add more checks as needed
     # - Database connectivity
     # - External API availability
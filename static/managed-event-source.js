@@ -96,6 +96,8 @@ export class ManagedEventSource {
       chatInterface.currentItems = [];
       chatInterface.thisRoundRemembered = null;
       chatInterface.thisRoundDecontextQuery = null;
+      chatInterface.thisRoundSummaryText = '';
+      chatInterface.thisRoundAnswerText = '';
       chatInterface.debugMessages = [];  // Reset debug messages for new response
       chatInterface.pendingResultBatches = [];  // Collect result batches
     }
@@ -235,10 +237,27 @@ export class ManagedEventSource {
           chatInterface.resortResults();
         }
         break;
+      case "summary_delta":
+        // Partial summary while it is being generated; replaced by the final "summary" message
+        if (typeof data.delta === 'string') {
+          chatInterface.noResponse = false;
+          chatInterface.thisRoundSummaryText = (chatInterface.thisRoundSummaryText || '') + data.delta;
+          chatInterface.thisRoundSummary = chatInterface.createIntermediateMessageHtml(chatInterface.thisRoundSummaryText);
+          chatInterface.resortResults();
+        }
+        break;
       case "nlws":
         chatInterface.noResponse = false;
         this.handleNLWS(data, chatInterface);
         break;
+      case "nlws_delta":
+        // Partial synthesized answer; replaced by the final "nlws" message
+        if (typeof data.delta === 'string') {
+          chatInterface.noResponse = false;
+          chatInterface.thisRoundAnswerText = (chatInterface.thisRoundAnswerText || '') + data.delta;
+          this.handleNLWS({answer: chatInterface.thisRoundAnswerText, items: []}, chatInterface);
+        }
+        break;
       case "compare_items":
         chatInterface.noResponse = false;
         handleCompareItems(data, chatInterface);